@@ -0,0 +1,849 @@
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from extraction_cache import ExtractionCache, hash_file
+from extraction_schema import extraction_model, to_full_bill
+from extractor import (
+    PDF_EXTRACTION_MODEL,
+    PNG_EXTRACTION_MODEL,
+    build_png_extraction_prompt,
+    parse_png_extraction,
+    save_extraction,
+    save_standard,
+)
+from jsonl_sink import JsonlSink
+from local_provider_detector import LocalProviderDetector
+from logging_setup import setup_logging
+from mapper_functions.llm_transformer import transform_to_standard_async
+from mapper_functions.rule_mapper import standardize_bill_async
+from metrics import provider_scope, stage_timer, start_http_server, write_textfile
+from openai import AsyncOpenAI
+from prompt_cache import compact_schema_json, load_prompt_text
+from provider_router import (
+    PDF_DETECTION_MODEL,
+    PNG_DETECTION_MODEL,
+    build_detection_prompt,
+    encode_png_to_base64,
+    get_model_for_provider,
+    get_prompt_path_for_provider,
+    normalize_detected_provider,
+)
+from request_scheduler import SCHEDULER, estimate_tokens, parse_rate_limit
+from results_store import ResultsStore
+from single_call import (
+    build_detect_and_extract_prompt,
+    get_detect_and_extract_text_format,
+    parse_detect_and_extract,
+    single_call_candidates,
+)
+from standard_template.standard_model import StandardUtilityBill
+
+
+class AsyncExtractor:
+    """
+    An asyncio version of `Extractor` built on `AsyncOpenAI`.
+
+    Every network step (upload, provider detection, extraction and the standard
+    transform) is awaited instead of blocking a thread, so a single event loop
+    can keep hundreds of bills in flight. A semaphore bounds how many bills are
+    inside the pipeline at once.
+
+    Post-processing, validation and the processed/unprocessed file layout are
+    shared with `Extractor`, so both produce identical output folders.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAI | None = None,
+        project_root: str | Path | None = None,
+        max_concurrency: int = 100,
+        cache: ExtractionCache | None = None,
+        local_detector: LocalProviderDetector | None = None,
+        single_call: bool = False,
+        results_store: ResultsStore | None = None,
+        jsonl_sink: JsonlSink | None = None,
+    ):
+        """
+        Initialize the AsyncExtractor with an AsyncOpenAI client and logging setup.
+
+        Args:
+            client: AsyncOpenAI client instance. If None, creates a new one.
+            project_root: Path to the project root directory. Used to set up
+                          the logs directory at <project_root>/logs.
+            max_concurrency: Maximum number of bills processed at the same time.
+            cache: Optional extraction cache, see `Extractor`.
+            local_detector: Optional LLM-free provider detector, see `Extractor`.
+            single_call: Merge detection into the PDF extraction call, see `Extractor`.
+            results_store: Optional results store, see `Extractor`.
+            jsonl_sink: Optional JSONL sink, see `Extractor`.
+        """
+
+        self.client = client or AsyncOpenAI(max_retries=0)
+        self.cache = cache
+        self.local_detector = local_detector
+        self.single_call = single_call
+        self.results_store = results_store
+        self.jsonl_sink = jsonl_sink
+
+        if project_root is None:
+            project_root = Path(__file__).resolve().parents[2]
+        else:
+            project_root = Path(project_root)
+
+        log_dir = project_root / "logs"
+        self.logger = setup_logging(log_dir)
+
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def upload_pdf(self, file_path: str | Path) -> str:
+        """
+        Upload a PDF file to OpenAI's file storage.
+
+        Args:
+            file_path: Path to the PDF file to upload.
+
+        Returns:
+            The OpenAI file ID of the uploaded PDF.
+        """
+
+        file_path = Path(file_path)
+        content = await asyncio.to_thread(file_path.read_bytes)
+        with stage_timer("upload"):
+            uploaded = await SCHEDULER.call_async(
+                None,
+                0,
+                self.client.files.create,
+                file=(file_path.name, content),
+                purpose="user_data",
+            )
+        return uploaded.id
+
+    async def detect_provider_from_file_id(
+        self, file_id: str, file_bytes: int = 0
+    ) -> str:
+        """
+        Ask the LLM to read the uploaded bill PDF and return the provider name.
+
+        Args:
+            file_id: The OpenAI file ID of the uploaded PDF.
+            file_bytes: Size of the PDF, used to budget the request's tokens.
+
+        Returns:
+            The normalized provider name.
+        """
+
+        prompt = build_detection_prompt()
+        with stage_timer("detect", model=PDF_DETECTION_MODEL):
+            response = await SCHEDULER.call_async(
+                PDF_DETECTION_MODEL,
+                estimate_tokens(prompt, file_bytes=file_bytes, max_output_tokens=100),
+                self.client.responses.create,
+                model=PDF_DETECTION_MODEL,
+                input=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "input_file", "file_id": file_id},
+                            {"type": "input_text", "text": prompt},
+                        ],
+                    }
+                ],
+            )
+
+        provider_text = response.output[0].content[0].text
+        if hasattr(provider_text, "value"):
+            provider_text = provider_text.value
+
+        return normalize_detected_provider(str(provider_text))
+
+    async def detect_provider_from_png(self, png_path: str | Path) -> str:
+        """
+        Ask the vision model to read the bill PNG image and return the provider name.
+
+        Args:
+            png_path: Path to the PNG file.
+
+        Returns:
+            The normalized provider name.
+        """
+
+        base64_image = await asyncio.to_thread(encode_png_to_base64, png_path)
+        prompt = build_detection_prompt()
+
+        with stage_timer("detect", model=PNG_DETECTION_MODEL):
+            response = await SCHEDULER.call_async(
+                PNG_DETECTION_MODEL,
+                estimate_tokens(prompt, images=1, max_output_tokens=100),
+                self.client.chat.completions.create,
+                model=PNG_DETECTION_MODEL,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:image/png;base64,{base64_image}",
+                                },
+                            },
+                            {"type": "text", "text": prompt},
+                        ],
+                    }
+                ],
+                max_tokens=100,
+            )
+
+        return normalize_detected_provider(response.choices[0].message.content)
+
+    async def extract_json_from_pdf(
+        self, file_id: str, prompt: str, model_class, file_bytes: int = 0
+    ) -> dict:
+        """
+        Extract structured JSON data from an uploaded PDF using structured outputs.
+
+        Args:
+            file_id: The OpenAI file ID of the uploaded PDF.
+            prompt: The prompt text instructing the LLM on what to extract.
+            model_class: The Pydantic model class to use for structured output,
+                         see `Extractor.extract_json_from_pdf`.
+            file_bytes: Size of the PDF, used to budget the request's tokens.
+
+        Returns:
+            A dictionary containing the extracted utility bill data.
+        """
+
+        extraction_class = extraction_model(model_class)
+        with stage_timer("extract", model=PDF_EXTRACTION_MODEL):
+            response = await SCHEDULER.call_async(
+                PDF_EXTRACTION_MODEL,
+                estimate_tokens(
+                    prompt, compact_schema_json(extraction_class), file_bytes=file_bytes
+                ),
+                self.client.responses.parse,
+                model=PDF_EXTRACTION_MODEL,
+                input=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "input_file", "file_id": file_id},
+                            {"type": "input_text", "text": prompt},
+                        ],
+                    }
+                ],
+                text_format=extraction_class,
+            )
+        return to_full_bill(model_class, response.output_parsed)
+
+    async def detect_and_extract_from_pdf(
+        self, file_id: str, candidates: tuple[str, ...], file_bytes: int = 0
+    ) -> tuple[str | None, dict | None]:
+        """
+        Detect the provider and extract its JSON in a single structured-output call.
+
+        See `Extractor.detect_and_extract_from_pdf`.
+
+        Returns:
+            (provider_name, extracted), or (None, None) if the bill is none of
+            the candidates.
+        """
+
+        prompt = build_detect_and_extract_prompt(candidates)
+        text_format = get_detect_and_extract_text_format(candidates)
+        with stage_timer("extract", model=PDF_EXTRACTION_MODEL):
+            response = await SCHEDULER.call_async(
+                PDF_EXTRACTION_MODEL,
+                estimate_tokens(prompt, json.dumps(text_format), file_bytes=file_bytes),
+                self.client.responses.create,
+                model=PDF_EXTRACTION_MODEL,
+                input=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "input_file", "file_id": file_id},
+                            {"type": "input_text", "text": prompt},
+                        ],
+                    }
+                ],
+                text={"format": text_format},
+            )
+        return parse_detect_and_extract(response.output_text, candidates)
+
+    async def extract_json_from_png(
+        self, png_path: str | Path, prompt: str, model_class
+    ) -> dict:
+        """
+        Extract structured JSON data from a PNG file using the vision API.
+
+        Args:
+            png_path: Path to the PNG file.
+            prompt: The prompt text instructing the LLM on what to extract.
+            model_class: The Pydantic model class used to validate the response.
+
+        Returns:
+            A dictionary containing the extracted utility bill data.
+        """
+
+        base64_image = await asyncio.to_thread(encode_png_to_base64, png_path)
+        full_prompt = build_png_extraction_prompt(prompt, model_class)
+
+        with stage_timer("extract", model=PNG_EXTRACTION_MODEL):
+            response = await SCHEDULER.call_async(
+                PNG_EXTRACTION_MODEL,
+                estimate_tokens(full_prompt, images=1, max_output_tokens=4000),
+                self.client.chat.completions.create,
+                model=PNG_EXTRACTION_MODEL,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:image/png;base64,{base64_image}",
+                                },
+                            },
+                            {
+                                "type": "text",
+                                "text": full_prompt,
+                            },
+                        ],
+                    }
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=4000,
+            )
+
+        return parse_png_extraction(response.choices[0].message.content, model_class)
+
+    async def transform_to_standard(
+        self, provider_json: dict, provider_name: str
+    ) -> StandardUtilityBill:
+        """
+        Use the LLM to transform provider-specific JSON to the standard format.
+
+        Args:
+            provider_json: The provider-specific JSON structure.
+            provider_name: Name of the provider.
+
+        Returns:
+            StandardUtilityBill object matching the uniform template.
+        """
+
+        return await transform_to_standard_async(
+            provider_json, provider_name, self.client
+        )
+
+    def _log_scheduler_stats(self) -> None:
+        """Log per-model request counts and the adaptive concurrency reached."""
+
+        for model, stats in SCHEDULER.stats().items():
+            self.logger.info(
+                f"{model}: {stats['requests']} requests, {stats['tokens']} tokens, "
+                f"{stats['retries']} retries, concurrency "
+                f"{stats.get('concurrency_current', '-')}/"
+                f"{stats.get('concurrency_target', '-')} (current/target)"
+            )
+
+    async def _detect_locally(
+        self, file_path: Path
+    ) -> tuple[str | None, tuple[str, ...]]:
+        """
+        Run the local provider detector off the event loop, if one is configured.
+
+        Returns:
+            (provider_name, candidates), see `Extractor._detect_locally`.
+        """
+
+        if self.local_detector is None:
+            return None, ()
+
+        with stage_timer("detect", model="local"):
+            if file_path.suffix.lower() == ".png":
+                detection = await asyncio.to_thread(
+                    self.local_detector.detect_png, file_path
+                )
+            else:
+                detection = await asyncio.to_thread(
+                    self.local_detector.detect_pdf, file_path
+                )
+
+        if detection.provider_name is None:
+            if not self.single_call:
+                return None, ()
+            return None, single_call_candidates(detection.scores)
+
+        self.logger.info(
+            f"Detected provider locally: {detection.provider_name} "
+            f"(confidence {detection.confidence:.2f})"
+        )
+        return detection.provider_name, ()
+
+    async def _cache_lookup(
+        self, file_path: Path, model: str
+    ) -> tuple[str | None, dict | None]:
+        """
+        Look up a bill in the extraction cache, if one is configured.
+
+        Returns:
+            (cache_key, cached_entry), see `Extractor._cache_lookup`.
+        """
+
+        if self.cache is None:
+            return None, None
+
+        file_sha256 = await asyncio.to_thread(hash_file, file_path)
+        cache_key = self.cache.make_key(file_sha256, model)
+        return cache_key, await asyncio.to_thread(self.cache.get, cache_key)
+
+    async def _transform_and_save(
+        self,
+        provider_json: dict,
+        provider_name: str,
+        project_root: Path,
+        stem: str,
+        cache_key: str | None = None,
+        cached_standard: dict | None = None,
+    ) -> Path | None:
+        """
+        Transform a saved bill to standard format and write it to json_results.
+
+        The bill is the post-processed JSON returned by `save_extraction`, so
+        the saved file is not read back.
+
+        Returns:
+            The path of the standard JSON, or None if the transform failed.
+        """
+
+        try:
+            if cached_standard is not None:
+                standard_json_path = await asyncio.to_thread(
+                    save_standard,
+                    project_root,
+                    stem,
+                    cached_standard,
+                    results_store=self.results_store,
+                    jsonl_sink=self.jsonl_sink,
+                )
+                self.logger.info(
+                    f" Standard JSON restored from cache to {standard_json_path}"
+                )
+                return standard_json_path
+
+            self.logger.info("Transforming to standard format...")
+            # Rule mapping, or the LLM transformer for unmapped providers
+            standard_bill = await standardize_bill_async(
+                provider_json, provider_name, self.client
+            )
+            standard_json_path = await asyncio.to_thread(
+                save_standard,
+                project_root,
+                stem,
+                standard_bill,
+                self.cache,
+                cache_key,
+                self.results_store,
+                self.jsonl_sink,
+            )
+
+            self.logger.info(f" Standard JSON saved to {standard_json_path}")
+            return standard_json_path
+
+        except Exception as transform_error:
+            self.logger.error(
+                f"Error transforming to standard format: {repr(transform_error)}"
+            )
+            return None
+
+    async def _upload_and_extract_pdf(
+        self, pdf_path: Path, project_root: Path
+    ) -> tuple[str, dict]:
+        """
+        Upload a PDF, detect its provider and extract the raw JSON.
+
+        Returns:
+            (provider_name, extracted) before post-processing.
+        """
+
+        provider_name, candidates = await self._detect_locally(pdf_path)
+
+        file_id = await self.upload_pdf(pdf_path)
+        file_bytes = pdf_path.stat().st_size
+
+        if provider_name is None and candidates:
+            provider_name, extracted = await self.detect_and_extract_from_pdf(
+                file_id, candidates, file_bytes
+            )
+            if provider_name is not None:
+                self.logger.info(
+                    f"Detected provider: {provider_name} ({pdf_path.name})"
+                )
+                return provider_name, extracted
+            # None of the candidates; fall back to the two-step path
+
+        if provider_name is None:
+            provider_name = await self.detect_provider_from_file_id(file_id, file_bytes)
+        self.logger.info(f"Detected provider: {provider_name} ({pdf_path.name})")
+
+        prompt_path = get_prompt_path_for_provider(project_root, provider_name)
+        prompt_text = load_prompt_text(prompt_path)
+        model_class = get_model_for_provider(provider_name)
+
+        with provider_scope(provider_name):
+            extracted = await self.extract_json_from_pdf(
+                file_id, prompt_text, model_class, file_bytes=file_bytes
+            )
+
+        return provider_name, extracted
+
+    async def process_pdf(self, pdf_path: str | Path, project_root: str | Path) -> dict:
+        """
+        Run the full pipeline for a single PDF from the inbox.
+
+        Args:
+            pdf_path: Path to the PDF file in the inbox.
+            project_root: Path to the project root directory.
+
+        Returns:
+            The same per-file result dictionary as `Extractor.process_pdf`.
+        """
+
+        pdf_path = Path(pdf_path)
+        project_root = Path(project_root)
+        file_result = {"pdf": str(pdf_path), "ok": False}
+
+        async with self._semaphore:
+            self.logger.info(f"Processing PDF: {pdf_path.name}")
+            try:
+                cache_key, cached = await self._cache_lookup(
+                    pdf_path, PDF_EXTRACTION_MODEL
+                )
+
+                if cached is not None:
+                    provider_name = cached["provider_name"]
+                    extracted = cached["extracted"]
+                    self.logger.info(f"Cache hit: {pdf_path.name} ({provider_name})")
+                else:
+                    provider_name, extracted = await self._upload_and_extract_pdf(
+                        pdf_path, project_root
+                    )
+
+                    if self.cache is not None:
+                        await asyncio.to_thread(
+                            self.cache.put, cache_key, provider_name, extracted
+                        )
+
+                saved = await asyncio.to_thread(
+                    save_extraction,
+                    pdf_path,
+                    project_root,
+                    provider_name,
+                    extracted,
+                    self.logger,
+                    results_store=self.results_store,
+                    jsonl_sink=self.jsonl_sink,
+                )
+
+                standard_json_path = None
+                if saved["validation_passed"]:
+                    standard_json_path = await self._transform_and_save(
+                        saved["extracted"],
+                        provider_name,
+                        project_root,
+                        pdf_path.stem,
+                        cache_key=cache_key,
+                        cached_standard=cached["standard"] if cached else None,
+                    )
+
+                file_result.update(
+                    {
+                        "ok": True,
+                        "json_path": str(saved["json_path"]),
+                        "moved_pdf_path": str(saved["moved_path"]),
+                        "validation_passed": saved["validation_passed"],
+                        "standard_json_path": (
+                            str(standard_json_path) if standard_json_path else None
+                        ),
+                    }
+                )
+
+                self.logger.info(f"Finished: {pdf_path.name} -> {saved['folder_type']}")
+
+            except Exception as e:
+                self.logger.error(
+                    f"Error processing {pdf_path.name}: {repr(e)}", exc_info=True
+                )
+                file_result["error"] = repr(e)
+
+        return file_result
+
+    async def process_png(self, png_path: str | Path, project_root: str | Path) -> dict:
+        """
+        Run the full pipeline for a single PNG from the inbox.
+
+        Args:
+            png_path: Path to the PNG file in the inbox.
+            project_root: Path to the project root directory.
+
+        Returns:
+            The same per-file result dictionary as `Extractor.process_png`.
+        """
+
+        png_path = Path(png_path)
+        project_root = Path(project_root)
+        file_result = {"png": str(png_path), "ok": False}
+
+        async with self._semaphore:
+            self.logger.info(f"Processing PNG: {png_path.name}")
+            try:
+                cache_key, cached = await self._cache_lookup(
+                    png_path, PNG_EXTRACTION_MODEL
+                )
+
+                if cached is not None:
+                    provider_name = cached["provider_name"]
+                    extracted = cached["extracted"]
+                    self.logger.info(f"Cache hit: {png_path.name} ({provider_name})")
+                else:
+                    provider_name, _ = await self._detect_locally(png_path)
+                    if provider_name is None:
+                        provider_name = await self.detect_provider_from_png(png_path)
+                    self.logger.info(
+                        f"Detected provider: {provider_name} ({png_path.name})"
+                    )
+
+                    prompt_path = get_prompt_path_for_provider(
+                        project_root, provider_name
+                    )
+                    prompt_text = load_prompt_text(prompt_path)
+                    model_class = get_model_for_provider(provider_name)
+
+                    with provider_scope(provider_name):
+                        extracted = await self.extract_json_from_png(
+                            png_path, prompt_text, model_class
+                        )
+
+                    if self.cache is not None:
+                        await asyncio.to_thread(
+                            self.cache.put, cache_key, provider_name, extracted
+                        )
+
+                saved = await asyncio.to_thread(
+                    save_extraction,
+                    png_path,
+                    project_root,
+                    provider_name,
+                    extracted,
+                    self.logger,
+                    results_store=self.results_store,
+                    jsonl_sink=self.jsonl_sink,
+                )
+
+                standard_json_path = None
+                if saved["validation_passed"]:
+                    standard_json_path = await self._transform_and_save(
+                        saved["extracted"],
+                        provider_name,
+                        project_root,
+                        png_path.stem,
+                        cache_key=cache_key,
+                        cached_standard=cached["standard"] if cached else None,
+                    )
+
+                file_result.update(
+                    {
+                        "ok": True,
+                        "json_path": str(saved["json_path"]),
+                        "moved_png_path": str(saved["moved_path"]),
+                        "validation_passed": saved["validation_passed"],
+                        "standard_json_path": (
+                            str(standard_json_path) if standard_json_path else None
+                        ),
+                    }
+                )
+
+                self.logger.info(f"Finished: {png_path.name} -> {saved['folder_type']}")
+
+            except Exception as e:
+                self.logger.error(
+                    f"Error processing {png_path.name}: {repr(e)}", exc_info=True
+                )
+                file_result["error"] = repr(e)
+
+        return file_result
+
+    def _prepare_dirs(self, project_root: Path, media: str) -> None:
+        for sub in ("processed", "unprocessed"):
+            (project_root / "src" / "data" / sub / "json").mkdir(
+                parents=True, exist_ok=True
+            )
+            (project_root / "src" / "data" / sub / media).mkdir(
+                parents=True, exist_ok=True
+            )
+
+    async def process_inbox_pdfs(self, project_root: str | Path) -> list[dict]:
+        """
+        Process all PDF files in the inbox directory concurrently.
+
+        Args:
+            project_root: Path to the project root directory.
+
+        Returns:
+            One result dictionary per PDF, in sorted order by filename.
+        """
+
+        project_root = Path(project_root)
+        self._prepare_dirs(project_root, "pdf")
+
+        pdf_paths = sorted((project_root / "src" / "data" / "inbox").glob("*.pdf"))
+        self.logger.info(f"Found {len(pdf_paths)} PDF(s) in inbox. Starting extraction")
+
+        # gather preserves the order of its arguments
+        results = await asyncio.gather(
+            *(self.process_pdf(pdf_path, project_root) for pdf_path in pdf_paths)
+        )
+
+        self.logger.info("All PDFs processed.")
+        self._log_scheduler_stats()
+        return list(results)
+
+    async def process_inbox_pngs(self, project_root: str | Path) -> list[dict]:
+        """
+        Process all PNG files in the inbox directory concurrently.
+
+        Args:
+            project_root: Path to the project root directory.
+
+        Returns:
+            One result dictionary per PNG, in sorted order by filename.
+        """
+
+        project_root = Path(project_root)
+        self._prepare_dirs(project_root, "png")
+
+        png_paths = sorted((project_root / "src" / "data" / "inbox").glob("*.png"))
+        self.logger.info(f"Found {len(png_paths)} PNG(s) in inbox. Starting extraction")
+
+        results = await asyncio.gather(
+            *(self.process_png(png_path, project_root) for png_path in png_paths)
+        )
+
+        self.logger.info("All PNGs processed.")
+        self._log_scheduler_stats()
+        return list(results)
+
+
+async def main(
+    max_concurrency: int,
+    use_cache: bool = True,
+    local_detection: bool = True,
+    single_call: bool = False,
+    results_db: bool = False,
+    jsonl: str | None = None,
+) -> dict:
+    project_root = Path(__file__).resolve().parents[2]
+    cache = ExtractionCache.for_project(project_root) if use_cache else None
+    local_detector = (
+        LocalProviderDetector.from_project(project_root) if local_detection else None
+    )
+    extractor = AsyncExtractor(
+        max_concurrency=max_concurrency,
+        cache=cache,
+        local_detector=local_detector,
+        single_call=single_call,
+        results_store=ResultsStore.for_project(project_root) if results_db else None,
+        jsonl_sink=(
+            JsonlSink.for_project(
+                project_root, compression="zstd" if jsonl == "zstd" else None
+            )
+            if jsonl
+            else None
+        ),
+    )
+
+    pdf_results = await extractor.process_inbox_pdfs(project_root)
+    png_results = await extractor.process_inbox_pngs(project_root)
+    if extractor.jsonl_sink is not None:
+        extractor.jsonl_sink.close()
+
+    return {"pdfs": pdf_results, "pngs": png_results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extract the inbox bills on a single asyncio event loop."
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=100,
+        help="Maximum number of bills in flight at once (default: 100).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the extraction cache and call OpenAI for every bill.",
+    )
+    parser.add_argument(
+        "--no-local-detection",
+        action="store_true",
+        help="Always ask the LLM for the provider instead of matching locally first.",
+    )
+    parser.add_argument(
+        "--single-call",
+        action="store_true",
+        help="Detect the provider among the local detector's top candidates "
+        "and extract the JSON in one LLM call per PDF.",
+    )
+    parser.add_argument(
+        "--results-db",
+        action="store_true",
+        help="Also write every bill to the SQLite results store (src/data/results).",
+    )
+    parser.add_argument(
+        "--jsonl",
+        choices=("plain", "zstd"),
+        default=None,
+        help="Also append every bill to JSONL segments in src/data/jsonl, "
+        "optionally zstd-compressed.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        action="append",
+        default=[],
+        metavar="MODEL=RPM:TPM",
+        help="Limit a model's requests/tokens per minute (repeatable; "
+        "no limit by default).",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help="Write Prometheus metrics to this file (textfile collector) at exit.",
+    )
+    args = parser.parse_args()
+    for override in args.rate_limit:
+        SCHEDULER.set_limits(*parse_rate_limit(override))
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+
+    all_results = asyncio.run(
+        main(
+            args.max_concurrency,
+            not args.no_cache,
+            not args.no_local_detection,
+            args.single_call,
+            args.results_db,
+            args.jsonl,
+        )
+    )
+    if args.metrics_file:
+        write_textfile(args.metrics_file)
+    print(json.dumps(all_results, indent=2))
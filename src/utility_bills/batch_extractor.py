@@ -0,0 +1,560 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+from extraction_cache import ExtractionCache, hash_file
+from extraction_schema import extraction_model
+from extractor import PDF_EXTRACTION_MODEL, save_extraction, save_standard
+from jsonl_sink import JsonlSink
+from local_provider_detector import LocalProviderDetector
+from logging_setup import setup_logging
+from mapper_functions.llm_transformer import build_transform_messages
+from mapper_functions.rule_mapper import map_with_rules
+from openai import OpenAI
+from openai.lib._parsing._completions import type_to_response_format_param
+from openai.lib._parsing._responses import type_to_text_format_param
+from prompt_cache import load_prompt_text
+from provider_router import (
+    PDF_DETECTION_MODEL,
+    build_detection_prompt,
+    get_model_for_provider,
+    get_prompt_path_for_provider,
+    normalize_detected_provider,
+)
+from results_store import ResultsStore
+from standard_template.standard_model import StandardUtilityBill
+
+TRANSFORM_MODEL = "gpt-4o-2024-08-06"
+
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def response_output_text(body: dict) -> str:
+    """
+    Pull the model's text out of a raw Responses or Chat Completions body.
+
+    Batch results come back as plain JSON, not SDK objects, so the SDK's
+    `output_text` and `message.content` helpers are not available.
+
+    Args:
+        body: The "body" of one batch output line.
+
+    Returns:
+        The concatenated output text.
+
+    Raises:
+        ValueError: If the body contains no text output.
+    """
+
+    if "choices" in body:
+        content = body["choices"][0]["message"].get("content")
+        if content is None:
+            raise ValueError("Chat completion has no content (refusal?)")
+        return content
+
+    texts = [
+        part["text"]
+        for item in body.get("output", [])
+        if item.get("type") == "message"
+        for part in item.get("content", [])
+        if part.get("type") == "output_text"
+    ]
+    if not texts:
+        raise ValueError("Response has no output_text")
+    return "".join(texts)
+
+
+class BatchExtractor:
+    """
+    Extract the inbox bills through the OpenAI Batch API.
+
+    Month-end backfills care about throughput and cost rather than latency, so
+    instead of one request per bill per step this writes a JSONL request file
+    for each step (provider detection, extraction, standard transform), submits
+    it as a batch, polls until it completes and then feeds the results through
+    the same post-processing, validation and folder layout as
+    `Extractor.process_inbox_pdfs`.
+
+    Request and result files are kept under src/data/batches/<run id>/ so a run
+    can be inspected or replayed with `fake_openai_server.py`.
+    """
+
+    def __init__(
+        self,
+        client: OpenAI | None = None,
+        project_root: str | Path | None = None,
+        poll_interval: float = 30.0,
+        completion_window: str = "24h",
+        cache: ExtractionCache | None = None,
+        local_detector: LocalProviderDetector | None = None,
+        results_store: ResultsStore | None = None,
+        jsonl_sink: JsonlSink | None = None,
+    ):
+        """
+        Initialize the BatchExtractor with an OpenAI client and logging setup.
+
+        Args:
+            client: OpenAI client instance. If None, creates a new one. Pass a
+                    client with base_url pointing at `FakeOpenAIServer` to run
+                    without network access.
+            project_root: Path to the project root directory. Used to set up
+                          the logs directory at <project_root>/logs.
+            poll_interval: Seconds between batch status checks.
+            completion_window: Batch completion window requested from the API.
+            cache: Optional extraction cache, see `Extractor`.
+            local_detector: Optional LLM-free provider detector, see `Extractor`.
+            results_store: Optional results store, see `Extractor`.
+            jsonl_sink: Optional JSONL sink, see `Extractor`.
+        """
+
+        self.client = client or OpenAI()
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        self.cache = cache
+        self.local_detector = local_detector
+        self.results_store = results_store
+        self.jsonl_sink = jsonl_sink
+
+        if project_root is None:
+            project_root = Path(__file__).resolve().parents[2]
+        else:
+            project_root = Path(project_root)
+
+        log_dir = project_root / "logs"
+        self.logger = setup_logging(log_dir)
+
+    @staticmethod
+    def build_detection_request(custom_id: str, file_id: str) -> dict:
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/responses",
+            "body": {
+                "model": PDF_DETECTION_MODEL,
+                "input": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "input_file", "file_id": file_id},
+                            {"type": "input_text", "text": build_detection_prompt()},
+                        ],
+                    }
+                ],
+            },
+        }
+
+    @staticmethod
+    def build_extraction_request(
+        custom_id: str, file_id: str, prompt: str, model_class
+    ) -> dict:
+        # Same structured-output schema that responses.parse(text_format=...)
+        # sends; the full model still parses the response
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/responses",
+            "body": {
+                "model": PDF_EXTRACTION_MODEL,
+                "input": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "input_file", "file_id": file_id},
+                            {"type": "input_text", "text": prompt},
+                        ],
+                    }
+                ],
+                "text": {
+                    "format": type_to_text_format_param(extraction_model(model_class))
+                },
+            },
+        }
+
+    @staticmethod
+    def build_transform_request(
+        custom_id: str, provider_json: dict, provider_name: str
+    ) -> dict:
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": TRANSFORM_MODEL,
+                "messages": build_transform_messages(provider_json, provider_name),
+                "response_format": type_to_response_format_param(StandardUtilityBill),
+                "temperature": 0,
+            },
+        }
+
+    def run_batch(
+        self, requests: list[dict], endpoint: str, name: str, run_dir: Path
+    ) -> dict[str, dict]:
+        """
+        Write, submit and wait for one batch, then collect its results.
+
+        Args:
+            requests: Batch request lines, see the build_*_request helpers.
+            endpoint: The endpoint every line targets, e.g. "/v1/responses".
+            name: Step name, used for the file names in run_dir.
+            run_dir: Directory for the request and result files.
+
+        Returns:
+            A dictionary mapping custom_id to {"body": ...} on success or
+            {"error": ...} on failure. Requests missing from both result files
+            are reported as errors.
+        """
+
+        if not requests:
+            return {}
+
+        request_path = run_dir / f"{name}_requests.jsonl"
+        request_path.write_text(
+            "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in requests),
+            encoding="utf-8",
+        )
+
+        with open(request_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=endpoint,
+            completion_window=self.completion_window,
+            metadata={"step": name, "run": run_dir.name},
+        )
+        self.logger.info(
+            f"Submitted {name} batch {batch.id} with {len(requests)} request(s)"
+        )
+
+        while batch.status not in BATCH_TERMINAL_STATUSES:
+            time.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+            self.logger.debug(f"Batch {batch.id} status: {batch.status}")
+
+        self.logger.info(f"Batch {batch.id} finished with status: {batch.status}")
+
+        results = {}
+        for file_id, suffix in (
+            (batch.output_file_id, "output"),
+            (batch.error_file_id, "errors"),
+        ):
+            if not file_id:
+                continue
+            text = self.client.files.content(file_id).text
+            (run_dir / f"{name}_{suffix}.jsonl").write_text(text, encoding="utf-8")
+            for line in text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code", 200) >= 400:
+                    results[record["custom_id"]] = {
+                        "error": record.get("error") or response.get("body")
+                    }
+                else:
+                    results[record["custom_id"]] = {"body": response["body"]}
+
+        for request in requests:
+            results.setdefault(
+                request["custom_id"],
+                {"error": f"No result (batch status: {batch.status})"},
+            )
+        return results
+
+    def process_inbox_pdfs(self, project_root: str | Path) -> list[dict]:
+        """
+        Process all PDF files in the inbox directory in batch mode.
+
+        Steps:
+        1. Serve cache hits and upload the remaining PDFs
+        2. Detect providers (locally where possible, the rest in one batch)
+        3. Extract every bill in one batch
+        4. Post-process, validate and file away each bill like `Extractor`
+        5. Transform the validated bills to standard format in one batch
+
+        A failure in any step only affects that bill; its PDF stays in the inbox.
+
+        Args:
+            project_root: Path to the project root directory.
+
+        Returns:
+            One result dictionary per PDF, in sorted order by filename, with the
+            same keys as `Extractor.process_inbox_pdfs`.
+        """
+
+        project_root = Path(project_root)
+        data_dir = project_root / "src" / "data"
+        for sub in ("processed", "unprocessed"):
+            for kind in ("json", "pdf"):
+                (data_dir / sub / kind).mkdir(parents=True, exist_ok=True)
+
+        run_dir = data_dir / "batches" / time.strftime("%Y%m%d_%H%M%S")
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+        pdf_paths = sorted((data_dir / "inbox").glob("*.pdf"))
+        self.logger.info(
+            f"Found {len(pdf_paths)} PDF(s) in inbox. Starting batch extraction"
+        )
+
+        # One state dict per bill, keyed by stem (which is also the custom_id suffix)
+        bills = {}
+        for pdf_path in pdf_paths:
+            bill = {
+                "path": pdf_path,
+                "result": {"pdf": str(pdf_path), "ok": False},
+                "cache_key": None,
+                "provider_name": None,
+                "extracted": None,
+                "standard": None,
+            }
+            bills[pdf_path.stem] = bill
+            try:
+                if self.cache is not None:
+                    bill["cache_key"] = self.cache.make_key(
+                        hash_file(pdf_path), PDF_EXTRACTION_MODEL
+                    )
+                    cached = self.cache.get(bill["cache_key"])
+                    if cached is not None:
+                        bill["provider_name"] = cached["provider_name"]
+                        bill["extracted"] = cached["extracted"]
+                        bill["standard"] = cached["standard"]
+                        self.logger.info(
+                            f"Cache hit: {pdf_path.name} ({cached['provider_name']})"
+                        )
+                        continue
+
+                if self.local_detector is not None:
+                    detection = self.local_detector.detect_pdf(pdf_path)
+                    bill["provider_name"] = detection.provider_name
+
+                with open(pdf_path, "rb") as f:
+                    bill["file_id"] = self.client.files.create(
+                        file=f, purpose="user_data"
+                    ).id
+            except Exception as e:
+                self._fail(bill, "upload", e)
+
+        def pending(step_done) -> dict[str, dict]:
+            return {
+                stem: bill
+                for stem, bill in bills.items()
+                if "error" not in bill["result"] and not step_done(bill)
+            }
+
+        # Provider detection
+        to_detect = pending(lambda bill: bill["provider_name"] is not None)
+        results = self.run_batch(
+            [
+                self.build_detection_request(f"detect:{stem}", bill["file_id"])
+                for stem, bill in to_detect.items()
+            ],
+            "/v1/responses",
+            "detect",
+            run_dir,
+        )
+        for stem, bill in to_detect.items():
+            try:
+                bill["provider_name"] = normalize_detected_provider(
+                    response_output_text(self._body(results[f"detect:{stem}"]))
+                )
+            except Exception as e:
+                self._fail(bill, "detection", e)
+
+        # Extraction
+        to_extract = pending(lambda bill: bill["extracted"] is not None)
+        requests = []
+        for stem, bill in to_extract.items():
+            try:
+                prompt_path = get_prompt_path_for_provider(
+                    project_root, bill["provider_name"]
+                )
+                requests.append(
+                    self.build_extraction_request(
+                        f"extract:{stem}",
+                        bill["file_id"],
+                        load_prompt_text(prompt_path),
+                        get_model_for_provider(bill["provider_name"]),
+                    )
+                )
+            except Exception as e:
+                self._fail(bill, "extraction", e)
+        results = self.run_batch(requests, "/v1/responses", "extract", run_dir)
+        for stem, bill in pending(lambda bill: bill["extracted"] is not None).items():
+            try:
+                model_class = get_model_for_provider(bill["provider_name"])
+                bill["extracted"] = model_class.model_validate_json(
+                    response_output_text(self._body(results[f"extract:{stem}"]))
+                ).model_dump(exclude_none=False, exclude_unset=False)
+                if self.cache is not None:
+                    self.cache.put(
+                        bill["cache_key"], bill["provider_name"], bill["extracted"]
+                    )
+            except Exception as e:
+                self._fail(bill, "extraction", e)
+
+        # Post-processing, validation and filing, exactly like Extractor
+        for stem, bill in pending(lambda bill: False).items():
+            try:
+                saved = save_extraction(
+                    bill["path"],
+                    project_root,
+                    bill["provider_name"],
+                    bill["extracted"],
+                    self.logger,
+                    results_store=self.results_store,
+                    jsonl_sink=self.jsonl_sink,
+                )
+                # The transform below takes the bill as saved, not re-read
+                bill["extracted"] = saved["extracted"]
+                bill["result"].update(
+                    {
+                        "ok": True,
+                        "json_path": str(saved["json_path"]),
+                        "moved_pdf_path": str(saved["moved_path"]),
+                        "validation_passed": saved["validation_passed"],
+                        "standard_json_path": None,
+                    }
+                )
+            except Exception as e:
+                self._fail(bill, "saving", e)
+
+        # Standard transform for validated bills
+        to_transform = {
+            stem: bill
+            for stem, bill in bills.items()
+            if bill["result"].get("validation_passed")
+        }
+        requests = []
+        for stem, bill in to_transform.items():
+            if bill["standard"] is not None:
+                continue
+            try:
+                provider_json, provider_name = bill["extracted"], bill["provider_name"]
+                # Mapped locally; only the rest need a transform request
+                bill["standard"] = map_with_rules(provider_json, provider_name)
+                if bill["standard"] is not None:
+                    continue
+                requests.append(
+                    self.build_transform_request(
+                        f"transform:{stem}", provider_json, provider_name
+                    )
+                )
+            except Exception as e:
+                self.logger.error(f"Error preparing transform for {stem}: {repr(e)}")
+        results = self.run_batch(requests, "/v1/chat/completions", "transform", run_dir)
+        for stem, bill in to_transform.items():
+            try:
+                # A dict is the standard JSON restored from the cache, a
+                # StandardUtilityBill a rule mapping
+                standard = bill["standard"]
+                if standard is None:
+                    standard = StandardUtilityBill.model_validate_json(
+                        response_output_text(self._body(results[f"transform:{stem}"]))
+                    )
+                standard_json_path = save_standard(
+                    project_root,
+                    stem,
+                    standard,
+                    self.cache,
+                    bill["cache_key"],
+                    self.results_store,
+                    self.jsonl_sink,
+                )
+                bill["result"]["standard_json_path"] = str(standard_json_path)
+                self.logger.info(f" Standard JSON saved to {standard_json_path}")
+            except Exception as e:
+                # Like Extractor, a failed transform keeps the bill's ok status
+                self.logger.error(
+                    f"Error transforming {stem} to standard format: {repr(e)}"
+                )
+
+        for bill in bills.values():
+            if bill["result"]["ok"]:
+                folder_type = (
+                    "processed"
+                    if bill["result"]["validation_passed"]
+                    else "unprocessed"
+                )
+                self.logger.info(f"Finished: {bill['path'].name} -> {folder_type}")
+
+        self.logger.info(f"All PDFs processed. Batch files in {run_dir}")
+        return [bill["result"] for bill in bills.values()]
+
+    @staticmethod
+    def _body(result: dict) -> dict:
+        if "error" in result:
+            raise RuntimeError(f"Batch request failed: {result['error']}")
+        return result["body"]
+
+    def _fail(self, bill: dict, step: str, error: Exception) -> None:
+        self.logger.error(
+            f"Error processing {bill['path'].name} ({step}): {repr(error)}"
+        )
+        bill["result"]["error"] = repr(error)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extract the inbox PDFs through the OpenAI Batch API."
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between batch status checks (default: 30).",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="OpenAI API base URL, e.g. a local fake_openai_server.py instance.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the extraction cache and send every bill to the batch.",
+    )
+    parser.add_argument(
+        "--no-local-detection",
+        action="store_true",
+        help="Always ask the LLM for the provider instead of matching locally first.",
+    )
+    parser.add_argument(
+        "--results-db",
+        action="store_true",
+        help="Also write every bill to the SQLite results store (src/data/results).",
+    )
+    parser.add_argument(
+        "--jsonl",
+        choices=("plain", "zstd"),
+        default=None,
+        help="Also append every bill to JSONL segments in src/data/jsonl, "
+        "optionally zstd-compressed.",
+    )
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[2]
+    extractor = BatchExtractor(
+        client=OpenAI(base_url=args.base_url) if args.base_url else None,
+        poll_interval=args.poll_interval,
+        cache=None if args.no_cache else ExtractionCache.for_project(project_root),
+        local_detector=(
+            None
+            if args.no_local_detection
+            else LocalProviderDetector.from_project(project_root)
+        ),
+        results_store=(
+            ResultsStore.for_project(project_root) if args.results_db else None
+        ),
+        jsonl_sink=(
+            JsonlSink.for_project(
+                project_root, compression="zstd" if args.jsonl == "zstd" else None
+            )
+            if args.jsonl
+            else None
+        ),
+    )
+
+    results = extractor.process_inbox_pdfs(project_root)
+    if extractor.jsonl_sink is not None:
+        extractor.jsonl_sink.close()
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,549 @@
+import argparse
+import json
+import logging
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+from extraction_cache import ExtractionCache
+from extraction_schema import extraction_model
+from extractor import Extractor
+from fake_openai_server import (
+    PROVIDER_MARKER,
+    CompletionRequest,
+    FakeOpenAIServer,
+    default_completion_responder,
+    synthesize_from_schema,
+)
+from local_provider_detector import LocalProviderDetector
+from metrics import STAGE_SECONDS
+from openai import OpenAI
+from provider_router import PROVIDER_SPECS
+from request_scheduler import SCHEDULER, parse_rate_limit
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Stages in the order they are reported
+STAGE_ORDER = (
+    "upload",
+    "detect",
+    "extract",
+    "postprocess",
+    "validate",
+    "write",
+    "move",
+    "transform",
+)
+
+
+def make_pdf(provider_name: str, pad_kb: int = 0) -> bytes:
+    """
+    Build a small, valid one-page PDF for a provider.
+
+    The provider marker sits in a comment right after the header, where the
+    fake server finds it in the uploaded bytes.
+
+    Args:
+        provider_name: The registered provider the bill pretends to be from.
+        pad_kb: Extra kilobytes of padding, to give uploads a realistic size.
+    """
+
+    text = f"{provider_name.title()} utility bill".replace("(", "").replace(")", "")
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+    ]
+
+    out = bytearray(b"%PDF-1.4\n% " + PROVIDER_MARKER)
+    out += provider_name.encode("utf-8") + b"\n"
+    if pad_kb:
+        out += b"% " + b"0" * (pad_kb * 1024) + b"\n"
+
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1)
+    out += b"startxref\n%d\n%%%%EOF\n" % xref
+    return bytes(out)
+
+
+def make_png(provider_name: str) -> bytes:
+    """Build a 1x1 PNG whose tEXt chunk carries the provider marker."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    marker = PROVIDER_MARKER + provider_name.encode("utf-8") + b"\n"
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+        + chunk(b"tEXt", b"Comment\x00" + marker)
+        + chunk(b"IDAT", zlib.compress(b"\x00\xff\xff\xff"))
+        + chunk(b"IEND", b"")
+    )
+
+
+def build_inbox(
+    project_root: Path,
+    providers: list[str],
+    pdfs: int,
+    pngs: int,
+    pad_kb: int = 0,
+    hint_filenames: bool = False,
+) -> None:
+    """
+    Fill <project_root>/src/data/inbox with synthetic bills, cycling through
+    the providers. The same arguments always produce the same bytes, so a
+    second run over a fresh inbox hits the extraction cache.
+
+    With `hint_filenames`, PDF names carry the provider's prompt stem, which
+    local detection scores as a candidate without placing the bill.
+    """
+
+    inbox_dir = project_root / "src" / "data" / "inbox"
+    inbox_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(pdfs):
+        provider_name = providers[i % len(providers)]
+        hint = (
+            f"_{Path(PROVIDER_SPECS[provider_name].prompt).stem}"
+            if hint_filenames
+            else ""
+        )
+        (inbox_dir / f"bill_{i:05d}{hint}.pdf").write_bytes(
+            make_pdf(provider_name, pad_kb)
+        )
+    for i in range(pngs):
+        provider_name = providers[i % len(providers)]
+        (inbox_dir / f"bill_{i:05d}.png").write_bytes(make_png(provider_name))
+
+
+def load_recorded_responses(recorded_dir: str | Path) -> dict[str, dict]:
+    """
+    Load recorded extractions, e.g. JSON files from processed/json.
+
+    Each file must carry a "provider_name"; the derived *_validation fields
+    are dropped so the post-processors recompute them.
+
+    Returns:
+        The extraction per provider name.
+    """
+
+    recorded = {}
+    for path in sorted(Path(recorded_dir).glob("*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        provider_name = str(data.pop("provider_name", "")).strip().lower()
+        if provider_name in PROVIDER_SPECS:
+            recorded[provider_name] = _strip_validation(data)
+    return recorded
+
+
+def _strip_validation(value):
+    if isinstance(value, dict):
+        return {
+            k: _strip_validation(v)
+            for k, v in value.items()
+            if not k.endswith("_validation")
+        }
+    if isinstance(value, list):
+        return [_strip_validation(v) for v in value]
+    return value
+
+
+@lru_cache(maxsize=None)
+def _synthetic_extraction(provider_name: str) -> str:
+    model_class = extraction_model(PROVIDER_SPECS[provider_name].model_class)
+    schema = model_class.model_json_schema()
+    return json.dumps(synthesize_from_schema(schema))
+
+
+class BenchmarkResponder:
+    """
+    Answers the extractor's calls the way the real models would for the
+    synthetic bills: detection returns the provider in the bill's marker,
+    extraction returns a recorded extraction for that provider (or one
+    synthesized from its Pydantic model), and anything else, such as the
+    standard-format transform, is synthesized from the request schema.
+    """
+
+    def __init__(self, recorded: dict[str, dict] | None = None):
+        self.recorded = {
+            provider_name: json.dumps(extraction)
+            for provider_name, extraction in (recorded or {}).items()
+        }
+
+    def extraction(self, provider_name: str) -> str:
+        if provider_name in self.recorded:
+            return self.recorded[provider_name]
+        return _synthetic_extraction(provider_name)
+
+    def __call__(self, request: CompletionRequest) -> str:
+        provider_name = request.provider
+        if provider_name is None:
+            return default_completion_responder(request)
+        if request.schema_name == "detect_and_extract":
+            if f'"{provider_name}"' not in json.dumps(request.schema):
+                return '{"result": {"provider_name": "other"}}'
+            bill = self.extraction(provider_name)
+            return (
+                f'{{"result": {{"provider_name": "{provider_name}", "bill": {bill}}}}}'
+            )
+        if request.schema is None and not request.json_mode:
+            return provider_name
+        return self.extraction(provider_name)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process (harness and fake server)."""
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def summarize_stages(samples: list[tuple[dict, float]]) -> dict[str, dict]:
+    by_stage: dict[str, list[float]] = {}
+    for labels, seconds in samples:
+        by_stage.setdefault(labels["stage"], []).append(seconds)
+
+    order = {stage: i for i, stage in enumerate(STAGE_ORDER)}
+    return {
+        stage: {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "total_s": round(sum(values), 3),
+        }
+        for stage, values in sorted(
+            by_stage.items(), key=lambda item: order.get(item[0], len(order))
+        )
+    }
+
+
+def run_benchmark(
+    pdfs: int = 100,
+    pngs: int = 0,
+    max_workers: int = 8,
+    stage_workers: dict[str, int] | None = None,
+    providers: list[str] | None = None,
+    latency: float = 0.5,
+    upload_latency: float = 0.1,
+    jitter: float = 0.2,
+    error_rate: float = 0.0,
+    error_status: int = 429,
+    recorded: dict[str, dict] | None = None,
+    runs: int = 1,
+    use_cache: bool = False,
+    single_call: bool = False,
+    pad_kb: int = 0,
+    seed: int = 0,
+    keep: bool = False,
+) -> dict:
+    """
+    Run the extractor end to end against the fake OpenAI server.
+
+    Each run fills a fresh inbox with the same synthetic bills and processes
+    it with `Extractor.process_inbox_pdfs` and `process_inbox_pngs`. With
+    `use_cache`, runs after the first measure the warm extraction cache.
+
+    Args:
+        pdfs: Number of PDF bills per run.
+        pngs: Number of PNG bills per run.
+        max_workers: Passed to the extractor.
+        stage_workers: Per-stage thread counts for the PDF pipeline.
+        providers: Providers to cycle through; defaults to all registered.
+        latency: Mean seconds per completion call.
+        upload_latency: Mean seconds per file upload.
+        jitter: Latency variation, as a fraction either way.
+        error_rate: Fraction of completion calls failed with `error_status`.
+        error_status: HTTP status of the injected errors.
+        recorded: Recorded extractions per provider, see
+                  `load_recorded_responses`.
+        runs: Number of runs.
+        use_cache: Use an extraction cache shared by the runs.
+        single_call: Detect and extract PDFs in one call. PDF names then
+                     hint at the provider, so local detection yields the
+                     candidate the single call chooses from.
+        pad_kb: Padding added to each PDF.
+        seed: Seed for latency jitter and error injection.
+        keep: Keep the temporary project directory.
+
+    Returns:
+        The report: per-run throughput and stage percentiles, server request
+        counts, scheduler stats and peak RSS.
+    """
+
+    providers = providers or list(PROVIDER_SPECS)
+    project_root = Path(tempfile.mkdtemp(prefix="utility_bills_bench_"))
+    package_dir = Path(__file__).resolve().parent
+    for name in ("prompts", "transformation_prompts"):
+        shutil.copytree(
+            package_dir / name, project_root / "src" / "utility_bills" / name
+        )
+
+    server = FakeOpenAIServer(
+        completion_responder=BenchmarkResponder(recorded),
+        latency=latency,
+        upload_latency=upload_latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        error_status=error_status,
+        seed=seed,
+    )
+    report = {
+        "config": {
+            "pdfs": pdfs,
+            "pngs": pngs,
+            "max_workers": max_workers,
+            "stage_workers": stage_workers or {},
+            "providers": len(providers),
+            "latency": latency,
+            "upload_latency": upload_latency,
+            "jitter": jitter,
+            "error_rate": error_rate,
+            "cache": use_cache,
+            "single_call": single_call,
+            "recorded_providers": len(recorded or {}),
+        },
+        "runs": [],
+    }
+
+    try:
+        with server:
+            client = OpenAI(
+                base_url=server.base_url, api_key="benchmark", max_retries=0
+            )
+            cache = ExtractionCache.for_project(project_root) if use_cache else None
+            extractor = Extractor(
+                client=client,
+                project_root=project_root,
+                cache=cache,
+                # Never conclusive: every PDF takes the single call, and bills
+                # outside their candidates the two-step fallback
+                local_detector=(
+                    LocalProviderDetector(threshold=float("inf"))
+                    if single_call
+                    else None
+                ),
+                single_call=single_call,
+            )
+
+            for run in range(1, runs + 1):
+                build_inbox(project_root, providers, pdfs, pngs, pad_kb, single_call)
+                counts_before = dict(server.counts)
+
+                with STAGE_SECONDS.record() as samples:
+                    started = time.perf_counter()
+                    results = extractor.process_inbox_pdfs(
+                        project_root,
+                        max_workers=max_workers,
+                        stage_workers=stage_workers,
+                    )
+                    results += extractor.process_inbox_pngs(
+                        project_root, max_workers=max_workers
+                    )
+                    wall = time.perf_counter() - started
+
+                ok = sum(1 for result in results if result["ok"])
+                report["runs"].append(
+                    {
+                        "run": run,
+                        "bills": len(results),
+                        "ok": ok,
+                        "failed": len(results) - ok,
+                        "validation_passed": sum(
+                            1 for result in results if result.get("validation_passed")
+                        ),
+                        "wall_seconds": round(wall, 3),
+                        "bills_per_second": (
+                            round(len(results) / wall, 2) if wall else None
+                        ),
+                        "requests": {
+                            key: server.counts[key] - counts_before[key]
+                            for key in server.counts
+                        },
+                        "stages": summarize_stages(samples),
+                    }
+                )
+
+            if cache is not None:
+                cache.close()
+    finally:
+        if keep:
+            report["project_root"] = str(project_root)
+        else:
+            shutil.rmtree(project_root, ignore_errors=True)
+
+    report["scheduler"] = SCHEDULER.stats()
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = []
+    for run in report["runs"]:
+        lines.append(
+            f"Run {run['run']}: {run['bills']} bills ({run['ok']} ok, "
+            f"{run['failed']} failed, {run['validation_passed']} validated) in "
+            f"{run['wall_seconds']}s = {run['bills_per_second']} bills/s; "
+            f"requests {run['requests']}"
+        )
+        lines.append(f"  {'stage':<12} {'count':>7} {'p50 ms':>10} {'p95 ms':>10}")
+        for stage, stats in run["stages"].items():
+            lines.append(
+                f"  {stage:<12} {stats['count']:>7} {stats['p50_ms']:>10} "
+                f"{stats['p95_ms']:>10}"
+            )
+    for model, stats in report["scheduler"].items():
+        lines.append(
+            f"{model}: {stats['requests']} requests, {stats['retries']} retries, "
+            f"{stats['wait_seconds']:.1f}s rate-limit wait"
+        )
+    lines.append(f"Peak RSS: {report['peak_rss_mb']} MB")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the extractor end to end against a local fake OpenAI API."
+    )
+    parser.add_argument("--pdfs", type=int, default=100, help="PDFs per run.")
+    parser.add_argument("--pngs", type=int, default=0, help="PNGs per run.")
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument(
+        "--stage-workers",
+        action="append",
+        default=[],
+        metavar="STAGE=N",
+        help="Threads for one PDF pipeline stage (repeatable).",
+    )
+    parser.add_argument(
+        "--provider",
+        action="append",
+        default=[],
+        help="Only generate bills for this provider (repeatable; default all).",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.5, help="Mean seconds per completion."
+    )
+    parser.add_argument(
+        "--upload-latency", type=float, default=0.1, help="Mean seconds per upload."
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.2, help="Latency variation (fraction)."
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of completions that fail with --error-status.",
+    )
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument(
+        "--recorded",
+        default=None,
+        help="Directory of recorded extraction JSONs (e.g. src/data/processed/json).",
+    )
+    parser.add_argument("--runs", type=int, default=1, help="Runs over the same bills.")
+    parser.add_argument(
+        "--cache", action="store_true", help="Share an extraction cache across runs."
+    )
+    parser.add_argument("--single-call", action="store_true")
+    parser.add_argument(
+        "--pdf-kb", type=int, default=0, help="Padding added to each PDF, in KB."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--rate-limit",
+        action="append",
+        default=[],
+        metavar="MODEL=RPM:TPM",
+        help="Apply a rate limit; by default the benchmark is not rate limited.",
+    )
+    parser.add_argument("--json", default=None, help="Also write the report here.")
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show the extractor's logging."
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the temporary project directory."
+    )
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Retries are expected under error injection; only show failures
+        logging.disable(logging.WARNING)
+
+    for override in args.rate_limit:
+        SCHEDULER.set_limits(*parse_rate_limit(override))
+
+    stage_workers = {}
+    for override in args.stage_workers:
+        stage, _, workers = override.partition("=")
+        stage_workers[stage.strip()] = int(workers)
+
+    providers = [name.strip().lower() for name in args.provider]
+    unknown = [name for name in providers if name not in PROVIDER_SPECS]
+    if unknown:
+        parser.error(f"Unknown provider(s): {unknown}")
+
+    report = run_benchmark(
+        pdfs=args.pdfs,
+        pngs=args.pngs,
+        max_workers=args.max_workers,
+        stage_workers=stage_workers,
+        providers=providers or None,
+        latency=args.latency,
+        upload_latency=args.upload_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        recorded=load_recorded_responses(args.recorded) if args.recorded else None,
+        runs=args.runs,
+        use_cache=args.cache,
+        single_call=args.single_call,
+        pad_kb=args.pdf_kb,
+        seed=args.seed,
+        keep=args.keep,
+    )
+
+    print(format_report(report))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
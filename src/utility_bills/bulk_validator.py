@@ -0,0 +1,562 @@
+import argparse
+import importlib
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from logging_setup import setup_logging
+from provider_functions.rules import Validation
+from provider_router import get_provider_spec
+
+
+class _Unsupported(Exception):
+    """A bill or rule the vectorized path cannot reproduce exactly."""
+
+
+def _provider_rules(provider_name: str) -> tuple[Validation, ...] | None:
+    """
+    The validations of a provider whose module declares them all as rules.
+
+    By the convention in `provider_functions.rules`, such a module names its
+    RuleSet RULES and its post-processor and checker delegate to it.
+
+    Returns:
+        The parsed rules, or None if the provider module has no RULES.
+    """
+
+    module_name = get_provider_spec(provider_name).postprocessor.partition(":")[0]
+    rules = getattr(importlib.import_module(module_name), "RULES", None)
+    return None if rules is None else rules.validations
+
+
+@dataclass
+class BulkResult:
+    """
+    Verdicts for a batch of bills, in input order.
+
+    Attributes:
+        passed: The `check_validation_passed` verdict of each bill, or None if
+                its post-processor raised.
+        errors: Error message per bill index, for the bills that raised.
+        vectorized: How many bills were validated with the array path.
+        fallback: How many went through their provider module one by one.
+    """
+
+    passed: list[bool | None]
+    errors: dict[int, str] = field(default_factory=dict)
+    vectorized: int = 0
+    fallback: int = 0
+
+
+_EMPTY: dict = {}
+_MISSING = object()
+
+
+def _getter(keys: tuple[str, ...], default: Any = None) -> Callable[[dict], Any]:
+    """
+    Build a lookup that follows keys the way the provider modules do:
+    missing levels read as empty, while a level that is present but not a
+    dict raises AttributeError (as their `.get` chains would).
+    """
+
+    *parents, last = keys
+    if not parents:
+        return lambda node: node.get(last, default)
+    if len(parents) == 1:
+        first = parents[0]
+        return lambda node: node.get(first, _EMPTY).get(last, default)
+
+    def get(node):
+        for key in parents:
+            node = node.get(key, _EMPTY)
+        return node.get(last, default)
+
+    return get
+
+
+def _number(value: Any, required: bool = False) -> float:
+    if value.__class__ is float:
+        # Without the `or 0.0`, a -0.0 would survive into the output
+        if required and value == 0 and math.copysign(1, value) < 0:
+            raise _Unsupported(value)
+        return value
+    if value is None and not required:
+        return 0.0
+    raise _Unsupported(value)
+
+
+def _to_cents(values: list[float]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Convert amounts to integer cents.
+
+    Returns:
+        The cents, and a mask of the amounts that are exactly the float
+        nearest to a whole number of cents (the usual case for parsed
+        currency). Only for those do integer cents round exactly like the
+        provider modules' `round(..., 2)`.
+    """
+
+    amounts = np.asarray(values, dtype=np.float64)
+    cents = np.rint(amounts * 100)
+    # NaN, inf and amounts beyond exact float integers cannot be summed as
+    # cents; they fall back, and are zeroed so the cast does not overflow
+    in_range = np.abs(cents) < 2**53
+    exact = in_range & (cents / 100 == amounts)
+    cents[~in_range] = 0
+    return cents.astype(np.int64), exact
+
+
+def _segment_sums(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Sum consecutive runs of `values`, one run per count (runs may be empty)."""
+
+    ends = np.cumsum(counts)
+    totals = np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+    return totals[ends] - totals[ends - counts]
+
+
+def _as_amounts(cents: np.ndarray, is_float: np.ndarray) -> list[float | int]:
+    # The modules' sum() over an empty list is the int 0
+    values = (cents / 100).tolist()
+    if not is_float.all():
+        values = [v if f else 0 for v, f in zip(values, is_float.tolist())]
+    return values
+
+
+class _CompiledCheck:
+    """
+    One rule validation with its key paths resolved into lookups once.
+
+    The distinct field and sum() operands of the validation are its leaves,
+    read from every bill; each statement is an integer combination of the
+    leaves, following the names it adds and subtracts.
+    """
+
+    def __init__(self, validation: Validation):
+        """
+        Raises:
+            _Unsupported: If the validation uses "??", whose result depends
+                          on which field is null.
+        """
+
+        self.validation = validation
+        each = validation.each
+        self.each = _getter(tuple(each.split(".")), ()) if each else None
+        output = tuple(validation.scope_output.split("."))
+        self.output_key = output[-1]
+        self.output_parent = _getter(output[:-1], _MISSING) if len(output) > 1 else None
+
+        self.leaves = []
+        leaf_indexes: dict = {}
+        combinations: dict[str, tuple[dict[int, int], set[int]]] = {}
+        for statement in validation.statements:
+            coefficients: dict[int, int] = {}
+            used: set[int] = set()
+            for sign, operand in statement.terms:
+                if operand.kind == "coalesce":
+                    raise _Unsupported(operand.paths)
+                if operand.kind == "name":
+                    terms, leaves = combinations[operand.paths[0]]
+                else:
+                    if operand not in leaf_indexes:
+                        leaf_indexes[operand] = len(self.leaves)
+                        self.leaves.append(self._leaf(operand))
+                    terms, leaves = {leaf_indexes[operand]: 1}, {leaf_indexes[operand]}
+                for index, coefficient in terms.items():
+                    coefficients[index] = (
+                        coefficients.get(index, 0) + sign * coefficient
+                    )
+                used |= leaves
+            combinations[statement.name] = (coefficients, used)
+
+        # (name, coefficient per leaf, leaves the value is built from)
+        self.statements = []
+        for statement in validation.statements:
+            coefficients, used = combinations[statement.name]
+            vector = np.zeros(len(self.leaves), dtype=np.int64)
+            mask = np.zeros(len(self.leaves), dtype=bool)
+            for index, coefficient in coefficients.items():
+                vector[index] = coefficient
+            mask[list(used)] = True
+            self.statements.append((statement.name, vector, mask))
+
+        check = validation.check
+        names = [statement.name for statement in validation.statements]
+        self.compared = names.index(check.name)
+        self.target_key = check.key
+        self.target = _getter(tuple(check.target.split(".")))
+
+    @staticmethod
+    def _leaf(operand) -> tuple:
+        """(required, list lookup or None, value lookup) for a field or sum()."""
+
+        head, star, tail = operand.paths[0].partition("[*]")
+        if star:
+            items = _getter(tuple(head.split(".")), ())
+            return False, items, _getter(tuple(tail.lstrip(".").split(".")))
+        # raw() has no `or 0.0` default
+        return operand.kind == "raw", None, _getter(tuple(head.split(".")))
+
+    def rows(self, bill: dict) -> list[tuple]:
+        """
+        Read every number the check needs from one bill.
+
+        Returns:
+            One (parent, target, leaves) row per scope; sum() leaves are lists
+            of item values. The parent is None if the validation has nowhere
+            to be stored.
+
+        Raises:
+            _Unsupported: If the provider module would raise on this bill, or
+                          would produce values the array path cannot match.
+        """
+
+        try:
+            if self.each is None:
+                return [self._row(bill)]
+            scopes = self.each(bill)
+            if scopes.__class__ is not list:
+                raise _Unsupported(self.validation.each)
+            return [self._row(scope) for scope in scopes]
+        except (AttributeError, TypeError) as e:
+            raise _Unsupported(e) from e
+
+    def _row(self, scope: dict) -> tuple:
+        parent = scope
+        if self.output_parent is not None:
+            parent = self.output_parent(scope)
+            if parent is _MISSING:
+                parent = None
+            elif parent.__class__ is not dict:
+                raise _Unsupported(self.validation.output)
+
+        values = []
+        for required, items, value in self.leaves:
+            if items is None:
+                values.append(_number(value(scope), required))
+                continue
+            column = items(scope)
+            if column.__class__ is not list and column != ():
+                raise _Unsupported(column)
+            values.append([_number(value(item)) for item in column])
+
+        target = self.target(scope)
+        if target is not None and target.__class__ is not float:
+            raise _Unsupported(target)
+        return parent, target, values
+
+
+class _Block:
+    """One check of one provider, over all of its bills, as cent columns."""
+
+    def __init__(self, compiled: _CompiledCheck, owners, parents, targets, columns):
+        self.compiled = compiled
+        self.owners = np.asarray(owners, dtype=np.int64)
+        self.parents = parents
+        self.targets = targets
+        rows = len(owners)
+
+        self.inexact = np.zeros(rows, dtype=bool)
+        leaf_cents, leaf_floats = [], []
+        for (_, items, _), (values, counts) in zip(compiled.leaves, columns):
+            cents, exact = _to_cents(values)
+            if items is None:
+                is_float = np.ones(rows, dtype=bool)
+            else:
+                counts = np.asarray(counts, dtype=np.int64)
+                cents = _segment_sums(cents, counts)
+                exact = _segment_sums(~exact, counts) == 0
+                is_float = counts > 0
+            self.inexact |= ~exact
+            leaf_cents.append(cents)
+            leaf_floats.append(is_float)
+        leaf_cents = np.stack(leaf_cents, axis=1)
+        leaf_floats = np.stack(leaf_floats, axis=1)
+
+        # A value is a float once any of its leaves is (a field, or a sum()
+        # over a non-empty list)
+        self.values = [
+            (name, leaf_cents @ vector, (leaf_floats & mask).any(axis=1))
+            for name, vector, mask in compiled.statements
+        ]
+        self.total = self.values[compiled.compared][1]
+
+        self.has_target = np.fromiter((t is not None for t in targets), bool, rows)
+        self.target_cents, target_exact = _to_cents([t or 0.0 for t in targets])
+        self.inexact |= ~target_exact
+        self.attached = np.fromiter((p is not None for p in parents), bool, rows)
+
+    def mismatches(self, tolerance: float, rows: np.ndarray) -> tuple:
+        difference = (self.total - self.target_cents) / 100
+        is_match = np.abs(difference) <= tolerance
+        # Like the provider modules, a result with nowhere to go cannot fail
+        # the bill either
+        failed = rows & self.attached & self.has_target & ~is_match
+        return difference, is_match, self.owners[failed]
+
+    def write(self, difference, is_match, rows: np.ndarray) -> None:
+        reported = [
+            (name, _as_amounts(cents, is_float))
+            for name, cents, is_float in self.values
+            if not name.startswith("_")
+        ]
+        differences, matches = difference.tolist(), is_match.tolist()
+        target_key = self.compiled.target_key
+        output_key = self.compiled.output_key
+
+        for row in np.flatnonzero(rows & self.attached).tolist():
+            validation = {name: values[row] for name, values in reported}
+            target = self.targets[row]
+            validation[target_key] = target
+            if target is None:
+                validation["difference"] = None
+                validation["is_match"] = None
+            else:
+                validation["difference"] = differences[row]
+                validation["is_match"] = matches[row]
+            self.parents[row][output_key] = validation
+
+
+@lru_cache(maxsize=None)
+def _compiled_checks(provider_name: str) -> tuple[_CompiledCheck, ...] | None:
+    validations = _provider_rules(provider_name)
+    if validations is None:
+        return None
+    try:
+        return tuple(_CompiledCheck(validation) for validation in validations)
+    except _Unsupported:
+        return None
+
+
+class ValidationFrame:
+    """
+    Many extracted bills flattened into integer-cent columns.
+
+    Building the frame reads every amount the provider checks need once:
+    line items become flat arrays with per-row offsets, and each check of
+    each provider becomes one block of rows. Evaluating a tolerance is then
+    a handful of array operations over all bills at once (segment sums are
+    computed while building), so sweeping tolerances over a large archive
+    costs one pass over the JSON plus a few milliseconds per tolerance.
+
+    The checks are the providers' own rules (the RULES of each provider
+    module), so the `*_validation` objects and verdicts are the same as
+    running `postprocess_for_provider` and `check_validation_for_provider` on
+    each bill. Bills of providers with hand-written validations or "??" in
+    their rules, and bills whose amounts are not whole cents or whose shape
+    the provider module would reject, go through the provider module one by
+    one instead.
+    """
+
+    def __init__(self, bills: list[tuple[str, dict]]):
+        """
+        Flatten the bills.
+
+        Args:
+            bills: (provider name, extracted bill) pairs.
+
+        Raises:
+            ValueError: If a provider is not registered.
+        """
+
+        self.bills = bills
+        self.blocks: list[_Block] = []
+        self.providers = [get_provider_spec(name).name for name, _ in bills]
+
+        fallback = set()
+        groups: dict[str, list[int]] = {}
+        for index, provider_name in enumerate(self.providers):
+            groups.setdefault(provider_name, []).append(index)
+
+        for provider_name, indexes in groups.items():
+            checks = _compiled_checks(provider_name)
+            if checks is None:
+                fallback.update(indexes)
+                continue
+            gathered = [([], [], [], [([], []) for _ in c.leaves]) for c in checks]
+            for index in indexes:
+                bill = bills[index][1]
+                try:
+                    rows = [check.rows(bill) for check in checks]
+                except _Unsupported:
+                    fallback.add(index)
+                    continue
+                for check_rows, (owners, parents, targets, columns) in zip(
+                    rows, gathered
+                ):
+                    for parent, target, values in check_rows:
+                        owners.append(index)
+                        parents.append(parent)
+                        targets.append(target)
+                        for value, (flat, counts) in zip(values, columns):
+                            if value.__class__ is list:
+                                flat.extend(value)
+                                counts.append(len(value))
+                            else:
+                                flat.append(value)
+            for check, (owners, parents, targets, columns) in zip(checks, gathered):
+                block = _Block(check, owners, parents, targets, columns)
+                fallback.update(block.owners[block.inexact].tolist())
+                self.blocks.append(block)
+
+        self.fallback = sorted(fallback)
+        self._vectorized = np.ones(len(bills), dtype=bool)
+        self._vectorized[self.fallback] = False
+
+    def evaluate(self, tolerance: float = 0.01, write: bool = True) -> BulkResult:
+        """
+        Validate every bill at a tolerance.
+
+        Args:
+            tolerance: Allowed absolute difference before is_match becomes False.
+            write: Store the `*_validation` objects in the bills, as the
+                   provider modules do. Without it only the verdicts are
+                   computed (the per-bill bills are still post-processed).
+
+        Returns:
+            The verdict of every bill.
+        """
+
+        failed = np.zeros(len(self.bills), dtype=bool)
+        for block in self.blocks:
+            rows = self._vectorized[block.owners]
+            difference, is_match, owners = block.mismatches(tolerance, rows)
+            failed[owners] = True
+            if write:
+                block.write(difference, is_match, rows)
+
+        passed = (~failed).tolist()
+        result = BulkResult(passed=passed, fallback=len(self.fallback))
+        result.vectorized = len(self.bills) - len(self.fallback)
+        for index in self.fallback:
+            spec = get_provider_spec(self.providers[index])
+            bill = self.bills[index][1]
+            try:
+                spec.postprocess(bill, tolerance)
+                passed[index] = spec.check(bill)
+            except Exception as e:
+                passed[index] = None
+                result.errors[index] = f"{type(e).__name__}: {e}"
+        return result
+
+
+def validate_bills(
+    bills: list[tuple[str, dict]], tolerance: float = 0.01
+) -> BulkResult:
+    """
+    Post-process and validate many extracted bills at once.
+
+    Equivalent to running `postprocess_for_provider` and
+    `check_validation_for_provider` on each bill; see ValidationFrame.
+
+    Args:
+        bills: (provider name, extracted bill) pairs. The bills are updated
+               in place, as the provider modules do.
+        tolerance: Allowed absolute difference before is_match becomes False.
+
+    Returns:
+        The verdict of every bill.
+    """
+
+    return ValidationFrame(bills).evaluate(tolerance)
+
+
+def load_bills(json_dirs: list[Path]) -> tuple[list[tuple[str, dict]], list[Path]]:
+    """
+    Load saved bills (processed/json, unprocessed/json) for re-validation.
+
+    Returns:
+        The (provider name, bill) pairs, and the path each was loaded from.
+        Files without a "provider_name" are skipped.
+    """
+
+    bills, paths = [], []
+    for json_dir in json_dirs:
+        for json_path in sorted(Path(json_dir).glob("*.json")):
+            data = json.loads(json_path.read_text(encoding="utf-8"))
+            provider_name = data.pop("provider_name", None)
+            if provider_name:
+                bills.append((provider_name, data))
+                paths.append(json_path)
+    return bills, paths
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-validate saved bills in bulk and report which verdicts "
+        "would change, e.g. before changing the tolerance."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        nargs="+",
+        default=[0.01],
+        help="Tolerance(s) to evaluate; the bills are loaded once (default 0.01).",
+    )
+    parser.add_argument(
+        "--json-dir",
+        action="append",
+        default=[],
+        help="Directory of saved bills (repeatable; default processed/json and "
+        "unprocessed/json).",
+    )
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[2]
+    logger = setup_logging(project_root / "logs")
+    data_dir = project_root / "src" / "data"
+    json_dirs = [Path(d) for d in args.json_dir] or [
+        data_dir / "processed" / "json",
+        data_dir / "unprocessed" / "json",
+    ]
+
+    started = time.perf_counter()
+    bills, paths = load_bills(json_dirs)
+    loaded = time.perf_counter()
+    frame = ValidationFrame(bills)
+    flattened = time.perf_counter()
+    was_passing = [path.parent.parent.name == "processed" for path in paths]
+
+    report = {
+        "bills": len(bills),
+        "vectorized": len(bills) - len(frame.fallback),
+        "fallback": len(frame.fallback),
+        "load_seconds": round(loaded - started, 3),
+        "flatten_seconds": round(flattened - loaded, 3),
+        "tolerances": [],
+    }
+    for tolerance in args.tolerance:
+        evaluated = time.perf_counter()
+        result = frame.evaluate(tolerance, write=False)
+        report["tolerances"].append(
+            {
+                "tolerance": tolerance,
+                "passed": sum(1 for passed in result.passed if passed),
+                "failed": sum(1 for passed in result.passed if passed is False),
+                "errors": len(result.errors),
+                "now_passing": sum(
+                    1
+                    for passed, was in zip(result.passed, was_passing)
+                    if passed and not was
+                ),
+                "now_failing": sum(
+                    1
+                    for passed, was in zip(result.passed, was_passing)
+                    if passed is False and was
+                ),
+                "seconds": round(time.perf_counter() - evaluated, 4),
+            }
+        )
+    for index, error in result.errors.items():
+        logger.warning(f"{paths[index].name}: {error}")
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
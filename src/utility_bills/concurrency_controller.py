@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("utility_bills")
+
+# Outcomes reported to the limiter after each call
+SUCCESS = "success"
+OVERLOAD = "overload"  # 429, 5xx, timeouts: the service wants less traffic
+FAILURE = "failure"  # anything else; says nothing about load
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Bounds in-flight requests with an AIMD (additive increase, multiplicative
+    decrease) limit.
+
+    Every successful call while the limit is in use adds 1/limit, so the
+    limit grows by about one per round of requests. An overload (429, 5xx,
+    timeout), or a short-term p95 latency above `latency_tolerance` times its
+    slow-moving baseline, multiplies the limit by `decrease_factor`. Requests
+    that were already in flight when the limit was cut do not cut it again,
+    so one burst of 429s halves the limit once rather than to the minimum.
+
+    Works from threads (`acquire`) and from asyncio tasks (`acquire_async`),
+    also both at once.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        window: int = 50,
+    ):
+        """
+        Args:
+            name: Label used in logs and metrics, usually the model name.
+            initial: Starting limit.
+            minimum: The limit never drops below this.
+            maximum: The limit never grows above this.
+            decrease_factor: Multiplier applied on overload.
+            latency_tolerance: Short-term p95 over long-term p95 that counts
+                as overload.
+            window: Number of recent latencies in the short-term p95.
+        """
+
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+
+        self._limit = float(max(minimum, min(initial, maximum)))
+        self._in_flight = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._baseline_p95: float | None = None
+        self._last_decrease = 0.0
+        self._increases = 0
+        self._decreases = 0
+
+        self._cond = threading.Condition()
+        self._async_waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]]
+        self._async_waiters = deque()
+
+    @property
+    def target(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> float:
+        """
+        Wait for a free slot.
+
+        Returns:
+            The start time to pass back to `release`.
+        """
+
+        with self._cond:
+            while self._in_flight >= self.target:
+                self._cond.wait()
+            self._in_flight += 1
+        return time.monotonic()
+
+    async def acquire_async(self) -> float:
+        """Async variant of `acquire`."""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._in_flight < self.target:
+                    self._in_flight += 1
+                    return time.monotonic()
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                # Pass a wake-up this task can no longer use on to the next waiter
+                with self._cond:
+                    self._wake()
+                raise
+
+    def release(self, started: float, outcome: str) -> None:
+        """
+        Free a slot and feed the call's latency and outcome into the limit.
+
+        Args:
+            started: The value `acquire` returned.
+            outcome: SUCCESS, OVERLOAD or FAILURE.
+        """
+
+        now = time.monotonic()
+        with self._cond:
+            self._in_flight -= 1
+            if outcome == SUCCESS:
+                self._latencies.append(now - started)
+                if self._latency_degraded():
+                    self._decrease(started, "p95 latency rising")
+                elif self._in_flight + 1 >= self.target:
+                    # Only grow while the limit is actually in use
+                    self._increase()
+            elif outcome == OVERLOAD:
+                self._decrease(started, "overloaded")
+            self._wake()
+
+    def _latency_degraded(self) -> bool:
+        if len(self._latencies) < self._latencies.maxlen // 2:
+            return False
+        ordered = sorted(self._latencies)
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        if self._baseline_p95 is None:
+            self._baseline_p95 = p95
+            return False
+        degraded = p95 > self.latency_tolerance * self._baseline_p95
+        # A slow-moving baseline lets a lasting shift become the new normal
+        self._baseline_p95 += 0.05 * (p95 - self._baseline_p95)
+        return degraded
+
+    def _increase(self) -> None:
+        previous = self.target
+        self._limit = min(self.maximum, self._limit + 1 / self._limit)
+        if self.target > previous:
+            self._increases += 1
+
+    def _decrease(self, started: float, reason: str) -> None:
+        if started < self._last_decrease:
+            return
+        previous = self.target
+        self._limit = max(self.minimum, self._limit * self.decrease_factor)
+        self._last_decrease = time.monotonic()
+        self._latencies.clear()
+        if self.target < previous:
+            self._decreases += 1
+            logger.info(
+                f"{self.name} concurrency {previous} -> {self.target} ({reason})"
+            )
+
+    def _wake(self) -> None:
+        self._cond.notify_all()
+        free = self.target - self._in_flight
+        while free > 0 and self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            if future.cancelled():
+                continue
+            loop.call_soon_threadsafe(_resolve, future)
+            free -= 1
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                "concurrency_current": self._in_flight,
+                "concurrency_target": self.target,
+                "concurrency_increases": self._increases,
+                "concurrency_decreases": self._decreases,
+                "latency_baseline_p95": self._baseline_p95,
+            }
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
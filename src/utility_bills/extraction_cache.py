@@ -0,0 +1,462 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from logging_setup import setup_logging
+
+DEFAULT_MAX_AGE_DAYS = 180
+DEFAULT_MAX_SIZE_MB = 512
+
+# How many puts between automatic eviction passes
+EVICT_EVERY = 50
+
+
+def hash_file(file_path: str | Path) -> str:
+    """
+    Compute the SHA-256 of a file's bytes.
+
+    Args:
+        file_path: Path to the file.
+
+    Returns:
+        The hex digest of the file contents.
+    """
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compute_source_version(
+    *sources: str | Path, patterns: tuple[str, ...] = ("*.txt", "*.py")
+) -> str:
+    """
+    Fingerprint the prompt and code files a cached result was produced with.
+
+    Any edit to one of the files changes the version, so cached results are
+    not served after a prompt, model or mapping fix.
+
+    Args:
+        sources: Files, or directories whose files matching `patterns` are
+                 part of the version (not recursively).
+        patterns: Glob patterns of the files taken from each directory.
+
+    Returns:
+        A short hex digest identifying the current files.
+    """
+
+    digest = hashlib.sha256()
+    for source in map(Path, sources):
+        if source.is_dir():
+            files = sorted({f for pattern in patterns for f in source.glob(pattern)})
+        else:
+            files = [source]
+        for source_file in files:
+            digest.update(f"{source_file.parent.name}/{source_file.name}".encode())
+            digest.update(source_file.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class ExtractionCache:
+    """
+    A persistent, content-addressed cache of bill extractions.
+
+    Entries are keyed by the SHA-256 of the bill bytes, the prompt version and
+    the extraction model, so re-dropped copies of the same bill (for example the
+    `_1`, `_2` copies made by `move_bills.copy_files_to_inbox`) skip every
+    OpenAI call. Each entry stores the detected provider, the raw extraction and,
+    once available, the standard JSON.
+
+    The standard JSON also depends on the post-processors and the standard
+    transform, which change independently of the extraction. It is stored
+    with the `transform_version` it was built with, and a lookup under a
+    different version returns the extraction without it, so the bill is
+    transformed again instead of served an outdated standard JSON.
+
+    The cache lives in a single SQLite file and is safe to share between the
+    worker threads of one process. Entries older than `max_age_days` or beyond
+    `max_size_mb` (least recently used first) are evicted.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        prompt_version: str,
+        transform_version: str = "",
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_size_mb: float = DEFAULT_MAX_SIZE_MB,
+    ):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            db_path: Path to the SQLite file.
+            prompt_version: Fingerprint of what the extraction depends on,
+                            see `for_project`.
+            transform_version: Fingerprint of what the standard JSON depends
+                               on, see `for_project`.
+            max_age_days: Entries not used for this many days are evicted.
+            max_size_mb: Upper bound on the total size of stored payloads.
+        """
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.prompt_version = prompt_version
+        self.transform_version = transform_version
+        self.max_age_days = max_age_days
+        self.max_size_mb = max_size_mb
+
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS extractions (
+                cache_key TEXT PRIMARY KEY,
+                file_sha256 TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                provider_name TEXT NOT NULL,
+                extracted TEXT NOT NULL,
+                standard TEXT,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                transform_version TEXT
+            )
+            """)
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(extractions)")
+        }
+        if "transform_version" not in columns:
+            # Caches created before the column; their standard JSON is stale
+            self._conn.execute(
+                "ALTER TABLE extractions ADD COLUMN transform_version TEXT"
+            )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_extractions_last_access "
+            "ON extractions (last_access)"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def for_project(cls, project_root: str | Path, **kwargs) -> "ExtractionCache":
+        """
+        Open the default cache for a project at <project_root>/src/data/cache.
+
+        The prompt version covers the provider prompts and the models the
+        extraction schema is built from. The transform version covers the
+        post-processors, the rule mappings and mapper code, the
+        transformation prompts and the standard model.
+        """
+
+        project_root = Path(project_root)
+        # Prompts are read from the project, the code from this package
+        package_dir = Path(__file__).resolve().parent
+        prompt_version = compute_source_version(
+            project_root / "src" / "utility_bills" / "prompts",
+            package_dir / "pydantic_models",
+            package_dir / "extraction_schema.py",
+        )
+        transform_version = compute_source_version(
+            package_dir / "provider_functions",
+            package_dir / "mapper_functions",
+            package_dir / "transformation_prompts",
+            package_dir / "standard_template",
+        )
+        db_path = project_root / "src" / "data" / "cache" / "extraction_cache.sqlite3"
+        return cls(db_path, prompt_version, transform_version, **kwargs)
+
+    def make_key(self, file_sha256: str, model: str) -> str:
+        """
+        Build the cache key for a bill.
+
+        Args:
+            file_sha256: SHA-256 of the bill bytes, see `hash_file`.
+            model: The extraction model name.
+
+        Returns:
+            The cache key.
+        """
+
+        return f"{file_sha256}:{self.prompt_version}:{model}"
+
+    def get(self, cache_key: str) -> dict[str, Any] | None:
+        """
+        Look up a cached extraction.
+
+        Returns:
+            A dictionary with "provider_name", "extracted" and "standard"
+            (None if the bill was never transformed, or was transformed under
+            another transform version), or None on a miss.
+        """
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT provider_name, extracted, standard, transform_version "
+                "FROM extractions WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE extractions SET last_access = ? WHERE cache_key = ?",
+                (time.time(), cache_key),
+            )
+            self._conn.commit()
+
+        provider_name, extracted, standard, transform_version = row
+        if transform_version != self.transform_version:
+            standard = None
+        return {
+            "provider_name": provider_name,
+            "extracted": json.loads(extracted),
+            "standard": json.loads(standard) if standard else None,
+        }
+
+    def put(
+        self,
+        cache_key: str,
+        provider_name: str,
+        extracted: dict,
+        standard: dict | None = None,
+    ) -> None:
+        """
+        Store (or replace) the provider and raw extraction for a bill.
+
+        Args:
+            cache_key: Key from `make_key`.
+            provider_name: The detected provider.
+            extracted: The raw extraction, before post-processing.
+            standard: The standard JSON, if already available.
+        """
+
+        file_sha256, _, model = cache_key.split(":", 2)
+        extracted_text = json.dumps(extracted, ensure_ascii=False)
+        standard_text = json.dumps(standard, ensure_ascii=False) if standard else None
+        size = len(extracted_text) + len(standard_text or "")
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO extractions (
+                    cache_key, file_sha256, model, prompt_version, provider_name,
+                    extracted, standard, size_bytes, created_at, last_access,
+                    transform_version
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    cache_key,
+                    file_sha256,
+                    model,
+                    self.prompt_version,
+                    provider_name,
+                    extracted_text,
+                    standard_text,
+                    size,
+                    now,
+                    now,
+                    self.transform_version,
+                ),
+            )
+            self._conn.commit()
+            self._puts_since_evict += 1
+            run_evict = self._puts_since_evict >= EVICT_EVERY
+
+        if run_evict:
+            self.evict()
+
+    def set_standard(self, cache_key: str, standard: dict) -> None:
+        """
+        Attach the standard JSON to an existing cache entry.
+
+        It is recorded with the current transform version.
+        """
+
+        standard_text = json.dumps(standard, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE extractions SET standard = ?, transform_version = ?, "
+                "size_bytes = length(extracted) + ? WHERE cache_key = ?",
+                (standard_text, self.transform_version, len(standard_text), cache_key),
+            )
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """
+        Remove expired entries, then least recently used ones until under the size cap.
+
+        Returns:
+            The number of entries removed.
+        """
+
+        cutoff = time.time() - self.max_age_days * 86400
+        max_bytes = int(self.max_size_mb * 1024 * 1024)
+
+        with self._lock:
+            self._puts_since_evict = 0
+            removed = self._conn.execute(
+                "DELETE FROM extractions WHERE last_access < ?", (cutoff,)
+            ).rowcount
+
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM extractions"
+            ).fetchone()[0]
+            if total > max_bytes:
+                rows = self._conn.execute(
+                    "SELECT cache_key, size_bytes FROM extractions "
+                    "ORDER BY last_access ASC"
+                ).fetchall()
+                doomed = []
+                for cache_key, size in rows:
+                    if total <= max_bytes:
+                        break
+                    doomed.append((cache_key,))
+                    total -= size
+                self._conn.executemany(
+                    "DELETE FROM extractions WHERE cache_key = ?", doomed
+                )
+                removed += len(doomed)
+
+            self._conn.commit()
+
+        return removed
+
+    def purge(
+        self, older_than_days: float | None = None, provider_name: str | None = None
+    ) -> int:
+        """
+        Delete cache entries.
+
+        Args:
+            older_than_days: Only delete entries not used for this many days.
+            provider_name: Only delete entries for this provider.
+
+        Returns:
+            The number of entries removed.
+        """
+
+        clauses, params = [], []
+        if older_than_days is not None:
+            clauses.append("last_access < ?")
+            params.append(time.time() - older_than_days * 86400)
+        if provider_name is not None:
+            clauses.append("provider_name = ?")
+            params.append(provider_name.strip().lower())
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            removed = self._conn.execute(
+                f"DELETE FROM extractions{where}", params
+            ).rowcount
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        return removed
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Summarize the cache contents.
+
+        Returns:
+            Entry count, total payload size, entries per provider, the number
+            of entries built with an older prompt version and the number whose
+            standard JSON was built with an older transform version.
+        """
+
+        with self._lock:
+            count, size, oldest, newest = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), "
+                "MIN(created_at), MAX(last_access) FROM extractions"
+            ).fetchone()
+            by_provider = dict(
+                self._conn.execute(
+                    "SELECT provider_name, COUNT(*) FROM extractions "
+                    "GROUP BY provider_name ORDER BY COUNT(*) DESC"
+                ).fetchall()
+            )
+            stale = self._conn.execute(
+                "SELECT COUNT(*) FROM extractions WHERE prompt_version != ?",
+                (self.prompt_version,),
+            ).fetchone()[0]
+            stale_standard = self._conn.execute(
+                "SELECT COUNT(*) FROM extractions WHERE standard IS NOT NULL "
+                "AND transform_version IS NOT ?",
+                (self.transform_version,),
+            ).fetchone()[0]
+
+        return {
+            "db_path": str(self.db_path),
+            "prompt_version": self.prompt_version,
+            "entries": count,
+            "size_mb": round(size / (1024 * 1024), 3),
+            "transform_version": self.transform_version,
+            "stale_prompt_version_entries": stale,
+            "stale_standard_entries": stale_standard,
+            "oldest_entry": (
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(oldest))
+                if oldest
+                else None
+            ),
+            "last_access": (
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(newest))
+                if newest
+                else None
+            ),
+            "by_provider": by_provider,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Inspect or purge the extraction cache."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Show cache size and entries per provider.")
+
+    purge_parser = subparsers.add_parser("purge", help="Delete cache entries.")
+    purge_parser.add_argument(
+        "--older-than-days",
+        type=float,
+        default=None,
+        help="Only delete entries not used for this many days.",
+    )
+    purge_parser.add_argument(
+        "--provider", default=None, help="Only delete entries for this provider."
+    )
+
+    subparsers.add_parser(
+        "evict", help="Apply the age and size limits now (normally done on write)."
+    )
+
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[2]
+    logger = setup_logging(project_root / "logs")
+    cache = ExtractionCache.for_project(project_root)
+
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    elif args.command == "purge":
+        removed = cache.purge(args.older_than_days, args.provider)
+        logger.info(f"Purged {removed} cache entr{'y' if removed == 1 else 'ies'}")
+    elif args.command == "evict":
+        removed = cache.evict()
+        logger.info(f"Evicted {removed} cache entr{'y' if removed == 1 else 'ies'}")
+
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from functools import lru_cache
+from typing import Any, Union, get_args, get_origin
+
+from pydantic import BaseModel, create_model
+
+# json_schema_extra marker for a field the post-processor always computes, e.g.
+#   total: Optional[float] = Field(default=None, json_schema_extra=COMPUTED)
+# Fields named *_validation are computed without the marker.
+COMPUTED = {"computed": True}
+
+
+def is_computed(name: str, field) -> bool:
+    """Whether a model field is filled in after extraction rather than by the LLM."""
+
+    extra = field.json_schema_extra
+    return name.endswith("_validation") or (
+        isinstance(extra, dict) and extra.get("computed") is True
+    )
+
+
+def _slim_annotation(annotation: Any) -> Any:
+    """The annotation with every model in it replaced by its extraction model."""
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return extraction_model(annotation)
+    args = get_args(annotation)
+    if not args:
+        return annotation
+    slim_args = tuple(_slim_annotation(arg) for arg in args)
+    if slim_args == args:
+        return annotation
+    origin = get_origin(annotation)
+    return Union[slim_args] if origin is Union else origin[slim_args]
+
+
+@lru_cache(maxsize=None)
+def extraction_model(model_class: type[BaseModel]) -> type[BaseModel]:
+    """
+    The model sent to the LLM for a provider model: the same fields, without
+    the computed ones.
+
+    The `*_validation` objects (and fields marked COMPUTED) are overwritten by
+    the provider's post-processor, so asking the LLM for them only costs
+    schema and output tokens. Nested models are rebuilt only if they contain
+    computed fields somewhere; the rest are reused as they are. Every computed
+    field defaults to None, so the full model validates the slim output and
+    stays the type used for post-processing.
+
+    Args:
+        model_class: A provider extraction model, e.g. SPUBillExtract.
+
+    Returns:
+        The slim model (model_class itself if nothing is computed). It keeps
+        the class names, so the schema reads the same apart from the
+        removed fields.
+    """
+
+    fields = {}
+    changed = False
+    for name, field in model_class.model_fields.items():
+        if is_computed(name, field):
+            changed = True
+            continue
+        annotation = _slim_annotation(field.annotation)
+        changed = changed or annotation is not field.annotation
+        fields[name] = (annotation, field)
+
+    if not changed:
+        return model_class
+    return create_model(
+        model_class.__name__,
+        __doc__=model_class.__doc__,
+        __module__=model_class.__module__,
+        **fields,
+    )
+
+
+def to_full_bill(model_class: type[BaseModel], extracted: BaseModel) -> dict:
+    """
+    Dump a bill parsed with the extraction model in the full model's shape.
+
+    Computed fields come back as None, at their declared position, so the
+    post-processors and the saved JSON see the same structure as before.
+    """
+
+    return model_class.model_validate(extracted.model_dump()).model_dump(
+        exclude_none=False, exclude_unset=False
+    )
@@ -1,11 +1,29 @@
-import base64
+import argparse
 import json
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 
+from extraction_cache import ExtractionCache, hash_file
+from extraction_schema import extraction_model, to_full_bill
+from jsonl_sink import JsonlSink
+from local_provider_detector import LocalProviderDetector
 from logging_setup import setup_logging
-from mapper_functions.universal_transformer import transform_single_bill
+from mapper_functions.provider_detector import load_and_detect_provider
+from mapper_functions.universal_transformer import transform_bill
+from metrics import (
+    VALIDATIONS,
+    provider_scope,
+    stage_timer,
+    start_http_server,
+    write_textfile,
+)
 from openai import OpenAI
+from pipeline import CPU, NETWORK, Stage, StagedPipeline
+from prompt_cache import compact_schema_json, load_prompt_text
 from provider_router import (
     check_validation_for_provider,
     detect_provider_from_file_id,
@@ -15,6 +33,269 @@ from provider_router import (
     get_prompt_path_for_provider,
     postprocess_for_provider,
 )
+from request_scheduler import SCHEDULER, estimate_tokens, parse_rate_limit
+from results_store import ResultsStore
+from run_journal import DETECTED, EXTRACTED, SAVED, TRANSFORMED, UPLOADED, RunJournal
+from single_call import (
+    build_detect_and_extract_prompt,
+    get_detect_and_extract_text_format,
+    parse_detect_and_extract,
+    single_call_candidates,
+)
+from standard_template.standard_model import StandardUtilityBill
+
+PDF_EXTRACTION_MODEL = "gpt-4o-2024-08-06"
+PNG_EXTRACTION_MODEL = "gpt-4o"
+
+
+@lru_cache(maxsize=128)
+def build_png_extraction_prompt(prompt: str, model_class) -> str:
+    """
+    Append the model's JSON schema to an extraction prompt for the vision API.
+
+    The chat completions vision call only supports a generic JSON object
+    response format, so the schema has to travel inside the prompt itself.
+    The rendered prompt is cached per (prompt, model); prompts come from the
+    shared prompt cache, so repeated bills hit the same string object.
+
+    Args:
+        prompt: The provider-specific extraction prompt.
+        model_class: The Pydantic model class the response must match. The
+                     schema leaves out its computed fields.
+
+    Returns:
+        The full prompt text to send alongside the image.
+    """
+
+    # Create a prompt that includes the (compact, cached) extraction schema
+    return f"""{prompt}
+
+        You must return a valid JSON object that matches this schema:
+        {compact_schema_json(extraction_model(model_class))}
+
+        Return ONLY valid JSON, no markdown formatting, no code blocks, just the raw JSON object."""
+
+
+def parse_png_extraction(json_text: str, model_class) -> dict:
+    """
+    Parse and validate the raw JSON text returned by the vision API.
+
+    Args:
+        json_text: The message content returned by the model.
+        model_class: The Pydantic model class to validate against.
+
+    Returns:
+        The validated extraction as a plain dictionary.
+
+    Raises:
+        json.JSONDecodeError: If the response is not valid JSON.
+        ValidationError: If the data doesn't match the Pydantic schema.
+    """
+
+    json_text = json_text.strip()
+
+    # Remove markdown code blocks if present
+    if json_text.startswith("```json"):
+        json_text = json_text[7:]
+    if json_text.startswith("```"):
+        json_text = json_text[3:]
+    if json_text.endswith("```"):
+        json_text = json_text[:-3]
+
+    json_text = json_text.strip()
+    extracted_dict = json.loads(json_text)
+
+    # Validate against Pydantic model
+    validated = model_class(**extracted_dict)
+    return validated.model_dump(exclude_none=False, exclude_unset=False)
+
+
+def dump_bill_json(provider_name: str, extracted: dict) -> str:
+    """
+    Serialize a post-processed bill the way it is saved to processed/json or
+    unprocessed/json, with the provider name as the first key.
+    """
+
+    # Add provider metadata to the extracted data
+    extracted_with_metadata = {
+        "provider_name": provider_name,  # Add provider here
+        **extracted,  # All the existing extracted data
+    }
+    return json.dumps(
+        extracted_with_metadata,
+        indent=4,
+        ensure_ascii=False,
+        sort_keys=False,
+    )
+
+
+def save_extraction(
+    source_path: str | Path,
+    project_root: str | Path,
+    provider_name: str,
+    extracted: dict,
+    logger,
+    results_store: ResultsStore | None = None,
+    file_sha256: str | None = None,
+    jsonl_sink: JsonlSink | None = None,
+) -> dict:
+    """
+    Post-process, validate and file away one extracted bill.
+
+    Runs the provider's post-processor and validation checker, saves the JSON
+    to processed/json or unprocessed/json, and moves the source file into the
+    matching processed/<ext> or unprocessed/<ext> folder.
+
+    Args:
+        source_path: Path to the bill file (PDF or PNG) in the inbox.
+        project_root: Path to the project root directory.
+        provider_name: The normalized provider name.
+        extracted: The raw extraction returned by the LLM.
+        logger: Logger used for progress messages.
+        results_store: Optional results store the bill is also written to.
+        file_sha256: SHA-256 of the bill bytes, stored with the bill if known.
+        jsonl_sink: Optional JSONL sink the bill is also appended to.
+
+    Returns:
+        A dictionary with "json_path", "moved_path", "validation_passed",
+        "folder_type" and "extracted" (the post-processed bill, as saved).
+    """
+
+    source_path = Path(source_path)
+    data_dir = Path(project_root) / "src" / "data"
+    media = source_path.suffix.lstrip(".").lower()
+
+    with stage_timer("postprocess", provider_name):
+        extracted = postprocess_for_provider(provider_name, extracted)
+
+    # Check validation results using provider-specific checker
+    with stage_timer("validate", provider_name):
+        validation_passed = check_validation_for_provider(provider_name, extracted)
+    VALIDATIONS.inc(
+        provider=provider_name, result="pass" if validation_passed else "fail"
+    )
+    logger.info(
+        f"Validation {'passed' if validation_passed else 'failed'} for {source_path.name}"
+    )
+
+    # Determine destination folders based on validation
+    folder_type = "processed" if validation_passed else "unprocessed"
+    json_dir = data_dir / folder_type / "json"
+    media_dir = data_dir / folder_type / media
+
+    # Save JSON
+    json_path = json_dir / f"{source_path.stem}.json"
+    with stage_timer("write", provider_name):
+        json_path.write_text(dump_bill_json(provider_name, extracted), encoding="utf-8")
+        if results_store is not None:
+            results_store.put_bill(
+                source_path.stem,
+                provider_name,
+                extracted,
+                validation_passed,
+                source_name=source_path.name,
+                file_sha256=file_sha256,
+            )
+        if jsonl_sink is not None:
+            jsonl_sink.put_bill(
+                source_path.stem,
+                provider_name,
+                extracted,
+                validation_passed,
+                source_name=source_path.name,
+                file_sha256=file_sha256,
+            )
+    logger.debug(f"Saved JSON to {json_path}")
+
+    dest = media_dir / source_path.name
+    with stage_timer("move", provider_name):
+        shutil.move(source_path, dest)
+    logger.debug(f"Moved {media.upper()} to {dest} ({folder_type})")
+
+    return {
+        "json_path": json_path,
+        "moved_path": dest,
+        "validation_passed": validation_passed,
+        "folder_type": folder_type,
+        "extracted": extracted,
+    }
+
+
+def save_standard(
+    project_root: str | Path,
+    stem: str,
+    standard: StandardUtilityBill | dict,
+    cache: ExtractionCache | None = None,
+    cache_key: str | None = None,
+    results_store: ResultsStore | None = None,
+    jsonl_sink: JsonlSink | None = None,
+) -> Path:
+    """
+    Write one bill's standard JSON to json_results and the configured stores.
+
+    Shared by the sequential, async and batch extractors, after the transform
+    (or the cache) produced the standard bill.
+
+    Args:
+        project_root: Path to the project root directory.
+        stem: File name (without extension) of the standard JSON.
+        standard: A freshly transformed bill, or the standard JSON restored
+                  from the cache.
+        cache: Extraction cache a freshly transformed bill is cached in.
+        cache_key: Cache key of the bill; a restored bill is not re-cached.
+        results_store: Optional results store the standard JSON is written to.
+        jsonl_sink: Optional JSONL sink the standard JSON is appended to.
+
+    Returns:
+        The path of the standard JSON.
+    """
+
+    json_results_dir = Path(project_root) / "src" / "data" / "json_results"
+    json_results_dir.mkdir(parents=True, exist_ok=True)
+    standard_json_path = json_results_dir / f"{stem}.json"
+
+    if isinstance(standard, StandardUtilityBill):
+        standard_json_path.write_text(
+            standard.model_dump_json(indent=4, exclude_none=False, exclude_unset=False),
+            encoding="utf-8",
+        )
+        standard = standard.model_dump()
+        if cache is not None and cache_key is not None:
+            cache.set_standard(cache_key, standard)
+    else:
+        standard_json_path.write_text(
+            json.dumps(standard, indent=4, ensure_ascii=False), encoding="utf-8"
+        )
+
+    if results_store is not None:
+        results_store.set_standard(stem, standard)
+    if jsonl_sink is not None:
+        jsonl_sink.set_standard(stem, standard)
+    return standard_json_path
+
+
+@dataclass
+class PdfJob:
+    """The state of one PDF as it moves through the extraction stages."""
+
+    path: Path
+    project_root: Path
+    # Pick the bill up from its last journaled stage
+    resume: bool = False
+    result: dict = field(default_factory=dict)
+    file_sha256: str | None = None
+    cache_key: str | None = None
+    cached: dict | None = None
+    provider_name: str | None = None
+    # Single-call candidates from an inconclusive local detection
+    candidates: tuple[str, ...] = ()
+    file_id: str | None = None
+    file_bytes: int = 0
+    extracted: dict | None = None
+    folder_type: str | None = None
+
+    def __post_init__(self):
+        self.result = {"pdf": str(self.path), "ok": False}
 
 
 class Extractor:
@@ -32,7 +313,15 @@ class Extractor:
     """
 
     def __init__(
-        self, client: OpenAI | None = None, project_root: str | Path | None = None
+        self,
+        client: OpenAI | None = None,
+        project_root: str | Path | None = None,
+        cache: ExtractionCache | None = None,
+        local_detector: LocalProviderDetector | None = None,
+        single_call: bool = False,
+        journal: RunJournal | None = None,
+        results_store: ResultsStore | None = None,
+        jsonl_sink: JsonlSink | None = None,
     ):
         """
         Initialize the Extractor with an OpenAI client and logging setup.
@@ -41,13 +330,38 @@ class Extractor:
             client: OpenAI client instance.
             project_root: Path to the project root directory. Used to set up
                           the logs directory at <project_root>/logs.
+            cache: Optional extraction cache. When set, bills whose bytes were
+                   already extracted with the current prompts and model reuse
+                   the cached provider, extraction and standard JSON.
+            local_detector: Optional LLM-free provider detector. It runs before
+                            the detection call, which is only made when the
+                            local confidence is below its threshold.
+            single_call: If True, PDFs that local detection narrows down to
+                         a few candidates without placing them are detected
+                         among those candidates and extracted in one LLM
+                         call instead of two. Needs `local_detector`; bills
+                         without candidates use the two-step path.
+            journal: Optional run journal. When set, each PDF's completed stages
+                     are recorded so an interrupted run can be resumed.
+            results_store: Optional results store. When set, every saved bill
+                           and its standard JSON are also written to it.
+            jsonl_sink: Optional JSONL sink. When set, every saved bill and its
+                        standard JSON are also appended to it.
 
         Note:
             The logger is configured to write to both console and a rotating log file
             at <project_root>/logs/utility_bills.log.
         """
 
-        self.client = client or OpenAI()
+        # The request scheduler owns retries, so the SDK must not retry underneath it
+        self.client = client or OpenAI(max_retries=0)
+        self.cache = cache
+        self.local_detector = local_detector
+        self.single_call = single_call
+        self.journal = journal
+        self.results_store = results_store
+        self.jsonl_sink = jsonl_sink
+        self.pipeline: StagedPipeline | None = None
 
         if project_root is None:
             project_root = Path(__file__).resolve().parents[2]
@@ -61,6 +375,9 @@ class Extractor:
         """
         Load a prompt template from a text file.
 
+        Files are served from the shared in-memory prompt cache and only
+        re-read when their mtime changes.
+
         Args:
             file_path: Path to the prompt text file to load.
 
@@ -72,7 +389,7 @@ class Extractor:
             UnicodeDecodeError: If the file cannot be decoded as UTF-8.
         """
 
-        return Path(file_path).read_text(encoding="utf-8")
+        return load_prompt_text(file_path)
 
     def upload_pdf(self, file_path: str | Path) -> str:
         """
@@ -89,10 +406,20 @@ class Extractor:
             openai.APIError: If the upload fails due to API issues.
         """
 
-        with open(file_path, "rb") as f:
-            return self.client.files.create(file=f, purpose="user_data").id
-
-    def extract_json_from_pdf(self, file_id: str, prompt: str, model_class) -> dict:
+        # Send bytes rather than the open file so a retried upload is complete
+        file_path = Path(file_path)
+        with stage_timer("upload"):
+            return SCHEDULER.call(
+                None,
+                0,
+                self.client.files.create,
+                file=(file_path.name, file_path.read_bytes()),
+                purpose="user_data",
+            ).id
+
+    def extract_json_from_pdf(
+        self, file_id: str, prompt: str, model_class, file_bytes: int = 0
+    ) -> dict:
         """
         Extract structured JSON data from a PDF using OpenAI's structured output API.
 
@@ -103,32 +430,90 @@ class Extractor:
             file_id: The OpenAI file ID of the uploaded PDF.
             prompt: The prompt text instructing the LLM on what to extract.
             model_class: The Pydantic model class to use for structured output.
+                         The LLM gets its extraction model, without the
+                         computed fields.
+            file_bytes: Size of the PDF, used to budget the request's tokens.
 
         Returns:
             A dictionary containing the extracted utility bill data, conforming to
-            the provided model schema.
+            the provided model schema, with the computed fields set to None.
 
         Raises:
             openai.APIError: If the API call fails.
             ValidationError: If the extracted data doesn't match the Pydantic schema.
         """
 
-        response = self.client.responses.parse(
-            model="gpt-4o-2024-08-06",
-            input=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "input_file", "file_id": file_id},
-                        {"type": "input_text", "text": prompt},
-                    ],
-                }
-            ],
-            text_format=model_class,
-        )
-        return response.output_parsed.model_dump(
-            exclude_none=False, exclude_unset=False
-        )
+        extraction_class = extraction_model(model_class)
+        with stage_timer("extract", model=PDF_EXTRACTION_MODEL):
+            response = SCHEDULER.call(
+                PDF_EXTRACTION_MODEL,
+                estimate_tokens(
+                    prompt, compact_schema_json(extraction_class), file_bytes=file_bytes
+                ),
+                self.client.responses.parse,
+                model=PDF_EXTRACTION_MODEL,
+                input=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "input_file", "file_id": file_id},
+                            {"type": "input_text", "text": prompt},
+                        ],
+                    }
+                ],
+                text_format=extraction_class,
+            )
+        return to_full_bill(model_class, response.output_parsed)
+
+    def detect_and_extract_from_pdf(
+        self, file_id: str, candidates: tuple[str, ...], file_bytes: int = 0
+    ) -> tuple[str | None, dict | None]:
+        """
+        Detect the provider and extract its JSON in a single structured-output call.
+
+        The response schema is a union of the candidate providers' models,
+        discriminated by provider_name, so the model reads the PDF once
+        instead of once for detection and once for extraction.
+
+        Args:
+            file_id: The OpenAI file ID of the uploaded PDF.
+            candidates: The providers local detection ranked highest, see
+                        `single_call_candidates`.
+            file_bytes: Size of the PDF, used to budget the request's tokens.
+
+        Returns:
+            (provider_name, extracted), where extracted has the same shape as
+            `extract_json_from_pdf` returns for that provider, or (None, None)
+            if the bill is none of the candidates.
+
+        Raises:
+            openai.APIError: If the API call fails.
+            ValidationError: If the response doesn't match any provider schema.
+        """
+
+        prompt = build_detect_and_extract_prompt(candidates)
+        text_format = get_detect_and_extract_text_format(candidates)
+        with stage_timer("extract", model=PDF_EXTRACTION_MODEL):
+            response = SCHEDULER.call(
+                PDF_EXTRACTION_MODEL,
+                estimate_tokens(prompt, json.dumps(text_format), file_bytes=file_bytes),
+                self.client.responses.create,
+                model=PDF_EXTRACTION_MODEL,
+                input=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "input_file", "file_id": file_id},
+                            {
+                                "type": "input_text",
+                                "text": prompt,
+                            },
+                        ],
+                    }
+                ],
+                text={"format": text_format},
+            )
+        return parse_detect_and_extract(response.output_text, candidates)
 
     def extract_json_from_png(
         self,
@@ -159,59 +544,524 @@ class Extractor:
 
         base64_image = encode_png_to_base64(png_path)
 
-        # Get the JSON schema from the Pydantic model
-        json_schema = model_class.model_json_schema()
+        full_prompt = build_png_extraction_prompt(prompt, model_class)
+
+        with stage_timer("extract", model=PNG_EXTRACTION_MODEL):
+            response = SCHEDULER.call(
+                PNG_EXTRACTION_MODEL,
+                estimate_tokens(full_prompt, images=1, max_output_tokens=4000),
+                self.client.chat.completions.create,
+                model=PNG_EXTRACTION_MODEL,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:image/png;base64,{base64_image}",
+                                },
+                            },
+                            {
+                                "type": "text",
+                                "text": full_prompt,
+                            },
+                        ],
+                    }
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=4000,
+            )
 
-        # Create a prompt that includes the schema
-        full_prompt = f"""{prompt}
+        return parse_png_extraction(response.choices[0].message.content, model_class)
 
-        You must return a valid JSON object that matches this schema:
-        {json.dumps(json_schema, indent=2)}
+    def _log_scheduler_stats(self) -> None:
+        """Log per-model request counts and the adaptive concurrency reached."""
 
-        Return ONLY valid JSON, no markdown formatting, no code blocks, just the raw JSON object."""
+        for model, stats in SCHEDULER.stats().items():
+            self.logger.info(
+                f"{model}: {stats['requests']} requests, {stats['tokens']} tokens, "
+                f"{stats['retries']} retries, concurrency "
+                f"{stats.get('concurrency_current', '-')}/"
+                f"{stats.get('concurrency_target', '-')} (current/target)"
+            )
+
+    def _detect_locally(self, file_path: Path) -> tuple[str | None, tuple[str, ...]]:
+        """
+        Run the local provider detector, if one is configured.
+
+        Returns:
+            (provider_name, candidates). provider_name is set when the local
+            confidence clears the detector's threshold, otherwise None (the
+            caller falls back to the LLM). In single-call mode, candidates
+            are the best-scoring providers of an inconclusive detection.
+        """
+
+        if self.local_detector is None:
+            return None, ()
+
+        with stage_timer("detect", model="local"):
+            if file_path.suffix.lower() == ".png":
+                detection = self.local_detector.detect_png(file_path)
+            else:
+                detection = self.local_detector.detect_pdf(file_path)
+
+        if detection.provider_name is None:
+            self.logger.debug(
+                f"Local detection inconclusive for {file_path.name} "
+                f"(confidence {detection.confidence:.2f}), using the LLM"
+            )
+            if not self.single_call:
+                return None, ()
+            return None, single_call_candidates(detection.scores)
+
+        self.logger.info(
+            f"Detected provider locally: {detection.provider_name} "
+            f"(confidence {detection.confidence:.2f})"
+        )
+        return detection.provider_name, ()
+
+    def _cache_lookup(
+        self, file_path: Path, model: str, file_sha256: str | None = None
+    ) -> tuple[str | None, dict | None]:
+        """
+        Look up a bill in the extraction cache, if one is configured.
+
+        Args:
+            file_path: The bill.
+            model: The extraction model name.
+            file_sha256: The bill's hash, if the caller already computed it.
+
+        Returns:
+            (cache_key, cached_entry). Both are None when caching is disabled;
+            cached_entry is None on a miss.
+        """
+
+        if self.cache is None:
+            return None, None
+
+        cache_key = self.cache.make_key(file_sha256 or hash_file(file_path), model)
+        return cache_key, self.cache.get(cache_key)
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
+    def save_standard_json(
+        self,
+        json_path: Path,
+        project_root: Path,
+        stem: str,
+        cache_key: str | None = None,
+        cached_standard: dict | None = None,
+        extracted: dict | None = None,
+        provider_name: str | None = None,
+    ) -> Path | None:
+        """
+        Write the standard-format JSON for a validated bill to json_results.
+
+        Uses the cached standard JSON when available, otherwise transforms the
+        bill with the universal transformer and caches the result. The bill is
+        taken as handed over by `save_extraction`; only bills resumed from the
+        journal are read back from json_path.
+
+        Args:
+            json_path: Path to the saved provider-specific JSON.
+            project_root: Path to the project root directory.
+            stem: File name (without extension) for the standard JSON.
+            cache_key: Cache key of the bill, if caching is enabled.
+            cached_standard: Standard JSON from a cache hit, if any.
+            extracted: The post-processed bill returned by `save_extraction`.
+            provider_name: The bill's provider, required with `extracted`.
+
+        Returns:
+            The path of the standard JSON, or None if the transform failed.
+        """
+
+        try:
+            if cached_standard is not None:
+                standard_json_path = save_standard(
+                    project_root,
+                    stem,
+                    cached_standard,
+                    results_store=self.results_store,
+                    jsonl_sink=self.jsonl_sink,
+                )
+                self.logger.info(
+                    f" Standard JSON restored from cache to {standard_json_path}"
+                )
+                return standard_json_path
+
+            if extracted is None:
+                # Resumed from the journal: the saved bill is read back
+                extracted, provider_name = load_and_detect_provider(str(json_path))
+
+            # Rule mapping, or the LLM transformer for unmapped providers
+            standard_bill = transform_bill(extracted, provider_name, client=self.client)
+            standard_json_path = save_standard(
+                project_root,
+                stem,
+                standard_bill,
+                self.cache,
+                cache_key,
+                self.results_store,
+                self.jsonl_sink,
+            )
+
+            self.logger.info(f" Standard JSON saved to {standard_json_path}")
+            return standard_json_path
+
+        except Exception as transform_error:
+            self.logger.error(
+                f"Error transforming to standard format: {repr(transform_error)}"
+            )
+            return None
+
+    def _run_per_file(self, func, paths: list[Path], max_workers: int) -> list[dict]:
+        """
+        Run a per-file pipeline over many files, optionally on a thread pool.
+
+        Args:
+            func: Callable taking a single file path and returning its result dict.
+            paths: Files to process, already in the desired output order.
+            max_workers: Maximum number of files in flight at once. Values <= 1
+                         process the files sequentially on the calling thread.
+
+        Returns:
+            The per-file result dictionaries in the same order as `paths`.
+        """
+
+        if max_workers <= 1 or len(paths) <= 1:
+            return [func(path) for path in paths]
+
+        workers = min(max_workers, len(paths))
+        self.logger.info(f"Processing {len(paths)} file(s) with {workers} workers")
+
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bill-worker"
+        ) as executor:
+            # executor.map yields results in submission order
+            return list(executor.map(func, paths))
+
+    def _pdf_stages(self) -> dict:
+        """The PDF pipeline's stage handlers, in order, keyed by stage name."""
+
+        return {
+            "prepare": self._pdf_prepare,
+            "upload": self._pdf_upload,
+            "detect": self._pdf_detect,
+            "extract": self._pdf_extract,
+            "save": self._pdf_save,
+            "transform": self._pdf_transform,
+        }
+
+    def _journal(self, job: PdfJob, stage: str, **fields) -> None:
+        if self.journal is not None and job.file_sha256 is not None:
+            self.journal.record(job.file_sha256, stage, **fields)
+
+    def _resume_stage(self, job: PdfJob) -> str | None:
+        """
+        Restore a bill's journaled progress.
+
+        Bills that already finished (transformed, or saved and moved out of
+        the inbox) are not resumed, so a copy dropped again is served from
+        the cache instead of being extracted from its old upload.
+
+        Returns:
+            The stage to continue at, or None to process the bill from scratch.
+        """
+
+        entry = self.journal.get(job.file_sha256)
+        if entry is None:
+            return None
+        resaved = entry["stage"] == SAVED and entry["moved_pdf_path"] != str(job.path)
+        if entry["stage"] == TRANSFORMED or resaved:
+            # A finished bill dropped into the inbox again; it goes through
+            # the cache like any other re-dropped bill
+            return None
+
+        job.provider_name = entry["provider_name"]
+        extracted = self.journal.load_raw(entry) if job.provider_name else None
+        if entry["stage"] == SAVED:
+            # Saved and moved out of the inbox; only the transform is missing
+            job.folder_type = "processed"
+            job.result.update(
                 {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}",
-                            },
-                        },
-                        {
-                            "type": "text",
-                            "text": full_prompt,
-                        },
-                    ],
+                    "ok": True,
+                    "json_path": entry["json_path"],
+                    "moved_pdf_path": entry["moved_pdf_path"],
+                    "validation_passed": True,
+                    "standard_json_path": None,
                 }
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=4000,
+            )
+            next_stage = "transform"
+        elif extracted is not None:
+            job.extracted = extracted
+            next_stage = "save"
+        elif entry["file_id"]:
+            job.file_id = entry["file_id"]
+            job.file_bytes = job.path.stat().st_size
+            # Single-call candidates are not journaled; detect in two steps
+            next_stage = "extract" if job.provider_name else "detect"
+        else:
+            return None
+
+        self.logger.info(f"Resuming {job.path.name} after the {entry['stage']} stage")
+        return next_stage
+
+    def _pdf_prepare(self, job: PdfJob) -> str:
+        """
+        Hash the bill, resume it from the journal or serve it from the cache,
+        and try the local provider detector.
+        """
+
+        self.logger.info(f"Processing PDF: {job.path.name}")
+
+        if self.cache is not None or self.journal is not None:
+            job.file_sha256 = job.file_sha256 or hash_file(job.path)
+        job.cache_key, job.cached = self._cache_lookup(
+            job.path, PDF_EXTRACTION_MODEL, job.file_sha256
         )
 
-        # Parse the JSON response
-        json_text = response.choices[0].message.content.strip()
+        if job.resume and self.journal is not None:
+            next_stage = self._resume_stage(job)
+            if next_stage is not None:
+                return next_stage
+
+        # Re-dropped bills are served from the cache without any API calls
+        if job.cached is not None:
+            job.provider_name = job.cached["provider_name"]
+            job.extracted = job.cached["extracted"]
+            self.logger.info(f"Cache hit: {job.path.name} ({job.provider_name})")
+            return "save"
+
+        # Try the local fingerprint match before spending an LLM call
+        job.provider_name, job.candidates = self._detect_locally(job.path)
+        return "upload"
+
+    def _pdf_upload(self, job: PdfJob) -> str:
+        with provider_scope(job.provider_name):
+            job.file_id = self.upload_pdf(str(job.path))
+        job.file_bytes = job.path.stat().st_size
+        self._journal(
+            job,
+            UPLOADED,
+            pdf_name=job.path.name,
+            file_id=job.file_id,
+            provider_name=job.provider_name,
+        )
+
+        # With single-call candidates the extract stage detects the provider too
+        if job.provider_name is None and not job.candidates:
+            return "detect"
+        return "extract"
+
+    def _pdf_detect(self, job: PdfJob) -> str:
+        self.logger.info(
+            f"Uploaded {job.path.name}, detecting the provider and selecting the prompt"
+        )
+        job.provider_name = detect_provider_from_file_id(
+            job.file_id, self.client, file_bytes=job.file_bytes
+        )
+        self.logger.info(f"Detected provider: {job.provider_name}")
+        self._journal(job, DETECTED, provider_name=job.provider_name)
+        return "extract"
 
-        # Remove markdown code blocks if present
-        if json_text.startswith("```json"):
-            json_text = json_text[7:]
-        if json_text.startswith("```"):
-            json_text = json_text[3:]
-        if json_text.endswith("```"):
-            json_text = json_text[:-3]
+    def _pdf_extract(self, job: PdfJob) -> str:
+        if job.provider_name is None:
+            self.logger.info(
+                f"Uploaded {job.path.name}, detecting the provider among "
+                f"{list(job.candidates)} and extracting in one call"
+            )
+            job.provider_name, job.extracted = self.detect_and_extract_from_pdf(
+                job.file_id, job.candidates, job.file_bytes
+            )
+            if job.provider_name is None:
+                # None of the candidates; items only move forward, so the
+                # two-step detection runs here
+                self.logger.info(
+                    f"{job.path.name} is none of the candidates, detecting in two steps"
+                )
+                self._pdf_detect(job)
+            else:
+                self.logger.info(f"Detected provider: {job.provider_name}")
+
+        if job.extracted is None:
+            # Get its prompt
+            prompt_path = get_prompt_path_for_provider(
+                job.project_root, job.provider_name
+            )
+            self.logger.info(f"Using prompt: {prompt_path.name}")
+            prompt_text = self.load_prompt(str(prompt_path))
 
-        json_text = json_text.strip()
-        extracted_dict = json.loads(json_text)
+            model_class = get_model_for_provider(job.provider_name)
+            if model_class is None:
+                raise ValueError(
+                    f"No Pydantic model registered for provider: {job.provider_name}"
+                )
 
-        # Validate against Pydantic model
-        validated = model_class(**extracted_dict)
-        return validated.model_dump(exclude_none=False, exclude_unset=False)
+            self.logger.info("Calling LLM to extract the JSON")
+            with provider_scope(job.provider_name):
+                job.extracted = self.extract_json_from_pdf(
+                    job.file_id, prompt_text, model_class, file_bytes=job.file_bytes
+                )
 
-    def process_inbox_pdfs(self, project_root: str | Path) -> list[dict]:
+        if self.cache is not None:
+            self.cache.put(job.cache_key, job.provider_name, job.extracted)
+        if self.journal is not None:
+            raw_path = self.journal.save_raw(job.file_sha256, job.extracted)
+            self._journal(
+                job, EXTRACTED, provider_name=job.provider_name, raw_path=raw_path
+            )
+        return "save"
+
+    def _pdf_save(self, job: PdfJob) -> str | None:
+        """Post-process, validate, write the JSON and move the PDF."""
+
+        saved = save_extraction(
+            job.path,
+            job.project_root,
+            job.provider_name,
+            job.extracted,
+            self.logger,
+            results_store=self.results_store,
+            file_sha256=job.file_sha256,
+            jsonl_sink=self.jsonl_sink,
+        )
+        job.folder_type = saved["folder_type"]
+        # Handed to the transform stage as is, instead of re-reading the JSON
+        job.extracted = saved["extracted"]
+        job.result.update(
+            {
+                "ok": True,
+                "json_path": str(saved["json_path"]),
+                "moved_pdf_path": str(saved["moved_path"]),
+                "validation_passed": saved["validation_passed"],
+                "standard_json_path": None,
+            }
+        )
+        self._journal(
+            job,
+            SAVED,
+            pdf_name=job.path.name,
+            provider_name=job.provider_name,
+            json_path=saved["json_path"],
+            moved_pdf_path=saved["moved_path"],
+            validation_passed=saved["validation_passed"],
+        )
+
+        if saved["validation_passed"]:
+            return "transform"
+        self.logger.info(f"Finished: {job.path.name} -> {job.folder_type}")
+        return None
+
+    def _pdf_transform(self, job: PdfJob) -> None:
+        standard_json_path = self.save_standard_json(
+            Path(job.result["json_path"]),
+            job.project_root,
+            job.path.stem,
+            cache_key=job.cache_key,
+            cached_standard=job.cached["standard"] if job.cached else None,
+            extracted=job.extracted,
+            provider_name=job.provider_name,
+        )
+        if standard_json_path:
+            job.result["standard_json_path"] = str(standard_json_path)
+            self._journal(job, TRANSFORMED, standard_json_path=standard_json_path)
+        self.logger.info(f"Finished: {job.path.name} -> {job.folder_type}")
+        return None
+
+    def _pdf_failed(self, job: PdfJob, stage: str, error: Exception) -> None:
+        self.logger.error(
+            f"Error processing {job.path.name} ({stage}): {repr(error)}",
+            exc_info=error,
+        )
+        job.result["ok"] = False
+        job.result["error"] = repr(error)
+        if self.journal is not None and job.file_sha256 is not None:
+            self.journal.record_error(job.file_sha256, repr(error))
+
+    def process_pdf(self, pdf_path: str | Path, project_root: str | Path) -> dict:
+        """
+        Run the full pipeline for a single PDF from the inbox.
+
+        Uploads the PDF, detects the provider, extracts and validates the JSON,
+        saves it to processed/ or unprocessed/, moves the PDF alongside it, and
+        transforms validated bills to the standard format. The stages are the
+        same as in the staged pipeline of `process_inbox_pdfs`, run inline.
+
+        Errors are caught and reported in the returned dictionary so that one
+        bad file never stops the rest of a batch.
+
+        Args:
+            pdf_path: Path to the PDF file in the inbox.
+            project_root: Path to the project root directory containing the
+                         src/data directories.
+
+        Returns:
+            The per-file result dictionary described in `process_inbox_pdfs`.
+        """
+
+        return self._run_pdf_job(PdfJob(Path(pdf_path), Path(project_root)))
+
+    def _run_pdf_job(self, job: PdfJob) -> dict:
+        stages = self._pdf_stages()
+
+        stage = "prepare"
+        while stage is not None:
+            try:
+                stage = stages[stage](job)
+            except Exception as e:
+                self._pdf_failed(job, stage, e)
+                break
+
+        return job.result
+
+    def build_pdf_pipeline(
+        self, max_workers: int, stage_workers: dict[str, int] | None = None
+    ) -> StagedPipeline:
+        """
+        Build the staged PDF pipeline.
+
+        Network-bound stages (upload, detect, extract, transform) get
+        `max_workers` threads each; the CPU-bound stages (prepare: hashing and
+        local detection; save: post-processing, validation, JSON
+        serialization and the file move) share the machine's cores. Queues
+        between stages hold twice their stage's workers.
+
+        Args:
+            max_workers: Threads per network-bound stage.
+            stage_workers: Per-stage overrides, e.g. {"transform": 2}.
+
+        Returns:
+            The pipeline; its `occupancy()` shows where bills are waiting.
+        """
+
+        stage_workers = stage_workers or {}
+        unknown = set(stage_workers) - set(self._pdf_stages())
+        if unknown:
+            raise ValueError(f"Unknown pipeline stage(s): {sorted(unknown)}")
+
+        cpu_workers = min(4, os.cpu_count() or 1)
+        stages = []
+        for name, handler in self._pdf_stages().items():
+            kind = CPU if name in ("prepare", "save") else NETWORK
+            default = cpu_workers if kind == CPU else max_workers
+            stages.append(
+                Stage(
+                    name, handler, workers=stage_workers.get(name, default), kind=kind
+                )
+            )
+
+        return StagedPipeline(
+            stages,
+            on_error=lambda job, stage, error: self._pdf_failed(job, stage, error),
+            logger=self.logger,
+        )
+
+    def process_inbox_pdfs(
+        self,
+        project_root: str | Path,
+        max_workers: int = 1,
+        stage_workers: dict[str, int] | None = None,
+        resume: bool = False,
+    ) -> list[dict]:
         """
         Process all PDF files in the inbox directory.
 
@@ -225,9 +1075,24 @@ class Extractor:
         Each file is processed independently, and errors for one file don't stop
         processing of other files. All operations are logged.
 
+        With more than one worker the steps run as a staged pipeline (see
+        `build_pdf_pipeline`): each stage has its own thread pool and a bounded
+        queue in front of it, so a slow transform no longer holds up the next
+        upload. The pipeline is kept on `self.pipeline` so its occupancy can be
+        inspected while it runs.
+
         Args:
             project_root: Path to the project root directory containing the
                          src/data/inbox and src/data/processed directories.
+            max_workers: Threads per network-bound stage. Defaults to 1, which
+                         processes the PDFs sequentially without a pipeline.
+            stage_workers: Per-stage thread counts overriding the defaults.
+            resume: If True, continue each bill from its last stage in the run
+                    journal (opening the project's journal if none was given):
+                    uploaded bills are not uploaded again, extracted ones go
+                    straight to saving, and bills that were saved but never
+                    transformed are transformed even though their PDFs have
+                    left the inbox.
 
         Returns:
             A list of dictionaries, one per processed PDF. Each dictionary contains:
@@ -239,155 +1104,183 @@ class Extractor:
 
         Note:
             The processed/json and processed/pdf directories are created automatically
-            if they don't exist. PDFs are processed in sorted order by filename.
+            if they don't exist. Results are returned in sorted order by filename,
+            regardless of the order in which concurrent workers finish.
         """
 
         project_root = Path(project_root)
         inbox_dir = project_root / "src" / "data" / "inbox"
 
-        processed_json_dir = project_root / "src" / "data" / "processed" / "json"
-        processed_pdf_dir = project_root / "src" / "data" / "processed" / "pdf"
-        unprocessed_json_dir = project_root / "src" / "data" / "unprocessed" / "json"
-        unprocessed_pdf_dir = project_root / "src" / "data" / "unprocessed" / "pdf"
-
-        processed_json_dir.mkdir(parents=True, exist_ok=True)
-        processed_pdf_dir.mkdir(parents=True, exist_ok=True)
-        unprocessed_json_dir.mkdir(parents=True, exist_ok=True)
-        unprocessed_pdf_dir.mkdir(parents=True, exist_ok=True)
+        for sub in ("processed", "unprocessed"):
+            (project_root / "src" / "data" / sub / "json").mkdir(
+                parents=True, exist_ok=True
+            )
+            (project_root / "src" / "data" / sub / "pdf").mkdir(
+                parents=True, exist_ok=True
+            )
 
         pdf_paths = sorted(inbox_dir.glob("*.pdf"))
         self.logger.info(f"Found {len(pdf_paths)} PDF(s) in inbox. Starting extraction")
 
-        results: list[dict] = []
+        jobs = [PdfJob(pdf_path, project_root, resume) for pdf_path in pdf_paths]
+        if resume:
+            if self.journal is None:
+                self.journal = RunJournal.for_project(project_root)
+            jobs += self._pending_transform_jobs(project_root)
 
-        for pdf_path in pdf_paths:
-            self.logger.info(f"Processing PDF: {pdf_path.name}")
-            file_result = {"pdf": str(pdf_path), "ok": False}
+        if max_workers <= 1 or len(jobs) <= 1:
+            results = [self._run_pdf_job(job) for job in jobs]
+        else:
+            self.pipeline = self.build_pdf_pipeline(max_workers, stage_workers)
+            self.pipeline.run(jobs)
+            results = [job.result for job in jobs]
 
-            try:
-                file_id = self.upload_pdf(str(pdf_path))
-                self.logger.info(
-                    "Uploaded PDF, detecting the provider and selecting the prompt"
-                )
+        self.logger.info("All PDFs processed.")
+        self._log_scheduler_stats()
+        return results
+
+    def _pending_transform_jobs(self, project_root: Path) -> list[PdfJob]:
+        """Jobs for journaled bills that were saved but never transformed."""
+
+        inbox_dir = project_root / "src" / "data" / "inbox"
+        jobs = []
+        for entry in self.journal.pending_transforms():
+            moved_pdf_path = Path(entry["moved_pdf_path"])
+            if not moved_pdf_path.exists() or not Path(entry["json_path"]).exists():
+                continue
+            job = PdfJob(
+                moved_pdf_path, project_root, True, file_sha256=entry["file_sha256"]
+            )
+            job.result["pdf"] = str(inbox_dir / entry["pdf_name"])
+            jobs.append(job)
+
+        if jobs:
+            self.logger.info(
+                f"Resuming {len(jobs)} saved bill(s) that were never transformed"
+            )
+        return jobs
+
+    def process_png(self, png_path: str | Path, project_root: str | Path) -> dict:
+        """
+        Run the full pipeline for a single PNG from the inbox.
+
+        Detects the provider with the vision model, extracts and validates the
+        JSON, saves it to processed/ or unprocessed/, moves the PNG alongside it,
+        and transforms validated bills to the standard format.
+
+        Args:
+            png_path: Path to the PNG file in the inbox.
+            project_root: Path to the project root directory containing the
+                         src/data directories.
+
+        Returns:
+            The per-file result dictionary described in `process_inbox_pngs`.
+        """
+
+        png_path = Path(png_path)
+        project_root = Path(project_root)
+
+        self.logger.info(f"Processing PNG: {png_path.name}")
+
+        file_result = {"png": str(png_path), "ok": False}
+
+        try:
+
+            cache_key, cached = self._cache_lookup(png_path, PNG_EXTRACTION_MODEL)
+
+            if cached is not None:
+                provider_name = cached["provider_name"]
+                extracted = cached["extracted"]
+                self.logger.info(f"Cache hit: {png_path.name} ({provider_name})")
+            else:
+                self.logger.info("Detecting the provider from PNG image")
 
                 # Detect provider
-                provider_name = detect_provider_from_file_id(file_id)
+                provider_name, _ = self._detect_locally(png_path)
+                if provider_name is None:
+                    provider_name = detect_provider_from_png(png_path, self.client)
+
                 self.logger.info(f"Detected provider: {provider_name}")
 
                 # Get its prompt
                 prompt_path = get_prompt_path_for_provider(project_root, provider_name)
+
                 self.logger.info(f"Using prompt: {prompt_path.name}")
 
-                # Extract JSON
-                prompt_text = self.load_prompt(str(prompt_path))
+                # Load prompt
+                prompt_text = self.load_prompt(prompt_path)
+
                 self.logger.info("Calling LLM to extract the JSON")
 
-                # provider-specific post‑processing
+                # Get provider-specific model
                 model_class = get_model_for_provider(provider_name)
                 if model_class is None:
                     raise ValueError(
                         f"No Pydantic model registered for provider: {provider_name}"
                     )
 
-                extracted = self.extract_json_from_pdf(
-                    file_id, prompt_text, model_class
-                )
-                extracted = postprocess_for_provider(provider_name, extracted)
-
-                # Add provider metadata to the extracted data
-                extracted_with_metadata = {
-                    "provider_name": provider_name,  # Add provider here
-                    **extracted,  # All the existing extracted data
-                }
+                # Extract JSON
+                with provider_scope(provider_name):
+                    extracted = self.extract_json_from_png(
+                        png_path, prompt_text, model_class
+                    )
 
-                # Check validation results using provider-specific checker
-                validation_passed = check_validation_for_provider(
-                    provider_name, extracted
-                )
-                self.logger.info(
-                    f"Validation {'passed' if validation_passed else 'failed'} for {pdf_path.name}"
+                if self.cache is not None:
+                    self.cache.put(cache_key, provider_name, extracted)
+
+            saved = save_extraction(
+                png_path,
+                project_root,
+                provider_name,
+                extracted,
+                self.logger,
+                results_store=self.results_store,
+                jsonl_sink=self.jsonl_sink,
+            )
+            json_path = saved["json_path"]
+            png_dest = saved["moved_path"]
+            validation_passed = saved["validation_passed"]
+            folder_type = saved["folder_type"]
+
+            standard_json_path = None
+            if validation_passed:
+                standard_json_path = self.save_standard_json(
+                    json_path,
+                    project_root,
+                    png_path.stem,
+                    cache_key=cache_key,
+                    cached_standard=cached["standard"] if cached else None,
+                    extracted=saved["extracted"],
+                    provider_name=provider_name,
                 )
 
-                # Determine destination folders based on validation
-                if validation_passed:
-                    json_dir = processed_json_dir
-                    pdf_dir = processed_pdf_dir
-                    folder_type = "processed"
-                else:
-                    json_dir = unprocessed_json_dir
-                    pdf_dir = unprocessed_pdf_dir
-                    folder_type = "unprocessed"
-
-                # Save JSON
-                json_path = json_dir / f"{pdf_path.stem}.json"
-                json_path.write_text(
-                    json.dumps(
-                        extracted_with_metadata,
-                        indent=4,
-                        ensure_ascii=False,
-                        sort_keys=False,
+            file_result.update(
+                {
+                    "ok": True,
+                    "json_path": str(json_path),
+                    "moved_png_path": str(png_dest),
+                    "validation_passed": validation_passed,
+                    "standard_json_path": (
+                        str(standard_json_path) if standard_json_path else None
                     ),
-                    encoding="utf-8",
-                )
-                self.logger.debug(f"Saved JSON to {json_path}")
-
-                pdf_dest = pdf_dir / pdf_path.name
-                shutil.move(pdf_path, pdf_dest)
-                self.logger.debug(f"Moved PDF to {pdf_dest} ({folder_type})")
-
-                standard_json_path = None
-                if validation_passed:
-                    try:
-                        self.logger.info("Transforming to standard format...")
-                        json_results_dir = (
-                            project_root / "src" / "data" / "json_results"
-                        )
-                        json_results_dir.mkdir(parents=True, exist_ok=True)
-
-                        standard_json_path = json_results_dir / f"{pdf_path.stem}.json"
-
-                        # Transform using the universal transformer
-                        transform_single_bill(
-                            str(json_path), str(standard_json_path), self.client
-                        )
-
-                        self.logger.info(
-                            f" Standard JSON saved to {standard_json_path}"
-                        )
-                    except Exception as transform_error:
-                        self.logger.error(
-                            f"Error transforming to standard format: {repr(transform_error)}"
-                        )
-                        standard_json_path = None
-
-                file_result.update(
-                    {
-                        "ok": True,
-                        "json_path": str(json_path),
-                        "moved_pdf_path": str(pdf_dest),
-                        "validation_passed": validation_passed,
-                        "standard_json_path": (
-                            str(standard_json_path) if standard_json_path else None
-                        ),
-                    }
-                )
+                }
+            )
 
-                self.logger.info(f"Finished: {pdf_path.name} -> {folder_type}")
+            self.logger.info(f"Finished: {png_path.name} -> {folder_type}")
 
-            except Exception as e:
-                self.logger.error(
-                    f"Error processing {pdf_path.name}: {repr(e)}", exc_info=True
-                )
-                file_result["error"] = repr(e)
+        except Exception as e:
 
-            results.append(file_result)
+            self.logger.error(
+                f"Error processing {png_path.name}: {repr(e)}", exc_info=True
+            )
+            file_result["error"] = repr(e)
 
-        self.logger.info("All PDFs processed.")
-        return results
+        return file_result
 
     def process_inbox_pngs(
         self,
         project_root: str | Path,
+        max_workers: int = 1,
     ) -> list[dict]:
         """
         Process all PNG files in the inbox directory.
@@ -402,8 +1295,8 @@ class Extractor:
         Args:
         project_root: Path to the project root directory containing the
         src/data/inbox and src/data/processed directories.
-        client: OpenAI client instance. If None, creates a new one.
-        logger: Logger instance for logging. If None, no logging is performed.
+        max_workers: Maximum number of PNGs processed concurrently. Defaults to 1
+        (sequential).
         Returns:
         A list of dictionaries, one per processed PNG. Each dictionary contains:
         "png": Path to the original PNG file
@@ -414,20 +1307,19 @@ class Extractor:
         "error": Error message string (only if ok=False)
         Note:
         The processed/json and processed/png directories are created automatically
-        if they don't exist. PNGs are processed in sorted order by filename.
+        if they don't exist. Results are returned in sorted order by filename.
         """
 
         project_root = Path(project_root)
         inbox_dir = project_root / "src" / "data" / "inbox"
-        processed_json_dir = project_root / "src" / "data" / "processed" / "json"
-        processed_png_dir = project_root / "src" / "data" / "processed" / "png"
-        unprocessed_json_dir = project_root / "src" / "data" / "unprocessed" / "json"
-        unprocessed_png_dir = project_root / "src" / "data" / "unprocessed" / "png"
 
-        processed_json_dir.mkdir(parents=True, exist_ok=True)
-        processed_png_dir.mkdir(parents=True, exist_ok=True)
-        unprocessed_json_dir.mkdir(parents=True, exist_ok=True)
-        unprocessed_png_dir.mkdir(parents=True, exist_ok=True)
+        for sub in ("processed", "unprocessed"):
+            (project_root / "src" / "data" / sub / "json").mkdir(
+                parents=True, exist_ok=True
+            )
+            (project_root / "src" / "data" / sub / "png").mkdir(
+                parents=True, exist_ok=True
+            )
 
         png_paths = sorted(inbox_dir.glob("*.png"))
 
@@ -436,150 +1328,142 @@ class Extractor:
                 f"Found {len(png_paths)} PNG(s) in inbox. Starting extraction"
             )
 
-        results: list[dict] = []
-
-        for png_path in png_paths:
-
-            self.logger.info(f"Processing PNG: {png_path.name}")
-
-            file_result = {"png": str(png_path), "ok": False}
-
-            try:
-
-                self.logger.info("Detecting the provider from PNG image")
-
-                # Detect provider
-                provider_name = detect_provider_from_png(png_path, self.client)
-
-                self.logger.info(f"Detected provider: {provider_name}")
-
-                # Get its prompt
-                prompt_path = get_prompt_path_for_provider(project_root, provider_name)
-
-                self.logger.info(f"Using prompt: {prompt_path.name}")
-
-                # Load prompt
-                prompt_text = Path(prompt_path).read_text(encoding="utf-8")
-
-                self.logger.info("Calling LLM to extract the JSON")
-
-                # Get provider-specific model
-                model_class = get_model_for_provider(provider_name)
-                if model_class is None:
-                    raise ValueError(
-                        f"No Pydantic model registered for provider: {provider_name}"
-                    )
-
-                # Extract JSON
-                extracted = self.extract_json_from_png(
-                    png_path, prompt_text, model_class
-                )
-                extracted = postprocess_for_provider(provider_name, extracted)
-
-                # Add provider metadata to the extracted data
-                extracted_with_metadata = {
-                    "provider_name": provider_name,  # Add provider here
-                    **extracted,  # All the existing extracted data
-                }
-
-                # Check validation results using provider-specific checker
-                validation_passed = check_validation_for_provider(
-                    provider_name, extracted
-                )
-
-                self.logger.info(
-                    f"Validation {'passed' if validation_passed else 'failed'} for {png_path.name}"
-                )
-
-                # Determine destination folders based on validation
-                if validation_passed:
-                    json_dir = processed_json_dir
-                    png_dir = processed_png_dir
-                    folder_type = "processed"
-                else:
-                    json_dir = unprocessed_json_dir
-                    png_dir = unprocessed_png_dir
-                    folder_type = "unprocessed"
-
-                # Save JSON
-                json_path = json_dir / f"{png_path.stem}.json"
-                json_path.write_text(
-                    json.dumps(
-                        extracted_with_metadata,
-                        indent=4,
-                        ensure_ascii=False,
-                        sort_keys=False,
-                    ),
-                    encoding="utf-8",
-                )
-
-                self.logger.debug(f"Saved JSON to {json_path}")
-
-                png_dest = png_dir / png_path.name
-                shutil.move(png_path, png_dest)
-
-                self.logger.debug(f"Moved PNG to {png_dest} ({folder_type})")
-
-                standard_json_path = None
-                if validation_passed:
-                    try:
-                        self.logger.info("Transforming to standard format...")
-                        json_results_dir = (
-                            project_root / "src" / "data" / "json_results"
-                        )
-                        json_results_dir.mkdir(parents=True, exist_ok=True)
-
-                        standard_json_path = json_results_dir / f"{png_path.stem}.json"
-
-                        # Transform using the universal transformer
-                        transform_single_bill(
-                            str(json_path), str(standard_json_path), self.client
-                        )
-
-                        self.logger.info(
-                            f" Standard JSON saved to {standard_json_path}"
-                        )
-                    except Exception as transform_error:
-                        self.logger.error(
-                            f"Error transforming to standard format: {repr(transform_error)}"
-                        )
-                        standard_json_path = None
-
-                file_result.update(
-                    {
-                        "ok": True,
-                        "json_path": str(json_path),
-                        "moved_png_path": str(png_dest),
-                        "validation_passed": validation_passed,
-                        "standard_json_path": (
-                            str(standard_json_path) if standard_json_path else None
-                        ),
-                    }
-                )
-
-                self.logger.info(f"Finished: {png_path.name} -> {folder_type}")
-
-            except Exception as e:
-
-                self.logger.error(
-                    f"Error processing {png_path.name}: {repr(e)}", exc_info=True
-                )
-                file_result["error"] = repr(e)
-
-            results.append(file_result)
+        results = self._run_per_file(
+            lambda png_path: self.process_png(png_path, project_root),
+            png_paths,
+            max_workers,
+        )
 
         self.logger.info("All PNGs processed.")
+        self._log_scheduler_stats()
 
         return results
 
 
 if __name__ == "__main__":
-    project_root = Path(__file__).resolve().parents[2]
-    extractor = Extractor()
+    parser = argparse.ArgumentParser(
+        description="Extract structured JSON from the utility bills in the inbox."
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=1,
+        help="Number of bills to process concurrently (default: 1).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the extraction cache and call OpenAI for every bill.",
+    )
+    parser.add_argument(
+        "--no-local-detection",
+        action="store_true",
+        help="Always ask the LLM for the provider instead of matching locally first.",
+    )
+    parser.add_argument(
+        "--single-call",
+        action="store_true",
+        help="Detect the provider among the local detector's top candidates "
+        "and extract the JSON in one LLM call per PDF.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        action="append",
+        default=[],
+        metavar="MODEL=RPM:TPM",
+        help="Limit a model's requests/tokens per minute (repeatable; "
+        "no limit by default).",
+    )
+    parser.add_argument(
+        "--no-journal",
+        action="store_true",
+        help="Do not record per-bill stage progress in the run journal.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue each PDF from its last stage recorded in the run journal.",
+    )
+    parser.add_argument(
+        "--results-db",
+        action="store_true",
+        help="Also write every bill to the SQLite results store (src/data/results).",
+    )
+    parser.add_argument(
+        "--jsonl",
+        choices=("plain", "zstd"),
+        default=None,
+        help="Also append every bill to JSONL segments in src/data/jsonl, "
+        "optionally zstd-compressed.",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help="Write Prometheus metrics to this file (textfile collector) at exit.",
+    )
+    parser.add_argument(
+        "--stage-workers",
+        action="append",
+        default=[],
+        metavar="STAGE=N",
+        help="Threads for one PDF pipeline stage, e.g. transform=2 (repeatable).",
+    )
+    args = parser.parse_args()
+    for override in args.rate_limit:
+        SCHEDULER.set_limits(*parse_rate_limit(override))
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
 
-    pdf_results = extractor.process_inbox_pdfs(project_root)
-    png_results = extractor.process_inbox_pngs(project_root)
+    project_root = Path(__file__).resolve().parents[2]
+    cache = None if args.no_cache else ExtractionCache.for_project(project_root)
+    local_detector = (
+        None
+        if args.no_local_detection
+        else LocalProviderDetector.from_project(project_root)
+    )
+    journal = None if args.no_journal else RunJournal.for_project(project_root)
+    results_store = ResultsStore.for_project(project_root) if args.results_db else None
+    jsonl_sink = (
+        JsonlSink.for_project(
+            project_root, compression="zstd" if args.jsonl == "zstd" else None
+        )
+        if args.jsonl
+        else None
+    )
+    extractor = Extractor(
+        cache=cache,
+        local_detector=local_detector,
+        single_call=args.single_call,
+        journal=journal,
+        results_store=results_store,
+        jsonl_sink=jsonl_sink,
+    )
+
+    stage_workers = {}
+    for override in args.stage_workers:
+        stage, _, workers = override.partition("=")
+        stage_workers[stage.strip()] = int(workers)
+
+    pdf_results = extractor.process_inbox_pdfs(
+        project_root,
+        max_workers=args.max_workers,
+        stage_workers=stage_workers,
+        resume=args.resume,
+    )
+    png_results = extractor.process_inbox_pngs(
+        project_root, max_workers=args.max_workers
+    )
+    if jsonl_sink is not None:
+        jsonl_sink.close()
 
     all_results = {"pdfs": pdf_results, "pngs": png_results}
+    if args.metrics_file:
+        write_textfile(args.metrics_file)
 
     print(json.dumps(all_results, indent=2))
@@ -0,0 +1,675 @@
+import argparse
+import base64
+import email.parser
+import email.policy
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+
+# A responder maps one batch request line to the response body for it, or None
+# to report the request as failed.
+Responder = Callable[[dict], dict | None]
+
+# Synthetic bills carry "FAKE-OPENAI-PROVIDER: <provider>\n" in their bytes so
+# a responder can tell which provider a request is about
+PROVIDER_MARKER = b"FAKE-OPENAI-PROVIDER: "
+_MARKER_RE = re.compile(re.escape(PROVIDER_MARKER) + rb"([^\n]+)\n")
+
+
+@dataclass
+class CompletionRequest:
+    """One /v1/responses or /v1/chat/completions request, decoded."""
+
+    endpoint: str
+    body: dict
+    # Uploaded files and inline images the request refers to
+    attachments: list[bytes] = field(default_factory=list)
+    text: str = ""
+    schema_name: str | None = None
+    schema: dict | None = None
+    json_mode: bool = False
+
+    @property
+    def provider(self) -> str | None:
+        """The provider marker of the first attachment that has one."""
+
+        for data in self.attachments:
+            match = _MARKER_RE.search(data)
+            if match:
+                return match.group(1).decode("utf-8").strip()
+        return None
+
+
+# A completion responder returns the output text for a request
+CompletionResponder = Callable[[CompletionRequest], str]
+
+
+def synthesize_from_schema(
+    schema: dict, node: dict | None = None, name: str = ""
+) -> Any:
+    """
+    Build a plausible instance of a JSON schema.
+
+    Nullable numbers are zero, so the provider validations (sums of
+    charges against totals) run and pass; strings get a value shaped by the field name
+    (dates, rates, addresses) so downstream parsing has something real to do.
+
+    Args:
+        schema: The root schema, holding any "$defs".
+        node: The sub-schema to instantiate; defaults to the root.
+        name: The property name the node belongs to.
+    """
+
+    node = schema if node is None else node
+    while "$ref" in node:
+        node = schema["$defs"][node["$ref"].rsplit("/", 1)[-1]]
+
+    if "const" in node:
+        return node["const"]
+    if node.get("enum"):
+        return node["enum"][0]
+    if "anyOf" in node:
+        options = [o for o in node["anyOf"] if o.get("type") != "null"]
+        nullable = len(options) < len(node["anyOf"])
+        resolved = [
+            schema["$defs"][o["$ref"].rsplit("/", 1)[-1]] if "$ref" in o else o
+            for o in options
+        ]
+        if nullable and all(o.get("type") in ("number", "integer") for o in resolved):
+            return 0.0
+        return synthesize_from_schema(schema, options[0], name)
+
+    kind = node.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object" or "properties" in node:
+        return {
+            key: synthesize_from_schema(schema, value, key)
+            for key, value in node.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [synthesize_from_schema(schema, node.get("items", {}), name)]
+    if kind == "number":
+        return 12.5
+    if kind == "integer":
+        return 30
+    if kind == "boolean":
+        return False
+    if kind == "null":
+        return None
+    if "date" in name:
+        return "Jan 15, 2026"
+    if "rate" in name:
+        return "$5.98 per CCF"
+    if "address" in name:
+        return "123 Main St, Seattle, WA 98101"
+    return f"{name or 'value'} sample"
+
+
+def default_completion_responder(request: CompletionRequest) -> str:
+    """Answer structured requests from their schema and plain ones with the provider."""
+
+    if request.schema is not None:
+        return json.dumps(synthesize_from_schema(request.schema))
+    if request.json_mode:
+        return "{}"
+    return request.provider or "unknown"
+
+
+def load_canned_responses(jsonl_path: str | Path) -> dict[str, dict]:
+    """
+    Load canned response bodies from a Batch API output file.
+
+    Each line has the Batch API output shape
+    {"custom_id": ..., "response": {"status_code": 200, "body": {...}}}, so the
+    output files saved by `BatchExtractor` can be replayed as-is. Lines of the
+    simpler form {"custom_id": ..., "body": {...}} are accepted too.
+
+    Args:
+        jsonl_path: Path to the JSONL file.
+
+    Returns:
+        A dictionary mapping custom_id to response body.
+    """
+
+    canned = {}
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            body = record.get("body")
+            if body is None and record.get("response"):
+                body = record["response"].get("body")
+            if body is not None:
+                canned[record["custom_id"]] = body
+    return canned
+
+
+class FakeOpenAIServer:
+    """
+    A local stand-in for the OpenAI Files, Batch, Responses and Chat
+    Completions endpoints.
+
+    It accepts uploads, runs each submitted batch through a responder (canned
+    bodies keyed by custom_id, or any callable), and serves the output and
+    error files exactly like the real API. Point an `OpenAI` client at
+    `base_url` to run the batch pipeline end to end without network access.
+
+    Batches report "in_progress" for `complete_after` seconds after
+    submission and "completed" afterwards, so polling code is exercised too.
+
+    The synchronous `responses` and `chat.completions` endpoints answer
+    through a completion responder after `latency` seconds (varied by
+    `jitter`), and fail a fraction `error_rate` of calls with `error_status`,
+    so the extractors' concurrency and retry paths can be measured offline.
+    """
+
+    def __init__(
+        self,
+        canned: dict[str, dict] | None = None,
+        responder: Responder | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        complete_after: float = 0.0,
+        completion_responder: CompletionResponder | None = None,
+        latency: float = 0.0,
+        upload_latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 429,
+        seed: int | None = None,
+    ):
+        """
+        Configure the server. Call `start` (or use it as a context manager) to serve.
+
+        Args:
+            canned: Response bodies keyed by custom_id.
+            responder: Called for request lines without a canned body.
+            host: Interface to bind.
+            port: Port to bind; 0 picks a free one.
+            complete_after: Seconds a batch stays "in_progress".
+            completion_responder: Produces the output text of responses and
+                                  chat completions requests.
+            latency: Mean seconds before a completion is answered.
+            upload_latency: Mean seconds before a file upload is answered.
+            jitter: Latencies vary uniformly by this fraction either way.
+            error_rate: Fraction of completions failed with `error_status`.
+            error_status: HTTP status of injected errors (429 adds retry-after-ms).
+            seed: Seed for the latency and error randomness.
+        """
+
+        self.canned = dict(canned or {})
+        self.responder = responder
+        self.complete_after = complete_after
+        self.completion_responder = completion_responder or default_completion_responder
+        self.latency = latency
+        self.upload_latency = upload_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self.counts = {"files": 0, "responses": 0, "chat.completions": 0, "errors": 0}
+
+        self.files: dict[str, dict] = {}
+        self.batches: dict[str, dict] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        """
+        Serve in a background thread.
+
+        Returns:
+            The base URL to pass to `OpenAI(base_url=...)`.
+        """
+
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fake-openai", daemon=True
+        )
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until interrupted."""
+
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}-fake{next(self._ids):06d}"
+
+    def add_file(self, filename: str, purpose: str, content: bytes) -> dict:
+        with self._lock:
+            file_id = self._new_id("file")
+            self.files[file_id] = {
+                "id": file_id,
+                "object": "file",
+                "bytes": len(content),
+                "created_at": int(time.time()),
+                "filename": filename,
+                "purpose": purpose,
+                "status": "processed",
+                "content": content,
+            }
+        return self.files[file_id]
+
+    def _respond(self, request_line: dict) -> dict | None:
+        custom_id = request_line.get("custom_id")
+        if custom_id in self.canned:
+            return self.canned[custom_id]
+        if self.responder is not None:
+            return self.responder(request_line)
+        return None
+
+    def create_batch(self, input_file_id: str, endpoint: str, window: str) -> dict:
+        """
+        Run every request line of an uploaded batch file and store the results.
+        """
+
+        input_file = self.files[input_file_id]
+        outputs, errors = [], []
+        for line in input_file["content"].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request_line = json.loads(line)
+            custom_id = request_line["custom_id"]
+            try:
+                body = self._respond(request_line)
+            except Exception as e:
+                body, message = None, repr(e)
+            else:
+                message = f"No canned response for {custom_id}"
+
+            if body is None:
+                errors.append(
+                    {
+                        "id": self._new_id("batch_req"),
+                        "custom_id": custom_id,
+                        "response": None,
+                        "error": {"code": "fake_no_response", "message": message},
+                    }
+                )
+            else:
+                outputs.append(
+                    {
+                        "id": self._new_id("batch_req"),
+                        "custom_id": custom_id,
+                        "response": {"status_code": 200, "body": body},
+                        "error": None,
+                    }
+                )
+
+        def to_file(records: list[dict], suffix: str) -> str | None:
+            if not records:
+                return None
+            content = "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+            name = f"{input_file_id}_{suffix}.jsonl"
+            return self.add_file(name, "batch_output", content)["id"]
+
+        output_file_id = to_file(outputs, "output")
+        error_file_id = to_file(errors, "errors")
+
+        now = int(time.time())
+        with self._lock:
+            batch_id = self._new_id("batch")
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": endpoint,
+                "input_file_id": input_file_id,
+                "completion_window": window,
+                "status": "in_progress",
+                "created_at": now,
+                "output_file_id": output_file_id,
+                "error_file_id": error_file_id,
+                "request_counts": {
+                    "total": len(outputs) + len(errors),
+                    "completed": len(outputs),
+                    "failed": len(errors),
+                },
+                "_ready_at": time.time() + self.complete_after,
+            }
+        return self.get_batch(batch_id)
+
+    def get_batch(self, batch_id: str) -> dict:
+        batch = dict(self.batches[batch_id])
+        ready_at = batch.pop("_ready_at")
+        if time.time() >= ready_at:
+            batch["status"] = "completed"
+            batch["completed_at"] = int(ready_at)
+        else:
+            # The real API only publishes the result files once the batch is done
+            batch["output_file_id"] = batch["error_file_id"] = None
+        return batch
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def _delay(self, mean: float) -> None:
+        if mean <= 0:
+            return
+        with self._lock:
+            factor = self._random.uniform(1 - self.jitter, 1 + self.jitter)
+        time.sleep(max(0.0, mean * factor))
+
+    def _inject_error(self) -> bool:
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.counts["errors"] += 1
+        return failed
+
+    def _decode_completion(self, endpoint: str, body: dict) -> CompletionRequest:
+        request = CompletionRequest(endpoint, body)
+        texts = []
+
+        def add_data_url(url: str) -> None:
+            if url.startswith("data:") and "," in url:
+                request.attachments.append(base64.b64decode(url.split(",", 1)[1]))
+
+        if endpoint == "responses":
+            messages = body.get("input", [])
+            if isinstance(messages, str):
+                messages = [{"content": messages}]
+            response_format = body.get("text", {}).get("format", {})
+        else:
+            messages = body.get("messages", [])
+            response_format = body.get("response_format", {})
+            if response_format.get("type") == "json_schema":
+                response_format = {
+                    "type": "json_schema",
+                    **response_format["json_schema"],
+                }
+
+        for message in messages:
+            content = message.get("content", "")
+            if isinstance(content, str):
+                texts.append(content)
+                continue
+            for part in content:
+                kind = part.get("type")
+                if kind in ("input_text", "text"):
+                    texts.append(part.get("text", ""))
+                elif kind == "input_file" and part.get("file_id") in self.files:
+                    request.attachments.append(self.files[part["file_id"]]["content"])
+                elif kind == "input_image":
+                    add_data_url(part.get("image_url", ""))
+                elif kind == "image_url":
+                    add_data_url(part.get("image_url", {}).get("url", ""))
+
+        request.text = "\n".join(texts)
+        if response_format.get("type") == "json_schema":
+            request.schema_name = response_format.get("name")
+            request.schema = response_format.get("schema")
+        request.json_mode = response_format.get("type") == "json_object"
+        return request
+
+    def complete(self, endpoint: str, body: dict) -> dict:
+        """
+        Answer a responses or chat.completions request body.
+
+        Returns:
+            The API response object, with a usage block estimated from the
+            request and output sizes.
+        """
+
+        request = self._decode_completion(endpoint, body)
+        text = self.completion_responder(request)
+        input_tokens = len(request.text) // 4 + sum(
+            len(data) // 64 for data in request.attachments
+        )
+        output_tokens = max(1, len(text) // 4)
+        model = body.get("model", "fake-model")
+        now = int(time.time())
+
+        if endpoint == "responses":
+            return {
+                "id": self._new_id("resp"),
+                "object": "response",
+                "created_at": now,
+                "model": model,
+                "status": "completed",
+                "output": [
+                    {
+                        "type": "message",
+                        "id": self._new_id("msg"),
+                        "role": "assistant",
+                        "status": "completed",
+                        "content": [
+                            {"type": "output_text", "text": text, "annotations": []}
+                        ],
+                    }
+                ],
+                "parallel_tool_calls": False,
+                "tool_choice": "auto",
+                "tools": [],
+                "usage": {
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "total_tokens": input_tokens + output_tokens,
+                    "input_tokens_details": {"cached_tokens": 0},
+                    "output_tokens_details": {"reasoning_tokens": 0},
+                },
+            }
+        return {
+            "id": self._new_id("chatcmpl"),
+            "object": "chat.completion",
+            "created": now,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": input_tokens,
+                "completion_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(
+                self, payload: dict, status: int = 200, headers: dict | None = None
+            ) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _not_found(self) -> None:
+                self._send_json(
+                    {"error": {"message": f"Unknown path {self.path}"}}, 404
+                )
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                    if parts[2] in server.batches:
+                        return self._send_json(server.get_batch(parts[2]))
+                elif parts[:2] == ["v1", "files"] and len(parts) == 4:
+                    stored = server.files.get(parts[2])
+                    if stored is not None and parts[3] == "content":
+                        self.send_response(200)
+                        self.send_header("Content-Type", "application/octet-stream")
+                        self.send_header("Content-Length", str(len(stored["content"])))
+                        self.end_headers()
+                        self.wfile.write(stored["content"])
+                        return
+                self._not_found()
+
+            def do_POST(self):
+                path = self.path.split("?")[0].rstrip("/")
+                if path in ("/v1/responses", "/v1/chat/completions"):
+                    endpoint = path.removeprefix("/v1/").replace("/", ".")
+                    body = json.loads(self._body() or b"{}")
+                    server._count(endpoint)
+                    server._delay(server.latency)
+                    if server._inject_error():
+                        headers = (
+                            {"retry-after-ms": "100"}
+                            if server.error_status == 429
+                            else {}
+                        )
+                        return self._send_json(
+                            {"error": {"message": "Injected error", "type": "fake"}},
+                            server.error_status,
+                            headers,
+                        )
+                    try:
+                        return self._send_json(server.complete(endpoint, body))
+                    except Exception as e:
+                        return self._send_json(
+                            {"error": {"message": repr(e), "type": "fake"}}, 400
+                        )
+                if path == "/v1/files":
+                    server._count("files")
+                    server._delay(server.upload_latency)
+                    # Parse the multipart upload with the stdlib email parser
+                    message = email.parser.BytesParser(
+                        policy=email.policy.HTTP
+                    ).parsebytes(
+                        f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+                        + self._body()
+                    )
+                    fields, filename, content = {}, "upload", b""
+                    for part in message.iter_parts():
+                        name = part.get_param("name", header="content-disposition")
+                        if part.get_filename() is not None:
+                            filename = part.get_filename()
+                            content = part.get_payload(decode=True) or b""
+                        else:
+                            fields[name] = part.get_content().strip()
+                    stored = server.add_file(
+                        filename, fields.get("purpose", "user_data"), content
+                    )
+                    return self._send_json(
+                        {k: v for k, v in stored.items() if k != "content"}
+                    )
+                if path == "/v1/batches":
+                    request = json.loads(self._body() or b"{}")
+                    if request.get("input_file_id") not in server.files:
+                        return self._send_json(
+                            {"error": {"message": "Unknown input_file_id"}}, 400
+                        )
+                    return self._send_json(
+                        server.create_batch(
+                            request["input_file_id"],
+                            request.get("endpoint", "/v1/responses"),
+                            request.get("completion_window", "24h"),
+                        )
+                    )
+                self._not_found()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a fake OpenAI API that replays canned responses."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--canned",
+        action="append",
+        default=[],
+        help="Batch output JSONL file to replay (repeatable).",
+    )
+    parser.add_argument(
+        "--complete-after",
+        type=float,
+        default=0.0,
+        help="Seconds each batch stays in_progress before completing.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Mean seconds before a responses/chat completion is answered.",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="Vary latencies uniformly by this fraction either way.",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of completions failed with --error-status.",
+    )
+    parser.add_argument("--error-status", type=int, default=429)
+    args = parser.parse_args()
+
+    canned = {}
+    for path in args.canned:
+        canned.update(load_canned_responses(path))
+
+    server = FakeOpenAIServer(
+        canned=canned,
+        host=args.host,
+        port=args.port,
+        complete_after=args.complete_after,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    print(f"Fake OpenAI server on {server.base_url} ({len(canned)} canned responses)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+from extraction_cache import ExtractionCache
+from extractor import Extractor, PdfJob
+from local_provider_detector import LocalProviderDetector
+from metrics import start_http_server, write_textfile
+from request_scheduler import SCHEDULER, parse_rate_limit
+from run_journal import RunJournal
+
+WATCHED_SUFFIXES = (".pdf", ".png")
+
+# Seconds between rewrites of the metrics textfile
+METRICS_FILE_INTERVAL = 15.0
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Reports the inbox contents every `poll_interval` seconds."""
+
+    def __init__(self, directory: str | Path, poll_interval: float = 2.0):
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self._next_poll = 0.0
+
+    def wait(self, timeout: float) -> set[Path] | None:
+        """
+        Wait up to `timeout` seconds for changes.
+
+        Returns:
+            None when the whole directory should be rescanned, otherwise the
+            paths that changed (possibly none).
+        """
+
+        delay = self._next_poll - time.monotonic()
+        if delay > 0:
+            time.sleep(min(delay, timeout))
+            if delay > timeout:
+                return set()
+        self._next_poll = time.monotonic() + self.poll_interval
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """
+    Reports files created, written or moved into a directory, using inotify
+    through libc so no extra package is needed.
+    """
+
+    MASK = IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO
+
+    def __init__(self, directory: str | Path):
+        """
+        Raises:
+            OSError: If inotify is not available on this system.
+        """
+
+        self.directory = Path(directory)
+        libc_name = ctypes.util.find_library("c")
+        if sys.platform != "linux" or libc_name is None:
+            raise OSError("inotify is only available on Linux")
+
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self._fd, os.fsencode(self.directory), self.MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {self.directory}")
+
+    def wait(self, timeout: float) -> set[Path] | None:
+        """See `PollingWatcher.wait`."""
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; only a rescan is reliable now
+                return None
+            if name and not mask & IN_ISDIR:
+                changed.add(self.directory / os.fsdecode(name))
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_watcher(
+    directory: str | Path, poll_interval: float = 2.0, polling: bool = False
+) -> InotifyWatcher | PollingWatcher:
+    """
+    Watch a directory with inotify, falling back to polling where it is not
+    available (macOS, Windows, some network filesystems).
+
+    Args:
+        directory: The directory to watch.
+        poll_interval: Seconds between scans when polling.
+        polling: Force polling even where inotify is available.
+    """
+
+    if not polling:
+        try:
+            return InotifyWatcher(directory)
+        except OSError:
+            pass
+    return PollingWatcher(directory, poll_interval)
+
+
+class InboxDaemon:
+    """
+    Processes bills as soon as they land in the inbox.
+
+    New PDFs go straight into one long-running staged PDF pipeline and PNGs
+    onto a thread pool, so a freshly dropped bill waits only for the bills
+    ahead of it in its stage instead of for the next cron run. The
+    Extractor, and with it the OpenAI client, provider registry, prompt and
+    extraction caches, stays warm across bills.
+
+    A file is only picked up once its size and modification time have stayed
+    the same for `settle_seconds`, so partially written or still-copying
+    bills are left alone. A file that failed is retried only after it
+    changes. SIGTERM and SIGINT stop the intake; bills already taken are
+    finished before `run` returns.
+    """
+
+    def __init__(
+        self,
+        extractor: Extractor,
+        project_root: str | Path,
+        max_workers: int = 4,
+        stage_workers: dict[str, int] | None = None,
+        settle_seconds: float = 2.0,
+        poll_interval: float = 2.0,
+        polling: bool = False,
+        resume: bool = False,
+        metrics_file: str | Path | None = None,
+    ):
+        """
+        Args:
+            extractor: The Extractor used for every bill.
+            project_root: Path to the project root directory containing the
+                         src/data directories.
+            max_workers: Threads per network-bound pipeline stage, and for PNGs.
+            stage_workers: Per-stage thread counts, see
+                           `Extractor.build_pdf_pipeline`.
+            settle_seconds: How long a file must stay unchanged before it is
+                            considered completely written.
+            poll_interval: Seconds between scans when inotify is unavailable.
+            polling: Force polling even where inotify is available.
+            resume: Continue PDFs from their last stage in the run journal.
+            metrics_file: If set, the Prometheus metrics are rewritten to this
+                          file every 15 seconds and on exit.
+        """
+
+        self.extractor = extractor
+        self.logger = extractor.logger
+        self.project_root = Path(project_root)
+        self.inbox_dir = self.project_root / "src" / "data" / "inbox"
+        self.max_workers = max_workers
+        self.stage_workers = stage_workers
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.polling = polling
+        self.resume = resume
+        self.metrics_file = metrics_file
+        self._metrics_written = 0.0
+
+        self._stop = threading.Event()
+        # path -> (size, mtime, monotonic time of the last change)
+        self._settling: dict[Path, tuple[int, float, float]] = {}
+        # path -> (size, mtime) when it was handed to the pipeline
+        self._taken: dict[Path, tuple[int, float]] = {}
+
+    def stop(self) -> None:
+        """Stop taking new bills; `run` returns once in-flight ones finish."""
+
+        self._stop.set()
+
+    def run(self) -> None:
+        """Watch the inbox until stopped, then drain."""
+
+        self.inbox_dir.mkdir(parents=True, exist_ok=True)
+        for sub in ("processed", "unprocessed"):
+            for kind in ("json", "pdf", "png"):
+                (self.project_root / "src" / "data" / sub / kind).mkdir(
+                    parents=True, exist_ok=True
+                )
+
+        previous_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                previous_handlers[signum] = signal.signal(signum, self._on_signal)
+
+        watcher = open_watcher(self.inbox_dir, self.poll_interval, self.polling)
+        self.logger.info(
+            f"Watching {self.inbox_dir} with {type(watcher).__name__} "
+            f"(settle {self.settle_seconds}s)"
+        )
+
+        self.extractor.pipeline = self.extractor.build_pdf_pipeline(
+            self.max_workers, self.stage_workers
+        )
+        png_pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="png-worker"
+        )
+        try:
+            # Blocks until the intake stops and every PDF taken has finished
+            self.extractor.pipeline.run(self._pdf_jobs(watcher, png_pool))
+        finally:
+            png_pool.shutdown(wait=True)
+            watcher.close()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        self.extractor._log_scheduler_stats()
+        if self.metrics_file:
+            write_textfile(self.metrics_file)
+        self.logger.info("Inbox watcher stopped.")
+
+    def _on_signal(self, signum, frame) -> None:
+        self.logger.info(
+            f"Received {signal.Signals(signum).name}, finishing in-flight bills"
+        )
+        self.stop()
+
+    def _pdf_jobs(self, watcher, png_pool: ThreadPoolExecutor) -> Iterator[PdfJob]:
+        """Yield a job per settled PDF, submitting PNGs to the pool, until stopped."""
+
+        # Bills dropped while the daemon was down
+        changed = None
+        while not self._stop.is_set():
+            if changed is None:
+                changed = {
+                    path
+                    for path in self.inbox_dir.iterdir()
+                    if path.suffix in WATCHED_SUFFIXES
+                }
+                for path in set(self._taken) - changed:
+                    del self._taken[path]
+            for path in changed:
+                if path.suffix in WATCHED_SUFFIXES:
+                    self._settling.setdefault(path, (-1, 0.0, time.monotonic()))
+
+            for path in self._settled():
+                self.logger.info(f"New bill in inbox: {path.name}")
+                if path.suffix == ".png":
+                    png_pool.submit(self.extractor.process_png, path, self.project_root)
+                else:
+                    yield PdfJob(path, self.project_root, self.resume)
+
+            if (
+                self.metrics_file
+                and time.monotonic() - self._metrics_written >= METRICS_FILE_INTERVAL
+            ):
+                write_textfile(self.metrics_file)
+                self._metrics_written = time.monotonic()
+
+            timeout = self.settle_seconds / 2 if self._settling else 1.0
+            changed = watcher.wait(timeout)
+
+    def _settled(self) -> list[Path]:
+        """Return the watched files whose size and mtime stopped changing."""
+
+        now = time.monotonic()
+        ready = []
+        for path, (size, mtime, changed_at) in list(self._settling.items()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Moved away by the pipeline or by whoever dropped it
+                del self._settling[path]
+                self._taken.pop(path, None)
+                continue
+
+            current = (stat.st_size, stat.st_mtime)
+            if current != (size, mtime):
+                self._settling[path] = (*current, now)
+            elif now - changed_at >= self.settle_seconds and stat.st_size > 0:
+                del self._settling[path]
+                if self._taken.get(path) != current:
+                    self._taken[path] = current
+                    ready.append(path)
+
+        return sorted(ready)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Watch the inbox and extract each bill as soon as it lands."
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=4,
+        help="Threads per network-bound pipeline stage (default: 4).",
+    )
+    parser.add_argument(
+        "--settle-seconds",
+        type=float,
+        default=2.0,
+        help="How long a file must stay unchanged before it is read (default: 2).",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Poll the inbox instead of using inotify.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between inbox scans when polling (default: 2).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the extraction cache and call OpenAI for every bill.",
+    )
+    parser.add_argument(
+        "--no-local-detection",
+        action="store_true",
+        help="Always ask the LLM for the provider instead of matching locally first.",
+    )
+    parser.add_argument(
+        "--single-call",
+        action="store_true",
+        help="Detect the provider among the local detector's top candidates "
+        "and extract the JSON in one LLM call per PDF.",
+    )
+    parser.add_argument(
+        "--no-journal",
+        action="store_true",
+        help="Do not record per-bill stage progress in the run journal.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue each PDF from its last stage recorded in the run journal.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        action="append",
+        default=[],
+        metavar="MODEL=RPM:TPM",
+        help="Limit a model's requests/tokens per minute (repeatable; "
+        "no limit by default).",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help="Rewrite Prometheus metrics to this file (textfile collector).",
+    )
+    parser.add_argument(
+        "--stage-workers",
+        action="append",
+        default=[],
+        metavar="STAGE=N",
+        help="Threads for one PDF pipeline stage, e.g. transform=2 (repeatable).",
+    )
+    args = parser.parse_args()
+    for override in args.rate_limit:
+        SCHEDULER.set_limits(*parse_rate_limit(override))
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+
+    stage_workers = {}
+    for override in args.stage_workers:
+        stage, _, workers = override.partition("=")
+        stage_workers[stage.strip()] = int(workers)
+
+    project_root = Path(__file__).resolve().parents[2]
+    cache = None if args.no_cache else ExtractionCache.for_project(project_root)
+    local_detector = (
+        None
+        if args.no_local_detection
+        else LocalProviderDetector.from_project(project_root)
+    )
+    journal = None if args.no_journal else RunJournal.for_project(project_root)
+    extractor = Extractor(
+        cache=cache,
+        local_detector=local_detector,
+        single_call=args.single_call,
+        journal=journal,
+    )
+
+    InboxDaemon(
+        extractor,
+        project_root,
+        max_workers=args.max_workers,
+        stage_workers=stage_workers,
+        settle_seconds=args.settle_seconds,
+        poll_interval=args.poll_interval,
+        polling=args.poll,
+        resume=args.resume,
+        metrics_file=args.metrics_file,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
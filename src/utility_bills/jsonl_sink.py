@@ -0,0 +1,398 @@
+import argparse
+import io
+import json
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Iterator
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+INDEX_NAME = "index.jsonl"
+
+# Record kinds: the post-processed provider JSON, and the standard JSON
+BILL = "bill"
+STANDARD = "standard"
+
+
+def _segment_lines(segment_path: Path) -> Iterator[bytes]:
+    """The lines of a plain or zstd segment."""
+
+    with open(segment_path, "rb") as f:
+        if segment_path.suffix != ".zst":
+            yield from f
+            return
+        if zstandard is None:
+            raise RuntimeError(
+                f"{segment_path.name} is zstd-compressed; install zstandard to read it"
+            )
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        try:
+            yield from io.BufferedReader(reader)
+        except zstandard.ZstdError:
+            # A frame cut short by a crash ends the segment
+            return
+
+
+class JsonlSink:
+    """
+    Append-only JSONL segments of extraction results, with an index by bill id.
+
+    Every saved bill (the provider JSON as post-processed, with its verdict)
+    and every standard JSON is appended as one compact JSON line to the
+    current segment. The pretty-printed file per bill is still written next
+    to it, since resumed runs, `reprocess_bills` and `bulk_validator` read
+    those files; the segments are for consumers of the whole archive.
+    Segments rotate at `segment_bytes`, so a directory holds a few large
+    files however many bills there are, and consumers can stream them
+    sequentially:
+
+        {"kind": "bill", "bill_id": ..., "provider_name": ...,
+         "validation_passed": ..., "source_name": ..., "file_sha256": ...,
+         "written_at": ..., "data": {...}}
+        {"kind": "standard", "bill_id": ..., "written_at": ..., "data": {...}}
+
+    With compression="zstd" (needs the zstandard package) records are
+    buffered into independent zstd frames of about `frame_bytes`. A segment
+    is then a valid multi-frame .zst stream (`zstdcat` reads it), and a
+    lookup decompresses only the one frame holding the record. Buffered
+    records are written when the frame fills up and on `flush`/`close`.
+
+    index.jsonl maps (kind, bill_id) to the segment, frame and byte range of
+    the record, so `get` is a single seek. A bill written again gets a new
+    record and index line; the latest one wins. Each process that opens the
+    sink writes its own segments, starting a new one rather than appending
+    to a segment that may end in a partial record.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        compression: str | None = None,
+        segment_bytes: int = 64 * 1024 * 1024,
+        frame_bytes: int = 256 * 1024,
+    ):
+        """
+        Open (or create) a sink directory.
+
+        Args:
+            directory: Where the segments and the index are kept.
+            compression: None for plain .jsonl segments, or "zstd".
+            segment_bytes: Size at which the next record starts a new segment.
+            frame_bytes: Uncompressed bytes buffered per zstd frame.
+
+        Raises:
+            ValueError: If the compression is not supported.
+            RuntimeError: If compression="zstd" and zstandard is not installed.
+        """
+
+        if compression not in (None, "zstd"):
+            raise ValueError(f"Unsupported compression: {compression!r}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError(
+                "zstd segments need zstandard; install it with "
+                "`pip install zstandard`"
+            )
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.segment_bytes = segment_bytes
+        self.frame_bytes = frame_bytes
+        self.index_path = self.directory / INDEX_NAME
+
+        self._lock = threading.Lock()
+        self._run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self._segment_number = 0
+        self._segment = None
+        self._segment_name = None
+        self._segment_size = 0
+        # Records waiting for the current zstd frame: (kind, bill_id, line)
+        self._pending: list[tuple[str, str, bytes]] = []
+        self._pending_size = 0
+        self._compressor = zstandard.ZstdCompressor() if compression else None
+
+        self.index = self._load_index()
+        self._index_file = open(self.index_path, "a", encoding="utf-8")
+
+    @classmethod
+    def for_project(cls, project_root: str | Path, **kwargs) -> "JsonlSink":
+        """The sink at <project_root>/src/data/jsonl."""
+
+        return cls(Path(project_root) / "src" / "data" / "jsonl", **kwargs)
+
+    def _load_index(self) -> dict[tuple[str, str], list]:
+        """Read index.jsonl, skipping entries whose segment data is missing."""
+
+        index = {}
+        if not self.index_path.exists():
+            return index
+
+        sizes = {}
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    kind, bill_id, segment, offset, length, *record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+                if segment not in sizes:
+                    segment_path = self.directory / segment
+                    sizes[segment] = (
+                        segment_path.stat().st_size if segment_path.exists() else 0
+                    )
+                if offset + length <= sizes[segment]:
+                    index[(kind, bill_id)] = [segment, offset, length, *record]
+        return index
+
+    def put_bill(
+        self,
+        bill_id: str,
+        provider_name: str,
+        provider_json: dict,
+        validation_passed: bool,
+        source_name: str | None = None,
+        file_sha256: str | None = None,
+    ) -> None:
+        """
+        Append a saved bill.
+
+        Args:
+            bill_id: The bill's id (the stem of its file).
+            provider_name: The normalized provider name.
+            provider_json: The post-processed provider JSON.
+            validation_passed: Whether the bill passed validation.
+            source_name: The bill's file name.
+            file_sha256: SHA-256 of the bill bytes, if known.
+        """
+
+        self._append(
+            {
+                "kind": BILL,
+                "bill_id": bill_id,
+                "provider_name": provider_name,
+                "validation_passed": validation_passed,
+                "source_name": source_name,
+                "file_sha256": file_sha256,
+                "written_at": time.time(),
+                "data": provider_json,
+            }
+        )
+
+    def set_standard(self, bill_id: str, standard: dict) -> None:
+        """Append the standard JSON of a bill."""
+
+        self._append(
+            {
+                "kind": STANDARD,
+                "bill_id": bill_id,
+                "written_at": time.time(),
+                "data": standard,
+            }
+        )
+
+    def _append(self, record: dict) -> None:
+        line = (
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        ).encode("utf-8")
+        kind, bill_id = record["kind"], record["bill_id"]
+
+        with self._lock:
+            if self._compressor is None:
+                self._write_frame(line, [(kind, bill_id, 0, len(line))])
+                return
+            self._pending.append((kind, bill_id, line))
+            self._pending_size += len(line)
+            if self._pending_size >= self.frame_bytes:
+                self._flush_frame()
+
+    def _flush_frame(self) -> None:
+        """Compress the pending records into one frame and write it."""
+
+        if not self._pending:
+            return
+        records, offset = [], 0
+        for kind, bill_id, line in self._pending:
+            records.append((kind, bill_id, offset, len(line)))
+            offset += len(line)
+        raw = b"".join(line for _, _, line in self._pending)
+        self._pending, self._pending_size = [], 0
+        self._write_frame(self._compressor.compress(raw), records)
+
+    def _write_frame(self, frame: bytes, records: list[tuple]) -> None:
+        """
+        Write one frame to the current segment, then index its records.
+
+        The index lines are written only after the frame is on disk, so the
+        index never points at data that was not written.
+        """
+
+        if self._segment is None or self._segment_size >= self.segment_bytes:
+            self._open_segment()
+
+        offset = self._segment_size
+        self._segment.write(frame)
+        self._segment.flush()
+        self._segment_size += len(frame)
+
+        for kind, bill_id, record_offset, record_length in records:
+            entry = [self._segment_name, offset, len(frame)]
+            if self._compressor is not None:
+                entry += [record_offset, record_length]
+            self.index[(kind, bill_id)] = entry
+            self._index_file.write(json.dumps([kind, bill_id, *entry]) + "\n")
+        self._index_file.flush()
+
+    def _open_segment(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_number += 1
+        suffix = ".jsonl.zst" if self.compression else ".jsonl"
+        self._segment_name = (
+            f"segment-{self._run_id}-{self._segment_number:05d}{suffix}"
+        )
+        self._segment = open(self.directory / self._segment_name, "xb")
+        self._segment_size = 0
+
+    def get(self, bill_id: str, kind: str = BILL) -> dict | None:
+        """
+        Read the latest record of a bill.
+
+        Args:
+            bill_id: The bill's id.
+            kind: "bill" for the provider JSON record, "standard" for the
+                  standard JSON record.
+
+        Returns:
+            The record, or None if the bill has no record of that kind.
+        """
+
+        with self._lock:
+            for pending_kind, pending_id, line in reversed(self._pending):
+                if (pending_kind, pending_id) == (kind, bill_id):
+                    return json.loads(line)
+            entry = self.index.get((kind, bill_id))
+        if entry is None:
+            return None
+
+        segment, offset, length, *record = entry
+        with open(self.directory / segment, "rb") as f:
+            f.seek(offset)
+            frame = f.read(length)
+        if record:
+            record_offset, record_length = record
+            frame = zstandard.ZstdDecompressor().decompress(frame)
+            frame = frame[record_offset : record_offset + record_length]
+        return json.loads(frame)
+
+    def segments(self) -> list[Path]:
+        """The segment files, oldest first."""
+
+        return sorted(self.directory.glob("segment-*.jsonl*"))
+
+    def records(self, kind: str | None = None) -> Iterator[dict]:
+        """
+        Stream every record in write order.
+
+        A bill written more than once appears once per write; the last
+        record is the current one. Records still buffered for a zstd frame
+        are not included until `flush`.
+
+        Args:
+            kind: Only yield records of this kind ("bill" or "standard").
+        """
+
+        for segment_path in self.segments():
+            for line in _segment_lines(segment_path):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A record cut short by a crash
+                    continue
+                if kind is None or record["kind"] == kind:
+                    yield record
+
+    def stats(self) -> dict[str, Any]:
+        """Segment and record counts."""
+
+        segments = self.segments()
+        return {
+            "directory": str(self.directory),
+            "segments": len(segments),
+            "segment_bytes": sum(path.stat().st_size for path in segments),
+            "bills": sum(1 for kind, _ in self.index if kind == BILL),
+            "standard": sum(1 for kind, _ in self.index if kind == STANDARD),
+        }
+
+    def flush(self) -> None:
+        """Write the records buffered for the current zstd frame."""
+
+        with self._lock:
+            self._flush_frame()
+
+    def close(self) -> None:
+        """Flush buffered records and close the current segment and the index."""
+
+        with self._lock:
+            self._flush_frame()
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            self._index_file.close()
+
+    def __enter__(self) -> "JsonlSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Read the JSONL results sink (src/data/jsonl)."
+    )
+    parser.add_argument(
+        "--dir",
+        default=None,
+        help="Sink directory (default src/data/jsonl).",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Show segment and record counts.")
+
+    get_parser = subparsers.add_parser("get", help="Print one bill's latest record.")
+    get_parser.add_argument("bill_id", help="The bill's file stem.")
+    get_parser.add_argument(
+        "--standard", action="store_true", help="Print the standard JSON record."
+    )
+
+    cat_parser = subparsers.add_parser(
+        "cat", help="Stream every record as JSONL to stdout."
+    )
+    cat_parser.add_argument("--kind", choices=(BILL, STANDARD), default=None)
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[2]
+    directory = Path(args.dir) if args.dir else project_root / "src" / "data" / "jsonl"
+    with JsonlSink(directory) as sink:
+        if args.command == "stats":
+            print(json.dumps(sink.stats(), indent=2))
+        elif args.command == "get":
+            record = sink.get(args.bill_id, STANDARD if args.standard else BILL)
+            if record is None:
+                sys.exit(f"No record for {args.bill_id}")
+            print(json.dumps(record, indent=2, ensure_ascii=False))
+        else:
+            for record in sink.records(args.kind):
+                sys.stdout.write(
+                    json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+                )
+
+
+if __name__ == "__main__":
+    main()
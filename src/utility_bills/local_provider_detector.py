@@ -0,0 +1,403 @@
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from provider_router import PROVIDER_SPECS
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - optional dependency
+    PdfReader = None
+
+# Weighted markers per provider, matched (case-insensitively) against the PDF
+# text layer. Weights of matching markers are summed; a leading "!" makes a
+# marker count when the pattern is ABSENT. Negative weights are used to tell
+# apart providers that share most of their markers (PSE gas vs electric vs
+# combined, SCL residential vs commercial, the King County formats).
+PROVIDER_FINGERPRINTS: dict[str, list[tuple[str, float]]] = {
+    "seattle public utilities": [
+        (r"seattle public utilities", 0.9),
+        (r"seattle\.gov/utilities", 0.9),
+        (r"seattle city light", -0.5),
+    ],
+    "puget sound energy - gas": [
+        (r"puget sound energy", 0.5),
+        (r"pse\.com", 0.3),
+        (r"natural gas charges", 0.5),
+        (r"electric charges", -1.0),
+    ],
+    "puget sound energy - electric": [
+        (r"puget sound energy", 0.5),
+        (r"pse\.com", 0.3),
+        (r"electric charges", 0.5),
+        (r"natural gas charges", -1.0),
+    ],
+    "puget sound energy - gas and electric": [
+        (r"puget sound energy", 0.5),
+        (r"pse\.com", 0.3),
+        (r"natural gas charges", 0.2),
+        (r"electric charges", 0.2),
+        (r"!natural gas charges", -0.6),
+        (r"!electric charges", -0.6),
+    ],
+    "seattle city light": [
+        (r"seattle city light", 0.9),
+        (r"power factor penalty", -0.5),
+        (r"small general energy", -0.5),
+        (r"\bkvrh\b", -0.3),
+        (r"total for:", -0.3),
+    ],
+    "seattle city light - commercial": [
+        (r"seattle city light", 0.6),
+        (r"power factor penalty", 0.4),
+        (r"small general energy", 0.4),
+        (r"\bkvrh\b", 0.3),
+        (r"total for:", 0.2),
+    ],
+    "waste management of washington": [
+        (r"wmnorthwest\.com", 0.9),
+        (r"wm\.com/mywm", 0.9),
+        (r"waste management", 0.6),
+    ],
+    "sammamish plateau water": [
+        (r"sammamish plateau water", 0.9),
+        (r"spwater\.org", 0.9),
+    ],
+    "kent": [
+        (r"kentwa\.gov", 0.9),
+        (r"city of kent", 0.7),
+    ],
+    "everett public works": [
+        (r"everettwa\.gov", 0.9),
+        (r"city of everett", 0.6),
+        (r"everett public works", 0.9),
+    ],
+    "republic services": [
+        (r"republicservices\.com", 0.9),
+        (r"republic services", 0.8),
+    ],
+    "redmond city washington": [
+        (r"redmond\.gov", 0.9),
+        (r"city of redmond", 0.8),
+    ],
+    "king county wastewater treatment division": [
+        (r"wastewater treatment division", 0.9),
+        (r"kingcounty\.gov/paycapacitycharge", 0.9),
+        (r"capacity charge", 0.4),
+        (r"choose a payment amount", -0.6),
+        (r"most recent invoice", -0.6),
+    ],
+    "king county account summary": [
+        (r"most recent invoice", 0.5),
+        (r"choose a payment amount", 0.5),
+        (r"remaining balance", 0.2),
+        (r"king county", 0.1),
+    ],
+    "city of bellevue": [
+        (r"bellevuewa\.gov", 0.9),
+        (r"city of bellevue", 0.7),
+    ],
+    "city of lynnwood": [
+        (r"lynnwoodwa\.gov", 0.9),
+        (r"city of lynnwood", 0.8),
+    ],
+    "rubatino refuse removal": [
+        (r"rubatino\.onlineportal\.us\.com", 1.0),
+        (r"rubatino", 0.8),
+    ],
+    "recology king county": [
+        (r"recology\.com", 0.9),
+        (r"recology", 0.8),
+    ],
+    "king county water district 20": [
+        (r"king county water district (?:no\.? ?)?20\b", 0.9),
+        (r"kcwd20\.com", 0.9),
+        (r"206[-. ]243[-. ]3990", 0.6),
+    ],
+    "valley view sewer district": [
+        (r"valley ?view sewer", 0.9),
+        (r"valleyviewsewer\.org", 0.9),
+    ],
+    "city of edmonds": [
+        (r"edmondsutilitypayments\.com", 0.9),
+        (r"edmondswa\.gov", 0.9),
+        (r"city of edmonds", 0.8),
+    ],
+    "alderwood water & wastewater district": [
+        (r"awwd\.com", 0.9),
+        (r"alderwood water", 0.9),
+    ],
+    "city of lacey": [
+        (r"cityoflacey\.org", 0.9),
+        (r"city of lacey", 0.8),
+    ],
+    "city of renton": [
+        (r"rentonwa\.gov", 0.9),
+        (r"city of renton", 0.8),
+        (r"425[-. ]430[-. ]6852", 0.6),
+    ],
+    "cedar grove organics recycling llc": [
+        (r"gogreenscene\.com", 0.9),
+        (r"cedar grove", 0.8),
+    ],
+    "centrio energy seattle": [
+        (r"centrio", 0.9),
+    ],
+    "southwest suburban sewer district": [
+        (r"swssd\.com", 0.9),
+        (r"southwest suburban sewer", 0.9),
+    ],
+    "city of bothell": [
+        (r"bothellwa\.gov", 0.9),
+        (r"city of bothell", 0.8),
+    ],
+    "city of olympia": [
+        (r"olympiawa\.gov", 0.9),
+        (r"city of olympia", 0.8),
+    ],
+    "city of auburn": [
+        (r"auburnwa\.gov", 0.9),
+        (r"city of auburn", 0.8),
+    ],
+    "snohomish county pud": [
+        (r"snopud\.com", 0.9),
+        (r"snohomish county pud", 0.9),
+        (r"public utility district no\.? ?1 of snohomish", 0.9),
+    ],
+    "city of frisco": [
+        (r"friscotexas\.gov", 0.9),
+        (r"city of frisco", 0.8),
+    ],
+    "city of ocean shores": [
+        (r"osgov\.com", 0.9),
+        (r"city of ocean shores", 0.8),
+    ],
+    "king county water district 49": [
+        (r"water district (?:no\.? ?)?49\b", 0.9),
+        (r"wd49\.com", 0.9),
+        (r"206[-. ]242[-. ]8535", 0.6),
+    ],
+}
+
+# Weight of a provider's prompt-file stem appearing as a token in the filename
+# (e.g. "spu_2026_01.pdf"). Never enough on its own to skip the LLM.
+FILENAME_WEIGHT = 0.3
+
+# Weight of a previously seen account number appearing in the filename or text
+KNOWN_ACCOUNT_WEIGHT = 0.9
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_MARGIN = 0.25
+
+# Only the first pages carry the provider header and account summary
+MAX_TEXT_PAGES = 2
+
+# Runs of digits/letters (optionally dash-separated) that could be an account number
+_ACCOUNT_TOKEN = re.compile(r"[0-9a-z][0-9a-z-]{4,}[0-9a-z]")
+
+_unknown = set(PROVIDER_FINGERPRINTS) ^ set(PROVIDER_SPECS)
+if _unknown:
+    raise RuntimeError(
+        f"PROVIDER_FINGERPRINTS and PROVIDER_SPECS disagree on: {sorted(_unknown)}"
+    )
+
+
+@dataclass
+class LocalDetection:
+    """Result of a local detection attempt."""
+
+    provider_name: str | None
+    confidence: float
+    scores: dict[str, float] = field(default_factory=dict)
+    evidence: list[str] = field(default_factory=list)
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).lower()
+
+
+def _normalize_account(account_number: str) -> str:
+    return re.sub(r"[^0-9a-z]", "", account_number.lower())
+
+
+def extract_pdf_text(pdf_path: str | Path, max_pages: int = MAX_TEXT_PAGES) -> str:
+    """
+    Read the text layer of the first pages of a PDF.
+
+    Args:
+        pdf_path: Path to the PDF file.
+        max_pages: Number of leading pages to read.
+
+    Returns:
+        The normalized (lowercase, single-spaced) text, or an empty string if
+        pypdf is not installed or the PDF has no readable text layer.
+    """
+
+    if PdfReader is None:
+        return ""
+
+    try:
+        reader = PdfReader(str(pdf_path))
+        pages = reader.pages[:max_pages]
+        return _normalize_text(" ".join(page.extract_text() or "" for page in pages))
+    except Exception:
+        # Scanned or malformed PDFs simply fall through to the LLM
+        return ""
+
+
+class LocalProviderDetector:
+    """
+    Detect the bill provider locally, without an LLM call.
+
+    Matches the PDF text layer, the filename and previously seen account
+    numbers against `PROVIDER_FINGERPRINTS`. A provider is only returned when
+    its score reaches `threshold` and beats the runner-up by `margin`;
+    otherwise the caller should fall back to LLM detection.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        margin: float = DEFAULT_MARGIN,
+        known_accounts: dict[str, str] | None = None,
+    ):
+        """
+        Args:
+            threshold: Minimum confidence required to skip the LLM.
+            margin: Minimum lead of the best provider over the runner-up.
+            known_accounts: Map of account number to provider name, see
+                            `from_project`.
+        """
+
+        self.threshold = threshold
+        self.margin = margin
+        self.known_accounts = {
+            _normalize_account(account): provider
+            for account, provider in (known_accounts or {}).items()
+            if len(_normalize_account(account)) >= 6
+        }
+
+        self._text_patterns = {
+            provider: [
+                (re.compile(pattern.lstrip("!")), pattern.startswith("!"), weight)
+                for pattern, weight in markers
+            ]
+            for provider, markers in PROVIDER_FINGERPRINTS.items()
+        }
+        self._filename_patterns = {
+            provider: re.compile(
+                rf"(?<![a-z0-9]){re.escape(Path(spec.prompt).stem)}(?![a-z0-9])"
+            )
+            for provider, spec in PROVIDER_SPECS.items()
+        }
+
+    @classmethod
+    def from_project(
+        cls, project_root: str | Path, **kwargs
+    ) -> "LocalProviderDetector":
+        """
+        Build a detector that also knows the account numbers of processed bills.
+
+        Account numbers are read from <project_root>/src/data/processed/json,
+        where every bill carries its provider_name.
+        """
+
+        known_accounts: dict[str, str] = {}
+        processed_json_dir = Path(project_root) / "src" / "data" / "processed" / "json"
+
+        for json_path in processed_json_dir.glob("*.json"):
+            try:
+                data = json.loads(json_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            provider_name = str(data.get("provider_name", "")).strip().lower()
+            account_number = (data.get("account_level_data") or {}).get(
+                "account_number"
+            )
+            if provider_name in PROVIDER_SPECS and account_number:
+                known_accounts[str(account_number)] = provider_name
+
+        return cls(known_accounts=known_accounts, **kwargs)
+
+    def score(self, text: str, filename: str = "") -> LocalDetection:
+        """
+        Score every provider against the given text and filename.
+
+        Args:
+            text: Normalized bill text (may be empty, e.g. for PNGs).
+            filename: The bill's file name.
+
+        Returns:
+            A LocalDetection with the accepted provider (or None) and scores.
+        """
+
+        filename = filename.lower()
+        scores: dict[str, float] = {}
+        evidence: list[str] = []
+
+        if text:
+            for provider, patterns in self._text_patterns.items():
+                total = 0.0
+                for pattern, when_absent, weight in patterns:
+                    if (pattern.search(text) is None) == when_absent:
+                        total += weight
+                        if weight > 0:
+                            evidence.append(f"{provider}: text /{pattern.pattern}/")
+                if total > 0:
+                    scores[provider] = total
+
+        for provider, pattern in self._filename_patterns.items():
+            if pattern.search(filename):
+                scores[provider] = scores.get(provider, 0.0) + FILENAME_WEIGHT
+                evidence.append(f"{provider}: filename /{pattern.pattern}/")
+
+        if self.known_accounts:
+            # Dict lookups per candidate token keep this O(text), not O(accounts)
+            candidates = {
+                _normalize_account(token)
+                for token in _ACCOUNT_TOKEN.findall(f"{filename} {text}")
+            }
+            for account in candidates & self.known_accounts.keys():
+                provider = self.known_accounts[account]
+                scores[provider] = scores.get(provider, 0.0) + KNOWN_ACCOUNT_WEIGHT
+                evidence.append(f"{provider}: known account {account}")
+
+        # Rank on raw sums so strong evidence still separates near-duplicates;
+        # the reported confidence is clamped to [0, 1]
+        ranked = sorted(
+            ((p, s) for p, s in scores.items() if s > 0),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        scores = {p: round(min(1.0, s), 3) for p, s in ranked}
+
+        if not ranked:
+            return LocalDetection(None, 0.0, scores, evidence)
+
+        best_provider, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        confidence = min(1.0, best)
+
+        if confidence >= self.threshold and best - runner_up >= self.margin:
+            return LocalDetection(best_provider, confidence, scores, evidence)
+        return LocalDetection(None, confidence, scores, evidence)
+
+    def detect_pdf(self, pdf_path: str | Path) -> LocalDetection:
+        """
+        Detect the provider of a PDF from its text layer, filename and account.
+        """
+
+        pdf_path = Path(pdf_path)
+        return self.score(extract_pdf_text(pdf_path), pdf_path.name)
+
+    def detect_png(self, png_path: str | Path) -> LocalDetection:
+        """
+        Detect the provider of a PNG from its filename and known accounts.
+
+        PNGs have no text layer, so this only succeeds for well-named files or
+        accounts that have been processed before.
+        """
+
+        png_path = Path(png_path)
+        return self.score("", png_path.name)
@@ -19,7 +19,7 @@ def setup_logging(log_dir: str | Path, level: int = logging.INFO) -> logging.Log
         return logger
 
     fmt = logging.Formatter(
-        fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+        fmt="%(asctime)s | %(levelname)s | %(name)s | %(threadName)s | %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
 
@@ -3,8 +3,20 @@ Mapper functions for transforming provider-specific JSON to standard format.
 """
 
 from .provider_detector import detect_provider_from_json, load_and_detect_provider
-from .llm_transformer import transform_to_standard, transform_bill_file
+from .llm_transformer import (
+    transform_to_standard,
+    transform_to_standard_async,
+    transform_bill_file,
+)
+from .rule_mapper import (
+    has_rule_mapping,
+    map_to_standard,
+    map_with_rules,
+    standardize_bill,
+    standardize_bill_async,
+)
 from .universal_transformer import (
+    transform_bill,
     transform_single_bill,
     batch_transform_directory,
     process_latest_bill,
@@ -14,7 +26,14 @@ __all__ = [
     "detect_provider_from_json",
     "load_and_detect_provider",
     "transform_to_standard",
+    "transform_to_standard_async",
     "transform_bill_file",
+    "has_rule_mapping",
+    "map_to_standard",
+    "map_with_rules",
+    "standardize_bill",
+    "standardize_bill_async",
+    "transform_bill",
     "transform_single_bill",
     "batch_transform_directory",
     "process_latest_bill",
@@ -1,7 +1,7 @@
 import sys
 from pathlib import Path
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 # Add parent directory to path to import standard_model
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -10,6 +10,9 @@ import json
 import logging
 from typing import Any, Dict
 
+from metrics import stage_timer
+from prompt_cache import compact_schema_json, load_prompt_text
+from request_scheduler import SCHEDULER, estimate_tokens
 from standard_template.standard_model import StandardUtilityBill
 
 # Setup logging
@@ -18,41 +21,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Supports structured outputs
+TRANSFORM_MODEL = "gpt-4o-2024-08-06"
+# A standard bill with several services and meters runs to a few thousand tokens
+TRANSFORM_OUTPUT_TOKENS = 4000
 
-def transform_to_standard(
-    provider_json: Dict[str, Any], provider_name: str, client: OpenAI = None
-) -> StandardUtilityBill:
+TAX_INSTRUCTIONS_PATH = (
+    Path(__file__).parent.parent
+    / "transformation_prompts"
+    / "tax_transformation_instructions.txt"
+)
+
+
+def build_transform_messages(
+    provider_json: Dict[str, Any], provider_name: str
+) -> list[dict]:
     """
-    Use LLM to transform provider-specific JSON to standard format.
+    Build the chat messages asking the LLM to transform a bill to standard format.
+
+    Shared by the sync and async transformers so both send the same prompt.
 
     Args:
         provider_json: The provider-specific JSON structure
         provider_name: Name of the provider (e.g., "Seattle Public Utilities")
-        client: OpenAI client instance. If None, creates a new one.
 
     Returns:
-        StandardUtilityBill object matching the uniform template
-
-    Raises:
-        Exception: If transformation fails
+        The system and user messages for the chat completions call.
     """
 
-    if client is None:
-        client = OpenAI()
-
     # Remove provider_name from the JSON before sending to LLM (avoid redundancy)
     provider_json_copy = provider_json.copy()
     provider_json_copy.pop("provider_name", None)
 
-    # Load tax transformation instructions
-    tax_instructions_path = (
-        Path(__file__).parent.parent
-        / "transformation_prompts"
-        / "tax_transformation_instructions.txt"
-    )
-    tax_instructions = ""
-    if tax_instructions_path.exists():
-        tax_instructions = tax_instructions_path.read_text(encoding="utf-8")
+    # Load tax transformation instructions (cached in memory, re-read on change)
+    try:
+        tax_instructions = load_prompt_text(TAX_INSTRUCTIONS_PATH)
+    except FileNotFoundError:
+        tax_instructions = ""
 
     prompt = f"""You are a utility bill data transformation expert. Your task is to transform a provider-specific utility bill JSON into a standardized format.
 
@@ -115,21 +120,60 @@ def transform_to_standard(
 
         Return ONLY the transformed data in the standard format. Do not include explanations or extra text."""
 
+    return [
+        {
+            "role": "system",
+            "content": "You are a data transformation expert that converts utility bill data to a standardized format. Always follow the exact structure specified.",
+        },
+        {"role": "user", "content": prompt},
+    ]
+
+
+def estimate_transform_tokens(messages: list[dict]) -> int:
+    """Token estimate of a transform request, for the request scheduler."""
+
+    return estimate_tokens(
+        *(message["content"] for message in messages),
+        compact_schema_json(StandardUtilityBill),
+        max_output_tokens=TRANSFORM_OUTPUT_TOKENS,
+    )
+
+
+def transform_to_standard(
+    provider_json: Dict[str, Any], provider_name: str, client: OpenAI = None
+) -> StandardUtilityBill:
+    """
+    Use LLM to transform provider-specific JSON to standard format.
+
+    Args:
+        provider_json: The provider-specific JSON structure
+        provider_name: Name of the provider (e.g., "Seattle Public Utilities")
+        client: OpenAI client instance. If None, creates a new one.
+
+    Returns:
+        StandardUtilityBill object matching the uniform template
+
+    Raises:
+        Exception: If transformation fails
+    """
+
+    if client is None:
+        client = OpenAI(max_retries=0)
+
     try:
         logger.info(f"Calling OpenAI API to transform {provider_name} bill...")
 
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",  # Supports structured outputs
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a data transformation expert that converts utility bill data to a standardized format. Always follow the exact structure specified.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            response_format=StandardUtilityBill,
-            temperature=0,  # Deterministic output
-        )
+        messages = build_transform_messages(provider_json, provider_name)
+        with stage_timer("transform", provider_name, TRANSFORM_MODEL):
+            response = SCHEDULER.call(
+                TRANSFORM_MODEL,
+                estimate_transform_tokens(messages),
+                client.beta.chat.completions.parse,
+                model=TRANSFORM_MODEL,
+                messages=messages,
+                response_format=StandardUtilityBill,
+                temperature=0,  # Deterministic output
+            )
 
         logger.info("Transformation successful!")
         return response.choices[0].message.parsed
@@ -139,6 +183,40 @@ def transform_to_standard(
         raise
 
 
+async def transform_to_standard_async(
+    provider_json: Dict[str, Any], provider_name: str, client: AsyncOpenAI = None
+) -> StandardUtilityBill:
+    """
+    `transform_to_standard` on an AsyncOpenAI client.
+
+    Args:
+        provider_json: The provider-specific JSON structure
+        provider_name: Name of the provider
+        client: AsyncOpenAI client instance. If None, creates a new one.
+
+    Returns:
+        StandardUtilityBill object matching the uniform template
+    """
+
+    if client is None:
+        client = AsyncOpenAI(max_retries=0)
+
+    logger.info(f"Calling OpenAI API to transform {provider_name} bill...")
+
+    messages = build_transform_messages(provider_json, provider_name)
+    with stage_timer("transform", provider_name, TRANSFORM_MODEL):
+        response = await SCHEDULER.call_async(
+            TRANSFORM_MODEL,
+            estimate_transform_tokens(messages),
+            client.beta.chat.completions.parse,
+            model=TRANSFORM_MODEL,
+            messages=messages,
+            response_format=StandardUtilityBill,
+            temperature=0,
+        )
+    return response.choices[0].message.parsed
+
+
 def transform_bill_file(
     input_path: str, output_path: str, provider_name: str, client: OpenAI = None
 ) -> StandardUtilityBill:
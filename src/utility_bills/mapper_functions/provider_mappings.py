@@ -0,0 +1,665 @@
+"""
+Declarative field mappings from provider-specific JSON to the standard format.
+
+Each provider is described by where its charges and meters live and which
+field holds each value; `rule_mapper` does the actual reshaping. Paths are
+dotted keys into the extracted JSON, and lists along a path are walked
+automatically ("[]" marks them for readability). Field names are looked up on
+the item first and then on its parents, so a charge can pick up, e.g., the
+service_name of the meter entry it belongs to. A field containing a dot is
+resolved from the root of the bill instead.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ChargeSource:
+    """Where one list of charges lives and how to read each charge."""
+
+    path: str
+    name: str = "line_item_charge_name"
+    amount: str = "line_item_charge_amount"
+    rate: str | None = None
+    usage: str | None = None
+    uom: str | None = None
+    from_date: str | None = None
+    to_date: str | None = None
+    meter_number: str | None = None
+    # Fixed service name, or the field holding it
+    service: str | None = None
+    service_field: str | None = None
+    # Fixed service type; otherwise it is classified from the service name
+    service_type: str | None = None
+    # Split charges into services by the type classified from each charge name
+    split_by_type: bool = False
+    group_field: str | None = None
+    service_address_field: str | None = None
+    is_tax: str | None = None
+    tax_rate: str | None = None
+    # Every item of this source is a tax
+    taxes_only: bool = False
+
+
+@dataclass(frozen=True)
+class ChargeTotals:
+    """Charges that are only given as named totals, e.g. a water_total field."""
+
+    path: str
+    items: tuple[tuple[str, str], ...]
+
+
+@dataclass(frozen=True)
+class MeterSource:
+    """Where one list of meters (or readings) lives and how to read it."""
+
+    path: str
+    meter_number: str | None = "meter_number"
+    previous_reading: str | None = "previous_reading"
+    current_reading: str | None = "current_reading"
+    from_date: str | None = None
+    to_date: str | None = None
+    usage: str | None = "usage"
+    uom: str | None = None
+    multiplier: str | None = None
+    meter_size: str | None = None
+    meter_category: str | None = None
+    service: str | None = None
+    service_field: str | None = None
+    service_type: str | None = None
+
+
+@dataclass(frozen=True)
+class ProviderMapping:
+    """The complete mapping for one provider."""
+
+    charges: tuple[ChargeSource | ChargeTotals, ...]
+    meters: tuple[MeterSource, ...] = ()
+    # Used when a charge or meter cannot be classified from its name
+    default_service_type: str = "OTHER"
+
+
+_SEATTLE_LINE_ITEMS = "meter_level_data[].line_item_charges[]"
+
+_SEATTLE_CHARGES = ChargeSource(
+    path=_SEATTLE_LINE_ITEMS,
+    rate="rate",
+    usage="usage",
+    uom="usage_unit_of_measurement",
+    from_date="service_from_date",
+    to_date="service_through_date",
+    meter_number="meter_number",
+    service_field="service_name",
+    group_field="service_category",
+)
+
+
+def _seattle_meters(multiplier: str | None) -> MeterSource:
+    return MeterSource(
+        path=_SEATTLE_LINE_ITEMS,
+        from_date="service_from_date",
+        to_date="service_through_date",
+        uom="usage_unit_of_measurement",
+        multiplier=multiplier,
+        service_field="service_name",
+    )
+
+
+def _pse_service(prefix: str, service: str, service_type: str, multiplier=None):
+    return (
+        ChargeSource(
+            path=f"{prefix}charges_level_data.line_item_charges[]",
+            rate="rate",
+            usage="usage",
+            uom="usage_unit_of_measurement",
+            service=service,
+            service_type=service_type,
+        ),
+        MeterSource(
+            path=f"{prefix}meter_level_data[]",
+            from_date="service_from_date",
+            to_date="service_to_date",
+            uom="usage_unit_of_measurement",
+            multiplier=multiplier,
+            meter_category="rate_schedule",
+            service=service,
+            service_type=service_type,
+        ),
+    )
+
+
+_PSE_GAS = _pse_service("", "Natural Gas", "GAS")
+_PSE_ELECTRIC = _pse_service("", "Electric", "ELECTRIC", multiplier="multiplier")
+_PSE_COMBINED_GAS = _pse_service("gas_", "Natural Gas", "GAS")
+_PSE_COMBINED_ELECTRIC = _pse_service(
+    "electric_", "Electric", "ELECTRIC", multiplier="multiplier"
+)
+
+_WATER_DISTRICT = ProviderMapping(
+    charges=(
+        ChargeSource(
+            path="charges_level_data.line_items[]",
+            name="description",
+            amount="amount",
+            rate="rate",
+            group_field="charge_type",
+            split_by_type=True,
+        ),
+    ),
+    meters=(
+        MeterSource(
+            path="meter_level_data",
+            previous_reading="prior_reading",
+            to_date="read_date",
+            uom="usage_unit",
+        ),
+    ),
+    default_service_type="WATER",
+)
+
+_SIMPLE_CHARGES = ChargeSource(
+    path="charges_level_data.charges[]",
+    name="charge_name",
+    amount="charge_amount",
+    split_by_type=True,
+)
+
+_SERVICE_CHARGES = ChargeSource(
+    path="charges_level_data.service_charges[]",
+    name="charge_name",
+    amount="charge_amount",
+    split_by_type=True,
+)
+
+# Normalized provider name -> mapping. Providers missing here fall back to the
+# LLM transformer.
+PROVIDER_MAPPINGS: dict[str, ProviderMapping] = {
+    "seattle public utilities": ProviderMapping(
+        charges=(
+            _SEATTLE_CHARGES,
+            ChargeSource(
+                path="miscellaneous_level_data.other_charges[]",
+                name="other_charge_name",
+                amount="other_charge_amount",
+                service="Other Charges",
+            ),
+        ),
+        meters=(_seattle_meters(None),),
+        default_service_type="WATER",
+    ),
+    "seattle city light": ProviderMapping(
+        charges=(_SEATTLE_CHARGES,),
+        meters=(_seattle_meters("kwh_multiplier"),),
+        default_service_type="ELECTRIC",
+    ),
+    "seattle city light - commercial": ProviderMapping(
+        charges=(_SEATTLE_CHARGES,),
+        meters=(_seattle_meters("multiplier"),),
+        default_service_type="ELECTRIC",
+    ),
+    "puget sound energy - gas": ProviderMapping(
+        charges=(_PSE_GAS[0],), meters=(_PSE_GAS[1],), default_service_type="GAS"
+    ),
+    "puget sound energy - electric": ProviderMapping(
+        charges=(_PSE_ELECTRIC[0],),
+        meters=(_PSE_ELECTRIC[1],),
+        default_service_type="ELECTRIC",
+    ),
+    "puget sound energy - gas and electric": ProviderMapping(
+        charges=(_PSE_COMBINED_ELECTRIC[0], _PSE_COMBINED_GAS[0]),
+        meters=(_PSE_COMBINED_ELECTRIC[1], _PSE_COMBINED_GAS[1]),
+    ),
+    "waste management of washington": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data[].line_items[]",
+                name="description",
+                amount="amount",
+                usage="quantity",
+                from_date="date",
+                to_date="date",
+                service_field="service_location",
+                service_type="SOLID_WASTE",
+                service_address_field="service_location",
+            ),
+        ),
+        default_service_type="SOLID_WASTE",
+    ),
+    "sammamish plateau water": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.line_item_charges[]",
+                rate="rate",
+                split_by_type=True,
+            ),
+        ),
+        meters=(
+            MeterSource(
+                path="meter_level_data[]",
+                from_date="service_from_date",
+                to_date="service_to_date",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "kent": ProviderMapping(
+        charges=(_SIMPLE_CHARGES,),
+        meters=(
+            MeterSource(
+                path="charges_level_data",
+                meter_number=None,
+                from_date="miscellaneous_level_data.service_from_date",
+                to_date="miscellaneous_level_data.service_to_date",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "everett public works": ProviderMapping(
+        charges=(_SIMPLE_CHARGES,),
+        meters=(
+            MeterSource(
+                path="charges_level_data",
+                meter_number=None,
+                previous_reading="previous_reading_high",
+                current_reading="current_reading_high",
+                from_date="read_date_previous",
+                to_date="read_date_present",
+                usage="current_consumption",
+                uom="consumption_unit",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "republic services": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.charges[]",
+                name="charge_name",
+                amount="charge_amount",
+                rate="unit_price",
+                usage="quantity",
+                from_date="service_from_date",
+                to_date="service_through_date",
+                service="Solid Waste",
+                service_type="SOLID_WASTE",
+                service_address_field="service_location",
+            ),
+        ),
+        default_service_type="SOLID_WASTE",
+    ),
+    "redmond city washington": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.current_charges[]",
+                name="charge_type",
+                amount="charge_amount",
+                split_by_type=True,
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "king county wastewater treatment division": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.charges[]",
+                name="charge_name",
+                amount="charge_amount",
+                service="Wastewater Treatment",
+                service_type="WASTEWATER",
+            ),
+        ),
+        default_service_type="WASTEWATER",
+    ),
+    "king county account summary": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.charges[]",
+                name="charge_name",
+                amount="charge_amount",
+                service="Wastewater Treatment",
+                service_type="WASTEWATER",
+            ),
+        ),
+        default_service_type="WASTEWATER",
+    ),
+    "city of bellevue": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.services[].line_item_charges[]",
+                service_field="service_name",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "city of lynnwood": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="meter_level_data[]",
+                name="service_name",
+                amount="charge",
+                usage="usage",
+                uom="usage_unit_of_measurement",
+                meter_number="meter_number",
+                service_field="service_name",
+            ),
+        ),
+        meters=(
+            MeterSource(
+                path="meter_level_data[]",
+                previous_reading="previous_meter_reading",
+                current_reading="current_meter_reading",
+                from_date="previous_read_date",
+                to_date="current_read_date",
+                uom="usage_unit_of_measurement",
+                service_field="service_name",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "rubatino refuse removal": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.line_items[]",
+                name="description",
+                amount="total",
+                rate="rate",
+                usage="quantity",
+                from_date="date",
+                to_date="date",
+                service="Refuse Removal",
+                service_type="SOLID_WASTE",
+            ),
+        ),
+        default_service_type="SOLID_WASTE",
+    ),
+    "recology king county": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.line_items[]",
+                name="description",
+                amount="total_amount",
+                rate="unit_cost",
+                usage="quantity",
+                service="Solid Waste",
+                service_type="SOLID_WASTE",
+            ),
+        ),
+        default_service_type="SOLID_WASTE",
+    ),
+    "king county water district 20": _WATER_DISTRICT,
+    "king county water district 49": _WATER_DISTRICT,
+    "valley view sewer district": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data[].line_items[]",
+                name="line_item_name",
+                amount="line_item_amount",
+                rate="rate",
+                usage="usage",
+                uom="unit_of_measurement",
+                service_field="charge_category_name",
+            ),
+        ),
+        default_service_type="SEWER",
+    ),
+    "city of edmonds": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data[]",
+                name="charge_description",
+                amount="charge_amount",
+                from_date="service_from_date",
+                to_date="service_through_date",
+                split_by_type=True,
+            ),
+        ),
+        meters=(
+            MeterSource(
+                path="meter_level_data[]",
+                previous_reading="prev_read",
+                current_reading=None,
+                to_date="read_date",
+                usage="total_consumption",
+                uom="consumption_unit",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "alderwood water & wastewater district": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data[].line_items[]",
+                name="charge_description",
+                amount="charge_amount",
+                rate="rate",
+                usage="usage",
+                service_field="service_type",
+            ),
+        ),
+        meters=(
+            MeterSource(
+                path="meter_level_data[]",
+                previous_reading="meter_reading_previous",
+                current_reading="meter_reading_present",
+                from_date="read_date_previous",
+                to_date="read_date_present",
+                uom="usage_unit_of_measurement",
+                meter_size="meter_size",
+                meter_category="meter_type",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "city of lacey": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data[]",
+                name="charge_description",
+                amount="charge_amount",
+                from_date="service_from_date",
+                to_date="service_to_date",
+                split_by_type=True,
+            ),
+        ),
+        meters=(
+            MeterSource(
+                path="meter_level_data[]",
+                previous_reading="previous_read",
+                current_reading="current_read",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "city of renton": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data[]",
+                name="charge_type",
+                amount="charge_amount",
+                split_by_type=True,
+            ),
+        ),
+        meters=(
+            MeterSource(
+                path="meter_level_data[]",
+                meter_number="serial_number",
+                from_date="previous_read_date",
+                to_date="current_read_date",
+                usage="consumption",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "cedar grove organics recycling llc": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data[]",
+                name="description",
+                amount="amount",
+                usage="quantity",
+                service="Organics Recycling",
+                service_type="SOLID_WASTE",
+            ),
+        ),
+        default_service_type="SOLID_WASTE",
+    ),
+    "centrio energy seattle": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.service_charges[]",
+                name="charge_name",
+                amount="charge_amount",
+                rate="rate",
+                usage="usage",
+                uom="usage_unit_of_measurement",
+                from_date="service_from_date",
+                to_date="service_through_date",
+                service="District Energy",
+            ),
+            ChargeSource(
+                path="charges_level_data.taxes[]",
+                name="tax_name",
+                amount="tax_amount",
+                service="District Energy",
+                taxes_only=True,
+            ),
+            ChargeSource(
+                path="charges_level_data.account_charges[]",
+                name="charge_name",
+                amount="charge_amount",
+                service="Account Charges",
+            ),
+        ),
+    ),
+    "southwest suburban sewer district": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.service_charges[]",
+                name="charge_name",
+                amount="charge_amount",
+                service="Sewer",
+                service_type="SEWER",
+            ),
+            ChargeSource(
+                path="charges_level_data.taxes[]",
+                name="tax_name",
+                amount="tax_amount",
+                service="Sewer",
+                taxes_only=True,
+            ),
+        ),
+        default_service_type="SEWER",
+    ),
+    "city of bothell": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="meter_level_data[].line_item_charges[]",
+                usage="units",
+                service_field="service_name",
+                is_tax="is_tax",
+                tax_rate="tax_percentage",
+            ),
+        ),
+        meters=(
+            MeterSource(
+                path="meter_level_data[]",
+                to_date="current_read_date",
+                uom="usage_unit_of_measurement",
+                service_field="service_name",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "city of olympia": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="charges_level_data.drinking_water_charges[]",
+                name="charge_name",
+                amount="charge_amount",
+                service="Drinking Water",
+                service_type="WATER",
+            ),
+            ChargeSource(
+                path="charges_level_data.wastewater_charges[]",
+                name="charge_name",
+                amount="charge_amount",
+                service="Wastewater",
+                service_type="WASTEWATER",
+            ),
+            ChargeSource(
+                path="charges_level_data.other_charges[]",
+                name="charge_name",
+                amount="charge_amount",
+                split_by_type=True,
+            ),
+        ),
+        meters=(
+            MeterSource(
+                path="meter_level_data[]",
+                uom="usage_unit_of_measurement",
+                service_field="service_name",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "city of auburn": ProviderMapping(
+        charges=(
+            ChargeTotals(
+                path="charges_level_data",
+                items=(
+                    ("Water", "water_total"),
+                    ("Sewer", "sewer_total"),
+                    ("Storm Water", "storm_water_total"),
+                ),
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+    "snohomish county pud": ProviderMapping(
+        charges=(
+            ChargeSource(
+                path="meter_level_data[].line_item_charges[]",
+                rate="rate",
+                usage="usage",
+                uom="usage_unit",
+                meter_number="meter_number",
+                service_field="service_name",
+                service_address_field="service_address",
+                is_tax="is_tax",
+                tax_rate="tax_percentage",
+            ),
+        ),
+        meters=(
+            MeterSource(
+                path="meter_level_data[]",
+                previous_reading=None,
+                current_reading=None,
+                usage="kwh_usage",
+                meter_category="rate_schedule",
+                service_field="service_name",
+            ),
+        ),
+        default_service_type="ELECTRIC",
+    ),
+    "city of frisco": ProviderMapping(
+        charges=(_SERVICE_CHARGES,),
+        meters=(
+            MeterSource(path="meter_level_data[]", uom="usage_unit_of_measurement"),
+        ),
+        default_service_type="WATER",
+    ),
+    "city of ocean shores": ProviderMapping(
+        charges=(_SERVICE_CHARGES,),
+        meters=(
+            MeterSource(
+                path="meter_level_data[]",
+                meter_number="serial_number",
+                from_date="previous_reading_date",
+                to_date="current_reading_date",
+                usage="consumption",
+                uom="usage_unit_of_measurement",
+            ),
+        ),
+        default_service_type="WATER",
+    ),
+}
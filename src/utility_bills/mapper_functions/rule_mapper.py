@@ -0,0 +1,813 @@
+"""
+Deterministic provider JSON -> StandardUtilityBill mapping.
+
+Providers listed in `PROVIDER_MAPPINGS` are mapped locally, without an LLM
+call: dates are normalized to ISO format, rate strings are parsed into a
+number and a rate type, meters get stable M1..Mn ids and charges are grouped
+per service. Providers without a mapping still go through the LLM
+transformer.
+"""
+
+import logging
+import re
+import sys
+from collections import ChainMap
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from openai import AsyncOpenAI, OpenAI
+
+from .llm_transformer import transform_to_standard, transform_to_standard_async
+from .provider_mappings import (
+    PROVIDER_MAPPINGS,
+    ChargeSource,
+    ChargeTotals,
+    MeterSource,
+    ProviderMapping,
+)
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from metrics import stage_timer
+from standard_template.standard_model import (
+    Adjustment,
+    ChargeGroup,
+    CustomerName,
+    LateFee,
+    LineItemCharge,
+    MeterLevelData,
+    MeterReading,
+    Payment,
+    ProviderAddress,
+    ProviderEmail,
+    ProviderPhone,
+    ProviderWebsite,
+    ServiceLevelData,
+    StandardUtilityBill,
+    StatementLevelData,
+    Tax,
+    Usage,
+)
+
+logger = logging.getLogger(__name__)
+
+_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%m/%d/%y",
+    "%m-%d-%Y",
+    "%m-%d-%y",
+    "%B %d, %Y",
+    "%b %d, %Y",
+    "%B %d %Y",
+    "%b %d %Y",
+    "%d %B %Y",
+    "%d %b %Y",
+    "%Y/%m/%d",
+    "%m.%d.%Y",
+    "%m.%d.%y",
+)
+
+# Checked in order, so e.g. "Wastewater" is not classified as WATER
+_SERVICE_TYPE_KEYWORDS = (
+    ("WASTEWATER", ("wastewater", "waste water")),
+    ("STORMWATER", ("storm", "drainage", "surface water")),
+    ("SOLID_WASTE", ("solid waste", "garbage", "refuse", "recycl", "organic", "yard")),
+    ("SEWER", ("sewer",)),
+    ("WATER", ("water",)),
+    ("ELECTRIC", ("electric", "kwh", "power")),
+    ("GAS", ("gas", "therm")),
+)
+
+_SERVICE_TYPE_NAMES = {
+    "WASTEWATER": "Wastewater",
+    "STORMWATER": "Storm Water",
+    "SOLID_WASTE": "Solid Waste",
+    "SEWER": "Sewer",
+    "WATER": "Water",
+    "ELECTRIC": "Electric",
+    "GAS": "Natural Gas",
+    "OTHER": "Other Charges",
+}
+
+_RATE_PATTERN = re.compile(r"^\s*\$?\s*(-?[\d,]*\.?\d+)\s*(.*)$")
+_CITY_STATE_ZIP_PATTERN = re.compile(
+    r"^(?P<street>.*?)[,\s]+(?P<csz>[A-Za-z .'-]+,?\s+[A-Z]{2}\s+\d{5}(?:-\d{4})?)\s*$"
+)
+_TAX_PATTERN = re.compile(r"\btax(es)?\b", re.IGNORECASE)
+_CITY_PATTERN = re.compile(r"\bcity of ([A-Za-z .'-]+?)(?:\s+tax|\s*$)", re.IGNORECASE)
+
+
+def normalize_provider_name(provider_name: str) -> str:
+    return " ".join((provider_name or "").lower().split())
+
+
+def has_rule_mapping(provider_name: str) -> bool:
+    """Return True if the provider can be mapped without the LLM."""
+
+    return normalize_provider_name(provider_name) in PROVIDER_MAPPINGS
+
+
+def to_iso_date(value: Any) -> str:
+    """
+    Normalize a date string to YYYY-MM-DD.
+
+    Args:
+        value: A date as printed on the bill, e.g. "01/22/2026" or "Jan. 5, 2026".
+
+    Returns:
+        The ISO date, the stripped input if it is not a recognizable single
+        date (e.g. a date range), or "" for empty values.
+    """
+
+    if value is None:
+        return ""
+    text = str(value).strip()
+    if not text:
+        return ""
+
+    cleaned = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", text.replace(".", " "))
+    cleaned = " ".join(cleaned.replace(" ,", ",").split())
+    for candidate in (text, cleaned):
+        for fmt in _DATE_FORMATS:
+            try:
+                return datetime.strptime(candidate, fmt).date().isoformat()
+            except ValueError:
+                continue
+    return text
+
+
+def to_float(value: Any) -> Optional[float]:
+    """Parse a number that may carry "$", "," or a trailing "CR" credit marker."""
+
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = str(value).strip().replace("$", "").replace(",", "")
+    negative = text.upper().endswith("CR") or (
+        text.startswith("(") and text.endswith(")")
+    )
+    text = text.upper().removesuffix("CR").strip("() ")
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return -abs(number) if negative else number
+
+
+def parse_rate(value: Any) -> tuple[Optional[float], Optional[str]]:
+    """
+    Split a rate into its number and the unit/description that follows it.
+
+    Args:
+        value: A rate such as 5.98, "$5.98 per CCF" or "6.714%".
+
+    Returns:
+        Tuple of (rate, rate_type), e.g. (5.98, "per CCF") or (6.714, "%").
+        A rate string without a number is returned as the rate_type.
+    """
+
+    if value is None or isinstance(value, bool):
+        return None, None
+    if isinstance(value, (int, float)):
+        return float(value), None
+
+    text = str(value).strip()
+    if not text:
+        return None, None
+    match = _RATE_PATTERN.match(text)
+    if match is None:
+        return None, text
+    try:
+        rate = float(match.group(1).replace(",", ""))
+    except ValueError:
+        return None, text
+    return rate, match.group(2).strip() or None
+
+
+def classify_service_type(name: str) -> str:
+    """Classify a service or charge name into a standard service type."""
+
+    lowered = (name or "").lower()
+    for service_type, keywords in _SERVICE_TYPE_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return service_type
+    return "OTHER"
+
+
+def split_address(address: Any) -> tuple[str, str]:
+    """Split a one-line address into (street, "City, ST 12345")."""
+
+    text = " ".join(str(address or "").split())
+    match = _CITY_STATE_ZIP_PATTERN.match(text)
+    if match is None:
+        return text, ""
+    return match.group("street").rstrip(", "), match.group("csz")
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _lookup(context: ChainMap, root: Dict[str, Any], field: Optional[str]) -> Any:
+    """Resolve a mapping field on an item and its parents, or from the root."""
+
+    if not field:
+        return None
+    if "." in field:
+        node: Any = root
+        for key in field.split("."):
+            node = node.get(key) if isinstance(node, dict) else None
+        return node
+    return context.get(field)
+
+
+def iter_items(data: Dict[str, Any], path: str) -> Iterator[ChainMap]:
+    """
+    Yield every item at `path`, each as a ChainMap over the item and its parents.
+
+    Lists along the path are walked automatically, and a path that ends on a
+    single object yields that object.
+    """
+
+    def walk(node: Any, keys: list[str], parents: tuple) -> Iterator[ChainMap]:
+        if isinstance(node, list):
+            for element in node:
+                yield from walk(element, keys, parents)
+            return
+        if not isinstance(node, dict):
+            return
+        if not keys:
+            yield ChainMap(node, *parents)
+            return
+        yield from walk(node.get(keys[0]), keys[1:], (node, *parents))
+
+    keys = [key.removesuffix("[]") for key in path.split(".")]
+    yield from walk(data, keys, ())
+
+
+class _ServiceBuilder:
+    """Accumulates the charges, taxes and meters of one standard service."""
+
+    def __init__(self, name: str, service_type: str, provider: str):
+        self.name = name
+        self.service_type = service_type
+        self.provider = provider
+        self.address = ""
+        self.groups: dict[str, list[tuple[LineItemCharge, str]]] = {}
+        self.taxes: list[Tax] = []
+        self.meters: dict[str, MeterLevelData] = {}
+
+    def build(self, service_days: Optional[int]) -> ServiceLevelData:
+        meter_ids = {m.meter_number: m.meter_id for m in self.meters.values()}
+        only_meter = [m.meter_id for m in self.meters.values()]
+
+        charge_groups = []
+        for group_name, items in self.groups.items():
+            charges = []
+            for charge, meter_number in items:
+                if meter_number and meter_number in meter_ids:
+                    charge.applies_to_meters = [meter_ids[meter_number]]
+                elif len(only_meter) == 1:
+                    charge.applies_to_meters = list(only_meter)
+                charges.append(charge)
+            amounts = [c.line_item_charge_amount for c in charges]
+            subtotal = round(sum(a for a in amounts if a is not None), 2)
+            charge_groups.append(
+                ChargeGroup(
+                    group_name=group_name,
+                    line_item_charges=charges,
+                    group_subtotal=subtotal,
+                )
+            )
+
+        dates = [
+            date
+            for group in charge_groups
+            for charge in group.line_item_charges
+            for date in (charge.service_from_date, charge.service_to_date)
+        ] + [
+            date
+            for meter in self.meters.values()
+            for reading in meter.meter_reading
+            for date in (reading.service_from_date, reading.service_to_date)
+        ]
+        iso_dates = sorted(d for d in dates if d and re.match(r"\d{4}-\d\d-\d\d$", d))
+        from_date = iso_dates[0] if iso_dates else ""
+        to_date = iso_dates[-1] if iso_dates else ""
+        if service_days is None and len(iso_dates) > 1 and from_date != to_date:
+            service_days = (
+                datetime.fromisoformat(to_date) - datetime.fromisoformat(from_date)
+            ).days
+
+        charge_total = sum(g.group_subtotal or 0 for g in charge_groups)
+        tax_total = sum(t.tax_amount or 0 for t in self.taxes)
+
+        return ServiceLevelData(
+            service_name=self.name,
+            service_provider=self.provider,
+            service_type=self.service_type,
+            service_address=self.address,
+            service_from_date=from_date,
+            service_to_date=to_date,
+            service_days=service_days,
+            meter_level_data=list(self.meters.values()),
+            charge_groups=charge_groups,
+            taxes=self.taxes,
+            service_charges=round(charge_total + tax_total, 2),
+        )
+
+
+class _BillBuilder:
+    """Maps one provider JSON document using a `ProviderMapping`."""
+
+    def __init__(self, data: Dict[str, Any], mapping: ProviderMapping, provider: str):
+        self.data = data
+        self.mapping = mapping
+        self.provider = provider
+        self.services: dict[str, _ServiceBuilder] = {}
+        self.meter_ids: dict[str, str] = {}
+
+    def service(self, name: str, service_type: Optional[str]) -> _ServiceBuilder:
+        name = name or _SERVICE_TYPE_NAMES[self.mapping.default_service_type]
+        if name not in self.services:
+            if not service_type:
+                service_type = classify_service_type(name)
+                if service_type == "OTHER":
+                    service_type = self.mapping.default_service_type
+            self.services[name] = _ServiceBuilder(name, service_type, self.provider)
+        return self.services[name]
+
+    def _service_for_charge(
+        self, source: ChargeSource, item: ChainMap, name: str
+    ) -> _ServiceBuilder:
+        if source.service:
+            return self.service(source.service, source.service_type)
+        service_name = _text(_lookup(item, self.data, source.service_field))
+        if service_name:
+            return self.service(service_name, source.service_type)
+        if source.split_by_type:
+            service_type = classify_service_type(name)
+            if service_type == "OTHER":
+                service_type = self.mapping.default_service_type
+            return self.service(_SERVICE_TYPE_NAMES[service_type], service_type)
+        return self.service("", source.service_type)
+
+    def add_charges(self, source: ChargeSource) -> None:
+        for item in iter_items(self.data, source.path):
+            name = _text(_lookup(item, self.data, source.name))
+            amount = to_float(_lookup(item, self.data, source.amount))
+            if not name and amount is None:
+                continue
+
+            service = self._service_for_charge(source, item, name)
+            if source.service_address_field and not service.address:
+                service.address = _text(
+                    _lookup(item, self.data, source.service_address_field)
+                )
+
+            rate, rate_type = parse_rate(_lookup(item, self.data, source.rate))
+            is_tax = source.taxes_only or bool(_lookup(item, self.data, source.is_tax))
+            if is_tax or (source.is_tax is None and _TAX_PATTERN.search(name)):
+                tax_rate = to_float(_lookup(item, self.data, source.tax_rate))
+                if tax_rate is None and rate_type and "%" in rate_type:
+                    tax_rate = rate
+                service.taxes.append(
+                    Tax(
+                        tax_name=name,
+                        tax_authority=_tax_authority(name),
+                        rate=tax_rate,
+                        tax_amount=amount,
+                    )
+                )
+                continue
+
+            group_name = _text(_lookup(item, self.data, source.group_field))
+            charge = LineItemCharge(
+                line_item_charge_name=name,
+                line_item_charge_amount=amount,
+                rate=rate,
+                rate_type=rate_type,
+                service_from_date=to_iso_date(
+                    _lookup(item, self.data, source.from_date)
+                )
+                or None,
+                service_to_date=to_iso_date(_lookup(item, self.data, source.to_date))
+                or None,
+                usage=to_float(_lookup(item, self.data, source.usage)),
+                usage_unit_of_measurement=_text(_lookup(item, self.data, source.uom))
+                or None,
+            )
+            meter_number = _text(_lookup(item, self.data, source.meter_number))
+            group_name = group_name or f"{service.name} Charges"
+            service.groups.setdefault(group_name, []).append((charge, meter_number))
+
+    def add_totals(self, source: ChargeTotals) -> None:
+        for item in iter_items(self.data, source.path):
+            for service_name, field in source.items:
+                amount = to_float(item.get(field))
+                if amount is None:
+                    continue
+                service = self.service(service_name, None)
+                service.groups.setdefault(f"{service_name} Charges", []).append(
+                    (
+                        LineItemCharge(
+                            line_item_charge_name=service_name,
+                            line_item_charge_amount=amount,
+                        ),
+                        "",
+                    )
+                )
+
+    def _service_for_meter(self, source: MeterSource, item: ChainMap):
+        if source.service:
+            return self.service(source.service, source.service_type)
+        service_name = _text(_lookup(item, self.data, source.service_field))
+        if service_name in self.services:
+            return self.services[service_name]
+
+        # Attach to a service of the meter's type, else the first service
+        service_type = source.service_type or classify_service_type(service_name)
+        if service_type == "OTHER":
+            service_type = self.mapping.default_service_type
+        for service in self.services.values():
+            if service.service_type == service_type:
+                return service
+        if self.services and not service_name:
+            return next(iter(self.services.values()))
+        return self.service(service_name, source.service_type)
+
+    def add_meters(self, source: MeterSource) -> None:
+        for index, item in enumerate(iter_items(self.data, source.path)):
+
+            def get(field: Optional[str]) -> Any:
+                return _lookup(item, self.data, field)
+
+            meter_number = _text(get(source.meter_number))
+            previous_reading = to_float(get(source.previous_reading))
+            current_reading = to_float(get(source.current_reading))
+            raw_usage = get(source.usage)
+            if (
+                not meter_number
+                and previous_reading is None
+                and current_reading is None
+                and raw_usage in (None, [], "")
+            ):
+                continue
+
+            multiplier = to_float(get(source.multiplier))
+            uom = _text(get(source.uom))
+            if isinstance(raw_usage, list):
+                usages = [
+                    Usage(
+                        multiplier=int(multiplier) if multiplier else None,
+                        usage=to_float(entry.get("value")),
+                        uom=_text(entry.get("unit_of_measurement")) or uom,
+                    )
+                    for entry in raw_usage
+                    if isinstance(entry, dict)
+                ]
+            elif to_float(raw_usage) is not None or multiplier:
+                usages = [
+                    Usage(
+                        multiplier=int(multiplier) if multiplier else None,
+                        usage=to_float(raw_usage),
+                        uom=uom,
+                    )
+                ]
+            else:
+                usages = []
+
+            reading = MeterReading(
+                service_from_date=to_iso_date(get(source.from_date)),
+                service_to_date=to_iso_date(get(source.to_date)),
+                previous_reading=previous_reading,
+                current_reading=current_reading,
+                usages=usages,
+            )
+
+            key = meter_number or f"{source.path}#{index}"
+            if key not in self.meter_ids:
+                self.meter_ids[key] = f"M{len(self.meter_ids) + 1}"
+
+            service = self._service_for_meter(source, item)
+            meter = service.meters.get(key)
+            if meter is None:
+                meter = service.meters[key] = MeterLevelData(
+                    meter_id=self.meter_ids[key],
+                    meter_number=meter_number,
+                    meter_size=_text(get(source.meter_size)),
+                    meter_category=_text(get(source.meter_category)),
+                )
+            # Line-item based sources repeat the reading on every charge
+            if reading not in meter.meter_reading:
+                meter.meter_reading.append(reading)
+
+    def build(self) -> StandardUtilityBill:
+        for source in self.mapping.charges:
+            if isinstance(source, ChargeTotals):
+                self.add_totals(source)
+            else:
+                self.add_charges(source)
+        for source in self.mapping.meters:
+            self.add_meters(source)
+
+        account = self.data.get("account_level_data") or {}
+        service_days = account.get("service_days")
+        if not isinstance(service_days, int) or len(self.services) != 1:
+            service_days = None
+
+        return StandardUtilityBill(
+            statement_level_data=build_statement_level_data(self.data),
+            service_level_data=[
+                service.build(service_days) for service in self.services.values()
+            ],
+        )
+
+
+def _tax_authority(tax_name: str) -> str:
+    if "state" in tax_name.lower():
+        return "Washington State"
+    match = _CITY_PATTERN.search(tax_name)
+    if match:
+        return f"City of {match.group(1).strip().title()}"
+    return ""
+
+
+def _as_list(value: Any) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def build_statement_level_data(data: Dict[str, Any]) -> StatementLevelData:
+    """
+    Map the account, statement and miscellaneous sections shared by all providers.
+
+    Args:
+        data: The provider-specific JSON.
+
+    Returns:
+        The standard statement-level data.
+    """
+
+    account = data.get("account_level_data") or {}
+    statement = data.get("statement_level_data") or {}
+    misc = data.get("miscellaneous_level_data") or {}
+    if isinstance(misc, list):
+        misc = misc[0] if misc and isinstance(misc[0], dict) else {}
+
+    service_address, service_csz = split_address(account.get("service_address"))
+    billing_address, billing_csz = split_address(account.get("billing_address"))
+
+    provider_addresses = []
+    for address_type, field in (
+        ("Mailing", "provider_address"),
+        ("Street", "provider_street_address"),
+        ("Payment", "payment_address"),
+    ):
+        if account.get(field):
+            line1, csz = split_address(account[field])
+            provider_addresses.append(
+                ProviderAddress(
+                    type=address_type, address_line1=line1, city_state_zip=csz
+                )
+            )
+
+    payments = [
+        Payment(
+            payment_details=_text(p.get("payment_details") or p.get("description")),
+            payment_date=to_iso_date(p.get("payment_date")),
+            payment_amount=to_float(p.get("payment_amount") or p.get("amount")),
+        )
+        for p in _as_list(statement.get("payments"))
+        if isinstance(p, dict)
+    ]
+    if not payments and statement.get("payments_applied") is not None:
+        payments.append(
+            Payment(
+                payment_details="Payment",
+                payment_date=to_iso_date(statement.get("payment_date")),
+                payment_amount=to_float(statement["payments_applied"]),
+            )
+        )
+
+    late_fees = []
+    if statement.get("late_fee_applied") is not None:
+        late_fees.append(
+            LateFee(
+                late_fee_details="Late Fee",
+                late_fee_date=to_iso_date(statement.get("late_fee_date")),
+                late_fee_amount=to_float(statement["late_fee_applied"]),
+            )
+        )
+
+    adjustments = []
+    for section in (misc, statement):
+        for field in (
+            "adjustments",
+            "current_adjustments",
+            "adjustments_and_additional_charges",
+            "other_charges_and_adjustments",
+            "penalties_adjustments",
+        ):
+            for entry in _as_list(section.get(field)):
+                if isinstance(entry, dict):
+                    adjustments.append(
+                        Adjustment(
+                            adjustment_details=_text(
+                                entry.get("adjustment_name")
+                                or entry.get("adjustment_details")
+                                or entry.get("description")
+                            ),
+                            adjustment_date=to_iso_date(
+                                entry.get("adjustment_date") or entry.get("date")
+                            ),
+                            adjustment_amount=to_float(
+                                entry.get("adjustment_amount", entry.get("amount"))
+                            ),
+                        )
+                    )
+                elif to_float(entry):
+                    adjustments.append(
+                        Adjustment(
+                            adjustment_details=field.replace("_", " ").capitalize(),
+                            adjustment_amount=to_float(entry),
+                        )
+                    )
+
+    def total(items: list, attribute: str, explicit: Any = None) -> Optional[float]:
+        if explicit is not None:
+            return to_float(explicit)
+        amounts = [getattr(i, attribute) for i in items if getattr(i, attribute)]
+        return round(sum(amounts), 2) if amounts else None
+
+    website = _text(account.get("provider_website"))
+    phone = _text(account.get("provider_customer_service_phone"))
+    email = _text(account.get("provider_customer_service_email"))
+    customer_name = _text(account.get("customer_name"))
+    current_charges = statement.get("current_billing")
+    if current_charges is None:
+        current_charges = statement.get("current_charges")
+
+    return StatementLevelData(
+        provider=_text(account.get("provider")) or _text(data.get("provider_name")),
+        provider_website=(
+            [ProviderWebsite(type="main", link=website)] if website else []
+        ),
+        provider_customer_service_phone=(
+            [ProviderPhone(type="call", phone=phone)] if phone else []
+        ),
+        provider_customer_service_email=(
+            [ProviderEmail(type="support", email=email)] if email else []
+        ),
+        provider_address=provider_addresses,
+        account_number=_text(account.get("account_number")),
+        invoice_number=_text(
+            statement.get("invoice_number")
+            or account.get("invoice_number")
+            or account.get("bill_number")
+        ),
+        customer_number=_text(account.get("customer_number")),
+        customer_name=(
+            [CustomerName(type="Property Owner", name=customer_name)]
+            if customer_name
+            else []
+        ),
+        service_address=service_address,
+        service_city_state_zip=service_csz,
+        billing_address=billing_address,
+        billing_city_state_zip=billing_csz,
+        bill_date=to_iso_date(statement.get("bill_date")),
+        previous_balance=to_float(statement.get("previous_balance")),
+        payments_applied=payments,
+        total_payments_applied=total(payments, "payment_amount"),
+        payments_cutoff_date=to_iso_date(statement.get("payment_date")),
+        late_fees_applied=late_fees,
+        total_late_fees_applied=total(late_fees, "late_fee_amount"),
+        adjustments_applied=adjustments,
+        total_adjustments_applied=total(
+            adjustments, "adjustment_amount", statement.get("total_adjustments")
+        ),
+        balance_forward=to_float(statement.get("balance")),
+        current_charges=to_float(current_charges),
+        total_amount_due=to_float(statement.get("total_amount_due")),
+        total_amount_due_date=to_iso_date(statement.get("total_amount_due_date")),
+        late_fee_by_duedate_percentage=to_float(
+            statement.get("late_fee_by_duedate_percentage")
+        ),
+        late_fee_by_duedate_amount=to_float(statement.get("latefee_amount")),
+        late_fee_by_duedate_details=_text(statement.get("late_fee_by_duedate")),
+        grace_period_days=statement.get("grace_period_days"),
+    )
+
+
+def map_to_standard(
+    provider_json: Dict[str, Any], provider_name: str
+) -> StandardUtilityBill:
+    """
+    Map a provider-specific bill to the standard format without an LLM.
+
+    Args:
+        provider_json: The provider-specific JSON structure
+        provider_name: Name of the provider (e.g., "Seattle Public Utilities")
+
+    Returns:
+        StandardUtilityBill object
+
+    Raises:
+        ValueError: If the provider has no rule mapping.
+    """
+
+    mapping = PROVIDER_MAPPINGS.get(normalize_provider_name(provider_name))
+    if mapping is None:
+        raise ValueError(f"No rule mapping for provider: {provider_name}")
+
+    account = provider_json.get("account_level_data") or {}
+    provider = _text(account.get("provider")) or provider_name
+    return _BillBuilder(provider_json, mapping, provider).build()
+
+
+def map_with_rules(
+    provider_json: Dict[str, Any], provider_name: str
+) -> Optional[StandardUtilityBill]:
+    """
+    Map a bill with its provider's rule mapping, if it has one.
+
+    The first step of every standard transform: the sequential, async and
+    batch extractors all call it, and send only the bills it returns None
+    for to the LLM transformer.
+
+    Args:
+        provider_json: The provider-specific JSON structure
+        provider_name: Name of the provider
+
+    Returns:
+        StandardUtilityBill object, or None if the provider has no rule
+        mapping or the mapping failed on this bill.
+    """
+
+    if not has_rule_mapping(provider_name):
+        return None
+    try:
+        with stage_timer("transform", provider_name, "rules"):
+            standard_bill = map_to_standard(provider_json, provider_name)
+    except Exception as e:
+        logger.warning(
+            f"Rule mapping failed for {provider_name}, falling back to LLM: {e}"
+        )
+        return None
+    logger.info(f"Mapped {provider_name} bill with rule mapping")
+    return standard_bill
+
+
+def standardize_bill(
+    provider_json: Dict[str, Any], provider_name: str, client: OpenAI = None
+) -> StandardUtilityBill:
+    """
+    Transform a bill to the standard format, preferring the rule mapping.
+
+    Providers with a rule mapping are mapped locally. Providers without one,
+    or bills the rule mapping cannot handle, go through the LLM transformer.
+
+    Args:
+        provider_json: The provider-specific JSON structure
+        provider_name: Name of the provider
+        client: OpenAI client for the LLM fallback. If None, one is created
+            only when the fallback is needed.
+
+    Returns:
+        StandardUtilityBill object
+    """
+
+    standard_bill = map_with_rules(provider_json, provider_name)
+    if standard_bill is None:
+        standard_bill = transform_to_standard(provider_json, provider_name, client)
+    return standard_bill
+
+
+async def standardize_bill_async(
+    provider_json: Dict[str, Any], provider_name: str, client: AsyncOpenAI = None
+) -> StandardUtilityBill:
+    """
+    `standardize_bill` with the LLM fallback awaited on an AsyncOpenAI client.
+
+    Args:
+        provider_json: The provider-specific JSON structure
+        provider_name: Name of the provider
+        client: AsyncOpenAI client for the LLM fallback. If None, one is
+            created only when the fallback is needed.
+
+    Returns:
+        StandardUtilityBill object
+    """
+
+    standard_bill = map_with_rules(provider_json, provider_name)
+    if standard_bill is None:
+        standard_bill = await transform_to_standard_async(
+            provider_json, provider_name, client
+        )
+    return standard_bill
@@ -1,5 +1,5 @@
 from pathlib import Path
-from .llm_transformer import transform_to_standard
+from .rule_mapper import standardize_bill
 from .provider_detector import load_and_detect_provider
 import sys
 
@@ -17,6 +17,52 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def transform_bill(
+    provider_json: dict,
+    provider_name: str,
+    output_path: Optional[str] = None,
+    client: OpenAI = None,
+) -> StandardUtilityBill:
+    """
+    Transform an in-memory provider bill to standard format.
+
+    Used by the extractors, which hand over the bill they just saved instead
+    of reading it back from processed/json.
+
+    Args:
+        provider_json: The post-processed provider JSON
+        provider_name: Name of the provider
+        output_path: If set, the standardized JSON is also written here
+        client: OpenAI client for providers without a rule mapping. If None,
+            one is created only when the LLM is needed.
+
+    Returns:
+        StandardUtilityBill object
+
+    Raises:
+        Exception: If the transformation fails
+    """
+
+    # Transform with the rule mapping, or the LLM for unmapped providers
+    logger.info("Transforming to standard format...")
+    standard_bill = standardize_bill(provider_json, provider_name, client)
+
+    if output_path is not None:
+        # Ensure output directory exists
+        output_file = Path(output_path)
+        output_file.parent.mkdir(exist_ok=True, parents=True)
+
+        # Save to output
+        with open(output_path, "w") as f:
+            f.write(
+                standard_bill.model_dump_json(
+                    indent=4, exclude_none=False, exclude_unset=False
+                )
+            )
+
+    return standard_bill
+
+
 def transform_single_bill(
     input_path: str, output_path: str, client: OpenAI = None
 ) -> Optional[StandardUtilityBill]:
@@ -27,15 +73,13 @@ def transform_single_bill(
     Args:
         input_path: Path to processed JSON file
         output_path: Path to save standardized JSON file
-        client: OpenAI client instance. If None, creates a new one.
+        client: OpenAI client for providers without a rule mapping. If None,
+            one is created only when the LLM is needed.
 
     Returns:
         StandardUtilityBill object if successful, None if failed
     """
 
-    if client is None:
-        client = OpenAI()
-
     try:
         # Load JSON and detect provider automatically
         logger.info(f"Loading file: {input_path}")
@@ -43,21 +87,9 @@ def transform_single_bill(
 
         logger.info(f"Detected provider: {provider_name}")
 
-        # Transform using LLM
-        logger.info("Transforming to standard format...")
-        standard_bill = transform_to_standard(provider_json, provider_name, client)
-
-        # Ensure output directory exists
-        output_file = Path(output_path)
-        output_file.parent.mkdir(exist_ok=True, parents=True)
-
-        # Save to output
-        with open(output_path, "w") as f:
-            f.write(
-                standard_bill.model_dump_json(
-                    indent=4, exclude_none=False, exclude_unset=False
-                )
-            )
+        standard_bill = transform_bill(
+            provider_json, provider_name, output_path, client
+        )
 
         logger.info(f" Successfully transformed bill!")
         logger.info(f"  Provider: {provider_name}")
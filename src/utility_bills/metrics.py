@@ -0,0 +1,328 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterator
+
+# Seconds; covers local work (milliseconds) up to slow extraction calls
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# The provider of the bill being worked on, so token usage recorded deep in
+# the request scheduler can be attributed to it
+current_provider: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_provider", default="unknown"
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, **extra) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A monotonically increasing count, one series per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [bucket counts..., sum, count]
+        self._values: dict[tuple, list[float]] = {}
+        self._recordings: list[list[tuple[dict, float]]] = []
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+            for recording in self._recordings:
+                recording.append((labels, value))
+
+    @contextmanager
+    def record(self) -> Iterator[list[tuple[dict, float]]]:
+        """
+        Also keep every raw observation made inside the block, for exact
+        percentiles in benchmarks (buckets only give approximate ones).
+
+        Yields:
+            A list that fills with (labels, value) pairs.
+        """
+
+        recording: list[tuple[dict, float]] = []
+        with self._lock:
+            self._recordings.append(recording)
+        try:
+            yield recording
+        finally:
+            with self._lock:
+                self._recordings.remove(recording)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                labels = _format_labels(self.labelnames, key, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    A value read at scrape time from a callback returning {label values: value},
+    for state that already lives elsewhere (queue depths, concurrency).
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...],
+        callback: Callable[[], dict[tuple, float]],
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.callback().items())
+            if value is not None
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = Histogram(
+    "utility_bills_stage_duration_seconds",
+    "Time spent in each processing stage of a bill.",
+    ("stage", "provider", "model"),
+)
+TOKENS = Counter(
+    "utility_bills_tokens_total",
+    "OpenAI tokens reported in response.usage.",
+    ("model", "provider", "direction"),
+)
+VALIDATIONS = Counter(
+    "utility_bills_validations_total",
+    "Bills checked by the provider validation, by result.",
+    ("provider", "result"),
+)
+
+
+@contextmanager
+def stage_timer(stage: str, provider: str | None = None, model: str = "") -> Iterator:
+    """
+    Time a block into the stage histogram.
+
+    Token usage recorded inside the block is attributed to the same provider.
+
+    Args:
+        stage: Stage name, e.g. "extract".
+        provider: The bill's provider. Defaults to the enclosing block's
+                  provider, or "unknown" before detection.
+        model: The model called in the stage, "" when none is.
+    """
+
+    provider = provider or current_provider.get()
+    token = current_provider.set(provider)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        current_provider.reset(token)
+        STAGE_SECONDS.observe(
+            time.perf_counter() - started, stage=stage, provider=provider, model=model
+        )
+
+
+@contextmanager
+def provider_scope(provider: str | None) -> Iterator:
+    """Attribute the stages and token usage inside the block to a provider."""
+
+    token = current_provider.set(provider or "unknown")
+    try:
+        yield
+    finally:
+        current_provider.reset(token)
+
+
+def record_usage(model: str, usage) -> None:
+    """
+    Count the input and output tokens of a response's `usage`.
+
+    Handles both the Responses API (input_tokens/output_tokens) and Chat
+    Completions (prompt_tokens/completion_tokens).
+    """
+
+    if usage is None:
+        return
+    provider = current_provider.get()
+    for direction, fields in (
+        ("input", ("input_tokens", "prompt_tokens")),
+        ("output", ("output_tokens", "completion_tokens")),
+    ):
+        for name in fields:
+            value = getattr(usage, name, None)
+            if isinstance(value, int):
+                TOKENS.inc(value, model=model, provider=provider, direction=direction)
+                break
+
+
+def write_textfile(path: str | Path) -> None:
+    """
+    Write the metrics for node_exporter's textfile collector.
+
+    The file is written to a temporary name and renamed, so the collector
+    never reads a partial file.
+    """
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(REGISTRY.render(), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve the metrics at http://<host>:<port>/metrics from a daemon thread.
+
+    Returns:
+        The server; call `shutdown()` on it to stop serving.
+    """
+
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    return server
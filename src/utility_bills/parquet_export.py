@@ -0,0 +1,387 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from logging_setup import setup_logging
+from mapper_functions.rule_mapper import to_iso_date
+from provider_router import normalize_provider_key
+from standard_template.standard_model import (
+    ChargeGroup,
+    LineItemCharge,
+    MeterLevelData,
+    MeterReading,
+    ServiceLevelData,
+    StandardUtilityBill,
+    StatementLevelData,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+TABLES = ("statements", "services", "meter_readings", "line_items")
+
+# Hive partition columns of every table, in directory order
+PARTITION_COLUMNS = ("provider_key", "bill_month")
+
+MANIFEST_NAME = "_manifest.json"
+
+_ISO_MONTH = re.compile(r"(\d{4}-\d{2})-\d{2}")
+
+
+def _arrow_type(annotation: Any) -> "pa.DataType":
+    """Map a standard model field annotation to an Arrow type."""
+
+    origin = get_origin(annotation)
+    if origin is Union:
+        (annotation,) = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _arrow_type(annotation)
+    if origin is list:
+        return pa.list_(_arrow_type(get_args(annotation)[0]))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return pa.struct(_model_fields(annotation))
+    return {str: pa.string(), float: pa.float64(), int: pa.int64(), bool: pa.bool_()}[
+        annotation
+    ]
+
+
+def _model_fields(model: type[BaseModel], exclude: tuple[str, ...] = ()) -> list:
+    return [
+        pa.field(name, _arrow_type(field.annotation))
+        for name, field in model.model_fields.items()
+        if name not in exclude
+    ]
+
+
+@lru_cache(maxsize=None)
+def table_schemas() -> dict[str, "pa.Schema"]:
+    """
+    The Arrow schema of each exported table, derived from the standard model.
+
+    Every table starts with bill_id and the partition columns, then the
+    position of the row within the bill, then the model's own fields. Nested
+    lists that have no table of their own (contact details, payments, taxes,
+    usages, applies_to_meters) are kept as list columns.
+    """
+
+    def schema(*parts: list) -> "pa.Schema":
+        keys = [pa.field("bill_id", pa.string())] + [
+            pa.field(name, pa.string()) for name in PARTITION_COLUMNS
+        ]
+        return pa.schema(keys + [field for part in parts for field in part])
+
+    def positions(*names: str) -> list:
+        return [pa.field(name, pa.int32()) for name in names]
+
+    return {
+        "statements": schema(
+            [
+                pa.field("schema_version", pa.string()),
+                pa.field("currency", pa.string()),
+            ],
+            _model_fields(StatementLevelData),
+        ),
+        "services": schema(
+            positions("service_index"),
+            _model_fields(
+                ServiceLevelData, exclude=("meter_level_data", "charge_groups")
+            ),
+        ),
+        "meter_readings": schema(
+            positions("service_index", "meter_index", "reading_index"),
+            _model_fields(MeterLevelData, exclude=("meter_reading",)),
+            _model_fields(MeterReading),
+        ),
+        "line_items": schema(
+            positions("service_index", "group_index", "item_index"),
+            _model_fields(ChargeGroup, exclude=("line_item_charges",)),
+            _model_fields(LineItemCharge),
+        ),
+    }
+
+
+def partition_values(standard: dict) -> dict[str, str]:
+    """
+    The partition of a standard bill: its provider and the month of its bill date.
+
+    Returns:
+        provider_key (the provider name lowercased, non-alphanumerics
+        collapsed to "_") and bill_month ("YYYY-MM"). Either is "unknown" if
+        the bill does not have it.
+    """
+
+    statement = standard.get("statement_level_data") or {}
+    provider = normalize_provider_key(statement.get("provider") or "")
+    month = _ISO_MONTH.fullmatch(to_iso_date(statement.get("bill_date")))
+    return {
+        "provider_key": re.sub(r"[^a-z0-9]+", "_", provider).strip("_") or "unknown",
+        "bill_month": month.group(1) if month else "unknown",
+    }
+
+
+def bill_rows(bill_id: str, standard: dict) -> dict[str, list[dict]]:
+    """
+    Flatten one standard bill into rows of the four tables.
+
+    The bill is validated against StandardUtilityBill first, so missing
+    fields get their defaults and every row matches `table_schemas()`. A
+    meter without readings still gets one meter_readings row (with the
+    reading fields empty), so no meter is lost.
+
+    Args:
+        bill_id: The bill's id (the stem of its JSON file).
+        standard: The standard JSON of the bill.
+
+    Returns:
+        The rows of each table, keyed by table name.
+
+    Raises:
+        pydantic.ValidationError: If the bill does not fit the standard model.
+    """
+
+    bill = StandardUtilityBill.model_validate(standard).model_dump()
+    keys = {"bill_id": bill_id, **partition_values(bill)}
+    rows = {
+        "statements": [
+            {
+                **keys,
+                "schema_version": bill["schema_version"],
+                "currency": bill["currency"],
+                **bill["statement_level_data"],
+            }
+        ],
+        "services": [],
+        "meter_readings": [],
+        "line_items": [],
+    }
+
+    for service_index, service in enumerate(bill["service_level_data"]):
+        meters = service.pop("meter_level_data")
+        groups = service.pop("charge_groups")
+        rows["services"].append({**keys, "service_index": service_index, **service})
+
+        for meter_index, meter in enumerate(meters):
+            readings = meter.pop("meter_reading")
+            meter_keys = {
+                **keys,
+                "service_index": service_index,
+                "meter_index": meter_index,
+                **meter,
+            }
+            if not readings:
+                rows["meter_readings"].append({**meter_keys, "reading_index": None})
+            for reading_index, reading in enumerate(readings):
+                rows["meter_readings"].append(
+                    {**meter_keys, "reading_index": reading_index, **reading}
+                )
+
+        for group_index, group in enumerate(groups):
+            items = group.pop("line_item_charges")
+            for item_index, item in enumerate(items):
+                rows["line_items"].append(
+                    {
+                        **keys,
+                        "service_index": service_index,
+                        "group_index": group_index,
+                        "item_index": item_index,
+                        **group,
+                        **item,
+                    }
+                )
+
+    return rows
+
+
+class ParquetExporter:
+    """
+    Export the standard bills in json_results to partitioned Parquet datasets.
+
+    Each table (statements, services, meter_readings, line_items) is a Hive
+    partitioned dataset under the output directory, e.g.
+    `line_items/provider_key=seattle_public_utilities/bill_month=2025-01/`,
+    joinable on bill_id. Bills are flattened and written in chunks, so memory
+    stays bounded whatever the archive size.
+
+    Exports are incremental: a manifest records the modification time and
+    size of every exported JSON, and each run appends new files holding only
+    the bills not exported yet. A bill whose JSON changed after it was
+    exported (e.g. regenerated by reprocess_bills.py) is reported as stale;
+    `export(rebuild=True)` rewrites the datasets from scratch, which also
+    compacts the small files left by many incremental runs.
+    """
+
+    def __init__(
+        self,
+        project_root: str | Path,
+        output_dir: str | Path | None = None,
+        chunk_size: int = 2000,
+    ):
+        """
+        Args:
+            project_root: Path to the project root directory.
+            output_dir: Where the datasets are written
+                        (default src/data/parquet).
+            chunk_size: Bills flattened per written file set.
+
+        Raises:
+            RuntimeError: If pyarrow is not installed.
+        """
+
+        if pa is None:
+            raise RuntimeError(
+                "Parquet export needs pyarrow; install it with `pip install pyarrow`"
+            )
+
+        self.project_root = Path(project_root)
+        self.source_dir = self.project_root / "src" / "data" / "json_results"
+        self.output_dir = (
+            Path(output_dir)
+            if output_dir
+            else self.project_root / "src" / "data" / "parquet"
+        )
+        self.chunk_size = chunk_size
+        self.manifest_path = self.output_dir / MANIFEST_NAME
+        self.logger = setup_logging(self.project_root / "logs")
+
+    def load_manifest(self) -> dict[str, list[int]]:
+        """The exported bills: bill_id -> [mtime_ns, size] of the exported JSON."""
+
+        if not self.manifest_path.exists():
+            return {}
+        return json.loads(self.manifest_path.read_text(encoding="utf-8"))["bills"]
+
+    def _save_manifest(self, exported: dict[str, list[int]]) -> None:
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps({"bills": exported}), encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+    def export(self, rebuild: bool = False) -> dict:
+        """
+        Write the bills not exported yet.
+
+        The manifest is updated after each chunk, so an interrupted run
+        resumes after the last written chunk.
+
+        Args:
+            rebuild: Delete the datasets and export every bill again.
+
+        Returns:
+            A report with bill and row counts.
+        """
+
+        started = time.perf_counter()
+        if rebuild and self.output_dir.exists():
+            shutil.rmtree(self.output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        exported = self.load_manifest()
+        pending, stale = [], 0
+        for json_path in sorted(self.source_dir.glob("*.json")):
+            stat = json_path.stat()
+            signature = [stat.st_mtime_ns, stat.st_size]
+            previous = exported.get(json_path.stem)
+            if previous is None:
+                pending.append((json_path, signature))
+            elif previous != signature:
+                stale += 1
+                self.logger.warning(
+                    f"{json_path.name} changed since it was exported; "
+                    "run with --rebuild to replace it"
+                )
+
+        report = {
+            "bills": len(pending),
+            "already_exported": len(exported),
+            "stale": stale,
+            "errors": 0,
+            "rows": dict.fromkeys(TABLES, 0),
+        }
+        run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+        for start in range(0, len(pending), self.chunk_size):
+            chunk = pending[start : start + self.chunk_size]
+            rows = {table: [] for table in TABLES}
+            for json_path, signature in chunk:
+                try:
+                    standard = json.loads(json_path.read_text(encoding="utf-8"))
+                    for table, table_rows in bill_rows(
+                        json_path.stem, standard
+                    ).items():
+                        rows[table].extend(table_rows)
+                except Exception as e:
+                    report["errors"] += 1
+                    self.logger.warning(f"{json_path.name}: {e!r}")
+                    continue
+                exported[json_path.stem] = signature
+
+            for table, table_rows in rows.items():
+                self._write(table, table_rows, f"{run_id}-{start // self.chunk_size}")
+                report["rows"][table] += len(table_rows)
+            self._save_manifest(exported)
+
+        report["bills"] -= report["errors"]
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        self.logger.info(
+            f"Exported {report['bills']} bills to {self.output_dir} "
+            f"in {report['seconds']}s"
+        )
+        return report
+
+    def _write(self, table: str, rows: list[dict], part: str) -> None:
+        """Append rows to one table's dataset, one new file per partition."""
+
+        if not rows:
+            return
+        pq.write_to_dataset(
+            pa.Table.from_pylist(rows, schema=table_schemas()[table]),
+            root_path=str(self.output_dir / table),
+            partition_cols=list(PARTITION_COLUMNS),
+            basename_template=f"part-{part}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the standard bills (json_results) to Parquet "
+        "datasets partitioned by provider and month, for analytics."
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=None,
+        help="Where to write the datasets (default src/data/parquet).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=2000,
+        help="Bills flattened per written file set (default 2000).",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Delete the datasets and export every bill again.",
+    )
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[2]
+    exporter = ParquetExporter(
+        project_root, output_dir=args.output_dir, chunk_size=args.chunk_size
+    )
+    print(json.dumps(exporter.export(rebuild=args.rebuild), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import logging
+import queue
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from metrics import Gauge
+
+# Stage kinds; they only size the default pools and label the metrics
+NETWORK = "network"
+CPU = "cpu"
+
+_STOP = object()
+
+# The most recently started pipeline, reported by the occupancy gauge
+_latest: weakref.ref | None = None
+
+
+@dataclass
+class Stage:
+    """
+    One step of a `StagedPipeline`.
+
+    The handler does the stage's work on an item and returns the name of the
+    stage the item goes to next, or None when the item is finished. Items
+    may skip stages but only move forward, so bounded queues cannot deadlock.
+    """
+
+    name: str
+    handler: Callable[[Any], str | None]
+    workers: int = 1
+    kind: str = NETWORK
+    # Defaults to twice the worker count
+    queue_size: int | None = None
+
+
+class _StageRuntime:
+    def __init__(self, stage: Stage, index: int):
+        self.stage = stage
+        self.index = index
+        self.queue: queue.Queue = queue.Queue(
+            maxsize=stage.queue_size or 2 * stage.workers
+        )
+        self.threads: list[threading.Thread] = []
+        self.busy = 0
+        self.blocked = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+
+class StagedPipeline:
+    """
+    Runs items through stages connected by bounded queues.
+
+    Each stage has its own pool of worker threads, so a slow stage (say, the
+    standard-format transform) only holds up the stages feeding it once its
+    queue is full, instead of every item waiting behind it. Network-bound
+    and CPU-bound stages get separate pools. Backpressure comes from the
+    queue bounds: a worker whose next queue is full blocks until there is
+    room, and the caller's `run` blocks the same way on the first queue.
+
+    `occupancy()` reports per stage how many items are queued, being worked
+    on, or blocked on a full downstream queue; the stage with full queues
+    and busy workers upstream of idle ones is the bottleneck.
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        on_error: Callable[[Any, str, Exception], None],
+        logger=None,
+        log_interval: float = 10.0,
+    ):
+        """
+        Args:
+            stages: The stages in order; items enter at the first one.
+            on_error: Called with (item, stage_name, error) when a handler
+                raises. The item is then finished, even if on_error raises
+                too (that error is logged).
+            logger: Logger for periodic occupancy lines, or None.
+            log_interval: Seconds between occupancy lines while running.
+        """
+
+        if len({stage.name for stage in stages}) != len(stages):
+            raise ValueError("Stage names must be unique")
+
+        self.stages = stages
+        self.on_error = on_error
+        self.logger = logger
+        self.log_interval = log_interval
+
+        self._runtimes = {
+            stage.name: _StageRuntime(stage, index)
+            for index, stage in enumerate(stages)
+        }
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._started: float | None = None
+
+    def run(self, items: Iterable[Any]) -> None:
+        """Feed every item into the pipeline and block until all are finished."""
+
+        global _latest
+        _latest = weakref.ref(self)
+
+        self._started = time.monotonic()
+        for runtime in self._runtimes.values():
+            for i in range(runtime.stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(runtime,),
+                    name=f"{runtime.stage.name}-{i}",
+                    daemon=True,
+                )
+                thread.start()
+                runtime.threads.append(thread)
+
+        stop_monitor = threading.Event()
+        monitor = threading.Thread(
+            target=self._monitor, args=(stop_monitor,), name="pipeline-monitor"
+        )
+        monitor.daemon = True
+        monitor.start()
+
+        try:
+            first = self._runtimes[self.stages[0].name]
+            for item in items:
+                with self._lock:
+                    self._pending += 1
+                first.queue.put(item)
+
+            with self._idle:
+                while self._pending:
+                    self._idle.wait()
+        finally:
+            stop_monitor.set()
+
+        # Every queue is empty now, so the stop markers cannot block
+        for runtime in self._runtimes.values():
+            for _ in runtime.threads:
+                runtime.queue.put(_STOP)
+        for runtime in self._runtimes.values():
+            for thread in runtime.threads:
+                thread.join()
+        monitor.join()
+
+        if self.logger is not None:
+            self.logger.info(f"Pipeline finished: {self.summary()}")
+
+    def _work(self, runtime: _StageRuntime) -> None:
+        stage = runtime.stage
+        while True:
+            item = runtime.queue.get()
+            if item is _STOP:
+                return
+
+            with self._lock:
+                runtime.busy += 1
+            started = time.monotonic()
+            next_stage = None
+            try:
+                next_stage = stage.handler(item)
+                if next_stage is not None and (
+                    next_stage not in self._runtimes
+                    or self._runtimes[next_stage].index <= runtime.index
+                ):
+                    raise ValueError(
+                        f"Stage {stage.name} routed to {next_stage!r}, which is "
+                        "not a later stage"
+                    )
+            except Exception as e:
+                next_stage = None
+                with self._lock:
+                    runtime.failed += 1
+                try:
+                    self.on_error(item, stage.name, e)
+                except Exception:
+                    # e.g. the journal's database is locked; the worker must
+                    # survive, or the item is never finished and run() hangs
+                    (self.logger or logging.getLogger(__name__)).exception(
+                        f"Error handler failed for an item of stage {stage.name}"
+                    )
+            finally:
+                with self._lock:
+                    runtime.busy -= 1
+                    runtime.processed += 1
+                    runtime.busy_seconds += time.monotonic() - started
+                if next_stage is None:
+                    with self._idle:
+                        self._pending -= 1
+                        self._idle.notify_all()
+
+            if next_stage is None:
+                continue
+
+            with self._lock:
+                runtime.blocked += 1
+            # Blocks while the next stage's queue is full
+            self._runtimes[next_stage].queue.put(item)
+            with self._lock:
+                runtime.blocked -= 1
+
+    def _monitor(self, stop: threading.Event) -> None:
+        while not stop.wait(self.log_interval):
+            # Stay quiet while idle, e.g. a watcher waiting for new bills
+            if self.logger is not None and self._pending:
+                self.logger.info(f"Pipeline occupancy: {self.summary()}")
+
+    def occupancy(self) -> dict[str, dict]:
+        """
+        Return a snapshot per stage.
+
+        Each entry has the stage "kind", its "workers" and queue "capacity",
+        the items "queued", "busy" (in the handler) and "blocked" (finished
+        but waiting for room downstream), the "processed" and "failed" counts
+        and "utilization", the fraction of worker time spent in the handler.
+        """
+
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        with self._lock:
+            return {
+                name: {
+                    "kind": runtime.stage.kind,
+                    "workers": runtime.stage.workers,
+                    "capacity": runtime.queue.maxsize,
+                    "queued": runtime.queue.qsize(),
+                    "busy": runtime.busy,
+                    "blocked": runtime.blocked,
+                    "processed": runtime.processed,
+                    "failed": runtime.failed,
+                    "utilization": (
+                        round(
+                            runtime.busy_seconds / (elapsed * runtime.stage.workers),
+                            3,
+                        )
+                        if elapsed
+                        else 0.0
+                    ),
+                }
+                for name, runtime in self._runtimes.items()
+            }
+
+    def summary(self) -> str:
+        """One line per stage: queued/capacity, busy/workers and utilization."""
+
+        return ", ".join(
+            f"{name} q={o['queued']}/{o['capacity']} busy={o['busy']}/{o['workers']} "
+            f"blocked={o['blocked']} done={o['processed']} util={o['utilization']:.0%}"
+            for name, o in self.occupancy().items()
+        )
+
+
+def _latest_occupancy() -> dict[tuple, float]:
+    pipeline = _latest() if _latest is not None else None
+    if pipeline is None:
+        return {}
+    return {
+        (stage, state): occupancy[state]
+        for stage, occupancy in pipeline.occupancy().items()
+        for state in ("queued", "busy", "blocked")
+    }
+
+
+OCCUPANCY = Gauge(
+    "utility_bills_pipeline_items",
+    "Bills queued, in progress or blocked on a full queue, per pipeline stage.",
+    ("stage", "state"),
+    _latest_occupancy,
+)
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+# How long a cached prompt is trusted before its mtime is checked again
+DEFAULT_CHECK_INTERVAL = 2.0
+
+
+class PromptCache:
+    """
+    An in-memory cache of prompt files, shared by every bill in the process.
+
+    Each entry is keyed by the absolute path, so relative and absolute
+    spellings of a prompt file share one entry, and remembers the file's mtime
+    and size. A file is stat'ed at most once per `check_interval` seconds and only
+    re-read when its mtime or size changed, so a prompt fix is picked up
+    within a couple of seconds while the common case is a dictionary lookup.
+    """
+
+    def __init__(self, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._entries: dict[Path, tuple[float, int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def read_text(self, path: str | Path) -> str:
+        """
+        Return the contents of a prompt file, reading it only if it changed.
+
+        Args:
+            path: Path to the prompt file.
+
+        Returns:
+            The file contents.
+        """
+
+        # abspath rather than resolve(): it does not touch the filesystem
+        path = Path(os.path.abspath(path))
+        now = time.monotonic()
+        entry = self._entries.get(path)
+        if entry is not None and now - entry[0] < self.check_interval:
+            return entry[3]
+
+        stat = path.stat()
+        if entry is not None and (stat.st_mtime_ns, stat.st_size) == entry[1:3]:
+            text = entry[3]
+        else:
+            text = path.read_text(encoding="utf-8")
+
+        with self._lock:
+            self._entries[path] = (now, stat.st_mtime_ns, stat.st_size, text)
+        return text
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+PROMPT_CACHE = PromptCache()
+
+
+def load_prompt_text(path: str | Path) -> str:
+    """
+    Load a prompt file through the shared `PROMPT_CACHE`.
+
+    Args:
+        path: Path to the prompt file.
+
+    Returns:
+        The prompt text.
+    """
+
+    return PROMPT_CACHE.read_text(path)
+
+
+@lru_cache(maxsize=None)
+def compact_schema_json(model_class) -> str:
+    """
+    Render a Pydantic model's JSON schema once, without indentation.
+
+    Models do not change while the process runs, so the schema string is
+    cached per class.
+
+    Args:
+        model_class: The Pydantic model class.
+
+    Returns:
+        The JSON schema as a compact string.
+    """
+
+    return json.dumps(model_class.model_json_schema(), separators=(",", ":"))
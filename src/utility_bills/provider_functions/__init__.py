@@ -1,40 +1,10 @@
-"""Provider-specific processing functions."""
+"""Provider-specific processing functions.
 
-from . import (
-    alderwood,
-    auburn,
-    bellevue,
-    bothell,
-    cedar_grove,
-    centrio,
-    edmond,
-    everett,
-    kent,
-    king_county,
-    king_county_summary,
-    lacey,
-    lynnwood,
-    ocean_shores,
-    olympia,
-    pse_electric,
-    pse_gas,
-    pse_gas_and_electric,
-    recology,
-    redmond,
-    renton,
-    republic,
-    rubatino,
-    sammamish,
-    scl,
-    scl_2,
-    skagit,
-    spu,
-    sssd,
-    valley_view,
-    wd_20,
-    wd_49,
-    wmw,
-)
+Submodules are imported on first access (PEP 562), e.g.
+`from provider_functions import spu`, so importing the package is cheap.
+"""
+
+import importlib
 
 __all__ = [
     "spu",
@@ -70,4 +40,11 @@ __all__ = [
     "ocean_shores",
     "scl_2",
     "wd_49",
+    "frisco",
 ]
+
+
+def __getattr__(name: str):
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return importlib.import_module(f".{name}", __name__)
@@ -1,113 +1,19 @@
 from typing import Any, Dict
 
+from .rules import RuleSet
 
-def compute_line_item_charges_validation(
-    utility_bill: Dict[str, Any],
-    tolerance: float = 0.01,
-) -> Dict[str, Any]:
-    """
-    For Everett Public Works utility bills:
-    - Sum all charges_level_data.charges[].charge_amount
-    - Compare that sum to statement_level_data.current_billing
-    - Attach a line_item_charges_validation object to charges_level_data.
-
-    Args:
-        utility_bill: Parsed JSON/dict in the EverettBillExtract shape.
-        tolerance: Allowed absolute difference before is_match becomes False.
-
-    Returns:
-        The same dict, mutated in-place and also returned, with
-        charges_level_data["line_item_charges_validation"] populated.
-    """
+RULES = RuleSet("""
+    charges_level_data.line_item_charges_validation:
+        sum_charges = sum(charges_level_data.charges[*].charge_amount)
+        check sum_charges == statement_level_data.current_billing
 
-    charges_data = utility_bill.get("charges_level_data", {})
-    statement_data = utility_bill.get("statement_level_data", {})
-    charges: list[Dict[str, Any]] = charges_data.get("charges", [])
-
-    # Sum up all charge_amount values (treat None as 0)
-    sum_charges = sum((charge.get("charge_amount") or 0.0) for charge in charges)
-
-    current_billing = statement_data.get("current_billing")
-
-    # Default values if current_billing is missing
-    if current_billing is None:
-        difference = None
-        is_match = None
-    else:
-        # Round to cents to avoid tiny float errors
-        sum_charges_rounded = round(sum_charges, 2)
-        difference = round(sum_charges_rounded - current_billing, 2)
-        is_match = abs(difference) <= tolerance
-
-    # Store the validation result under charges_level_data
-    charges_data["line_item_charges_validation"] = {
-        "sum_charges": round(sum_charges, 2),
-        "current_billing": current_billing,
-        "difference": difference,
-        "is_match": is_match,
-    }
-
-    return utility_bill
-
-
-def compute_total_amount_validation(
-    utility_bill: Dict[str, Any],
-    tolerance: float = 0.01,
-) -> Dict[str, Any]:
-    """
-    For Everett Public Works utility bills:
-    - Calculate: previous_balance + payments_applied + current_billing
-    - Compare that sum to total_amount_due
-    - Attach a total_amount_validation object to statement_level_data.
-
-    Note: Everett bills show Previous Balance, then Payment (as negative CR amount),
-    then Current Billing, resulting in Total Due.
-
-    Args:
-        utility_bill: Parsed JSON/dict in the EverettBillExtract shape.
-        tolerance: Allowed absolute difference before is_match becomes False.
-
-    Returns:
-        The same dict, mutated in-place and also returned, with
-        statement_level_data["total_amount_validation"] populated.
-    """
-
-    statement_data = utility_bill.get("statement_level_data", {})
-
-    # Get values (treat None as 0)
-    # Note: payments_applied should be negative if extracted from "CR" amounts
-    previous_balance = statement_data.get("previous_balance") or 0.0
-    payments_applied = statement_data.get("payments_applied") or 0.0
-    current_billing = statement_data.get("current_billing") or 0.0
-
-    # Calculate expected total
-    calculated_total = previous_balance + payments_applied + current_billing
-
-    # Get total_amount_due from statement
-    total_amount_due = statement_data.get("total_amount_due")
-
-    # Compute validation
-    if total_amount_due is None:
-        difference = None
-        is_match = None
-    else:
-        # Round to cents to avoid tiny float errors
-        calculated_total_rounded = round(calculated_total, 2)
-        total_amount_due_rounded = round(total_amount_due, 2)
-        difference = round(calculated_total_rounded - total_amount_due_rounded, 2)
-        is_match = abs(difference) <= tolerance
-
-    # Store the validation result
-    statement_data["total_amount_validation"] = {
-        "previous_balance": round(previous_balance, 2),
-        "current_billing": round(current_billing, 2),
-        "calculated_total": round(calculated_total, 2),
-        "total_amount_due": total_amount_due,
-        "difference": difference,
-        "is_match": is_match,
-    }
-
-    return utility_bill
+    statement_level_data.total_amount_validation:
+        previous_balance = statement_level_data.previous_balance
+        _payments_applied = statement_level_data.payments_applied
+        current_billing = statement_level_data.current_billing
+        calculated_total = previous_balance + _payments_applied + current_billing
+        check calculated_total == round(statement_level_data.total_amount_due)
+    """)
 
 
 def postprocess_everett(
@@ -119,9 +25,7 @@ def postprocess_everett(
     - Validates line item charges match current billing
     - Validates total amount due calculation
     """
-    utility_bill = compute_line_item_charges_validation(utility_bill, tolerance)
-    utility_bill = compute_total_amount_validation(utility_bill, tolerance)
-    return utility_bill
+    return RULES.apply(utility_bill, tolerance)
 
 
 def check_validation_passed(utility_bill: Dict[str, Any]) -> bool:
@@ -138,21 +42,4 @@ def check_validation_passed(utility_bill: Dict[str, Any]) -> bool:
     Returns:
         True if all validations passed (all is_match are True or None), False otherwise.
     """
-    # Check line_item_charges_validation
-    charges_data = utility_bill.get("charges_level_data", {})
-    validation = charges_data.get("line_item_charges_validation", {})
-    is_match = validation.get("is_match")
-    # If is_match is False, validation failed
-    if is_match is False:
-        return False
-
-    # Check total_amount_validation at statement level
-    statement_data = utility_bill.get("statement_level_data", {})
-    total_validation = statement_data.get("total_amount_validation", {})
-    is_match = total_validation.get("is_match")
-    # If is_match is False, validation failed
-    if is_match is False:
-        return False
-
-    # All validations passed (True or None)
-    return True
+    return RULES.passed(utility_bill)
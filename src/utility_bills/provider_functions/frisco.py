@@ -1,54 +1,15 @@
-from typing import Any, Dict, List
-
-
-def compute_line_item_charges_validation(
-    utility_bill: Dict[str, Any],
-    tolerance: float = 0.01,
-) -> Dict[str, Any]:
-    """
-    For City of Frisco bills:
-    - Sum all service_charges[].charge_amount from charges_level_data
-    - Compare that sum to current_charges_total
-    - Attach a line_item_charges_validation object with details.
-
-    Args:
-        utility_bill: Parsed JSON/dict in the FriscoBillExtract shape.
-        tolerance: Allowed absolute difference before is_match becomes False.
-
-    Returns:
-        The same dict, mutated in-place and also returned, with
-        charges_level_data["line_item_charges_validation"] populated.
-    """
-
-    charges_data: Dict[str, Any] = utility_bill.get("charges_level_data", {})
-    service_charges: List[Dict[str, Any]] = charges_data.get("service_charges", [])
-
-    # Sum up all charge_amount values from service_charges (treat None as 0)
-    sum_service_charges = sum(
-        (item.get("charge_amount") or 0.0) for item in service_charges
-    )
-
-    current_charges_total = charges_data.get("current_charges_total")
-
-    # Default values if current_charges_total is missing
-    if current_charges_total is None:
-        difference = None
-        is_match = None
-    else:
-        # Round to cents to avoid tiny float errors
-        sum_service_charges_rounded = round(sum_service_charges, 2)
-        difference = round(sum_service_charges_rounded - current_charges_total, 2)
-        is_match = abs(difference) <= tolerance
-
-    # Store the validation result
-    charges_data["line_item_charges_validation"] = {
-        "sum_service_charges": round(sum_service_charges, 2),
-        "current_charges_total": current_charges_total,
-        "difference": difference,
-        "is_match": is_match,
-    }
-
-    return utility_bill
+from typing import Any, Dict
+
+from .rules import RuleSet
+
+LINE_ITEM_RULES = RuleSet("""
+    charges_level_data.line_item_charges_validation:
+        sum_service_charges = sum(charges_level_data.service_charges[*].charge_amount)
+        check sum_service_charges == charges_level_data.current_charges_total
+    """)
+compute_line_item_charges_validation = LINE_ITEM_RULES.validation(
+    "charges_level_data.line_item_charges_validation"
+)
 
 
 def compute_total_amount_validation(
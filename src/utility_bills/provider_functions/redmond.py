@@ -1,122 +1,23 @@
 from typing import Any, Dict
 
-
-def compute_line_item_charges_validation(
-    utility_bill: Dict[str, Any],
-    tolerance: float = 0.01,
-) -> Dict[str, Any]:
-    """
-    For City of Redmond utility bills:
-    - Sum all charges_level_data.current_charges[].charge_amount
-    - Compare that sum to statement_level_data.current_billing
-    - Attach a line_item_charges_validation object to charges_level_data.
-
-    Args:
-        utility_bill: Parsed JSON/dict in the RedmondBillExtract shape.
-        tolerance: Allowed absolute difference before is_match becomes False.
-
-    Returns:
-        The same dict, mutated in-place and also returned, with
-        charges_level_data["line_item_charges_validation"] populated.
-    """
-
-    charges_data = utility_bill.get("charges_level_data", {})
-    statement_data = utility_bill.get("statement_level_data", {})
-    current_charges: list[Dict[str, Any]] = charges_data.get("current_charges", [])
-
-    # Sum up all charge_amount values (treat None as 0)
-    sum_line_item_charges = sum(
-        (charge.get("charge_amount") or 0.0) for charge in current_charges
-    )
-
-    current_billing = statement_data.get("current_billing")
-
-    # Default values if current_billing is missing
-    if current_billing is None:
-        difference = None
-        is_match = None
-    else:
-        # Round to cents to avoid tiny float errors
-        sum_line_item_charges_rounded = round(sum_line_item_charges, 2)
-        difference = round(sum_line_item_charges_rounded - current_billing, 2)
-        is_match = abs(difference) <= tolerance
-
-    # Store the validation result under charges_level_data
-    charges_data["line_item_charges_validation"] = {
-        "sum_line_item_charges": round(sum_line_item_charges, 2),
-        "current_charges": current_billing,
-        "difference": difference,
-        "is_match": is_match,
-    }
-
-    return utility_bill
-
-
-def compute_total_amount_validation(
-    utility_bill: Dict[str, Any],
-    tolerance: float = 0.01,
-) -> Dict[str, Any]:
-    """
-    For City of Redmond utility bills:
-    - Calculate: previous_balance + payments_applied + current_billing + adjustments_and_additional_charges
-    - Compare that sum to total_amount_due
-    - Attach a total_amount_validation object to statement_level_data.
-
-    Note: Redmond bills show Previous Balance, then Payments Received (as negative),
-    then Adjustments / Additional Charges, then Current Charges, resulting in Total Amount Due.
-
-    Args:
-        utility_bill: Parsed JSON/dict in the RedmondBillExtract shape.
-        tolerance: Allowed absolute difference before is_match becomes False.
-
-    Returns:
-        The same dict, mutated in-place and also returned, with
-        statement_level_data["total_amount_validation"] populated.
-    """
-
-    statement_data = utility_bill.get("statement_level_data", {})
-    miscellaneous_data = utility_bill.get("miscellaneous_level_data", {})
-
-    # Get values (treat None as 0)
-    # Note: payments_applied should be negative if extracted correctly
-    previous_balance = statement_data.get("previous_balance") or 0.0
-    payments_applied = statement_data.get("payments_applied") or 0.0
-    current_billing = statement_data.get("current_billing") or 0.0
-    adjustments = miscellaneous_data.get("adjustments_and_additional_charges") or 0.0
-
-    # Calculate expected total
-    # Formula: Previous Balance + Payments Applied + Adjustments + Current Charges
-    calculated_total = (
-        previous_balance - payments_applied + adjustments + current_billing
-    )
-
-    # Get total_amount_due from statement
-    total_amount_due = statement_data.get("total_amount_due")
-
-    # Compute validation
-    if total_amount_due is None:
-        difference = None
-        is_match = None
-    else:
-        # Round to cents to avoid tiny float errors
-        calculated_total_rounded = round(calculated_total, 2)
-        total_amount_due_rounded = round(total_amount_due, 2)
-        difference = round(calculated_total_rounded - total_amount_due_rounded, 2)
-        is_match = abs(difference) <= tolerance
-
-    # Store the validation result
-    statement_data["total_amount_validation"] = {
-        "previous_balance": round(previous_balance, 2),
-        "payments_applied": round(payments_applied, 2),
-        "adjustments_and_additional_charges": round(adjustments, 2),
-        "current_billing": round(current_billing, 2),
-        "calculated_total": round(calculated_total, 2),
-        "total_amount_due": total_amount_due,
-        "difference": difference,
-        "is_match": is_match,
-    }
-
-    return utility_bill
+from .rules import RuleSet
+
+RULES = RuleSet("""
+    charges_level_data.line_item_charges_validation:
+        sum_line_item_charges = sum(charges_level_data.current_charges[*].charge_amount)
+        check sum_line_item_charges == statement_level_data.current_billing
+            as current_charges
+
+    statement_level_data.total_amount_validation:
+        previous_balance = statement_level_data.previous_balance
+        payments_applied = statement_level_data.payments_applied
+        adjustments_and_additional_charges =
+            miscellaneous_level_data.adjustments_and_additional_charges
+        current_billing = statement_level_data.current_billing
+        calculated_total = previous_balance - payments_applied
+            + adjustments_and_additional_charges + current_billing
+        check calculated_total == round(statement_level_data.total_amount_due)
+    """)
 
 
 def postprocess_redmond(
@@ -128,9 +29,7 @@ def postprocess_redmond(
     - Validates line item charges match current billing
     - Validates total amount due calculation
     """
-    utility_bill = compute_line_item_charges_validation(utility_bill, tolerance)
-    utility_bill = compute_total_amount_validation(utility_bill, tolerance)
-    return utility_bill
+    return RULES.apply(utility_bill, tolerance)
 
 
 def check_validation_passed(utility_bill: Dict[str, Any]) -> bool:
@@ -147,21 +46,4 @@ def check_validation_passed(utility_bill: Dict[str, Any]) -> bool:
     Returns:
         True if all validations passed (all is_match are True or None), False otherwise.
     """
-    # Check line_item_charges_validation
-    charges_data = utility_bill.get("charges_level_data", {})
-    validation = charges_data.get("line_item_charges_validation", {})
-    is_match = validation.get("is_match")
-    # If is_match is False, validation failed
-    if is_match is False:
-        return False
-
-    # Check total_amount_validation at statement level
-    statement_data = utility_bill.get("statement_level_data", {})
-    total_validation = statement_data.get("total_amount_validation", {})
-    is_match = total_validation.get("is_match")
-    # If is_match is False, validation failed
-    if is_match is False:
-        return False
-
-    # All validations passed (True or None)
-    return True
+    return RULES.passed(utility_bill)
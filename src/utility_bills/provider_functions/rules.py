@@ -0,0 +1,581 @@
+"""
+A small rule language for the provider validations.
+
+Each provider's `*_validation` objects are declared as rules and compiled
+once, when the provider module is imported, into functions that follow
+precomputed key paths. One validation looks like:
+
+    statement_level_data.total_amount_validation:
+        previous_balance = statement_level_data.previous_balance
+        payments_applied = statement_level_data.payments_applied
+        current_billing = statement_level_data.current_billing
+        calculated_total = previous_balance + payments_applied + current_billing
+        check calculated_total == round(statement_level_data.total_amount_due)
+
+The header is where the validation object is stored. A "[*]" segment runs
+the validation once per element of that list (per meter, per service), with
+paths relative to the element:
+
+    meter_level_data[*].line_item_charges_validation:
+        sum_line_item_charges = sum(line_item_charges[*].line_item_charge_amount)
+        check sum_line_item_charges == current_service_amount
+
+Statements assign names, which become the keys of the validation object in
+the order they are assigned (names starting with "_" are computed but not
+stored). Values are:
+
+    a.b.c           the field, or 0.0 when it is missing or null
+    raw(a.b.c)      the field as extracted, without the 0.0 default
+    a.b ?? a.c      the first field that is not null (the last one defaults to 0.0)
+    sum(a[*].b)     the sum of a field over a list, each defaulting to 0.0
+    x + y - z       names and values added and subtracted left to right
+
+Stored numbers are rounded to cents. The closing `check` compares a name to
+a target field: the difference is round(round(name, 2) - target, 2), with
+`round(...)` around the target to round it to cents first, and the
+validation matches when the difference is within the tolerance. A null
+target gives a null difference and is_match. `as <key>` stores the target
+under another key.
+
+A provider module whose validations are all rules names its RuleSet RULES,
+and its post-processor and checker delegate to it.
+"""
+
+import re
+import textwrap
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+_MISSING = object()
+_EMPTY: dict = {}
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<path>[A-Za-z_]\w*(?:\[\*\])?(?:\.[A-Za-z_]\w*(?:\[\*\])?)*)"
+    r"|(?P<op>\?\?|==|[=+\-()]))"
+)
+
+
+@dataclass(frozen=True)
+class Operand:
+    """
+    One value in a statement.
+
+    Attributes:
+        kind: "name", "field", "raw", "sum" or "coalesce".
+        paths: The name or dotted path; the alternatives for "coalesce".
+    """
+
+    kind: str
+    paths: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Statement:
+    """`name = ...`: the operands, each with its sign (+1 or -1)."""
+
+    name: str
+    terms: tuple[tuple[int, Operand], ...]
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """`check name == target`: the name compared, and where the target is read."""
+
+    name: str
+    target: str
+    rounded: bool
+    key: str
+
+
+@dataclass(frozen=True)
+class Validation:
+    """
+    One `*_validation` object.
+
+    Attributes:
+        output: Path of the validation object, with "[*]" for a per-element one.
+        statements: The assignments, in order.
+        check: The comparison that sets difference and is_match.
+    """
+
+    output: str
+    statements: tuple[Statement, ...]
+    check: Comparison
+
+    @property
+    def each(self) -> str | None:
+        """Path of the list the validation runs over, or None."""
+
+        head, star, _ = self.output.partition("[*]")
+        return head if star else None
+
+    @property
+    def scope_output(self) -> str:
+        """Path of the validation object from its scope (the bill or an element)."""
+
+        _, star, tail = self.output.partition("[*]")
+        return tail.lstrip(".") if star else self.output
+
+
+class _Parser:
+    def __init__(self, text: str, line_number: int, names: list[str]):
+        self.line_number = line_number
+        self.names = names
+        self.tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if not match:
+                self.fail(f"unexpected {text[position:].strip()!r}")
+            self.tokens.append(match.group("path") or match.group("op"))
+            position = match.end()
+        self.position = 0
+
+    def fail(self, message: str):
+        raise ValueError(f"Rule line {self.line_number}: {message}")
+
+    def peek(self) -> str | None:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def take(self, expected: str | None = None) -> str:
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            self.fail(f"expected {expected or 'more'}, got {token!r}")
+        self.position += 1
+        return token
+
+    def path(self, star: bool = False) -> str:
+        token = self.take()
+        if not re.match(r"[A-Za-z_]", token):
+            self.fail(f"expected a field, got {token!r}")
+        if token.count("[*]") != int(star):
+            self.fail(
+                f"{token!r}: sum() needs one '[*]'" if star else f"{token!r}: use sum()"
+            )
+        if star and token.endswith("[*]"):
+            self.fail(f"{token!r}: sum a field of the list items")
+        return token
+
+    def call(self, function: str, star: bool = False) -> str:
+        self.take(function)
+        self.take("(")
+        path = self.path(star)
+        self.take(")")
+        return path
+
+    def operand(self) -> Operand:
+        token = self.peek()
+        if token in ("sum", "raw") and self.tokens[
+            self.position + 1 : self.position + 2
+        ] == ["("]:
+            return Operand(token, (self.call(token, star=token == "sum"),))
+        path = self.path()
+        if "." not in path and path in self.names:
+            return Operand("name", (path,))
+        if self.peek() != "??":
+            return Operand("field", (path,))
+        paths = [path]
+        while self.peek() == "??":
+            self.take("??")
+            paths.append(self.path())
+        return Operand("coalesce", tuple(paths))
+
+    def statement(self) -> Statement:
+        name = self.take()
+        if not re.fullmatch(r"[A-Za-z_]\w*", name) or name in ("check", "sum", "raw"):
+            self.fail(f"expected a name to assign, got {name!r}")
+        if name in self.names:
+            self.fail(f"{name!r} is assigned twice")
+        self.take("=")
+        terms = [(1, self.operand())]
+        while self.peek() in ("+", "-"):
+            sign = 1 if self.take() == "+" else -1
+            terms.append((sign, self.operand()))
+        self.end()
+        return Statement(name, tuple(terms))
+
+    def comparison(self) -> Comparison:
+        self.take("check")
+        name = self.take()
+        if name not in self.names:
+            self.fail(f"check of unknown name {name!r}")
+        self.take("==")
+        rounded = self.peek() == "round"
+        target = self.call("round") if rounded else self.path()
+        key = target.rsplit(".", 1)[-1]
+        if self.peek() == "as":
+            self.take("as")
+            key = self.take()
+            if not re.fullmatch(r"[A-Za-z_]\w*", key):
+                self.fail(f"expected a key after 'as', got {key!r}")
+        self.end()
+        return Comparison(name, target, rounded, key)
+
+    def end(self) -> None:
+        if self.peek() is not None:
+            self.fail(f"unexpected {self.peek()!r}")
+
+
+def _open_brackets(line: str) -> bool:
+    return line.count("(") > line.count(")")
+
+
+def _logical_lines(source: str) -> list[tuple[int, str]]:
+    """
+    Split rule text into (line number, line) pairs, without comments and
+    blank lines. A line indented deeper than the statements of its rule, or
+    following an unclosed "(", continues the statement above it.
+    """
+
+    lines: list[tuple[int, str]] = []
+    indent = None
+    for number, line in enumerate(textwrap.dedent(source).splitlines(), 1):
+        line = line.split("#", 1)[0].rstrip()
+        if not line.strip():
+            continue
+        depth = len(line) - len(line.lstrip())
+        if depth == 0:
+            indent = None
+        elif indent is None:
+            indent = depth
+        elif lines and (depth > indent or _open_brackets(lines[-1][1])):
+            previous_number, previous = lines[-1]
+            lines[-1] = (previous_number, f"{previous} {line.strip()}")
+            continue
+        lines.append((number, line))
+    return lines
+
+
+def parse_rules(source: str) -> tuple[Validation, ...]:
+    """
+    Parse rule text into validations.
+
+    Raises:
+        ValueError: On a syntax error, naming the line.
+    """
+
+    validations = []
+    output, statements, check = None, [], None
+    names: list[str] = []
+
+    def close():
+        if output is None:
+            return
+        if check is None:
+            raise ValueError(f"Rule {output!r}: missing check")
+        validations.append(Validation(output, tuple(statements), check))
+
+    for number, line in _logical_lines(source):
+        if not line[0].isspace():
+            close()
+            header = line.rstrip(":")
+            if not line.endswith(":") or not re.fullmatch(
+                r"[A-Za-z_]\w*(\[\*\])?(\.[A-Za-z_]\w*(\[\*\])?)*", header
+            ):
+                raise ValueError(f"Rule line {number}: expected '<output path>:'")
+            if header.count("[*]") > 1 or header.endswith("[*]"):
+                raise ValueError(
+                    f"Rule line {number}: {header!r}: one '[*]' per output"
+                )
+            output, statements, check, names = header, [], None, []
+            continue
+        if output is None:
+            raise ValueError(f"Rule line {number}: statement outside a rule")
+        if check is not None:
+            raise ValueError(f"Rule line {number}: check must be the last statement")
+        parser = _Parser(line, number, names)
+        if parser.peek() == "check":
+            check = parser.comparison()
+        else:
+            statements.append(parser.statement())
+            names.append(statements[-1].name)
+    close()
+    return tuple(validations)
+
+
+class _Source:
+    """
+    Python source for one compiled function.
+
+    Paths are read with the `.get(key, {})` chains the rules replace, and
+    each level is looked up at most once: a level is bound to a local the
+    first time a statement needs it, so lookups happen in the same order as
+    in a hand-written validation.
+    """
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self._locals = 0
+
+    def emit(self, line: str, depth: int) -> None:
+        self.lines.append("    " * depth + line)
+
+    def local(self, prefix: str) -> str:
+        self._locals += 1
+        return f"{prefix}{self._locals}"
+
+
+class _Scope:
+    """The dicts already bound to locals under one root (the bill or an element)."""
+
+    def __init__(self, source: _Source, root: str, depth: int):
+        self.source = source
+        self.depth = depth
+        self._nodes: dict[tuple[str, ...], str] = {(): root}
+
+    def node(self, keys: tuple[str, ...], setup: list[str]) -> str:
+        """The local holding `keys` (missing levels read as {}), binding it if needed."""
+
+        if keys in self._nodes:
+            return self._nodes[keys]
+        parent = self.node(keys[:-1], setup)
+        name = self.source.local("_node")
+        setup.append(f"{name} = {parent}.get({keys[-1]!r}, _EMPTY)")
+        self._nodes[keys] = name
+        return name
+
+    def inline(self, keys: tuple[str, ...]) -> str:
+        """`keys` as an expression, without binding any new locals."""
+
+        depth = len(keys)
+        while keys[:depth] not in self._nodes:
+            depth -= 1
+        expression = self._nodes[keys[:depth]]
+        for key in keys[depth:]:
+            expression += f".get({key!r}, _EMPTY)"
+        return expression
+
+    def lookup(
+        self, path: str, default: str = "", setup: list[str] | None = None
+    ) -> str:
+        """
+        `path` as an expression: a `.get` on its parent level, bound into
+        `setup`, or inline when `setup` is None.
+        """
+
+        *parents, last = path.split(".")
+        if setup is None:
+            parent = self.inline(tuple(parents))
+        else:
+            parent = self.node(tuple(parents), setup)
+        return f"{parent}.get({last!r}{', ' + default if default else ''})"
+
+    def flush(self, setup: list[str]) -> None:
+        for line in setup:
+            self.source.emit(line, self.depth)
+        setup.clear()
+
+
+def _operand(operand: Operand, scope: _Scope, setup: list[str]) -> str:
+    """Emit what `operand` needs into `setup` and return it as an expression."""
+
+    kind, paths = operand.kind, operand.paths
+    if kind == "name":
+        return f"_value{paths[0]}"
+    if kind == "sum":
+        head, _, field = paths[0].partition("[*].")
+        items = scope.lookup(head, "()", setup)
+        *parents, last = field.split(".")
+        item = "item"
+        for key in parents:
+            item += f".get({key!r}, _EMPTY)"
+        return f"sum({item}.get({last!r}) or 0.0 for item in {items})"
+    if kind == "raw":
+        return scope.lookup(paths[0], setup=setup)
+    if kind == "field":
+        return f"({scope.lookup(paths[0], setup=setup)} or 0.0)"
+
+    # coalesce: the first alternative is always read, the rest only when
+    # the ones before them are null
+    value = scope.source.local("_first")
+    setup.append(f"{value} = {scope.lookup(paths[0], setup=setup)}")
+    for depth, path in enumerate(paths[1:-1]):
+        setup.append("    " * depth + f"if {value} is None:")
+        setup.append("    " * (depth + 1) + f"{value} = {scope.lookup(path)}")
+    depth = len(paths) - 2
+    setup.append("    " * depth + f"if {value} is None:")
+    setup.append("    " * (depth + 1) + f"{value} = {scope.lookup(paths[-1])} or 0.0")
+    return value
+
+
+def _emit_validation(validation: Validation, scope: _Scope) -> None:
+    """Emit the statements, the check and the store of one validation."""
+
+    names = [statement.name for statement in validation.statements]
+    indexes = {name: str(index) for index, name in enumerate(names)}
+    setup: list[str] = []
+
+    for index, statement in enumerate(validation.statements):
+        value = f"_value{index}"
+        expression = ""
+        for sign, operand in statement.terms:
+            if operand.kind == "name":
+                operand = Operand("name", (indexes[operand.paths[0]],))
+            term = _operand(operand, scope, setup)
+            if setup and expression:
+                # Add up what came before the new lookups first
+                scope.source.emit(f"{value} = {expression}", scope.depth)
+                expression = value
+            scope.flush(setup)
+            if not expression:
+                expression = term
+            else:
+                expression += f" {'+' if sign > 0 else '-'} {term}"
+        scope.source.emit(f"{value} = {expression}", scope.depth)
+
+    check = validation.check
+    target = scope.lookup(check.target, setup=setup)
+    scope.flush(setup)
+    emit = scope.source.emit
+    compared = f"round(_value{indexes[check.name]}, 2)"
+    emit(f"target = {target}", scope.depth)
+    emit("if target is None:", scope.depth)
+    emit("difference = None", scope.depth + 1)
+    emit("is_match = None", scope.depth + 1)
+    emit("else:", scope.depth)
+    rounded = "round(target, 2)" if check.rounded else "target"
+    emit(f"difference = round({compared} - {rounded}, 2)", scope.depth + 1)
+    emit("is_match = abs(difference) <= tolerance", scope.depth + 1)
+
+    emit("validation = {", scope.depth)
+    for name in names:
+        if not name.startswith("_"):
+            emit(f"{name!r}: round(_value{indexes[name]}, 2),", scope.depth + 1)
+    emit(f"{check.key!r}: target,", scope.depth + 1)
+    emit('"difference": difference,', scope.depth + 1)
+    emit('"is_match": is_match,', scope.depth + 1)
+    emit("}", scope.depth)
+
+    parent, key = _output_parent(validation, scope, setup)
+    scope.flush(setup)
+    if parent == "parent":
+        emit("if parent is not _MISSING:", scope.depth)
+        emit(f"parent[{key!r}] = validation", scope.depth + 1)
+    else:
+        emit(f"{parent}[{key!r}] = validation", scope.depth)
+
+
+def _output_parent(
+    validation: Validation, scope: _Scope, setup: list[str]
+) -> tuple[str, str]:
+    """
+    Emit the lookup of the dict a validation object is stored in, and return
+    the expression holding it with the key. A missing parent is left as
+    _MISSING, since there is nowhere to store the validation.
+    """
+
+    parent, _, key = validation.scope_output.rpartition(".")
+    if not parent:
+        return scope.node((), setup), key
+    setup.append(f"parent = {scope.lookup(parent, '_MISSING', setup)}")
+    return "parent", key
+
+
+def _each(validation: Validation, root: _Scope) -> _Scope:
+    """Open the loop over a per-element validation's list; return the element scope."""
+
+    setup: list[str] = []
+    items = root.lookup(validation.each, "()", setup)
+    root.flush(setup)
+    root.source.emit(f"for scope in {items}:", root.depth)
+    return _Scope(root.source, "scope", root.depth + 1)
+
+
+def _define(source: _Source, name: str, filename: str) -> Callable:
+    namespace = {
+        "_EMPTY": _EMPTY,
+        "_MISSING": _MISSING,
+        "abs": abs,
+        "round": round,
+        "sum": sum,
+    }
+    exec(compile("\n".join(source.lines), filename, "exec"), namespace)
+    return namespace[name]
+
+
+def _compile_apply(validations: tuple[Validation, ...], filename: str) -> Callable:
+    """
+    Compile validations into one `apply(utility_bill, tolerance=0.01)` that
+    computes them in order.
+    """
+
+    source = _Source()
+    source.emit("def apply(utility_bill, tolerance=0.01):", 0)
+    root = _Scope(source, "utility_bill", 1)
+    for validation in validations:
+        scope = _each(validation, root) if validation.each else root
+        _emit_validation(validation, scope)
+    source.emit("return utility_bill", 1)
+    return _define(source, "apply", filename)
+
+
+def _compile_passed(validations: tuple[Validation, ...]) -> Callable:
+    """Compile the check that no validation object has is_match False."""
+
+    source = _Source()
+    source.emit("def passed(utility_bill):", 0)
+    root = _Scope(source, "utility_bill", 1)
+    for validation in validations:
+        scope = _each(validation, root) if validation.each else root
+        setup: list[str] = []
+        parent, key = _output_parent(validation, scope, setup)
+        scope.flush(setup)
+        found = f"{parent}.get({key!r}, _EMPTY).get('is_match') is False"
+        if parent == "parent":
+            found = f"parent is not _MISSING and {found}"
+        source.emit(f"if {found}:", scope.depth)
+        source.emit("return False", scope.depth + 1)
+    source.emit("return True", 1)
+    return _define(source, "passed", "<rules passed>")
+
+
+class RuleSet:
+    """
+    A provider's validations, compiled once.
+
+    Attributes:
+        validations: The parsed rules.
+        apply: Function of (utility_bill, tolerance=0.01) that computes every
+            validation object in the order they are declared, updating the
+            bill in place, and returns it.
+        passed: Function of (utility_bill) that is True if no validation
+            object has is_match False.
+    """
+
+    def __init__(self, source: str):
+        """
+        Args:
+            source: The rules; see the module docstring.
+
+        Raises:
+            ValueError: If the rules do not parse.
+        """
+
+        self.validations = parse_rules(source)
+        self.apply = _compile_apply(self.validations, "<rules>")
+        self.passed = _compile_passed(self.validations)
+        self._by_output = {
+            validation.output: _compile_apply(
+                (validation,), f"<rules {validation.output}>"
+            )
+            for validation in self.validations
+        }
+
+    def validation(
+        self, output: str
+    ) -> Callable[[Dict[str, Any], float], Dict[str, Any]]:
+        """
+        The function that computes one validation object.
+
+        Args:
+            output: The rule header, e.g. "statement_level_data.total_amount_validation".
+
+        Returns:
+            A function taking (utility_bill, tolerance=0.01) and returning the
+            bill, updated in place.
+        """
+
+        return self._by_output[output]
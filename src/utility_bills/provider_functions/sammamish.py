@@ -1,120 +1,21 @@
-from typing import Any, Dict, List
+from typing import Any, Dict
 
+from .rules import RuleSet
 
-def compute_line_item_charges_validation(
-    utility_bill: Dict[str, Any],
-    tolerance: float = 0.01,
-) -> Dict[str, Any]:
-    """
-    For Sammamish Plateau Water bills:
-    - Sum all charges_level_data.line_item_charges[].line_item_charge_amount
-    - Compare that sum to statement_level_data.current_charges
-    - Attach a line_item_charges_validation object to charges_level_data.
-
-    Args:
-        utility_bill: Parsed JSON/dict in the SammamishPlateauWaterBillExtract shape.
-        tolerance: Allowed absolute difference before is_match becomes False.
-
-    Returns:
-        The same dict, mutated in-place and also returned, with
-        charges_level_data["line_item_charges_validation"] populated.
-    """
-
-    # Get the charges_level_data object (not a list)
-    charges_data: Dict[str, Any] = utility_bill.get("charges_level_data", {})
-    line_items: List[Dict[str, Any]] = charges_data.get("line_item_charges", [])
-
-    # Sum up all line_item_charge_amount values (treat None as 0)
-    sum_line_items = sum(
-        (item.get("line_item_charge_amount") or 0.0) for item in line_items
-    )
-
-    # Get current_charges from statement_level_data
-    statement_data = utility_bill.get("statement_level_data", {})
-    current_charges = statement_data.get("current_charges")
-
-    # Default values if current_charges is missing
-    if current_charges is None:
-        difference = None
-        is_match = None
-    else:
-        # Round to cents to avoid tiny float errors
-        sum_line_items_rounded = round(sum_line_items, 2)
-        difference = round(sum_line_items_rounded - current_charges, 2)
-        is_match = abs(difference) <= tolerance
-
-    # Store the validation result within charges_level_data
-    charges_data["line_item_charges_validation"] = {
-        "sum_line_item_charges": round(sum_line_items, 2),
-        "current_charges": current_charges,
-        "difference": difference,
-        "is_match": is_match,
-    }
-
-    return utility_bill
-
-
-def compute_total_amount_validation(
-    utility_bill: Dict[str, Any],
-    tolerance: float = 0.01,
-) -> Dict[str, Any]:
-    """
-    For Sammamish Plateau Water bills:
-    - Get balance (or past_due_balance if balance is None) from statement_level_data
-    - Get current_charges from statement_level_data
-    - Calculate: balance + current_charges
-    - Compare calculated total to total_amount_due
-    - Attach a total_amount_validation object to statement_level_data.
-
-    Note: The balance may be negative (a credit).
-
-    Args:
-        utility_bill: Parsed JSON/dict in the SammamishPlateauWaterBillExtract shape.
-        tolerance: Allowed absolute difference before is_match becomes False.
-
-    Returns:
-        The same dict, mutated in-place and also returned, with
-        statement_level_data["total_amount_validation"] populated.
-    """
-
-    statement_data = utility_bill.get("statement_level_data", {})
-
-    # Get balance (use past_due_balance if balance is None, treat None as 0)
-    balance = statement_data.get("balance")
-    if balance is None:
-        balance = statement_data.get("past_due_balance") or 0.0
-
-    # Get current_charges (treat None as 0)
-    current_charges = statement_data.get("current_charges") or 0.0
-
-    # Calculate expected total: balance + current_charges
-    calculated_total = balance + current_charges
+RULES = RuleSet("""
+    charges_level_data.line_item_charges_validation:
+        sum_line_item_charges = sum(
+            charges_level_data.line_item_charges[*].line_item_charge_amount
+        )
+        check sum_line_item_charges == statement_level_data.current_charges
 
-    # Get total_amount_due from statement
-    total_amount_due = statement_data.get("total_amount_due")
-
-    # Compute validation
-    if total_amount_due is None:
-        difference = None
-        is_match = None
-    else:
-        # Round to cents to avoid tiny float errors
-        calculated_total_rounded = round(calculated_total, 2)
-        total_amount_due_rounded = round(total_amount_due, 2)
-        difference = round(calculated_total_rounded - total_amount_due_rounded, 2)
-        is_match = abs(difference) <= tolerance
-
-    # Store the validation result at statement level
-    statement_data["total_amount_validation"] = {
-        "balance": round(balance, 2),
-        "current_charges": round(current_charges, 2),
-        "calculated_total": round(calculated_total, 2),
-        "total_amount_due": total_amount_due,
-        "difference": difference,
-        "is_match": is_match,
-    }
-
-    return utility_bill
+    statement_level_data.total_amount_validation:
+        # Bills without a balance line show it as past due
+        balance = statement_level_data.balance ?? statement_level_data.past_due_balance
+        current_charges = statement_level_data.current_charges
+        calculated_total = balance + current_charges
+        check calculated_total == round(statement_level_data.total_amount_due)
+    """)
 
 
 def postprocess_sammamish_plateau_water(
@@ -133,9 +34,7 @@ def postprocess_sammamish_plateau_water(
     Returns:
         The same dict with validation objects added.
     """
-    utility_bill = compute_line_item_charges_validation(utility_bill, tolerance)
-    utility_bill = compute_total_amount_validation(utility_bill, tolerance)
-    return utility_bill
+    return RULES.apply(utility_bill, tolerance)
 
 
 def check_validation_passed(utility_bill: Dict[str, Any]) -> bool:
@@ -143,7 +42,7 @@ def check_validation_passed(utility_bill: Dict[str, Any]) -> bool:
     Check if all validation checks passed for Sammamish Plateau Water bills.
 
     This function checks:
-    - line_item_charges_validation["is_match"] at root level
+    - line_item_charges_validation["is_match"] in charges_level_data
     - total_amount_validation["is_match"] in statement_level_data
 
     Args:
@@ -152,21 +51,4 @@ def check_validation_passed(utility_bill: Dict[str, Any]) -> bool:
     Returns:
         True if all validations passed (all is_match are True or None), False otherwise.
     """
-    # Check line_item_charges_validation at charges level
-    charges_data = utility_bill.get("charges_level_data", {})
-    charges_validation = charges_data.get("line_item_charges_validation", {})
-    is_match = charges_validation.get("is_match")
-    # If is_match is False, validation failed
-    if is_match is False:
-        return False
-
-    # Check total_amount_validation at statement level
-    statement_data = utility_bill.get("statement_level_data", {})
-    total_validation = statement_data.get("total_amount_validation", {})
-    is_match = total_validation.get("is_match")
-    # If is_match is False, validation failed
-    if is_match is False:
-        return False
-
-    # All validations passed (True or None)
-    return True
+    return RULES.passed(utility_bill)
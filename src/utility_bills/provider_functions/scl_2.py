@@ -1,6 +1,9 @@
 from typing import Any, Dict
 from . import scl
 
+# Same rules as residential bills; see postprocess_seattle_city_light_commercial
+RULES = scl.RULES
+
 
 def postprocess_seattle_city_light_commercial(
     utility_bill: Dict[str, Any],
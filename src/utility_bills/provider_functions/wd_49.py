@@ -1,49 +1,15 @@
 from typing import Any, Dict, List
 
-
-def compute_line_item_charges_validation(
-    utility_bill: Dict[str, Any],
-    tolerance: float = 0.01,
-) -> Dict[str, Any]:
-    """
-    Validate that line items sum to total charges.
-
-    Args:
-        utility_bill: Parsed JSON/dict in the WaterDistrict49BillExtract shape.
-        tolerance: Allowed absolute difference before is_match becomes False.
-
-    Returns:
-        The same dict, mutated in-place and also returned, with
-        charges_level_data["line_item_charges_validation"] populated.
-    """
-
-    charges_data = utility_bill.get("charges_level_data", {})
-    line_items: List[Dict[str, Any]] = charges_data.get("line_items", [])
-
-    # Sum up all line item amounts
-    sum_line_items = sum((item.get("amount") or 0.0) for item in line_items)
-
-    total_charges = charges_data.get("total_charges")
-
-    # Default values if total_charges is missing
-    if total_charges is None:
-        difference = None
-        is_match = None
-    else:
-        # Round to cents to avoid tiny float errors
-        sum_line_items_rounded = round(sum_line_items, 2)
-        difference = round(sum_line_items_rounded - total_charges, 2)
-        is_match = abs(difference) <= tolerance
-
-    # Store the validation result
-    charges_data["line_item_charges_validation"] = {
-        "sum_line_items": round(sum_line_items, 2),
-        "total_charges": total_charges,
-        "difference": difference,
-        "is_match": is_match,
-    }
-
-    return utility_bill
+from .rules import RuleSet
+
+LINE_ITEM_RULES = RuleSet("""
+    charges_level_data.line_item_charges_validation:
+        sum_line_items = sum(charges_level_data.line_items[*].amount)
+        check sum_line_items == charges_level_data.total_charges
+    """)
+compute_line_item_charges_validation = LINE_ITEM_RULES.validation(
+    "charges_level_data.line_item_charges_validation"
+)
 
 
 def compute_total_amount_validation(
@@ -1,311 +1,513 @@
 import base64
+import importlib
+import importlib.util
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Any, Callable, Dict, Union
-
-from openai import OpenAI
-from provider_functions import (
-    alderwood,
-    auburn,
-    bellevue,
-    bothell,
-    cedar_grove,
-    centrio,
-    edmond,
-    everett,
-    frisco,
-    kent,
-    king_county,
-    king_county_summary,
-    lacey,
-    lynnwood,
-    ocean_shores,
-    olympia,
-    pse_electric,
-    pse_gas,
-    pse_gas_and_electric,
-    recology,
-    redmond,
-    renton,
-    republic,
-    rubatino,
-    sammamish,
-    scl,
-    scl_2,
-    skagit,
-    spu,
-    sssd,
-    valley_view,
-    wd_20,
-    wd_49,
-    wmw,
-)
-from pydantic_models import (
-    AlderwoodBillExtract,
-    AuburnBillExtract,
-    BellevueBillExtract,
-    BothellBillExtract,
-    CedarGroveBillExtract,
-    CenTrioBillExtract,
-    EdmondsBillExtract,
-    EverettBillExtract,
-    FriscoBillExtract,
-    KentBillExtract,
-    KingCountyBillExtract,
-    KingCountySummaryBillExtract,
-    LaceyBillExtract,
-    LynnwoodBillExtract,
-    OceanShoresBillExtract,
-    OlympiaBillExtract,
-    PSEElectricBillExtract,
-    PSEGasAndElectricBillExtract,
-    PSEGasBillExtract,
-    RecologyBillExtract,
-    RedmondBillExtract,
-    RentonBillExtract,
-    RepublicServicesBillExtract,
-    RubatinoBillExtract,
-    SammamishPlateauWaterBillExtract,
-    SeattleCityLightBillExtract,
-    SeattleCityLightCommercialBillExtract,
-    SkagitPUDBillExtract,
-    SPUBillExtract,
-    SSSDBillExtract,
-    ValleyViewBillExtract,
-    WaterDistrict20BillExtract,
-    WaterDistrict49BillExtract,
-    WMBillExtract,
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Union
+
+from prompt_cache import load_prompt_text
+from metrics import stage_timer
+from request_scheduler import SCHEDULER, estimate_tokens
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
+
+# Inexpensive models that only need to name the provider
+PDF_DETECTION_MODEL = "gpt-4.1-mini"
+PNG_DETECTION_MODEL = "gpt-4o"
+
+
+def normalize_provider_key(provider_name: str) -> str:
+    """Normalize a provider name to its registry key."""
+    return provider_name.strip().lower()
+
+
+@lru_cache(maxsize=None)
+def _resolve(import_path: str) -> Any:
+    module_name, _, attribute = import_path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    """
+    Everything the pipeline needs to know about one provider.
+
+    The spec is declared with a prompt filename and "module:attribute" import
+    paths; the model class, post-processor and checker are loaded the first
+    time they are used and then kept on the spec, so every later bill for the
+    provider reuses them. The prompt text comes from the shared prompt cache,
+    and the schemas sent to the LLM are rendered from the extraction model
+    (see `extraction_schema` and `prompt_cache.compact_schema_json`).
+    """
+
+    name: str
+    prompt: str
+    model: str
+    postprocessor: str
+    checker: str
+
+    @property
+    def prompt_path(self) -> Path:
+        return PROMPTS_DIR / self.prompt
+
+    @property
+    def prompt_text(self) -> str:
+        # Served from the shared prompt cache, so edits are picked up by mtime
+        return load_prompt_text(self.prompt_path)
+
+    @cached_property
+    def model_class(self) -> type:
+        return _resolve(self.model)
+
+    @cached_property
+    def postprocess(self) -> Callable[[dict], dict]:
+        return _resolve(self.postprocessor)
+
+    @cached_property
+    def check(self) -> Callable[[dict], bool]:
+        return _resolve(self.checker)
+
+
+def _build_registry(specs: tuple[ProviderSpec, ...]) -> dict[str, ProviderSpec]:
+    """
+    Index the specs by normalized name and check the registry is complete.
+
+    Every provider must have a prompt file on disk and importable model,
+    post-processor and checker modules. The modules are located, not
+    imported, so the check stays cheap.
+
+    Raises:
+        RuntimeError: If a name is duplicated or not normalized, or a
+                      prompt file or module is missing.
+    """
+
+    registry: dict[str, ProviderSpec] = {}
+    problems = []
+    for spec in specs:
+        if spec.name != normalize_provider_key(spec.name):
+            problems.append(f"{spec.name!r}: name is not normalized")
+        if spec.name in registry:
+            problems.append(f"{spec.name!r}: registered twice")
+        if not spec.prompt_path.is_file():
+            problems.append(f"{spec.name!r}: missing prompt {spec.prompt_path}")
+        for field in ("model", "postprocessor", "checker"):
+            module_name, _, attribute = getattr(spec, field).partition(":")
+            if not attribute or importlib.util.find_spec(module_name) is None:
+                problems.append(
+                    f"{spec.name!r}: {field} {getattr(spec, field)!r} not found"
+                )
+        registry[spec.name] = spec
+
+    if problems:
+        raise RuntimeError("Invalid provider registry:\n  " + "\n  ".join(problems))
+    return registry
+
+
+# One spec per supported provider, keyed by its normalized name
+PROVIDER_SPECS: dict[str, ProviderSpec] = _build_registry(
+    (
+        ProviderSpec(
+            name="seattle public utilities",
+            prompt="spu.txt",
+            model="pydantic_models.spu:SPUBillExtract",
+            postprocessor="provider_functions.spu:postprocess_seattle_public_utilities",
+            checker="provider_functions.spu:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="puget sound energy - gas",
+            prompt="pse_gas.txt",
+            model="pydantic_models.pse_gas:PSEGasBillExtract",
+            postprocessor="provider_functions.pse_gas:postprocess_pse_gas",
+            checker="provider_functions.pse_gas:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="puget sound energy - electric",
+            prompt="pse_electric.txt",
+            model="pydantic_models.pse_electric:PSEElectricBillExtract",
+            postprocessor="provider_functions.pse_electric:postprocess_pse_electric",
+            checker="provider_functions.pse_electric:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="puget sound energy - gas and electric",
+            prompt="pse_gas_and_electric.txt",
+            model="pydantic_models.pse_gas_and_electric:PSEGasAndElectricBillExtract",
+            postprocessor="provider_functions.pse_gas_and_electric:postprocess_pse_gas_and_electric",
+            checker="provider_functions.pse_gas_and_electric:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="seattle city light",
+            prompt="scl.txt",
+            model="pydantic_models.scl:SeattleCityLightBillExtract",
+            postprocessor="provider_functions.scl:postprocess_seattle_city_light",
+            checker="provider_functions.scl:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="seattle city light - commercial",
+            prompt="scl_2.txt",
+            model="pydantic_models.scl_2:SeattleCityLightCommercialBillExtract",
+            postprocessor="provider_functions.scl_2:postprocess_seattle_city_light_commercial",
+            checker="provider_functions.scl_2:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="waste management of washington",
+            prompt="wmw.txt",
+            model="pydantic_models.wmw:WMBillExtract",
+            postprocessor="provider_functions.wmw:postprocess_waste_management_washington",
+            checker="provider_functions.wmw:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="sammamish plateau water",
+            prompt="sammamish.txt",
+            model="pydantic_models.sammamish:SammamishPlateauWaterBillExtract",
+            postprocessor="provider_functions.sammamish:postprocess_sammamish_plateau_water",
+            checker="provider_functions.sammamish:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="kent",
+            prompt="kent.txt",
+            model="pydantic_models.kent:KentBillExtract",
+            postprocessor="provider_functions.kent:postprocess_kent",
+            checker="provider_functions.kent:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="everett public works",
+            prompt="everett.txt",
+            model="pydantic_models.everett:EverettBillExtract",
+            postprocessor="provider_functions.everett:postprocess_everett",
+            checker="provider_functions.everett:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="republic services",
+            prompt="republic.txt",
+            model="pydantic_models.republic:RepublicServicesBillExtract",
+            postprocessor="provider_functions.republic:postprocess_republic_services",
+            checker="provider_functions.republic:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="redmond city washington",
+            prompt="redmond.txt",
+            model="pydantic_models.redmond:RedmondBillExtract",
+            postprocessor="provider_functions.redmond:postprocess_redmond",
+            checker="provider_functions.redmond:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="king county wastewater treatment division",
+            prompt="king_county.txt",
+            model="pydantic_models.king_county:KingCountyBillExtract",
+            postprocessor="provider_functions.king_county:postprocess_king_county",
+            checker="provider_functions.king_county:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="king county account summary",
+            prompt="king_county_summary.txt",
+            model="pydantic_models.king_county_summary:KingCountySummaryBillExtract",
+            postprocessor="provider_functions.king_county_summary:postprocess_king_county_summary",
+            checker="provider_functions.king_county_summary:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="city of bellevue",
+            prompt="bellevue.txt",
+            model="pydantic_models.bellevue:BellevueBillExtract",
+            postprocessor="provider_functions.bellevue:postprocess_bellevue",
+            checker="provider_functions.bellevue:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="city of lynnwood",
+            prompt="lynnwood.txt",
+            model="pydantic_models.lynnwood:LynnwoodBillExtract",
+            postprocessor="provider_functions.lynnwood:postprocess_lynnwood",
+            checker="provider_functions.lynnwood:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="rubatino refuse removal",
+            prompt="rubatino.txt",
+            model="pydantic_models.rubatino:RubatinoBillExtract",
+            postprocessor="provider_functions.rubatino:postprocess_rubatino",
+            checker="provider_functions.rubatino:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="recology king county",
+            prompt="recology.txt",
+            model="pydantic_models.recology:RecologyBillExtract",
+            postprocessor="provider_functions.recology:postprocess_recology",
+            checker="provider_functions.recology:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="king county water district 20",
+            prompt="wd_20.txt",
+            model="pydantic_models.wd_20:WaterDistrict20BillExtract",
+            postprocessor="provider_functions.wd_20:postprocess_water_district_20",
+            checker="provider_functions.wd_20:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="valley view sewer district",
+            prompt="valley_view.txt",
+            model="pydantic_models.valley_view:ValleyViewBillExtract",
+            postprocessor="provider_functions.valley_view:postprocess_valley_view",
+            checker="provider_functions.valley_view:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="city of edmonds",
+            prompt="edmond.txt",
+            model="pydantic_models.edmond:EdmondsBillExtract",
+            postprocessor="provider_functions.edmond:postprocess_edmonds",
+            checker="provider_functions.edmond:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="alderwood water & wastewater district",
+            prompt="alderwood.txt",
+            model="pydantic_models.alderwood:AlderwoodBillExtract",
+            postprocessor="provider_functions.alderwood:postprocess_alderwood",
+            checker="provider_functions.alderwood:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="city of lacey",
+            prompt="lacey.txt",
+            model="pydantic_models.lacey:LaceyBillExtract",
+            postprocessor="provider_functions.lacey:postprocess_lacey",
+            checker="provider_functions.lacey:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="city of renton",
+            prompt="renton.txt",
+            model="pydantic_models.renton:RentonBillExtract",
+            postprocessor="provider_functions.renton:postprocess_renton",
+            checker="provider_functions.renton:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="cedar grove organics recycling llc",
+            prompt="cedar_grove.txt",
+            model="pydantic_models.cedar_grove:CedarGroveBillExtract",
+            postprocessor="provider_functions.cedar_grove:postprocess_cedar_grove",
+            checker="provider_functions.cedar_grove:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="centrio energy seattle",
+            prompt="centrio.txt",
+            model="pydantic_models.centrio:CenTrioBillExtract",
+            postprocessor="provider_functions.centrio:postprocess_centrio",
+            checker="provider_functions.centrio:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="southwest suburban sewer district",
+            prompt="sssd.txt",
+            model="pydantic_models.sssd:SSSDBillExtract",
+            postprocessor="provider_functions.sssd:postprocess_sssd",
+            checker="provider_functions.sssd:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="city of bothell",
+            prompt="bothell.txt",
+            model="pydantic_models.bothell:BothellBillExtract",
+            postprocessor="provider_functions.bothell:postprocess_bothell",
+            checker="provider_functions.bothell:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="city of olympia",
+            prompt="olympia.txt",
+            model="pydantic_models.olympia:OlympiaBillExtract",
+            postprocessor="provider_functions.olympia:postprocess_olympia",
+            checker="provider_functions.olympia:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="city of auburn",
+            prompt="auburn.txt",
+            model="pydantic_models.auburn:AuburnBillExtract",
+            postprocessor="provider_functions.auburn:postprocess_auburn",
+            checker="provider_functions.auburn:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="snohomish county pud",
+            prompt="skagit.txt",
+            model="pydantic_models.skagit:SkagitPUDBillExtract",
+            postprocessor="provider_functions.skagit:postprocess_skagit",
+            checker="provider_functions.skagit:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="city of frisco",
+            prompt="frisco.txt",
+            model="pydantic_models.frisco:FriscoBillExtract",
+            postprocessor="provider_functions.frisco:postprocess_frisco",
+            checker="provider_functions.frisco:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="city of ocean shores",
+            prompt="ocean_shores.txt",
+            model="pydantic_models.ocean_shores:OceanShoresBillExtract",
+            postprocessor="provider_functions.ocean_shores:postprocess_ocean_shores",
+            checker="provider_functions.ocean_shores:check_validation_passed",
+        ),
+        ProviderSpec(
+            name="king county water district 49",
+            prompt="wd_49.txt",
+            model="pydantic_models.wd_49:WaterDistrict49BillExtract",
+            postprocessor="provider_functions.wd_49:postprocess_water_district_49",
+            checker="provider_functions.wd_49:check_validation_passed",
+        ),
+        # add more providers here as I support them
+    )
 )
 
-client = OpenAI()
-
-# Map normalized provider names to prompt filenames
-PROVIDER_PROMPTS: dict[str, str] = {
-    "seattle public utilities": "spu.txt",
-    "puget sound energy - gas": "pse_gas.txt",
-    "puget sound energy - electric": "pse_electric.txt",
-    "puget sound energy - gas and electric": "pse_gas_and_electric.txt",
-    "seattle city light": "scl.txt",
-    "seattle city light - commercial": "scl_2.txt",
-    "waste management of washington": "wmw.txt",
-    "sammamish plateau water": "sammamish.txt",
-    "kent": "kent.txt",
-    "everett public works": "everett.txt",
-    "republic services": "republic.txt",
-    "redmond city washington": "redmond.txt",
-    "king county wastewater treatment division": "king_county.txt",
-    "king county account summary": "king_county_summary.txt",
-    "city of bellevue": "bellevue.txt",
-    "city of lynnwood": "lynnwood.txt",
-    "rubatino refuse removal": "rubatino.txt",
-    "recology king county": "recology.txt",
-    "king county water district 20": "wd_20.txt",
-    "valley view sewer district": "valley_view.txt",
-    "city of edmonds": "edmond.txt",
-    "alderwood water & wastewater district": "alderwood.txt",
-    "city of lacey": "lacey.txt",
-    "city of renton": "renton.txt",
-    "cedar grove organics recycling llc": "cedar_grove.txt",
-    "centrio energy seattle": "centrio.txt",
-    "southwest suburban sewer district": "sssd.txt",
-    "city of bothell": "bothell.txt",
-    "city of olympia": "olympia.txt",
-    "city of auburn": "auburn.txt",
-    "snohomish county pud": "skagit.txt",
-    "city of frisco": "frisco.txt",
-    "city of ocean shores": "ocean_shores.txt",
-    "king county water district 49": "wd_49.txt",
-    # add more providers here as I support them
-}
-
-# provider-specific post‑processors
-PROVIDER_POSTPROCESSORS: Dict[str, Callable[[dict], dict]] = {
-    "seattle public utilities": spu.postprocess_seattle_public_utilities,
-    "puget sound energy - gas": pse_gas.postprocess_pse_gas,
-    "puget sound energy - electric": pse_electric.postprocess_pse_electric,
-    "puget sound energy - gas and electric": pse_gas_and_electric.postprocess_pse_gas_and_electric,
-    "seattle city light": scl.postprocess_seattle_city_light,
-    "waste management of washington": wmw.postprocess_waste_management_washington,
-    "sammamish plateau water": sammamish.postprocess_sammamish_plateau_water,
-    "kent": kent.postprocess_kent,
-    "everett public works": everett.postprocess_everett,
-    "republic services": republic.postprocess_republic_services,
-    "redmond city washington": redmond.postprocess_redmond,
-    "king county wastewater treatment division": king_county.postprocess_king_county,
-    "king county account summary": king_county_summary.postprocess_king_county_summary,
-    "city of bellevue": bellevue.postprocess_bellevue,
-    "city of lynnwood": lynnwood.postprocess_lynnwood,
-    "rubatino refuse removal": rubatino.postprocess_rubatino,
-    "recology king county": recology.postprocess_recology,
-    "king county water district 20": wd_20.postprocess_water_district_20,
-    "valley view sewer district": valley_view.postprocess_valley_view,
-    "city of edmonds": edmond.postprocess_edmonds,
-    "alderwood water & wastewater district": alderwood.postprocess_alderwood,
-    "city of lacey": lacey.postprocess_lacey,
-    "city of renton": renton.postprocess_renton,
-    "cedar grove organics recycling llc": cedar_grove.postprocess_cedar_grove,
-    "centrio energy seattle": centrio.postprocess_centrio,
-    "southwest suburban sewer district": sssd.postprocess_sssd,
-    "city of bothell": bothell.postprocess_bothell,
-    "city of olympia": olympia.postprocess_olympia,
-    "city of auburn": auburn.postprocess_auburn,
-    "snohomish county pud": skagit.postprocess_skagit,
-    "city of frisco": frisco.postprocess_frisco,
-    "city of ocean shores": ocean_shores.postprocess_ocean_shores,
-    "seattle city light - commercial": scl_2.postprocess_seattle_city_light_commercial,
-    "king county water district 49": wd_49.postprocess_water_district_49,
-    # add more providers here later
-}
-
-# provider-specific validation checkers
-PROVIDER_VALIDATION_CHECKERS: Dict[str, Callable[[dict], bool]] = {
-    "seattle public utilities": spu.check_validation_passed,
-    "puget sound energy - gas": pse_gas.check_validation_passed,
-    "puget sound energy - electric": pse_electric.check_validation_passed,
-    "puget sound energy - gas and electric": pse_gas_and_electric.check_validation_passed,
-    "seattle city light": scl.check_validation_passed,
-    "waste management of washington": wmw.check_validation_passed,
-    "sammamish plateau water": sammamish.check_validation_passed,
-    "kent": kent.check_validation_passed,
-    "everett public works": everett.check_validation_passed,
-    "republic services": republic.check_validation_passed,
-    "king county wastewater treatment division": king_county.check_validation_passed,
-    "king county account summary": king_county_summary.check_validation_passed,
-    "city of bellevue": bellevue.check_validation_passed,
-    "city of lynnwood": lynnwood.check_validation_passed,
-    "rubatino refuse removal": rubatino.check_validation_passed,
-    "recology king county": recology.check_validation_passed,
-    "king county water district 20": wd_20.check_validation_passed,
-    "valley view sewer district": valley_view.check_validation_passed,
-    "city of edmonds": edmond.check_validation_passed,
-    "alderwood water & wastewater district": alderwood.check_validation_passed,
-    "city of lacey": lacey.check_validation_passed,
-    "city of renton": renton.check_validation_passed,
-    "cedar grove organics recycling llc": cedar_grove.check_validation_passed,
-    "centrio energy seattle": centrio.check_validation_passed,
-    "southwest suburban sewer district": sssd.check_validation_passed,
-    "city of bothell": bothell.check_validation_passed,
-    "city of olympia": olympia.check_validation_passed,
-    "city of auburn": auburn.check_validation_passed,
-    "snohomish county pud": skagit.check_validation_passed,
-    "city of frisco": frisco.check_validation_passed,
-    "city of ocean shores": ocean_shores.check_validation_passed,
-    "seattle city light - commercial": scl_2.check_validation_passed,
-    "king county water district 49": wd_49.check_validation_passed,
-    # add more providers here later
-}
-
-# Map provider names to their Pydantic models
-PROVIDER_MODELS = {
-    "seattle public utilities": SPUBillExtract,
-    "puget sound energy - gas": PSEGasBillExtract,
-    "puget sound energy - electric": PSEElectricBillExtract,
-    "puget sound energy - gas and electric": PSEGasAndElectricBillExtract,
-    "seattle city light": SeattleCityLightBillExtract,
-    "waste management of washington": WMBillExtract,
-    "sammamish plateau water": SammamishPlateauWaterBillExtract,
-    "kent": KentBillExtract,
-    "everett public works": EverettBillExtract,
-    "republic services": RepublicServicesBillExtract,
-    "redmond city washington": RedmondBillExtract,
-    "king county wastewater treatment division": KingCountyBillExtract,
-    "king county account summary": KingCountySummaryBillExtract,
-    "city of bellevue": BellevueBillExtract,
-    "city of lynnwood": LynnwoodBillExtract,
-    "rubatino refuse removal": RubatinoBillExtract,
-    "recology king county": RecologyBillExtract,
-    "king county water district 20": WaterDistrict20BillExtract,
-    "valley view sewer district": ValleyViewBillExtract,
-    "city of edmonds": EdmondsBillExtract,
-    "alderwood water & wastewater district": AlderwoodBillExtract,
-    "city of lacey": LaceyBillExtract,
-    "city of renton": RentonBillExtract,
-    "cedar grove organics recycling llc": CedarGroveBillExtract,
-    "centrio energy seattle": CenTrioBillExtract,
-    "southwest suburban sewer district": SSSDBillExtract,
-    "city of bothell": BothellBillExtract,
-    "city of olympia": OlympiaBillExtract,
-    "city of auburn": AuburnBillExtract,
-    "snohomish county pud": SkagitPUDBillExtract,
-    "city of frisco": FriscoBillExtract,
-    "city of ocean shores": OceanShoresBillExtract,
-    "seattle city light - commercial": SeattleCityLightCommercialBillExtract,
-    "king county water district 49": WaterDistrict49BillExtract,
-    # add more providers here later
-}
-
-
-def detect_provider_from_file_id(file_id: str) -> str:
+
+def get_provider_spec(provider_name: str) -> ProviderSpec:
     """
-    Ask the LLM to read the bill PDF and return the provider name.
+    Look up the spec for a provider.
+
+    Args:
+        provider_name: The provider name; normalized names hit the registry
+                       directly, others are normalized first.
+
+    Returns:
+        The provider's ProviderSpec.
+
+    Raises:
+        ValueError: If the provider is not registered.
+    """
+
+    spec = PROVIDER_SPECS.get(provider_name)
+    if spec is None:
+        spec = PROVIDER_SPECS.get(normalize_provider_key(provider_name))
+        if spec is None:
+            raise ValueError(
+                f"Unknown provider '{provider_name}'. "
+                f"Known providers: {list(PROVIDER_SPECS)}"
+            )
+    return spec
+
+
+@lru_cache(maxsize=1)
+def get_client() -> "OpenAI":
+    """
+    Return the shared OpenAI client, creating it on first use.
+
+    Building the client lazily keeps `import provider_router` free of the
+    openai import cost and lets offline tasks run without an API key. The
+    request scheduler owns retries, so the SDK's own retries are disabled.
     """
 
-    allowed_providers = list(PROVIDER_PROMPTS.keys())
+    from openai import OpenAI
+
+    return OpenAI(max_retries=0)
+
+
+def build_detection_prompt(providers: Iterable[str] | None = None) -> str:
+    """
+    Build the instruction text used to ask the LLM which provider issued a bill.
+
+    The same text is used for PDF and PNG detection, and by the sync and async
+    extractors, so the list of allowed providers is rendered in one place.
+
+    Args:
+        providers: The names the answer must come from. Defaults to every
+                   registered provider.
+    """
+
+    allowed_providers = list(PROVIDER_SPECS if providers is None else providers)
     allowed_display = ", ".join(f"'{name}'" for name in allowed_providers)
 
-    response = client.responses.create(
-        model="gpt-4.1-mini",  # or another inexpensive model
-        input=[
-            {
-                "role": "user",
-                "content": [
-                    {"type": "input_file", "file_id": file_id},
-                    {
-                        "type": "input_text",
-                        "text": (
-                            "You are identifying the utility provider that issued this bill.\n\n"
-                            "You MUST answer with EXACTLY ONE name from the following list, "
-                            "and nothing else (no extra words, punctuation, or explanation):\n"
-                            f"{allowed_display}\n\n"
-                            "Look at the bill carefully:\n"
-                            "- For Puget Sound Energy bills, check if it's for Natural Gas, Electric service or both together\n"
-                            "- For Seattle City Light bills, check the detailed billing section:\n"
-                            "  * If you see 'Power Factor Penalty', 'Small General Energy', service categories 'KVRH' or 'KW', "
-                            "or totals formatted as 'Total for: [address]', answer: seattle city light - commercial\n"
-                            "  * Otherwise, answer: seattle city light\n"
-                            "- For King County bills:\n"
-                            "  * If you see 'Account Summary' as a heading with an information icon (i in a circle) next to it, "
-                            "AND the page shows fields like 'Most Recent Invoice #', 'Most Recent Invoice Date', 'Remaining Balance', "
-                            "and 'Choose a Payment Amount' section, answer: king county account summary\n"
-                            "  * If you see a detailed invoice with 'DESCRIPTION' section, '*Past Due', 'Current Billing', "
-                            "'Discount Early Payoff', or 'BILLING PERIOD' table, answer: king county wastewater treatment division\n"
-                            "- For King County Water District bills:\n"
-                            "  * Look for 'King County Water District No. 49' or 'KING COUNTY Water District No.49' in the header/logo area\n"
-                            "  * If found, answer: king county water district 49\n"
-                            "  * If you see 'KING COUNTY WATER DISTRICT 20', answer: king county water district 20\n"
-                            "- Choose the specific option that matches BOTH the provider and service type\n"
-                            "- scroll to the VERY BOTTOM of the page and look for a URL/website address\n"
-                            "If you find a URL containing 'rubatino.onlineportal.us.com', answer: rubatino refuse removal\n"
-                            "Reply with only that exact name."
-                        ),
-                    },
-                ],
-            }
-        ],
+    return (
+        "You are identifying the utility provider that issued this bill.\n\n"
+        "You MUST answer with EXACTLY ONE name from the following list, "
+        "and nothing else (no extra words, punctuation, or explanation):\n"
+        f"{allowed_display}\n\n"
+        "Look at the bill carefully:\n"
+        "- For Puget Sound Energy bills, check if it's for Natural Gas, Electric service or both together\n"
+        "- For Seattle City Light bills, check the detailed billing section:\n"
+        "  * If you see 'Power Factor Penalty', 'Small General Energy', service categories 'KVRH' or 'KW', "
+        "or totals formatted as 'Total for: [address]', answer: seattle city light - commercial\n"
+        "  * Otherwise, answer: seattle city light\n"
+        "- For King County bills:\n"
+        "  * If you see 'Account Summary' as a heading with an information icon (i in a circle) next to it, "
+        "AND the page shows fields like 'Most Recent Invoice #', 'Most Recent Invoice Date', 'Remaining Balance', "
+        "and 'Choose a Payment Amount' section, answer: king county account summary\n"
+        "  * If you see a detailed invoice with 'DESCRIPTION' section, '*Past Due', 'Current Billing', "
+        "'Discount Early Payoff', or 'BILLING PERIOD' table, answer: king county wastewater treatment division\n"
+        "- For King County Water District bills:\n"
+        "  * Look for 'King County Water District No. 49' or 'KING COUNTY Water District No.49' in the header/logo area\n"
+        "  * If found, answer: king county water district 49\n"
+        "  * If you see 'KING COUNTY WATER DISTRICT 20', answer: king county water district 20\n"
+        "- Choose the specific option that matches BOTH the provider and service type\n"
+        "- scroll to the VERY BOTTOM of the page and look for a URL/website address\n"
+        "If you find a URL containing 'rubatino.onlineportal.us.com', answer: rubatino refuse removal\n"
+        "Reply with only that exact name."
     )
 
-    # Extract the text from the response
-    provider_text = response.output[0].content[0].text
 
-    # Convert to plain string
-    if hasattr(provider_text, "value"):
-        provider_name = provider_text.value
-    else:
-        provider_name = str(provider_text)
+def normalize_detected_provider(provider_text: str) -> str:
+    """
+    Normalize the provider name returned by the LLM and check it is supported.
 
-    # Normalize and validate
-    provider_name = provider_name.strip()
+    Args:
+        provider_text: Raw text returned by the detection call.
+
+    Returns:
+        The normalized (lowercase) provider name.
+
+    Raises:
+        ValueError: If the name is not one of the known providers.
+    """
+
+    provider_name = provider_text.strip()
     normalized = provider_name.lower()
 
-    if normalized not in PROVIDER_PROMPTS:
+    if normalized not in PROVIDER_SPECS:
         raise ValueError(
             f"Model returned unknown provider '{provider_name}'. "
-            f"Expected one of: {list(PROVIDER_PROMPTS.keys())}"
+            f"Expected one of: {list(PROVIDER_SPECS)}"
         )
 
     # return normalized since the dict keys are lowercase
     return normalized
 
 
+def detect_provider_from_file_id(
+    file_id: str, client: "OpenAI | None" = None, file_bytes: int = 0
+) -> str:
+    """
+    Ask the LLM to read the bill PDF and return the provider name.
+
+    `file_bytes` is the size of the uploaded PDF; it only sizes the request's
+    token budget in the scheduler.
+    """
+
+    if client is None:
+        client = get_client()
+
+    prompt = build_detection_prompt()
+    with stage_timer("detect", model=PDF_DETECTION_MODEL):
+        response = SCHEDULER.call(
+            PDF_DETECTION_MODEL,
+            estimate_tokens(prompt, file_bytes=file_bytes, max_output_tokens=100),
+            client.responses.create,
+            model=PDF_DETECTION_MODEL,
+            input=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "input_file", "file_id": file_id},
+                        {"type": "input_text", "text": prompt},
+                    ],
+                }
+            ],
+        )
+
+    # Extract the text from the response
+    provider_text = response.output[0].content[0].text
+
+    # Convert to plain string
+    if hasattr(provider_text, "value"):
+        provider_name = provider_text.value
+    else:
+        provider_name = str(provider_text)
+
+    # Normalize and validate
+    return normalize_detected_provider(provider_name)
+
+
 def encode_png_to_base64(file_path: str | Path) -> str:
     """
     Encode a PNG file to base64 string.
@@ -320,7 +522,9 @@ def encode_png_to_base64(file_path: str | Path) -> str:
         return base64.b64encode(f.read()).decode("utf-8")
 
 
-def detect_provider_from_png(png_path: str | Path, client: OpenAI | None = None) -> str:
+def detect_provider_from_png(
+    png_path: str | Path, client: "OpenAI | None" = None
+) -> str:
     """
     Ask the LLM to read the bill PNG image and return the provider name.
 
@@ -332,70 +536,38 @@ def detect_provider_from_png(png_path: str | Path, client: OpenAI | None = None)
         The normalized provider name.
     """
     if client is None:
-        client = OpenAI()
-
-    allowed_providers = list(PROVIDER_PROMPTS.keys())
-    allowed_display = ", ".join(f"'{name}'" for name in allowed_providers)
+        client = get_client()
 
     base64_image = encode_png_to_base64(png_path)
-
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/png;base64,{base64_image}",
+    prompt = build_detection_prompt()
+
+    with stage_timer("detect", model=PNG_DETECTION_MODEL):
+        response = SCHEDULER.call(
+            PNG_DETECTION_MODEL,
+            estimate_tokens(prompt, images=1, max_output_tokens=100),
+            client.chat.completions.create,
+            model=PNG_DETECTION_MODEL,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/png;base64,{base64_image}",
+                            },
                         },
-                    },
-                    {
-                        "type": "text",
-                        "text": (
-                            "You are identifying the utility provider that issued this bill.\n\n"
-                            "You MUST answer with EXACTLY ONE name from the following list, "
-                            "and nothing else (no extra words, punctuation, or explanation):\n"
-                            f"{allowed_display}\n\n"
-                            "Look at the bill carefully:\n"
-                            "- For Puget Sound Energy bills, check if it's for Natural Gas, Electric service or both together\n"
-                            "- For Seattle City Light bills, check the detailed billing section:\n"
-                            "  * If you see 'Power Factor Penalty', 'Small General Energy', service categories 'KVRH' or 'KW', "
-                            "or totals formatted as 'Total for: [address]', answer: seattle city light - commercial\n"
-                            "  * Otherwise, answer: seattle city light\n"
-                            "- For King County bills:\n"
-                            "  * If you see 'Account Summary' as a heading with an information icon (i in a circle) next to it, "
-                            "AND the page shows fields like 'Most Recent Invoice #', 'Most Recent Invoice Date', 'Remaining Balance', "
-                            "and 'Choose a Payment Amount' section, answer: king county account summary\n"
-                            "  * If you see a detailed invoice with 'DESCRIPTION' section, '*Past Due', 'Current Billing', "
-                            "'Discount Early Payoff', or 'BILLING PERIOD' table, answer: king county wastewater treatment division\n"
-                            "- For King County Water District bills:\n"
-                            "  * Look for 'King County Water District No. 49' or 'KING COUNTY Water District No.49' in the header/logo area\n"
-                            "  * If found, answer: king county water district 49\n"
-                            "  * If you see 'KING COUNTY WATER DISTRICT 20', answer: king county water district 20\n"
-                            "- Choose the specific option that matches BOTH the provider and service type\n"
-                            "- scroll to the VERY BOTTOM of the page and look for a URL/website address\n"
-                            "If you find a URL containing 'rubatino.onlineportal.us.com', answer: rubatino refuse removal\n"
-                            "Reply with only that exact name."
-                        ),
-                    },
-                ],
-            }
-        ],
-        max_tokens=100,
-    )
-
-    provider_name = response.choices[0].message.content.strip()
-    normalized = provider_name.lower()
-
-    if normalized not in PROVIDER_PROMPTS:
-        raise ValueError(
-            f"Model returned unknown provider '{provider_name}'. "
-            f"Expected one of: {list(PROVIDER_PROMPTS.keys())}"
+                        {
+                            "type": "text",
+                            "text": prompt,
+                        },
+                    ],
+                }
+            ],
+            max_tokens=100,
         )
 
-    return normalized
+    return normalize_detected_provider(response.choices[0].message.content)
 
 
 def get_prompt_path_for_provider(
@@ -405,19 +577,8 @@ def get_prompt_path_for_provider(
     """
     Map a detected provider name to the corresponding prompt file path.
     """
-    project_root = Path(project_root)
-
-    normalized = provider_name.strip().lower()
-    prompt_filename = PROVIDER_PROMPTS.get(normalized)
-
-    if not prompt_filename:
-        # You can change this to a default prompt or logging behavior if you prefer
-        raise ValueError(
-            f"Unknown provider '{provider_name}'. "
-            f"Known providers: {list(PROVIDER_PROMPTS.keys())}"
-        )
-
-    return project_root / "src" / "utility_bills" / "prompts" / prompt_filename
+    spec = get_provider_spec(provider_name)
+    return Path(project_root) / "src" / "utility_bills" / "prompts" / spec.prompt
 
 
 def select_prompt_for_bill(
@@ -433,32 +594,29 @@ def select_prompt_for_bill(
 
 def postprocess_for_provider(provider_name: str, data: dict) -> dict:
     """
-    Apply any provider-specific post‑processing to the extracted JSON.
-    If no post‑processor is registered, return data unchanged.
+    Apply the provider-specific post‑processing to the extracted JSON.
+
+    Raises:
+        ValueError: If the provider is not registered.
     """
-    func = PROVIDER_POSTPROCESSORS.get(provider_name.strip().lower())
-    if not func:
-        return data
-    return func(data)
+    return get_provider_spec(provider_name).postprocess(data)
 
 
 def check_validation_for_provider(provider_name: str, data: dict) -> bool:
     """
     Check if validation passed for a provider-specific utility bill.
-    If no validation checker is registered, returns True by default.
 
     Args:
         provider_name: The normalized provider name.
         data: The extracted utility bill dictionary after post-processing.
 
     Returns:
-        True if validation passed or no checker is registered, False otherwise.
+        True if validation passed, False otherwise.
+
+    Raises:
+        ValueError: If the provider is not registered.
     """
-    func = PROVIDER_VALIDATION_CHECKERS.get(provider_name.strip().lower())
-    if not func:
-        # If no validation checker is registered, assume validation passed
-        return True
-    return func(data)
+    return get_provider_spec(provider_name).check(data)
 
 
 def get_model_for_provider(provider_name: str):
@@ -474,13 +632,4 @@ def get_model_for_provider(provider_name: str):
     Raises:
         ValueError: If no model is registered for the provider.
     """
-    normalized = provider_name.strip().lower()
-    model_class = PROVIDER_MODELS.get(normalized)
-
-    if model_class is None:
-        raise ValueError(
-            f"No Pydantic model registered for provider '{provider_name}'. "
-            f"Known providers: {list(PROVIDER_MODELS.keys())}"
-        )
-
-    return model_class
+    return get_provider_spec(provider_name).model_class
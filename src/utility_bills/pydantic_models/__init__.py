@@ -1,39 +1,47 @@
-"""Pydantic models for utility bill extraction."""
+"""Pydantic models for utility bill extraction.
 
-from .alderwood import AlderwoodBillExtract
-from .auburn import AuburnBillExtract
-from .bellevue import BellevueBillExtract
-from .bothell import BothellBillExtract
-from .cedar_grove import CedarGroveBillExtract
-from .centrio import CenTrioBillExtract
-from .edmond import EdmondsBillExtract
-from .everett import EverettBillExtract
-from .frisco import FriscoBillExtract
-from .kent import KentBillExtract
-from .king_county import KingCountyBillExtract
-from .king_county_summary import KingCountySummaryBillExtract
-from .lacey import LaceyBillExtract
-from .lynnwood import LynnwoodBillExtract
-from .ocean_shores import OceanShoresBillExtract
-from .olympia import OlympiaBillExtract
-from .pse_electric import PSEElectricBillExtract
-from .pse_gas import PSEGasBillExtract
-from .pse_gas_and_electric import PSEGasAndElectricBillExtract
-from .recology import RecologyBillExtract
-from .redmond import RedmondBillExtract
-from .renton import RentonBillExtract
-from .republic import RepublicServicesBillExtract
-from .rubatino import RubatinoBillExtract
-from .sammamish import SammamishPlateauWaterBillExtract
-from .scl import SeattleCityLightBillExtract
-from .scl_2 import SeattleCityLightCommercialBillExtract
-from .skagit import SkagitPUDBillExtract
-from .spu import SPUBillExtract
-from .sssd import SSSDBillExtract
-from .valley_view import ValleyViewBillExtract
-from .wd_20 import WaterDistrict20BillExtract
-from .wd_49 import WaterDistrict49BillExtract
-from .wmw import WMBillExtract
+Models are imported on first access (PEP 562), so importing the package, or a
+single model, does not build every provider's schema.
+"""
+
+import importlib
+
+_MODEL_MODULES = {
+    "AlderwoodBillExtract": "alderwood",
+    "AuburnBillExtract": "auburn",
+    "BellevueBillExtract": "bellevue",
+    "BothellBillExtract": "bothell",
+    "CedarGroveBillExtract": "cedar_grove",
+    "CenTrioBillExtract": "centrio",
+    "EdmondsBillExtract": "edmond",
+    "EverettBillExtract": "everett",
+    "FriscoBillExtract": "frisco",
+    "KentBillExtract": "kent",
+    "KingCountyBillExtract": "king_county",
+    "KingCountySummaryBillExtract": "king_county_summary",
+    "LaceyBillExtract": "lacey",
+    "LynnwoodBillExtract": "lynnwood",
+    "OceanShoresBillExtract": "ocean_shores",
+    "OlympiaBillExtract": "olympia",
+    "PSEElectricBillExtract": "pse_electric",
+    "PSEGasBillExtract": "pse_gas",
+    "PSEGasAndElectricBillExtract": "pse_gas_and_electric",
+    "RecologyBillExtract": "recology",
+    "RedmondBillExtract": "redmond",
+    "RentonBillExtract": "renton",
+    "RepublicServicesBillExtract": "republic",
+    "RubatinoBillExtract": "rubatino",
+    "SammamishPlateauWaterBillExtract": "sammamish",
+    "SeattleCityLightBillExtract": "scl",
+    "SeattleCityLightCommercialBillExtract": "scl_2",
+    "SkagitPUDBillExtract": "skagit",
+    "SPUBillExtract": "spu",
+    "SSSDBillExtract": "sssd",
+    "ValleyViewBillExtract": "valley_view",
+    "WaterDistrict20BillExtract": "wd_20",
+    "WaterDistrict49BillExtract": "wd_49",
+    "WMBillExtract": "wmw",
+}
 
 __all__ = [
     "SPUBillExtract",
@@ -71,3 +79,16 @@ __all__ = [
     "SeattleCityLightCommercialBillExtract",
     "WaterDistrict49BillExtract",
 ]
+
+
+def __getattr__(name: str):
+    module_name = _MODEL_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    model_class = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = model_class
+    return model_class
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODEL_MODULES))
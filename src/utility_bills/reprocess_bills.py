@@ -0,0 +1,276 @@
+import argparse
+import glob
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+
+from extractor import dump_bill_json
+from logging_setup import setup_logging
+from mapper_functions.rule_mapper import has_rule_mapping
+from mapper_functions.universal_transformer import transform_single_bill
+from provider_router import (
+    check_validation_for_provider,
+    normalize_provider_key,
+    postprocess_for_provider,
+)
+
+MEDIA_TYPES = ("pdf", "png")
+
+
+@dataclass
+class Reprocessed:
+    """
+    The outcome of re-running one saved bill.
+
+    Attributes:
+        json_path: Where the bill JSON was read from.
+        provider_name: The provider recorded in the JSON, or None.
+        was_passing: The bill was in processed/ (its old verdict).
+        passed: The new verdict, or None if the bill was skipped or failed.
+        text: The re-serialized JSON if it differs from the file, else None.
+        error: repr() of the exception if the bill could not be re-run.
+    """
+
+    json_path: Path
+    provider_name: str | None
+    was_passing: bool
+    passed: bool | None = None
+    text: str | None = None
+    error: str | None = None
+
+    @property
+    def verdict_changed(self) -> bool:
+        return self.passed is not None and self.passed != self.was_passing
+
+
+def reprocess_file(json_path: Path, provider: str | None = None) -> Reprocessed:
+    """
+    Re-run the post-processor and checker on one saved bill, without writing.
+
+    Args:
+        json_path: A bill in processed/json or unprocessed/json.
+        provider: If set, bills of other providers are skipped (passed stays None).
+
+    Returns:
+        The new verdict, and the new JSON text if the content changed.
+    """
+
+    result = Reprocessed(
+        json_path, None, was_passing=json_path.parent.parent.name == "processed"
+    )
+    try:
+        original = json_path.read_text(encoding="utf-8")
+        data = json.loads(original)
+        result.provider_name = data.pop("provider_name", None)
+        if not result.provider_name:
+            raise ValueError("no provider_name in the saved JSON")
+        if provider and normalize_provider_key(result.provider_name) != provider:
+            return result
+
+        data = postprocess_for_provider(result.provider_name, data)
+        result.passed = check_validation_for_provider(result.provider_name, data)
+        text = dump_bill_json(result.provider_name, data)
+        if text != original:
+            result.text = text
+    except Exception as e:
+        result.error = repr(e)
+    return result
+
+
+def _move_media(data_dir: Path, stem: str, source: str, dest: str) -> list[Path]:
+    """Move the PDF/PNG of a bill between processed and unprocessed."""
+
+    moved = []
+    for media in MEDIA_TYPES:
+        for media_path in (data_dir / source / media).glob(f"{glob.escape(stem)}.*"):
+            media_dir = data_dir / dest / media
+            media_dir.mkdir(parents=True, exist_ok=True)
+            moved.append(Path(shutil.move(media_path, media_dir / media_path.name)))
+    return moved
+
+
+class Reprocessor:
+    """
+    Re-apply the provider post-processors and checkers to every saved bill.
+
+    The saved JSON in processed/json and unprocessed/json is re-run on a
+    process pool, so fixing a provider module does not mean paying for the
+    extraction again. Bills whose verdict changed are moved (JSON and PDF/PNG)
+    to the other folder, bills whose content changed are rewritten, and the
+    standard JSON in json_results is regenerated only for passing bills with
+    either change. Standard JSON of bills that now fail is removed.
+    """
+
+    def __init__(
+        self,
+        project_root: str | Path,
+        max_workers: int | None = None,
+        use_llm: bool = True,
+        dry_run: bool = False,
+    ):
+        """
+        Args:
+            project_root: Path to the project root directory.
+            max_workers: Worker processes (default: one per CPU).
+            use_llm: Regenerate standard JSON with the LLM for providers
+                     without a rule mapping. If False they are only counted.
+            dry_run: Only report what would change.
+        """
+
+        self.project_root = Path(project_root)
+        self.data_dir = self.project_root / "src" / "data"
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_llm = use_llm
+        self.dry_run = dry_run
+        self.logger = setup_logging(self.project_root / "logs")
+
+    def saved_bills(self) -> list[Path]:
+        """The saved bill JSON files, processed first."""
+
+        return [
+            json_path
+            for folder in ("processed", "unprocessed")
+            for json_path in sorted((self.data_dir / folder / "json").glob("*.json"))
+        ]
+
+    def run(self, provider: str | None = None) -> dict:
+        """
+        Re-process the saved bills and apply the changes.
+
+        Args:
+            provider: Only re-run bills of this provider.
+
+        Returns:
+            A report with counts per outcome.
+        """
+
+        started = time.perf_counter()
+        paths = self.saved_bills()
+        if provider:
+            provider = normalize_provider_key(provider)
+        report = {
+            "bills": len(paths),
+            "skipped": 0,
+            "errors": 0,
+            "unchanged": 0,
+            "content_changed": 0,
+            "now_passing": 0,
+            "now_failing": 0,
+            "standard_regenerated": 0,
+            "standard_failed": 0,
+            "standard_without_rule_mapping": 0,
+            "standard_removed": 0,
+        }
+
+        worker = partial(reprocess_file, provider=provider)
+        chunksize = max(1, min(64, len(paths) // (self.max_workers * 4)))
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            for result in pool.map(worker, paths, chunksize=chunksize):
+                if result.error is not None:
+                    report["errors"] += 1
+                    self.logger.warning(f"{result.json_path.name}: {result.error}")
+                elif result.passed is None:
+                    report["skipped"] += 1
+                else:
+                    self._apply(result, report)
+
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    def _apply(self, result: Reprocessed, report: dict) -> None:
+        """Write, move and re-transform one re-run bill as its outcome requires."""
+
+        if result.verdict_changed:
+            report["now_passing" if result.passed else "now_failing"] += 1
+        elif result.text is not None:
+            report["content_changed"] += 1
+        else:
+            report["unchanged"] += 1
+            return
+
+        json_path = result.json_path
+        stem = json_path.stem
+        source = json_path.parent.parent.name
+        dest = "processed" if result.passed else "unprocessed"
+        self.logger.info(
+            f"{json_path.name}: {source} -> {dest}"
+            + (" (content changed)" if result.text is not None else "")
+        )
+        if self.dry_run:
+            return
+
+        dest_json = self.data_dir / dest / "json" / json_path.name
+        dest_json.parent.mkdir(parents=True, exist_ok=True)
+        if result.text is not None:
+            dest_json.write_text(result.text, encoding="utf-8")
+            if dest_json != json_path:
+                json_path.unlink()
+        elif dest_json != json_path:
+            shutil.move(json_path, dest_json)
+        if result.verdict_changed:
+            _move_media(self.data_dir, stem, source, dest)
+
+        standard_json_path = self.data_dir / "json_results" / f"{stem}.json"
+        if not result.passed:
+            # Only validated bills have standard JSON
+            if standard_json_path.exists():
+                standard_json_path.unlink()
+                report["standard_removed"] += 1
+            return
+        if not self.use_llm and not has_rule_mapping(result.provider_name):
+            report["standard_without_rule_mapping"] += 1
+            return
+        standard_bill = transform_single_bill(str(dest_json), str(standard_json_path))
+        if standard_bill is None:
+            report["standard_failed"] += 1
+        else:
+            report["standard_regenerated"] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-run the provider post-processing and validation on the "
+        "saved bills, e.g. after fixing a provider module, without new "
+        "extraction calls."
+    )
+    parser.add_argument(
+        "--provider",
+        default=None,
+        help="Only re-run bills of this provider.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: one per CPU).",
+    )
+    parser.add_argument(
+        "--no-llm",
+        action="store_true",
+        help="Do not call the LLM for standard JSON; bills of providers "
+        "without a rule mapping are only counted.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would change without writing or moving anything.",
+    )
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[2]
+    reprocessor = Reprocessor(
+        project_root,
+        max_workers=args.workers,
+        use_llm=not args.no_llm,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(reprocessor.run(args.provider), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from concurrency_controller import (
+    FAILURE,
+    OVERLOAD,
+    SUCCESS,
+    AdaptiveConcurrencyLimiter,
+)
+from metrics import Gauge, record_usage
+
+logger = logging.getLogger("utility_bills")
+
+# Rough size of one token in characters of English prompt text
+CHARS_PER_TOKEN = 4
+# Rough PDF bytes per input token (the Responses API sends page text and images)
+PDF_BYTES_PER_TOKEN = 64
+# Used when the size of an uploaded file is not known
+DEFAULT_FILE_TOKENS = 3000
+# A high-detail vision image is at most this many tokens
+IMAGE_TOKENS = 1105
+DEFAULT_OUTPUT_TOKENS = 2000
+
+# HTTP statuses worth retrying; everything else is a caller error
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+# Statuses that mean the service wants less traffic
+OVERLOAD_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    """Requests and tokens a model may use per minute."""
+
+    requests_per_minute: int
+    tokens_per_minute: int
+
+
+def estimate_tokens(
+    *texts: str,
+    file_bytes: int | None = None,
+    images: int = 0,
+    max_output_tokens: int = DEFAULT_OUTPUT_TOKENS,
+) -> int:
+    """
+    Estimate how many tokens a request will count against the TPM budget.
+
+    OpenAI counts the input plus the requested maximum output when admitting a
+    request, so this errs on the high side.
+
+    Args:
+        *texts: Prompt texts and JSON schemas sent with the request.
+        file_bytes: Size of an attached PDF; 0 means a file of unknown size.
+        images: Number of attached images.
+        max_output_tokens: Output tokens the request may produce.
+
+    Returns:
+        The estimated token count.
+    """
+
+    tokens = sum(len(text) for text in texts) // CHARS_PER_TOKEN
+    if file_bytes is not None:
+        tokens += (
+            file_bytes // PDF_BYTES_PER_TOKEN if file_bytes else DEFAULT_FILE_TOKENS
+        )
+    return tokens + images * IMAGE_TOKENS + max_output_tokens
+
+
+class TokenBucket:
+    """
+    A token bucket that refills continuously up to its capacity.
+
+    `reserve` debits immediately and may drive the balance negative; the
+    caller then waits until the refill covers the debt. Reservations are
+    therefore served in order without callers polling the bucket.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Debit `amount` and return the seconds until it is covered."""
+
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.refill_per_second
+
+    def credit(self, amount: float, now: float) -> None:
+        """Return (or, if negative, further debit) tokens after the fact."""
+
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _ModelState:
+    def __init__(
+        self,
+        limits: ModelLimits | None,
+        concurrency: AdaptiveConcurrencyLimiter | None,
+    ):
+        self.limits = limits
+        self.concurrency = concurrency
+        # Without limits the model has no budget, only retries and the pause
+        self.requests = self.tokens = None
+        if limits is not None:
+            self.requests = TokenBucket(
+                limits.requests_per_minute, limits.requests_per_minute / 60
+            )
+            self.tokens = TokenBucket(
+                limits.tokens_per_minute, limits.tokens_per_minute / 60
+            )
+        self.paused_until = 0.0
+        self.stats = {
+            "requests": 0,
+            "tokens": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "wait_seconds": 0.0,
+        }
+
+
+class RequestScheduler:
+    """
+    Admits OpenAI calls within per-model RPM/TPM budgets and retries failures.
+
+    Every call names its model and an estimated token count. For a model
+    with limits, the scheduler waits until both the request and the token
+    bucket of that model can cover it, runs the call, then corrects the token
+    bucket with the usage the API reported; the tokens of a failed attempt
+    are returned, since the API does not count them. Models have no limits
+    unless they are set, as the organization's tier is not known. Rate-limit, timeout, connection and 5xx errors are retried with
+    jittered exponential backoff; a Retry-After header sets the minimum delay
+    and pauses the whole model, so concurrent callers back off together.
+
+    On top of the budgets, each model has an `AdaptiveConcurrencyLimiter` that
+    bounds its in-flight calls and adapts the bound to observed latency and
+    overload errors, so callers can run with generous worker counts.
+
+    Clients created by this package use `max_retries=0` so the SDK does not
+    retry underneath the scheduler.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, ModelLimits] | None = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        adaptive_concurrency: bool = True,
+        initial_concurrency: int = 8,
+        max_concurrency: int = 64,
+    ):
+        """
+        Args:
+            limits: Limits per model; models without limits are not budgeted.
+            max_retries: Retries per call before the error is raised.
+            base_delay: Backoff before the first retry, doubled per attempt.
+            max_delay: Upper bound for a single backoff.
+            adaptive_concurrency: Bound in-flight calls per model with AIMD.
+            initial_concurrency: Starting in-flight bound per model.
+            max_concurrency: Upper in-flight bound per model.
+        """
+
+        self.limits = dict(limits or {})
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.adaptive_concurrency = adaptive_concurrency
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self._models: dict[str, _ModelState] = {}
+        self._lock = threading.Lock()
+
+    def set_limits(self, model: str, limits: ModelLimits) -> None:
+        with self._lock:
+            self.limits[model] = limits
+            self._models.pop(model, None)
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            concurrency = None
+            if self.adaptive_concurrency:
+                concurrency = AdaptiveConcurrencyLimiter(
+                    model,
+                    initial=self.initial_concurrency,
+                    maximum=self.max_concurrency,
+                )
+            state = _ModelState(self.limits.get(model), concurrency)
+            self._models[model] = state
+        return state
+
+    def _reserve(self, model: str | None, tokens: int) -> float:
+        if model is None:
+            return 0.0
+        with self._lock:
+            state = self._state(model)
+            now = time.monotonic()
+            wait = state.paused_until - now
+            if state.limits is not None:
+                wait = max(
+                    wait,
+                    state.requests.reserve(1, now),
+                    state.tokens.reserve(tokens, now),
+                )
+            wait = max(wait, 0.0)
+            state.stats["wait_seconds"] += wait
+            return wait
+
+    def _refund(self, model: str | None, tokens: int) -> None:
+        """Return the tokens reserved for an attempt that failed."""
+
+        if model is None:
+            return
+        with self._lock:
+            state = self._state(model)
+            if state.tokens is not None:
+                state.tokens.credit(tokens, time.monotonic())
+
+    def _settle(self, model: str | None, estimated: int, response: Any) -> None:
+        if model is None:
+            return
+        usage = getattr(response, "usage", None)
+        actual = getattr(usage, "total_tokens", None)
+        record_usage(model, usage)
+        with self._lock:
+            state = self._state(model)
+            state.stats["requests"] += 1
+            if isinstance(actual, int):
+                state.stats["tokens"] += actual
+                if state.tokens is not None:
+                    state.tokens.credit(estimated - actual, time.monotonic())
+            else:
+                state.stats["tokens"] += estimated
+
+    def _limiter(self, model: str | None) -> AdaptiveConcurrencyLimiter | None:
+        if model is None:
+            return None
+        with self._lock:
+            return self._state(model).concurrency
+
+    def _retry_delay(self, model: str | None, error: Exception, attempt: int):
+        """Return the backoff for a retryable error, or None to give up."""
+
+        status = getattr(error, "status_code", None)
+        if attempt >= self.max_retries or not (
+            _is_connection_error(error) or status in RETRYABLE_STATUS_CODES
+        ):
+            return None
+
+        backoff = min(self.max_delay, self.base_delay * 2**attempt)
+        delay = random.uniform(backoff / 2, backoff)
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+
+        if model is not None:
+            with self._lock:
+                state = self._state(model)
+                state.stats["retries"] += 1
+                if status == 429:
+                    state.stats["rate_limited"] += 1
+                    state.paused_until = max(
+                        state.paused_until, time.monotonic() + delay
+                    )
+        logger.warning(
+            f"{model or 'OpenAI'} request failed ({type(error).__name__}"
+            f"{f' {status}' if status else ''}), retrying in {delay:.1f}s "
+            f"(attempt {attempt + 1}/{self.max_retries})"
+        )
+        return delay
+
+    def call(
+        self,
+        model: str | None,
+        estimated_tokens: int,
+        fn: Callable[..., Any],
+        /,
+        *args,
+        **kwargs,
+    ) -> Any:
+        """
+        Run `fn(*args, **kwargs)` once the model's budget allows it.
+
+        Args:
+            model: Model the request is billed to; None skips the budget (e.g.
+                file uploads) but still retries.
+            estimated_tokens: See `estimate_tokens`.
+            fn: The client method to call.
+
+        Returns:
+            Whatever `fn` returns.
+        """
+
+        limiter = self._limiter(model)
+        attempt = 0
+        while True:
+            wait = self._reserve(model, estimated_tokens)
+            if wait > 0:
+                time.sleep(wait)
+            started = limiter.acquire() if limiter else 0.0
+            try:
+                response = fn(*args, **kwargs)
+            except BaseException as e:
+                if limiter:
+                    limiter.release(started, _outcome(e))
+                # The API does not count a failed attempt against the budget
+                self._refund(model, estimated_tokens)
+                if not isinstance(e, Exception):
+                    raise
+                delay = self._retry_delay(model, e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            if limiter:
+                limiter.release(started, SUCCESS)
+            self._settle(model, estimated_tokens, response)
+            return response
+
+    async def call_async(
+        self,
+        model: str | None,
+        estimated_tokens: int,
+        fn: Callable[..., Any],
+        /,
+        *args,
+        **kwargs,
+    ) -> Any:
+        """Async variant of `call` for `AsyncOpenAI` methods."""
+
+        limiter = self._limiter(model)
+        attempt = 0
+        while True:
+            wait = self._reserve(model, estimated_tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            started = await limiter.acquire_async() if limiter else 0.0
+            try:
+                response = await fn(*args, **kwargs)
+            except BaseException as e:
+                if limiter:
+                    limiter.release(started, _outcome(e))
+                # The API does not count a failed attempt against the budget
+                self._refund(model, estimated_tokens)
+                if not isinstance(e, Exception):
+                    raise
+                delay = self._retry_delay(model, e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            if limiter:
+                limiter.release(started, SUCCESS)
+            self._settle(model, estimated_tokens, response)
+            return response
+
+    def stats(self) -> dict[str, dict]:
+        """
+        Return per-model counters: requests, tokens, retries, waits and, with
+        adaptive concurrency, the current (in-flight) and target concurrency.
+        """
+
+        with self._lock:
+            states = dict(self._models)
+        stats = {}
+        for model, state in states.items():
+            stats[model] = dict(state.stats)
+            if state.concurrency is not None:
+                stats[model].update(state.concurrency.metrics())
+        return stats
+
+
+def _is_connection_error(error: BaseException) -> bool:
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _outcome(error: BaseException) -> str:
+    if _is_connection_error(error) or (
+        getattr(error, "status_code", None) in OVERLOAD_STATUS_CODES
+    ):
+        return OVERLOAD
+    return FAILURE
+
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def parse_rate_limit(text: str) -> tuple[str, ModelLimits]:
+    """
+    Parse a "MODEL=RPM:TPM" command line override, e.g. "gpt-4o=5000:800000".
+
+    Raises:
+        ValueError: If the text is not in that form.
+    """
+
+    model, sep, limits = text.partition("=")
+    rpm, sep2, tpm = limits.partition(":")
+    if not (sep and sep2 and model.strip()):
+        raise ValueError(f"Expected MODEL=RPM:TPM, got '{text}'")
+    return model.strip(), ModelLimits(int(rpm), int(tpm))
+
+
+# Shared by every client in the process, so the budgets are global
+SCHEDULER = RequestScheduler()
+
+CONCURRENCY = Gauge(
+    "utility_bills_openai_concurrency",
+    "In-flight OpenAI requests and the adaptive concurrency target per model.",
+    ("model", "kind"),
+    lambda: {
+        (model, kind): stats.get(f"concurrency_{kind}")
+        for model, stats in SCHEDULER.stats().items()
+        for kind in ("current", "target")
+    },
+)
@@ -0,0 +1,422 @@
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from logging_setup import setup_logging
+from mapper_functions.rule_mapper import to_iso_date
+
+# Key columns returned by `find`, in order
+KEY_COLUMNS = (
+    "bill_id",
+    "source_name",
+    "provider_name",
+    "account_number",
+    "bill_date",
+    "total_amount_due",
+    "validation_passed",
+    "has_standard",
+    "updated_at",
+)
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def key_columns(provider_json: dict) -> dict[str, Any]:
+    """
+    Pull the indexed columns out of a provider JSON.
+
+    Every provider model has account_level_data.account_number,
+    statement_level_data.bill_date and statement_level_data.total_amount_due.
+    Bill dates that are not a single recognizable date are stored as NULL.
+
+    Returns:
+        account_number, bill_date (ISO) and total_amount_due.
+    """
+
+    account = provider_json.get("account_level_data") or {}
+    statement = provider_json.get("statement_level_data") or {}
+
+    bill_date = to_iso_date(statement.get("bill_date"))
+    total_amount_due = statement.get("total_amount_due")
+    if isinstance(total_amount_due, bool) or not isinstance(
+        total_amount_due, (int, float)
+    ):
+        total_amount_due = None
+
+    account_number = account.get("account_number")
+    return {
+        "account_number": str(account_number) if account_number else None,
+        "bill_date": bill_date if _ISO_DATE.fullmatch(bill_date) else None,
+        "total_amount_due": total_amount_due,
+    }
+
+
+class ResultsStore:
+    """
+    A queryable store of extraction results, next to the per-bill JSON files.
+
+    One row per bill (keyed by the bill file's stem, like the JSON files)
+    holds the provider JSON as saved to processed/ or unprocessed/, the
+    standard JSON once the bill is transformed, and key columns pulled from
+    the provider JSON: provider_name, account_number, bill_date (ISO),
+    total_amount_due and validation_passed. Indexes on those columns make
+    lookups such as "all bills for account X in 2025" a single index range
+    scan instead of a directory scan.
+
+    The database runs in WAL mode, so readers do not block the extractor, and
+    is safe to share between the worker threads of one process.
+    """
+
+    def __init__(self, db_path: str | Path):
+        """
+        Open (or create) the results database.
+
+        Args:
+            db_path: Path to the SQLite file.
+        """
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS bills (
+                bill_id TEXT PRIMARY KEY,
+                source_name TEXT,
+                file_sha256 TEXT,
+                provider_name TEXT NOT NULL,
+                account_number TEXT,
+                bill_date TEXT,
+                total_amount_due REAL,
+                validation_passed INTEGER NOT NULL,
+                extracted TEXT NOT NULL,
+                standard TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """)
+        # (provider, account, date) serves provider+account lookups with a date
+        # range; the others serve account-only and date-only queries
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bills_provider_account_date "
+            "ON bills (provider_name, account_number, bill_date)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bills_account_date "
+            "ON bills (account_number, bill_date)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bills_date ON bills (bill_date)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bills_failed "
+            "ON bills (provider_name) WHERE validation_passed = 0"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def for_project(cls, project_root: str | Path) -> "ResultsStore":
+        """Open the default store at <project_root>/src/data/results."""
+
+        results_dir = Path(project_root) / "src" / "data" / "results"
+        return cls(results_dir / "results.sqlite3")
+
+    def put_bill(
+        self,
+        bill_id: str,
+        provider_name: str,
+        provider_json: dict,
+        validation_passed: bool,
+        source_name: str | None = None,
+        file_sha256: str | None = None,
+    ) -> None:
+        """
+        Store (or replace) a post-processed bill and its verdict.
+
+        A replaced bill keeps its standard JSON only if it still passes.
+
+        Args:
+            bill_id: The bill file's stem, e.g. "b00" for inbox/b00.pdf.
+            provider_name: The normalized provider name.
+            provider_json: The post-processed extraction, without provider_name.
+            validation_passed: The checker's verdict.
+            source_name: The bill's file name.
+            file_sha256: SHA-256 of the bill bytes, if known.
+        """
+
+        columns = key_columns(provider_json)
+        extracted_text = json.dumps(provider_json, ensure_ascii=False)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO bills (
+                    bill_id, source_name, file_sha256, provider_name,
+                    account_number, bill_date, total_amount_due,
+                    validation_passed, extracted, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (bill_id) DO UPDATE SET
+                    source_name = COALESCE(excluded.source_name, source_name),
+                    file_sha256 = COALESCE(excluded.file_sha256, file_sha256),
+                    provider_name = excluded.provider_name,
+                    account_number = excluded.account_number,
+                    bill_date = excluded.bill_date,
+                    total_amount_due = excluded.total_amount_due,
+                    validation_passed = excluded.validation_passed,
+                    extracted = excluded.extracted,
+                    standard = CASE WHEN excluded.validation_passed
+                        THEN standard END,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    bill_id,
+                    source_name,
+                    file_sha256,
+                    provider_name,
+                    columns["account_number"],
+                    columns["bill_date"],
+                    columns["total_amount_due"],
+                    int(validation_passed),
+                    extracted_text,
+                    now,
+                    now,
+                ),
+            )
+            self._conn.commit()
+
+    def set_standard(self, bill_id: str, standard: dict) -> None:
+        """Attach the standard JSON to a stored bill."""
+
+        standard_text = json.dumps(standard, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE bills SET standard = ?, updated_at = ? WHERE bill_id = ?",
+                (standard_text, time.time(), bill_id),
+            )
+            self._conn.commit()
+
+    def get(self, bill_id: str) -> dict[str, Any] | None:
+        """
+        Look up one bill.
+
+        Returns:
+            The key columns plus "extracted" and "standard" (None if the
+            bill was never transformed) as dictionaries, or None if the bill
+            is not stored.
+        """
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM bills WHERE bill_id = ?", (bill_id,)
+            )
+            row = cursor.fetchone()
+            columns = [c[0] for c in cursor.description]
+        if row is None:
+            return None
+
+        entry = dict(zip(columns, row))
+        entry["validation_passed"] = bool(entry["validation_passed"])
+        entry["extracted"] = json.loads(entry["extracted"])
+        if entry["standard"] is not None:
+            entry["standard"] = json.loads(entry["standard"])
+        return entry
+
+    def find(
+        self,
+        provider_name: str | None = None,
+        account_number: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        validation_passed: bool | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Find bills by their key columns, without loading the JSON payloads.
+
+        Args:
+            provider_name: Provider (normalized to lowercase).
+            account_number: Exact account number.
+            date_from: Earliest bill date, inclusive (YYYY-MM-DD).
+            date_to: Latest bill date, inclusive (YYYY-MM-DD).
+            validation_passed: Only passing (True) or failing (False) bills.
+            limit: Maximum number of rows.
+
+        Returns:
+            One dictionary of KEY_COLUMNS per bill, ordered by bill date.
+        """
+
+        clauses, params = [], []
+        if provider_name is not None:
+            clauses.append("provider_name = ?")
+            params.append(provider_name.strip().lower())
+        if account_number is not None:
+            clauses.append("account_number = ?")
+            params.append(account_number)
+        if date_from is not None:
+            clauses.append("bill_date >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            clauses.append("bill_date <= ?")
+            params.append(date_to)
+        if validation_passed is not None:
+            clauses.append("validation_passed = ?")
+            params.append(int(validation_passed))
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = (
+            f"SELECT bill_id, source_name, provider_name, account_number, bill_date, "
+            f"total_amount_due, validation_passed, standard IS NOT NULL, updated_at "
+            f"FROM bills{where} ORDER BY bill_date, bill_id"
+        )
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        results = []
+        for row in rows:
+            entry = dict(zip(KEY_COLUMNS, row))
+            entry["validation_passed"] = bool(entry["validation_passed"])
+            entry["has_standard"] = bool(entry["has_standard"])
+            results.append(entry)
+        return results
+
+    def import_files(self, data_dir: str | Path) -> int:
+        """
+        Load bills saved before the store was enabled.
+
+        Reads processed/json and unprocessed/json (the folder gives the
+        verdict) and the matching standard JSON in json_results.
+
+        Args:
+            data_dir: The <project_root>/src/data directory.
+
+        Returns:
+            The number of bills stored.
+        """
+
+        data_dir = Path(data_dir)
+        imported = 0
+        for folder in ("processed", "unprocessed"):
+            for json_path in sorted((data_dir / folder / "json").glob("*.json")):
+                provider_json = json.loads(json_path.read_text(encoding="utf-8"))
+                provider_name = provider_json.pop("provider_name", None)
+                if not provider_name:
+                    continue
+                passed = folder == "processed"
+                self.put_bill(json_path.stem, provider_name, provider_json, passed)
+
+                standard_path = data_dir / "json_results" / json_path.name
+                if passed and standard_path.exists():
+                    self.set_standard(
+                        json_path.stem,
+                        json.loads(standard_path.read_text(encoding="utf-8")),
+                    )
+                imported += 1
+        return imported
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Summarize the store.
+
+        Returns:
+            Bill counts: total, failing, without standard JSON, and per provider.
+        """
+
+        with self._lock:
+            total, failed, without_standard = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(validation_passed = 0), 0), "
+                "COALESCE(SUM(validation_passed = 1 AND standard IS NULL), 0) "
+                "FROM bills"
+            ).fetchone()
+            by_provider = dict(
+                self._conn.execute(
+                    "SELECT provider_name, COUNT(*) FROM bills "
+                    "GROUP BY provider_name ORDER BY COUNT(*) DESC"
+                ).fetchall()
+            )
+
+        return {
+            "db_path": str(self.db_path),
+            "bills": total,
+            "failed_validation": failed,
+            "passed_without_standard": without_standard,
+            "by_provider": by_provider,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query or fill the extraction results store."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Show how many bills are stored.")
+
+    find_parser = subparsers.add_parser("find", help="List bills by key columns.")
+    find_parser.add_argument("--provider", default=None)
+    find_parser.add_argument("--account", default=None)
+    find_parser.add_argument("--from", dest="date_from", default=None)
+    find_parser.add_argument("--to", dest="date_to", default=None)
+    verdict = find_parser.add_mutually_exclusive_group()
+    verdict.add_argument("--passed", action="store_true")
+    verdict.add_argument("--failed", action="store_true")
+    find_parser.add_argument("--limit", type=int, default=None)
+
+    get_parser = subparsers.add_parser("get", help="Print one bill's JSON.")
+    get_parser.add_argument("bill_id")
+
+    subparsers.add_parser(
+        "import",
+        help="Load the bills in processed/, unprocessed/ and json_results.",
+    )
+
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[2]
+    logger = setup_logging(project_root / "logs")
+    store = ResultsStore.for_project(project_root)
+
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == "find":
+        started = time.perf_counter()
+        rows = store.find(
+            provider_name=args.provider,
+            account_number=args.account,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            validation_passed=True if args.passed else False if args.failed else None,
+            limit=args.limit,
+        )
+        print(json.dumps(rows, indent=2))
+        logger.info(
+            f"Found {len(rows)} bill(s) in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+    elif args.command == "get":
+        entry = store.get(args.bill_id)
+        print(json.dumps(entry, indent=2, ensure_ascii=False))
+    elif args.command == "import":
+        imported = store.import_files(project_root / "src" / "data")
+        logger.info(f"Imported {imported} bill(s) into the results store")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from logging_setup import setup_logging
+
+# Stages a bill can have completed, in pipeline order
+UPLOADED = "uploaded"
+DETECTED = "detected"
+EXTRACTED = "extracted"
+SAVED = "saved"
+TRANSFORMED = "transformed"
+STAGES = (UPLOADED, DETECTED, EXTRACTED, SAVED, TRANSFORMED)
+
+_COLUMNS = (
+    "pdf_name",
+    "file_id",
+    "provider_name",
+    "raw_path",
+    "json_path",
+    "moved_pdf_path",
+    "validation_passed",
+    "standard_json_path",
+    "error",
+)
+
+
+class RunJournal:
+    """
+    A durable record of how far each bill got through the extraction stages.
+
+    Rows are keyed by the SHA-256 of the bill bytes and updated as each stage
+    completes: the OpenAI file ID after upload, the provider after detection,
+    the path of the raw extraction (written next to the database) after
+    extraction, the saved JSON and moved PDF after saving, and the standard
+    JSON after the transform. A run that dies halfway can then be resumed
+    from each bill's last completed stage instead of from upload.
+
+    A raw extraction is only needed until the bill is saved, so it is deleted
+    when the save is recorded. Raw files left behind by bills that never got
+    that far are removed with `prune`.
+
+    The database runs in WAL mode and commits after every update, so a crash
+    loses at most the stage that was in progress. It is safe to share between
+    the worker threads of one process.
+    """
+
+    def __init__(self, db_path: str | Path, raw_dir: str | Path | None = None):
+        """
+        Open (or create) the journal database.
+
+        Args:
+            db_path: Path to the SQLite file.
+            raw_dir: Directory for raw extractions. Defaults to a "raw"
+                     directory next to the database.
+        """
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.raw_dir = Path(raw_dir) if raw_dir else self.db_path.parent / "raw"
+        self.raw_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL still survives a process crash; only power loss
+        # can drop the last commits
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS bills (
+                file_sha256 TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                pdf_name TEXT,
+                file_id TEXT,
+                provider_name TEXT,
+                raw_path TEXT,
+                json_path TEXT,
+                moved_pdf_path TEXT,
+                validation_passed INTEGER,
+                standard_json_path TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bills_stage ON bills (stage)"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def for_project(cls, project_root: str | Path) -> "RunJournal":
+        """Open the default journal at <project_root>/src/data/journal."""
+
+        journal_dir = Path(project_root) / "src" / "data" / "journal"
+        return cls(journal_dir / "run_journal.sqlite3")
+
+    def get(self, file_sha256: str) -> dict[str, Any] | None:
+        """
+        Look up a bill.
+
+        Returns:
+            The bill's row as a dictionary ("stage" is the last completed
+            stage), or None if the bill was never journaled.
+        """
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM bills WHERE file_sha256 = ?", (file_sha256,)
+            )
+            row = cursor.fetchone()
+            columns = [c[0] for c in cursor.description]
+
+        return self._to_dict(columns, row) if row else None
+
+    def record(self, file_sha256: str, stage: str, **fields) -> None:
+        """
+        Mark a stage as completed for a bill, merging in the stage's outputs.
+
+        Fields that are not passed keep their previous values, and the last
+        error is cleared. Recording the save or the transform deletes the
+        bill's raw extraction, which the saved JSON supersedes.
+
+        Args:
+            file_sha256: SHA-256 of the bill bytes.
+            stage: One of STAGES.
+            **fields: Any of pdf_name, file_id, provider_name, raw_path,
+                      json_path, moved_pdf_path, validation_passed and
+                      standard_json_path.
+
+        Raises:
+            ValueError: If the stage or a field name is unknown.
+        """
+
+        if stage not in STAGES:
+            raise ValueError(f"Unknown journal stage: {stage}")
+        unknown = set(fields) - set(_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown journal field(s): {sorted(unknown)}")
+
+        fields = {k: str(v) if isinstance(v, Path) else v for k, v in fields.items()}
+        fields["error"] = None
+        if stage in (SAVED, TRANSFORMED):
+            fields["raw_path"] = None
+        names = ["stage", *fields, "updated_at"]
+        values = [stage, *fields.values(), time.time()]
+        updates = ", ".join(f"{name} = excluded.{name}" for name in names)
+
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO bills (file_sha256, {', '.join(names)}) "
+                f"VALUES (?, {', '.join('?' for _ in names)}) "
+                f"ON CONFLICT (file_sha256) DO UPDATE SET {updates}",
+                (file_sha256, *values),
+            )
+            self._conn.commit()
+
+        if stage in (SAVED, TRANSFORMED):
+            self._raw_path(file_sha256).unlink(missing_ok=True)
+
+    def record_error(self, file_sha256: str, error: str) -> None:
+        """Store the last error for a bill without changing its stage."""
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE bills SET error = ?, updated_at = ? WHERE file_sha256 = ?",
+                (error, time.time(), file_sha256),
+            )
+            self._conn.commit()
+
+    def save_raw(self, file_sha256: str, extracted: dict) -> Path:
+        """
+        Write a raw extraction to the journal's raw directory.
+
+        The file is written to a temporary name and renamed, so a crash never
+        leaves a truncated extraction behind.
+
+        Returns:
+            The path of the raw extraction.
+        """
+
+        raw_path = self._raw_path(file_sha256)
+        tmp_path = raw_path.with_suffix(".json.tmp")
+        tmp_path.write_text(
+            json.dumps(extracted, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        os.replace(tmp_path, raw_path)
+        return raw_path
+
+    def load_raw(self, entry: dict[str, Any]) -> dict | None:
+        """
+        Read back the raw extraction of a journaled bill.
+
+        Returns:
+            The extraction, or None if the bill was not extracted yet or the
+            file is gone.
+        """
+
+        raw_path = entry.get("raw_path")
+        if not raw_path or not Path(raw_path).exists():
+            return None
+        return json.loads(Path(raw_path).read_text(encoding="utf-8"))
+
+    def pending_transforms(self) -> list[dict[str, Any]]:
+        """
+        Return bills that were saved and validated but never transformed.
+
+        Their PDFs have already left the inbox, so a resumed run picks them up
+        from here.
+        """
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM bills WHERE stage = ? AND validation_passed = 1 "
+                "ORDER BY pdf_name",
+                (SAVED,),
+            )
+            rows = cursor.fetchall()
+            columns = [c[0] for c in cursor.description]
+
+        return [self._to_dict(columns, row) for row in rows]
+
+    def prune(self, older_than_days: float | None = None) -> int:
+        """
+        Delete raw extractions that a resumed run can no longer use.
+
+        Always removes leftover temporary files and raw files of bills that
+        are not waiting at the extracted stage. With `older_than_days`, raw
+        files of extracted bills not updated for that long are removed too;
+        those bills are extracted again if they come back.
+
+        Args:
+            older_than_days: Also drop raw files of bills stuck after
+                             extraction for at least this many days.
+
+        Returns:
+            The number of files removed.
+        """
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file_sha256, updated_at FROM bills "
+                "WHERE stage = ? AND raw_path IS NOT NULL",
+                (EXTRACTED,),
+            ).fetchall()
+            keep = {file_sha256 for file_sha256, _ in rows}
+            if older_than_days is not None:
+                cutoff = time.time() - older_than_days * 86400
+                stale = [(sha,) for sha, updated_at in rows if updated_at < cutoff]
+                self._conn.executemany(
+                    "UPDATE bills SET raw_path = NULL WHERE file_sha256 = ?", stale
+                )
+                self._conn.commit()
+                keep -= {sha for (sha,) in stale}
+
+        removed = 0
+        for path in self.raw_dir.glob("*.json*"):
+            if path.name.endswith(".json") and path.stem in keep:
+                continue
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Summarize the journal.
+
+        Returns:
+            The number of bills per last completed stage, the number whose
+            last attempt failed, and the count and size of the raw files.
+        """
+
+        with self._lock:
+            by_stage = dict(
+                self._conn.execute(
+                    "SELECT stage, COUNT(*) FROM bills GROUP BY stage"
+                ).fetchall()
+            )
+            failed = self._conn.execute(
+                "SELECT COUNT(*) FROM bills WHERE error IS NOT NULL"
+            ).fetchone()[0]
+
+        raw_files = list(self.raw_dir.glob("*.json*"))
+        return {
+            "db_path": str(self.db_path),
+            "bills": sum(by_stage.values()),
+            "by_stage": {stage: by_stage.get(stage, 0) for stage in STAGES},
+            "failed": failed,
+            "raw_files": len(raw_files),
+            "raw_size_mb": round(
+                sum(p.stat().st_size for p in raw_files) / (1024 * 1024), 2
+            ),
+        }
+
+    def clear(self) -> int:
+        """
+        Forget every bill and delete the raw extractions.
+
+        Returns:
+            The number of bills removed.
+        """
+
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM bills").rowcount
+            self._conn.commit()
+        for raw_path in self.raw_dir.glob("*.json*"):
+            raw_path.unlink(missing_ok=True)
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _raw_path(self, file_sha256: str) -> Path:
+        return self.raw_dir / f"{file_sha256}.json"
+
+    @staticmethod
+    def _to_dict(columns: list[str], row: tuple) -> dict[str, Any]:
+        entry = dict(zip(columns, row))
+        if entry["validation_passed"] is not None:
+            entry["validation_passed"] = bool(entry["validation_passed"])
+        return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the run journal.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Show how many bills reached each stage.")
+    subparsers.add_parser("clear", help="Forget every bill and its raw extraction.")
+
+    prune_parser = subparsers.add_parser(
+        "prune", help="Delete raw extractions a resumed run can no longer use."
+    )
+    prune_parser.add_argument(
+        "--older-than-days",
+        type=float,
+        default=None,
+        help="Also delete raw files of bills stuck after extraction this long.",
+    )
+
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[2]
+    logger = setup_logging(project_root / "logs")
+    journal = RunJournal.for_project(project_root)
+
+    if args.command == "stats":
+        print(json.dumps(journal.stats(), indent=2))
+    elif args.command == "clear":
+        removed = journal.clear()
+        logger.info(f"Cleared {removed} bill(s) from the run journal")
+    elif args.command == "prune":
+        removed = journal.prune(args.older_than_days)
+        logger.info(f"Pruned {removed} raw extraction file(s)")
+
+    journal.close()
+
+
+if __name__ == "__main__":
+    main()
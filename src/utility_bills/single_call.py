@@ -0,0 +1,163 @@
+from functools import lru_cache
+from typing import Annotated, Any, Literal, Union
+
+from extraction_schema import extraction_model, to_full_bill
+from openai.lib._pydantic import to_strict_json_schema
+from provider_router import PROVIDER_SPECS, build_detection_prompt
+from pydantic import BaseModel, Field, create_model
+
+# Providers whose schemas go into one single-call request. Every extraction
+# model adds about 2k tokens of schema: with two candidates a request is about
+# 6k tokens plus the PDF once, against about 6.5k plus the PDF twice for the
+# two-step detect+extract pair. A union of every provider is about 60k.
+MAX_CANDIDATES = 2
+
+# provider_name answered when the bill is none of the candidates
+OTHER_PROVIDER = "other"
+
+SINGLE_CALL_INSTRUCTIONS = """You are an information extraction system.
+
+Goal: Identify the utility provider that issued the attached bill AND extract its
+data in the same response.
+
+Step 1 - provider_name:
+{detection_prompt}
+If the bill was issued by none of these providers, answer "{other}" and stop;
+do not fill in "bill".
+
+Step 2 - bill:
+Fill in "bill" using the schema that belongs to the provider you chose in step 1.
+
+Global rules:
+- Use ONLY information present in the document.
+- If a field is not present, return null.
+- Do not guess missing values.
+- Dates: return exactly as written on the bill (do not reformat).
+- Monetary values: return numbers only (no $). If followed by "CR", treat as negative (prefix a minus sign). Remove commas.
+- Phone numbers/emails/websites: return exactly as written (no normalization).
+- Extract data for the current billing period only.
+"""
+
+
+def single_call_candidates(scores: dict[str, float]) -> tuple[str, ...]:
+    """
+    Pick the providers a single-call request chooses between.
+
+    Args:
+        scores: Local detection scores by provider (`LocalDetection.scores`).
+
+    Returns:
+        Up to MAX_CANDIDATES of the best-scoring providers, sorted by name so
+        the same set always maps to the same cached schema. Empty when local
+        detection found nothing, in which case the two-step path is cheaper.
+    """
+
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return tuple(sorted(ranked[:MAX_CANDIDATES]))
+
+
+@lru_cache(maxsize=128)
+def get_detect_and_extract_model(candidates: tuple[str, ...]) -> type[BaseModel]:
+    """
+    Build the discriminated union of the candidate providers' extraction models.
+
+    Each member wraps one model from `PROVIDER_SPECS` as
+    {"provider_name": <literal provider>, "bill": <provider model>}, so the
+    provider name selects which schema the bill must follow. The bills use
+    the extraction models, without the computed fields. A last member,
+    {"provider_name": "other"}, lets the model say the bill is none of them.
+
+    Args:
+        candidates: Provider names, see `single_call_candidates`.
+
+    Returns:
+        A model validating {"result": <member>} payloads.
+    """
+
+    members = [
+        create_model(
+            f"{PROVIDER_SPECS[provider_name].model_class.__name__}Result",
+            provider_name=(Literal[provider_name], ...),
+            bill=(extraction_model(PROVIDER_SPECS[provider_name].model_class), ...),
+        )
+        for provider_name in candidates
+    ]
+    members.append(
+        create_model(
+            "OtherProviderResult", provider_name=(Literal[OTHER_PROVIDER], ...)
+        )
+    )
+    result_type = Annotated[Union[tuple(members)], Field(discriminator="provider_name")]
+    return create_model("DetectAndExtract", result=(result_type, ...))
+
+
+def _anyof_for_strict_mode(node: Any) -> Any:
+    # Structured outputs accept anyOf but not oneOf/discriminator; the literal
+    # provider_name on each member still makes the union unambiguous.
+    if isinstance(node, dict):
+        node = {k: v for k, v in node.items() if k != "discriminator"}
+        if "oneOf" in node:
+            node["anyOf"] = node.pop("oneOf")
+        return {k: _anyof_for_strict_mode(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_anyof_for_strict_mode(v) for v in node]
+    return node
+
+
+@lru_cache(maxsize=128)
+def get_detect_and_extract_text_format(candidates: tuple[str, ...]) -> dict:
+    """
+    Return the Responses API `text.format` for a single-call union schema.
+
+    Built once per candidate set.
+    """
+
+    schema = _anyof_for_strict_mode(
+        to_strict_json_schema(get_detect_and_extract_model(candidates))
+    )
+    return {
+        "type": "json_schema",
+        "name": "detect_and_extract",
+        "schema": schema,
+        "strict": True,
+    }
+
+
+def build_detect_and_extract_prompt(candidates: tuple[str, ...]) -> str:
+    """
+    Build the instruction text for the single detect+extract call.
+    """
+
+    return SINGLE_CALL_INSTRUCTIONS.format(
+        detection_prompt=build_detection_prompt(candidates + (OTHER_PROVIDER,)),
+        other=OTHER_PROVIDER,
+    )
+
+
+def parse_detect_and_extract(
+    output_text: str, candidates: tuple[str, ...]
+) -> tuple[str | None, dict | None]:
+    """
+    Validate the single-call response and split it into provider and bill.
+
+    Args:
+        output_text: The JSON text returned by the model.
+        candidates: The candidates the request was built for.
+
+    Returns:
+        (provider_name, extracted) where extracted is the provider model dumped
+        to a plain dictionary, exactly as `extract_json_from_pdf` returns it.
+        (None, None) if the model answered that the bill is none of the
+        candidates; the caller then detects and extracts in two steps.
+
+    Raises:
+        ValidationError: If the payload doesn't match any provider's schema.
+    """
+
+    result = (
+        get_detect_and_extract_model(candidates).model_validate_json(output_text).result
+    )
+    if result.provider_name == OTHER_PROVIDER:
+        return None, None
+    model_class = PROVIDER_SPECS[result.provider_name].model_class
+    return result.provider_name, to_full_bill(model_class, result.bill)
@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "utility_bills"))
+
+from request_scheduler import ModelLimits, RequestScheduler  # noqa: E402
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def _flaky(failures: int, total_tokens: int):
+    attempts = []
+
+    def call():
+        attempts.append(None)
+        if len(attempts) <= failures:
+            raise RateLimitError("rate limited")
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=total_tokens))
+
+    return call, attempts
+
+
+def test_failed_attempts_return_their_tokens():
+    scheduler = RequestScheduler(
+        limits={"m": ModelLimits(1000, 60_000)},
+        base_delay=0.0,
+        adaptive_concurrency=False,
+    )
+    call, attempts = _flaky(failures=3, total_tokens=20_000)
+
+    scheduler.call("m", 20_000, call)
+
+    assert len(attempts) == 4
+    assert scheduler._state("m").tokens.tokens >= 40_000 - 1
+    assert scheduler._reserve("m", 20_000) == 0.0
+
+
+def test_models_without_limits_are_not_budgeted():
+    scheduler = RequestScheduler(adaptive_concurrency=False)
+    call, _ = _flaky(failures=0, total_tokens=10**9)
+
+    scheduler.call("m", 10**9, call)
+
+    assert scheduler._reserve("m", 10**9) == 0.0